@@ -11,24 +11,22 @@ def update_job_order_on_cnc_task_change(sender, instance, **kwargs):
 
 def _update_related_job_orders(cnc_task):
     """Update all job orders related to this CncTask via its parts."""
-    from projects.models import JobOrder
+    from projects.models import JobOrderDepartmentTask
+    from projects.services.completion import recompute_job_completion
 
     # Collect unique job numbers from CncParts
-    job_nos = set(cnc_task.parts.values_list('job_no', flat=True))
-
-    for job_no in job_nos:
-        if not job_no:
+    job_nos = {j for j in cnc_task.parts.values_list('job_no', flat=True) if j}
+    if not job_nos:
+        return
+
+    # One set-based recompute for every job (and its ancestors)
+    recompute_job_completion(job_nos)
+
+    # Check if CNC Kesim subtask should auto-complete (first one per job)
+    checked = set()
+    for cnc_subtask in JobOrderDepartmentTask.objects.filter(
+            job_order_id__in=job_nos, task_type='cnc_cutting').select_related('job_order'):
+        if cnc_subtask.job_order_id in checked:
             continue
-        try:
-            job_order = JobOrder.objects.get(job_no=job_no)
-            job_order.update_completion_percentage()
-
-            # Check if CNC Kesim subtask should auto-complete
-            cnc_subtask = job_order.department_tasks.filter(
-                task_type='cnc_cutting'
-            ).first()
-            if cnc_subtask:
-                cnc_subtask.check_cnc_auto_complete()
-
-        except JobOrder.DoesNotExist:
-            pass
+        checked.add(cnc_subtask.job_order_id)
+        cnc_subtask.check_cnc_auto_complete()
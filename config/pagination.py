@@ -1,6 +1,156 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
 
 class CustomPageNumberPagination(PageNumberPagination):
     page_size = 100
     page_size_query_param = 'page_size'
-    max_page_size = 1000
\ No newline at end of file
+    max_page_size = 1000
+
+
+def estimate_count(queryset) -> int:
+    """The PostgreSQL planner's row estimate for ``queryset`` (no scan)."""
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination on (``field``, id): each page is an index range scan
+    after the last row of the previous one instead of an OFFSET, and no
+    COUNT(*) runs unless asked for.
+
+    - ``?cursor=`` is the opaque token of the ``next`` / ``previous`` links.
+    - ``?count=exact`` adds COUNT(*), ``?count=estimate`` the planner's
+      estimate (see ``estimate_count``); otherwise ``count`` is null.
+
+    Descending pages put NULLs first and ascending pages NULLs last (the
+    PostgreSQL defaults), so either order is the exact reverse of the other
+    and one (field, id) index serves both.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, field, descending=True):
+        self.field = field
+        self.descending = descending
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'estimate':
+            return estimate_count(queryset)
+        return None
+
+    # --- cursor -----------------------------------------------------------
+
+    def encode_cursor(self, row, backwards):
+        position = [getattr(row, self.field), row.pk, int(backwards)]
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            value, pk, backwards = json.loads(base64.urlsafe_b64decode(token.encode()))
+            return value, int(pk), bool(backwards)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _ordering(self, descending):
+        if descending:
+            return [F(self.field).desc(nulls_first=True), '-pk']
+        return [F(self.field).asc(nulls_last=True), 'pk']
+
+    def _after(self, value, pk, descending):
+        """Rows strictly after (value, pk) in the ``descending`` order."""
+        field = self.field
+        if descending:
+            if value is None:
+                return Q(**{f'{field}__isnull': True, 'pk__lt': pk}) | Q(**{f'{field}__isnull': False})
+            return Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk})
+        if value is None:
+            return Q(**{f'{field}__isnull': True, 'pk__gt': pk})
+        return (
+            Q(**{f'{field}__gt': value})
+            | Q(**{field: value, 'pk__gt': pk})
+            | Q(**{f'{field}__isnull': True})
+        )
+
+    # --- page -------------------------------------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        self.count = self.get_count(queryset, request)
+
+        backwards = bool(cursor and cursor[2])
+        descending = self.descending != backwards
+        queryset = queryset.order_by(*self._ordering(descending))
+        if cursor:
+            queryset = queryset.filter(self._after(cursor[0], cursor[1], descending))
+
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.rows = rows
+        return rows
+
+    def _link(self, row, backwards):
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, backwards))
+
+    def get_next_link(self):
+        if not (self.rows and self.has_next):
+            return None
+        return self._link(self.rows[-1], backwards=False)
+
+    def get_previous_link(self):
+        if not (self.rows and self.has_previous):
+            return None
+        return self._link(self.rows[0], backwards=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -57,9 +57,72 @@ GCP_LOCATION                 = os.getenv('GCP_LOCATION', 'europe-west3')
 CLOUD_TASKS_QUEUE            = os.getenv('CLOUD_TASKS_QUEUE', 'email-notifications')
 CLOUD_RUN_SERVICE_URL        = os.getenv('CLOUD_RUN_SERVICE_URL', 'https://gemkom-backend-716746493353.europe-west3.run.app')
 CLOUD_TASKS_SERVICE_ACCOUNT  = os.getenv('CLOUD_TASKS_SERVICE_ACCOUNT', '')
+# Cache shared by every instance (Redis) when CACHE_REDIS_URL is set;
+# otherwise Django's per-process LocMem default. Caches invalidated through
+# version keys are only reused across requests with a shared backend, since a
+# LocMem invalidation never reaches the other instances.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', '')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+SHARED_CACHE = bool(CACHE_REDIS_URL)
+
 # Set to False in local .env to send emails synchronously (no Cloud Tasks needed)
 USE_CLOUD_TASKS = os.getenv('USE_CLOUD_TASKS', 'true').lower() == 'true'
 
+# Processes the linear-cutting optimizer may spread its strategy search over
+# (1 = serial). Only worth raising on multi-core instances; sessions under
+# 2000 pieces always run serially regardless.
+LINEAR_CUTTING_OPTIMIZER_WORKERS = int(os.getenv('LINEAR_CUTTING_OPTIMIZER_WORKERS', '1'))
+# Per item-group time budget (seconds) for the optional mode="exact" search.
+LINEAR_CUTTING_EXACT_TIME_BUDGET_S = float(os.getenv('LINEAR_CUTTING_EXACT_TIME_BUDGET_S', '5'))
+# Cloud Tasks queue that runs background optimize jobs.
+LINEAR_CUTTING_TASKS_QUEUE = os.getenv('LINEAR_CUTTING_TASKS_QUEUE', CLOUD_TASKS_QUEUE)
+# A background optimize job still "running" this long after it started is
+# taken as crashed: a redelivered task runs it again, the status endpoint
+# reports it failed.
+LINEAR_CUTTING_JOB_STALE_S = int(os.getenv('LINEAR_CUTTING_JOB_STALE_S', '900'))
+# How long a rendered cutting-list PDF is reused (seconds, 0 = never cache).
+# Per-process copies are rarely hit again and only hold memory: off by
+# default without a shared cache.
+LINEAR_CUTTING_PDF_CACHE_TTL_S = int(os.getenv('LINEAR_CUTTING_PDF_CACHE_TTL_S', '3600' if SHARED_CACHE else '0'))
+# Production-plan overview snapshots older than this are rebuilt even when no
+# signal marked them stale (backstop for QuerySet.update writes).
+PRODUCTION_PLAN_SNAPSHOT_MAX_AGE_S = int(os.getenv('PRODUCTION_PLAN_SNAPSHOT_MAX_AGE_S', '900'))
+# Cost each operation-timer change incrementally in the timer's transaction
+# (false = legacy: enqueue the part for a full rebuild by the drain worker).
+PART_COST_INCREMENTAL = os.getenv('PART_COST_INCREMENTAL', 'true').lower() == 'true'
+# Same for welding time entries (false = enqueue the job_no for a full rebuild).
+WELDING_COST_INCREMENTAL = os.getenv('WELDING_COST_INCREMENTAL', 'true').lower() == 'true'
+# How long a cost_table response is reused (seconds, 0 = never cache). Summary
+# and job order changes invalidate it earlier through a version key, which
+# only reaches every instance through a shared cache: off by default without one.
+COST_TABLE_CACHE_TTL_S = int(os.getenv('COST_TABLE_CACHE_TTL_S', '300' if SHARED_CACHE else '0'))
+# How long a user's resolved role permission set is reused across requests
+# (seconds, 0 = load once per request). Override, group and position changes
+# invalidate it earlier through version keys, which only reach every instance
+# through a shared cache: off by default without one.
+ROLE_PERMISSION_CACHE_TTL_S = int(os.getenv('ROLE_PERMISSION_CACHE_TTL_S', '300' if SHARED_CACHE else '0'))
+# Upper bound on how long a process reuses its FX rate table (core.fx;
+# seconds, 0 = reload on every use). Snapshot changes reload it at once: each
+# use checks the snapshot table's row count and latest updated_at.
+FX_RATE_CACHE_TTL_S = int(os.getenv('FX_RATE_CACHE_TTL_S', '300'))
+# How queued notification emails leave the outbox: 'cloud_tasks' (push a send
+# task per email) or 'smtp' (send through EMAIL_BACKEND directly). Empty picks
+# by USE_CLOUD_TASKS.
+EMAIL_OUTBOX_TRANSPORT = os.getenv('EMAIL_OUTBOX_TRANSPORT', '')
+# Concurrent create_task calls per outbox batch (cloud_tasks transport).
+EMAIL_OUTBOX_SEND_WORKERS = int(os.getenv('EMAIL_OUTBOX_SEND_WORKERS', '8'))
+# Deliver the emails a commit queued right after it, inside the request
+# (false = leave them to the scheduled drain / drain_email_outbox).
+EMAIL_OUTBOX_DISPATCH_ON_COMMIT = os.getenv('EMAIL_OUTBOX_DISPATCH_ON_COMMIT', 'true').lower() == 'true'
+# Seconds between keep-alive comments on /notifications/stream/.
+NOTIFICATION_STREAM_HEARTBEAT_S = int(os.getenv('NOTIFICATION_STREAM_HEARTBEAT_S', '20'))
+
 
 ALLOWED_HOSTS = ['gemkom-backend-716746493353.europe-west3.run.app',
                  '127.0.0.1', 'localhost']  # for now
@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CostRecalcJob
+
+
+@admin.register(CostRecalcJob)
+class CostRecalcJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'key', 'enqueued_at', 'attempts', 'next_attempt_at', 'dead_at']
+    list_filter = ['kind', ('dead_at', admin.EmptyFieldListFilter)]
+    search_fields = ['key']
+    readonly_fields = ['last_error']
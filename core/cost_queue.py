@@ -0,0 +1,260 @@
+"""
+Unified background queue for part, welding and subcontractor cost recalculation.
+
+Producers call ``enqueue_cost_recalc(kind, key)``; repeated enqueues of the same
+(kind, key) coalesce into one CostRecalcJob row. ``drain_cost_queue`` claims a
+batch with SELECT ... FOR UPDATE SKIP LOCKED plus a short lease, so any number of
+workers can drain concurrently without processing a row twice. Each row runs in
+its own transaction; failures are retried with exponential backoff and, after
+MAX_ATTEMPTS, parked as dead letters (``dead_at`` set) for inspection.
+
+The per-kind recomputes all end in recompute_job_cost_summary. The worker runs
+them under ``defer_job_cost_summaries`` and turns the collected job_nos into
+coalesced ``job_summary`` rows, so a burst of 200 part changes on one job costs
+one JobOrderCostSummary rebuild; claimed summary rows are rebuilt together by
+the set-based recompute_job_cost_summaries. Summary rebuilds in turn queue
+``cost_table`` rows (one per root job), which refresh the cost table's sort
+columns last.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import CostRecalcJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_S = 30
+RETRY_MAX_S = 3600
+# A claimed row is skipped by other workers until its lease runs out; a worker
+# that dies mid-batch therefore only delays its rows.
+CLAIM_LEASE = timedelta(minutes=10)
+
+COST_KINDS = (CostRecalcJob.KIND_PART, CostRecalcJob.KIND_WELDING, CostRecalcJob.KIND_SUBCONTRACTOR)
+
+
+def _recompute_part(part_key):
+    from tasks.services.costing import recompute_part_cost_snapshot
+    recompute_part_cost_snapshot(part_key)
+
+
+def _recompute_welding(job_no):
+    from welding.services.costing import recompute_welding_job_cost
+    recompute_welding_job_cost(job_no)
+
+
+def _recompute_subcontractor(job_no):
+    from subcontracting.services.costing import recompute_subcontractor_cost
+    recompute_subcontractor_cost(job_no)
+
+
+def _recompute_summary(job_no):
+    from projects.services.costing import recompute_job_cost_summary
+    recompute_job_cost_summary(job_no)
+
+
+def _recompute_summaries(job_nos):
+    from projects.services.costing import recompute_job_cost_summaries
+    recompute_job_cost_summaries(job_nos)
+
+
+def _refresh_cost_table(root_no):
+    from projects.services.cost_table import refresh_cost_table_rows
+    refresh_cost_table_rows([root_no])
+
+
+def _refresh_cost_tables(root_nos):
+    from projects.services.cost_table import refresh_cost_table_rows
+    refresh_cost_table_rows(root_nos)
+
+
+HANDLERS = {
+    CostRecalcJob.KIND_PART: _recompute_part,
+    CostRecalcJob.KIND_WELDING: _recompute_welding,
+    CostRecalcJob.KIND_SUBCONTRACTOR: _recompute_subcontractor,
+    CostRecalcJob.KIND_JOB_SUMMARY: _recompute_summary,
+    CostRecalcJob.KIND_COST_TABLE: _refresh_cost_table,
+}
+
+# Kinds whose claimed rows are first tried as one set-based call
+BATCH_HANDLERS = {
+    CostRecalcJob.KIND_JOB_SUMMARY: _recompute_summaries,
+    CostRecalcJob.KIND_COST_TABLE: _refresh_cost_tables,
+}
+
+# Derived kinds, drained in this order after the cost kinds (each feeds the next)
+DERIVED_KINDS = (CostRecalcJob.KIND_JOB_SUMMARY, CostRecalcJob.KIND_COST_TABLE)
+
+
+def enqueue_cost_recalc(kind: str, key: str) -> None:
+    """
+    Queue a recalculation (idempotent). Re-enqueueing a failed or dead row
+    gives it a fresh set of attempts, since the data it failed on changed.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"unknown cost recalc kind: {kind}")
+    if not key:
+        return
+    now = timezone.now()
+    CostRecalcJob.objects.update_or_create(
+        kind=kind, key=key,
+        defaults={
+            'enqueued_at': now, 'next_attempt_at': now,
+            'attempts': 0, 'last_error': '', 'dead_at': None,
+        },
+    )
+
+
+def enqueue_cost_recalcs(kind: str, keys) -> int:
+    """enqueue_cost_recalc for many keys; returns how many were queued."""
+    count = 0
+    for key in dict.fromkeys(k for k in keys if k):
+        enqueue_cost_recalc(kind, key)
+        count += 1
+    return count
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_S * 2 ** (attempts - 1), RETRY_MAX_S))
+
+
+def _claim(kinds, limit):
+    """Lease up to ``limit`` due rows of ``kinds``, oldest first."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            CostRecalcJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(kind__in=kinds, dead_at__isnull=True, next_attempt_at__lte=now)
+            .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+            .order_by('enqueued_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        if ids:
+            CostRecalcJob.objects.filter(id__in=ids).update(claimed_until=now + CLAIM_LEASE)
+    return list(CostRecalcJob.objects.filter(id__in=ids).order_by('enqueued_at'))
+
+
+def _finish(job):
+    deleted, _ = CostRecalcJob.objects.filter(pk=job.pk, enqueued_at=job.enqueued_at).delete()
+    if not deleted:
+        # Re-enqueued while we worked: keep it (unclaimed) for another pass
+        CostRecalcJob.objects.filter(pk=job.pk).update(claimed_until=None)
+
+
+def _run_batch(kind, jobs) -> bool:
+    """Process claimed rows of ``kind`` in one transaction; returns False when
+    it failed (the caller then retries row by row to isolate the bad one)."""
+    try:
+        with transaction.atomic():
+            BATCH_HANDLERS[kind]([job.key for job in jobs])
+            for job in jobs:
+                _finish(job)
+        return True
+    except Exception:
+        logger.exception("batched cost recalc of %s %s rows failed; retrying one by one", len(jobs), kind)
+        return False
+
+
+def _run(job) -> bool:
+    """Process one claimed row; returns False when it failed."""
+    try:
+        with transaction.atomic():
+            HANDLERS[job.kind](job.key)
+            _finish(job)
+        return True
+    except Exception as exc:
+        attempts = job.attempts + 1
+        now = timezone.now()
+        dead = attempts >= MAX_ATTEMPTS
+        logger.exception(
+            "cost recalc %s:%s failed (attempt %s/%s)%s",
+            job.kind, job.key, attempts, MAX_ATTEMPTS, "; moved to dead letters" if dead else "",
+        )
+        CostRecalcJob.objects.filter(pk=job.pk, enqueued_at=job.enqueued_at).update(
+            attempts=attempts,
+            last_error=repr(exc)[:2000],
+            claimed_until=None,
+            next_attempt_at=now + _retry_delay(attempts),
+            dead_at=now if dead else None,
+        )
+        return False
+
+
+def _drain_derived(kind, max_rows):
+    """Claim due rows of a derived kind and run them as one batch, falling
+    back to row by row; returns (done, failed)."""
+    claimed = _claim([kind], max_rows)
+    if claimed and _run_batch(kind, claimed):
+        return len(claimed), 0
+    done = failed = 0
+    for job in claimed:
+        if _run(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def drain_cost_queue(max_rows: int = 200, kinds=None) -> dict:
+    """
+    Process up to ``max_rows`` due cost rows of ``kinds`` (default: all cost
+    kinds), then the job summaries they and earlier runs queued, then the
+    cost table trees those summaries queued.
+
+    Returns {"processed": N, "failed": M, "summaries": S, "cost_tables": T}.
+    """
+    from projects.services.costing import defer_job_cost_summaries
+
+    kinds = [k for k in (kinds or COST_KINDS) if k not in DERIVED_KINDS]
+    processed = failed = 0
+
+    with defer_job_cost_summaries() as job_nos:
+        for job in _claim(kinds, max_rows) if kinds else ():
+            if _run(job):
+                processed += 1
+            else:
+                failed += 1
+    enqueue_cost_recalcs(CostRecalcJob.KIND_JOB_SUMMARY, sorted(job_nos))
+
+    done = {}
+    for kind in DERIVED_KINDS:
+        done[kind], kind_failed = _drain_derived(kind, max_rows)
+        failed += kind_failed
+
+    return {
+        'processed': processed,
+        'failed': failed,
+        'summaries': done[CostRecalcJob.KIND_JOB_SUMMARY],
+        'cost_tables': done[CostRecalcJob.KIND_COST_TABLE],
+    }
+
+
+def _drain_in_thread(max_rows, kinds):
+    try:
+        return drain_cost_queue(max_rows, kinds)
+    finally:
+        connection.close()
+
+
+def drain_cost_queue_concurrently(workers: int, max_rows: int = 200, kinds=None) -> dict:
+    """Run ``workers`` drain_cost_queue calls in parallel threads (each with
+    its own DB connection); returns the summed counters."""
+    if workers <= 1:
+        return drain_cost_queue(max_rows, kinds)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda _: _drain_in_thread(max_rows, kinds), range(workers)))
+    return {k: sum(r[k] for r in results) for k in results[0]}
+
+
+def requeue_dead(kind=None) -> int:
+    """Give dead-letter rows (optionally of one kind) a fresh set of attempts."""
+    rows = CostRecalcJob.objects.filter(dead_at__isnull=False)
+    if kind:
+        rows = rows.filter(kind=kind)
+    return rows.update(dead_at=None, attempts=0, next_attempt_at=timezone.now(), claimed_until=None)
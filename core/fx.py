@@ -0,0 +1,224 @@
+"""
+Process-wide FX rates.
+
+CurrencyRateSnapshot holds one TRY-based rates dict per day ({"EUR": 0.026,
+"USD": 0.029, ...}: units of that currency per 1 TRY). Costing used to read
+the table three different ways: machining.fx_utils.build_fx_lookup loaded
+every snapshot on each call (once per part/job recompute),
+projects.services.costing cached it per calendar day, and procurement
+reports fetched the latest snapshot per report.
+
+``fx_table()`` returns one shared ``FxTable``: snapshot dates as a sorted
+array of ordinals plus one rate column per currency, so a date resolves with
+a single bisect (last snapshot on/before it, else the earliest) and batches
+of (amount, currency, date) convert with one lookup per distinct date.
+
+The table is loaded once per process and reused while the snapshot signature
+(row count and latest ``updated_at``, one aggregate query per use) is the one
+it was loaded with, at most FX_RATE_CACHE_TTL_S. Every process sees a saved
+or deleted snapshot as soon as it commits (the writing transaction at once),
+so persisted costs are never converted with replaced rates; a rolled-back
+change only costs a reload. core.signals also drops this process's copy
+(``invalidate_fx_rates``).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+
+_ZERO = Decimal('0')
+_CENT = Decimal('0.01')
+
+
+def _q2(value: Decimal) -> Decimal:
+    return value.quantize(_CENT)
+
+
+class FxTable:
+    """Immutable snapshot table; see the module docstring."""
+
+    def __init__(self, snapshots):
+        """``snapshots``: iterable of (date, rates dict) in ascending date order."""
+        self._dates = []
+        self._ordinals = array('l')
+        self._has_rates = []
+        self._columns: dict[str, list] = {}
+        for position, (on_date, rates) in enumerate(snapshots):
+            self._dates.append(on_date)
+            self._ordinals.append(on_date.toordinal())
+            self._has_rates.append(bool(rates))
+            for currency, rate in (rates or {}).items():
+                column = self._columns.setdefault(currency, [None] * position)
+                column.append(Decimal(str(rate)) if rate is not None else None)
+            for column in self._columns.values():
+                if len(column) <= position:
+                    column.append(None)
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    @property
+    def dates(self) -> list:
+        return list(self._dates)
+
+    def index(self, on_date) -> int:
+        """Row of the last snapshot on/before ``on_date`` (the earliest when
+        it precedes them all); -1 for an empty table."""
+        if not self._ordinals:
+            return -1
+        return max(bisect_right(self._ordinals, on_date.toordinal()) - 1, 0)
+
+    def rate_at(self, currency: str, row: int) -> Decimal:
+        """TRY -> ``currency`` rate of ``row``; 0 when missing."""
+        column = self._columns.get(currency)
+        if row < 0 or column is None or column[row] is None:
+            return _ZERO
+        return column[row]
+
+    def rate(self, currency: str, on_date) -> Decimal:
+        return self.rate_at(currency, self.index(on_date))
+
+    def rates(self, row: int) -> dict[str, Decimal]:
+        """The rates dict of ``row`` (missing currencies left out)."""
+        if row < 0:
+            return {}
+        return {
+            currency: column[row]
+            for currency, column in self._columns.items()
+            if column[row] is not None
+        }
+
+    def lookup(self, quote: str = 'EUR'):
+        """fx(local_date) -> Decimal(TRY -> quote), for per-day labor costing."""
+        return lambda on_date: self.rate(quote, on_date)
+
+    # --- EUR conversion ----------------------------------------------------
+
+    def _eur_factor(self, currency: str, row: int):
+        """Multiplier taking ``currency`` to EUR at ``row``; None when the
+        snapshot cannot convert it."""
+        if row < 0 or not self._has_rates[row]:
+            return None
+        eur_rate = self.rate_at('EUR', row)
+        if currency == 'TRY':
+            return eur_rate if eur_rate != 0 else None
+        # Cross-rate via TRY: 1 src_currency = (rates['EUR'] / rates[src]) EUR
+        src_rate = self.rate_at(currency, row)
+        if src_rate == 0 or eur_rate == 0:
+            return None
+        return eur_rate / src_rate
+
+    def to_eur(self, amount, currency: str, on_date) -> Decimal:
+        """
+        ``amount`` of ``currency`` in EUR at the snapshot for ``on_date``:
+        EUR passes through unchanged, others are rounded to cents, and
+        Decimal('0.00') is returned when no snapshot or rate is available.
+        """
+        if not amount:
+            return Decimal('0.00')
+        amount = Decimal(str(amount))
+        if currency == 'EUR':
+            return amount
+        factor = self._eur_factor(currency, self.index(on_date))
+        if factor is None:
+            return Decimal('0.00')
+        return _q2(amount * factor)
+
+    def to_eur_many(self, rows) -> list[Decimal]:
+        """to_eur over (amount, currency, date) tuples, resolving each
+        distinct date and (currency, snapshot) factor once."""
+        rows = list(rows)
+        positions = {d: self.index(d) for d in {on_date for _, _, on_date in rows}}
+        factors = {}
+        out = []
+        for amount, currency, on_date in rows:
+            if not amount:
+                out.append(Decimal('0.00'))
+                continue
+            amount = Decimal(str(amount))
+            if currency == 'EUR':
+                out.append(amount)
+                continue
+            key = (currency, positions[on_date])
+            if key not in factors:
+                factors[key] = self._eur_factor(*key)
+            factor = factors[key]
+            out.append(Decimal('0.00') if factor is None else _q2(amount * factor))
+        return out
+
+    def fallback_rates(self, today=None) -> dict[str, Decimal]:
+        """
+        Rates of today's snapshot, else the latest one, upper-cased with
+        TRY=1 (procurement.reports.common.extract_rates shape); {} when there
+        is none.
+        """
+        if not self._ordinals:
+            return {}
+        today = today or timezone.now().date()
+        row = bisect_right(self._ordinals, today.toordinal()) - 1
+        if row < 0 or self._ordinals[row] != today.toordinal():
+            row = len(self._ordinals) - 1
+        if not self._has_rates[row]:
+            return {}
+        out = {currency.upper(): rate for currency, rate in self.rates(row).items()}
+        out.setdefault('TRY', Decimal('1'))
+        return out
+
+
+def load_fx_table() -> FxTable:
+    """Read every snapshot into a new FxTable (one query)."""
+    from core.models import CurrencyRateSnapshot
+
+    return FxTable(
+        (row['date'], row['rates'])
+        for row in CurrencyRateSnapshot.objects.order_by('date').values('date', 'rates')
+    )
+
+
+# ---------------------------------------------------------------------------
+# Process-wide instance
+# ---------------------------------------------------------------------------
+
+_lock = threading.Lock()
+_state = {'table': None, 'signature': None, 'loaded_at': 0.0}
+
+
+def _snapshot_signature() -> tuple:
+    """(row count, latest updated_at) of CurrencyRateSnapshot: changes with
+    every insert, save and delete, as this connection sees them."""
+    from core.models import CurrencyRateSnapshot
+
+    row = CurrencyRateSnapshot.objects.aggregate(n=Count('id'), changed=Max('updated_at'))
+    return row['n'], row['changed']
+
+
+def fx_table() -> FxTable:
+    """The current FxTable of this process (reloaded when the snapshot
+    signature changes or after FX_RATE_CACHE_TTL_S; 0 = reload on every
+    call)."""
+    ttl = settings.FX_RATE_CACHE_TTL_S
+    if ttl <= 0:
+        return load_fx_table()
+    now = time.monotonic()
+    signature = _snapshot_signature()
+    with _lock:
+        table = _state['table']
+        if table is not None and _state['signature'] == signature and now - _state['loaded_at'] < ttl:
+            return table
+    table = load_fx_table()
+    with _lock:
+        _state.update(table=table, signature=signature, loaded_at=now)
+    return table
+
+
+def invalidate_fx_rates() -> None:
+    """Drop this process's table (the next call reloads it)."""
+    with _lock:
+        _state['table'] = None
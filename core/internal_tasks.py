@@ -0,0 +1,48 @@
+"""
+Helpers shared by the internal task / queue endpoints (Cloud Tasks and
+Cloud Scheduler targets).
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_LIMIT = 1000
+
+
+def verify_task_secret(request):
+    """
+    Verify the shared secret sent by Cloud Tasks in the X-Task-Secret header.
+    Raises PermissionDenied if the secret is missing or incorrect.
+
+    Skipped when USE_CLOUD_TASKS=False (local dev).
+    """
+    if not getattr(settings, 'USE_CLOUD_TASKS', True):
+        return  # skip verification in local dev
+
+    secret = getattr(settings, 'QUEUE_SECRET', '')
+    if not secret:
+        logger.warning('QUEUE_SECRET is not set — task endpoint is unprotected')
+        return
+
+    incoming = request.headers.get('X-Task-Secret', '')
+    if incoming != secret:
+        raise PermissionDenied('Invalid task secret')
+
+
+def parse_batch_limit(value, default: int, maximum: int = MAX_BATCH_LIMIT) -> int:
+    """
+    A request's "max" as an int capped at ``maximum``; ``default`` when it is
+    missing. Raises ValueError unless it is a positive whole number.
+    """
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(str(value))
+    except ValueError:
+        raise ValueError("'max' must be a positive whole number.")
+    if limit < 1:
+        raise ValueError("'max' must be a positive whole number.")
+    return min(limit, maximum)
@@ -0,0 +1,39 @@
+# core/management/commands/drain_cost_queue.py
+from django.core.management.base import BaseCommand
+
+from core.cost_queue import COST_KINDS, drain_cost_queue_concurrently, requeue_dead
+from core.models import CostRecalcJob
+
+
+class Command(BaseCommand):
+    help = "Drains the unified cost recalculation queue (part, welding, subcontractor, job summaries, cost table rows)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max", type=int, default=200, help="Rows claimed per worker pass")
+        parser.add_argument("--workers", type=int, default=1, help="Concurrent worker threads")
+        parser.add_argument("--kind", action="append", choices=COST_KINDS,
+                            help="Only drain these kinds (repeatable; default all)")
+        parser.add_argument("--requeue-dead", action="store_true",
+                            help="Retry dead-letter rows before draining")
+
+    def handle(self, *args, **opts):
+        if opts["requeue_dead"]:
+            revived = requeue_dead()
+            self.stdout.write(f"Requeued {revived} dead-letter rows")
+
+        totals = {"processed": 0, "failed": 0, "summaries": 0, "cost_tables": 0}
+        # Drain until a pass finds nothing left to do. Failed rows back off
+        # (next_attempt_at in the future), so they cannot keep this loop busy.
+        while True:
+            result = drain_cost_queue_concurrently(opts["workers"], opts["max"], opts["kind"])
+            for k in totals:
+                totals[k] += result[k]
+            if not any(result.values()):
+                break
+
+        dead = CostRecalcJob.objects.filter(dead_at__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {totals['processed']} cost rows, {totals['summaries']} job summaries and "
+            f"{totals['cost_tables']} cost table trees, "
+            f"{totals['failed']} failed, {dead} in dead letters"
+        ))
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_legacy_queues(apps, schema_editor):
+    """Carry pending rows of the per-app recalc queues over to CostRecalcJob."""
+    CostRecalcJob = apps.get_model('core', 'CostRecalcJob')
+    legacy = [
+        ('part', apps.get_model('tasks', 'PartCostRecalcQueue'), 'part_id'),
+        ('welding', apps.get_model('welding', 'WeldingJobCostRecalcQueue'), 'job_no'),
+        ('subcontractor', apps.get_model('subcontracting', 'SubcontractorCostRecalcQueue'), 'job_no'),
+    ]
+    now = timezone.now()
+    for kind, model, key_field in legacy:
+        CostRecalcJob.objects.bulk_create(
+            [
+                CostRecalcJob(kind=kind, key=key, enqueued_at=enqueued_at or now, next_attempt_at=now)
+                for key, enqueued_at in model.objects.values_list(key_field, 'enqueued_at')
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_lock_down_supabase_public_tables'),
+        ('subcontracting', '0011_add_tier_type_to_price_tier'),
+        ('tasks', '0010_timer_cost_contribution'),
+        ('welding', '0008_weldingentrycostcontribution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostRecalcJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('part', 'Part labor cost'), ('welding', 'Welding job cost'), ('subcontractor', 'Subcontractor cost'), ('job_summary', 'Job order cost summary')], max_length=20)),
+                ('key', models.CharField(max_length=100)),
+                ('enqueued_at', models.DateTimeField()),
+                ('next_attempt_at', models.DateTimeField()),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('dead_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'core_cost_recalc_job',
+                'indexes': [models.Index(condition=models.Q(('dead_at__isnull', True)), fields=['kind', 'next_attempt_at'], name='cost_recalc_job_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='uniq_cost_recalc_job_kind_key')],
+            },
+        ),
+        migrations.RunPython(copy_legacy_queues, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_costrecalcjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='costrecalcjob',
+            name='kind',
+            field=models.CharField(choices=[('part', 'Part labor cost'), ('welding', 'Welding job cost'), ('subcontractor', 'Subcontractor cost'), ('job_summary', 'Job order cost summary'), ('cost_table', 'Cost table rows of a job tree')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_costrecalcjob_cost_table_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='currencyratesnapshot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
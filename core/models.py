@@ -7,6 +7,51 @@ class CurrencyRateSnapshot(models.Model):
     base = models.CharField(max_length=3, default="TRY")  # fixed base
     rates = models.JSONField()                            # {"EUR": 0.91, "TRY": 33.2, ...}
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)                  # part of core.fx's table signature
 
     def __str__(self):
-        return f"{self.provider} {self.date} base={self.base}"
\ No newline at end of file
+        return f"{self.provider} {self.date} base={self.base}"
+
+
+class CostRecalcJob(models.Model):
+    """
+    Unified background cost-recalculation queue (see core.cost_queue).
+
+    One row per (kind, key): enqueueing an already queued key only refreshes
+    it, so bursts of changes coalesce. Rows that keep failing are retried with
+    backoff and finally parked with ``dead_at`` set (the dead-letter list).
+    """
+    KIND_PART = 'part'
+    KIND_WELDING = 'welding'
+    KIND_SUBCONTRACTOR = 'subcontractor'
+    KIND_JOB_SUMMARY = 'job_summary'
+    KIND_COST_TABLE = 'cost_table'
+    KIND_CHOICES = [
+        (KIND_PART, 'Part labor cost'),
+        (KIND_WELDING, 'Welding job cost'),
+        (KIND_SUBCONTRACTOR, 'Subcontractor cost'),
+        (KIND_JOB_SUMMARY, 'Job order cost summary'),
+        (KIND_COST_TABLE, 'Cost table rows of a job tree'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    key = models.CharField(max_length=100)   # part key or (root) job_no
+    enqueued_at = models.DateTimeField()
+    next_attempt_at = models.DateTimeField()
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    dead_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'core_cost_recalc_job'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'key'], name='uniq_cost_recalc_job_kind_key'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'next_attempt_at'], name='cost_recalc_job_due_idx',
+                         condition=models.Q(dead_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.key}" + (" (dead)" if self.dead_at else "")
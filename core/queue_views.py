@@ -0,0 +1,39 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.cost_queue import COST_KINDS, drain_cost_queue
+from core.internal_tasks import parse_batch_limit
+from machining.permissions import HasQueueSecret
+
+
+class DrainCostRecalcQueueView(APIView):
+    """
+    Internal endpoint draining the unified cost recalculation queue
+    (part, welding and subcontractor costs, then the job summaries and cost
+    table rows they touched).
+
+    POST /internal/drain-cost-queue/
+    Headers: X-Queue-Secret: <secret>
+    Body: {"max": 200, "kinds": ["part", "welding"]}  # both optional, max <= 1000
+
+    Response: {"processed": N, "failed": M, "summaries": S, "cost_tables": T}
+
+    Safe to call from several schedulers at once: rows are claimed with
+    SKIP LOCKED, and failing rows back off instead of blocking the batch.
+    """
+    authentication_classes = []
+    permission_classes = [HasQueueSecret]
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            max_rows = parse_batch_limit(request.data.get("max"), default=200)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        kinds = request.data.get("kinds") or None
+        if kinds is not None and (not isinstance(kinds, list) or any(k not in COST_KINDS for k in kinds)):
+            return Response({"error": f"'kinds' must be a list of {', '.join(COST_KINDS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(drain_cost_queue(max_rows, kinds))
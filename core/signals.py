@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .fx import invalidate_fx_rates
+from .models import CurrencyRateSnapshot
+
+
+@receiver(post_save, sender=CurrencyRateSnapshot)
+@receiver(post_delete, sender=CurrencyRateSnapshot)
+def invalidate_fx_on_snapshot_change(sender, **kwargs):
+    invalidate_fx_rates()
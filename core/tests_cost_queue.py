@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import cost_queue
+from core.cost_queue import drain_cost_queue, enqueue_cost_recalc, requeue_dead
+from core.models import CostRecalcJob
+from projects.services.costing import recompute_job_cost_summary
+from projects.tests_meeting_brief import _allowed_host
+
+PART = CostRecalcJob.KIND_PART
+SUMMARY = CostRecalcJob.KIND_JOB_SUMMARY
+
+
+class CostQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def part(key):
+            self.calls.append((PART, key))
+            recompute_job_cost_summary('J-1')   # deferred by the worker
+
+        def summary(job_no):
+            self.calls.append((SUMMARY, job_no))
+
+        def summaries(job_nos):
+            self.calls.extend((SUMMARY, job_no) for job_no in job_nos)
+
+        for handlers, patched in ((cost_queue.HANDLERS, {PART: part, SUMMARY: summary}),
+                                  (cost_queue.BATCH_HANDLERS, {SUMMARY: summaries})):
+            patcher = mock.patch.dict(handlers, patched)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_duplicates_coalesce_and_summaries_collapse(self):
+        for key in ('P-1', 'P-2', 'P-1', 'P-3', 'P-2'):
+            enqueue_cost_recalc(PART, key)
+        self.assertEqual(CostRecalcJob.objects.count(), 3)
+
+        result = drain_cost_queue()
+        self.assertEqual(result, {'processed': 3, 'failed': 0, 'summaries': 1, 'cost_tables': 0})
+        self.assertEqual([c for c in self.calls if c[0] == SUMMARY], [(SUMMARY, 'J-1')])
+        self.assertFalse(CostRecalcJob.objects.exists())
+
+    def test_failures_back_off_then_go_to_dead_letters(self):
+        cost_queue.HANDLERS[PART] = mock.Mock(side_effect=RuntimeError('boom'))
+        enqueue_cost_recalc(PART, 'P-bad')
+
+        self.assertEqual(drain_cost_queue()['failed'], 1)
+        job = CostRecalcJob.objects.get()
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.next_attempt_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+        self.assertEqual(drain_cost_queue()['failed'], 0)   # not due yet
+
+        for _ in range(cost_queue.MAX_ATTEMPTS - 1):
+            CostRecalcJob.objects.update(next_attempt_at=timezone.now())
+            drain_cost_queue()
+        job.refresh_from_db()
+        self.assertIsNotNone(job.dead_at)
+
+        CostRecalcJob.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(drain_cost_queue()['failed'], 0)   # dead rows are skipped
+        self.assertEqual(requeue_dead(), 1)
+        self.assertEqual(CostRecalcJob.objects.get().attempts, 0)
+
+    def test_claimed_rows_are_skipped_by_other_workers(self):
+        enqueue_cost_recalc(PART, 'P-1')
+        CostRecalcJob.objects.update(claimed_until=timezone.now() + cost_queue.CLAIM_LEASE)
+        self.assertEqual(drain_cost_queue()['processed'], 0)
+        self.assertEqual(self.calls, [])
+
+    @override_settings(QUEUE_SECRET='queue-secret')
+    def test_drain_endpoints_validate_their_body(self):
+        client = APIClient()
+        headers = {'HTTP_X_QUEUE_SECRET': 'queue-secret', 'HTTP_HOST': _allowed_host()}
+        for url in ('/internal/drain-cost-queue/', '/tasks/internal/drain-part-cost-queue/',
+                    '/subcontracting/internal/drain-cost-queue/'):
+            for body in ({'max': 'lots'}, {'max': 0}, {'max': 2.5}, ['max']):
+                resp = client.post(url, body, format='json', **headers)
+                self.assertEqual(resp.status_code, 400, (url, body))
+        resp = client.post('/internal/drain-cost-queue/', {'kinds': ['part', {}]}, format='json', **headers)
+        self.assertEqual(resp.status_code, 400)
+
+        enqueue_cost_recalc(PART, 'P-1')
+        resp = client.post('/internal/drain-cost-queue/', {'max': 10 ** 9, 'kinds': [PART]},
+                           format='json', **headers)
+        self.assertEqual(resp.data['processed'], 1)
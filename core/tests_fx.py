@@ -0,0 +1,71 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core import fx
+from core.fx import FxTable, fx_table
+from core.models import CurrencyRateSnapshot
+from machining.fx_utils import build_fx_lookup
+from procurement.reports.common import get_fallback_rates
+
+
+class FxTableTests(SimpleTestCase):
+    table = FxTable([
+        (date(2026, 1, 1), {'EUR': 0.025, 'USD': 0.03}),
+        (date(2026, 3, 4), {'EUR': 0.024}),
+        (date(2026, 3, 10), {}),
+    ])
+
+    def test_lookups_use_the_last_snapshot_on_or_before(self):
+        self.assertEqual(self.table.rate('EUR', date(2026, 3, 3)), Decimal('0.025'))
+        self.assertEqual(self.table.rate('EUR', date(2026, 3, 4)), Decimal('0.024'))
+        self.assertEqual(self.table.rate('EUR', date(2025, 6, 1)), Decimal('0.025'))  # earliest
+        self.assertEqual(self.table.rate('USD', date(2026, 3, 5)), Decimal('0'))
+        self.assertEqual(FxTable([]).rate('EUR', date(2026, 1, 1)), Decimal('0'))
+
+    def test_eur_conversion(self):
+        self.assertEqual(self.table.to_eur(Decimal('1000'), 'TRY', date(2026, 2, 1)), Decimal('25.00'))
+        self.assertEqual(self.table.to_eur(Decimal('30'), 'USD', date(2026, 2, 1)), Decimal('25.00'))
+        self.assertEqual(self.table.to_eur(Decimal('12.345'), 'EUR', date(2026, 2, 1)), Decimal('12.345'))
+        self.assertEqual(self.table.to_eur(Decimal('30'), 'USD', date(2026, 3, 5)), Decimal('0.00'))
+        self.assertEqual(self.table.to_eur(Decimal('1000'), 'TRY', date(2026, 3, 12)), Decimal('0.00'))
+
+        rows = [(Decimal(a), cur, d) for a in ('0', '17.5', '1000') for cur in ('TRY', 'USD', 'EUR')
+                for d in (date(2025, 1, 1), date(2026, 3, 4), date(2026, 4, 1))]
+        self.assertEqual(self.table.to_eur_many(rows), [self.table.to_eur(*row) for row in rows])
+
+    def test_fallback_rates(self):
+        self.assertEqual(self.table.fallback_rates(today=date(2026, 3, 4)),
+                         {'EUR': Decimal('0.024'), 'TRY': Decimal('1')})
+        self.assertEqual(self.table.fallback_rates(today=date(2026, 3, 5)), {})   # latest is empty
+
+
+class FxServiceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        CurrencyRateSnapshot.objects.create(date=date(2026, 1, 1), rates={'EUR': 0.025})
+
+    def setUp(self):
+        fx._state.update(table=None, signature=None)
+
+    def test_table_is_reused_until_the_snapshots_change(self):
+        with mock.patch('core.fx.load_fx_table', wraps=fx.load_fx_table) as load:
+            self.assertIs(fx_table(), fx_table())
+            self.assertEqual(build_fx_lookup('EUR')(date(2026, 5, 1)), Decimal('0.025'))
+            self.assertEqual(load.call_count, 1)
+
+            CurrencyRateSnapshot.objects.create(date=date(2026, 5, 1), rates={'EUR': 0.02})
+            self.assertEqual(build_fx_lookup('EUR')(date(2026, 5, 1)), Decimal('0.02'))
+            self.assertEqual(get_fallback_rates()['EUR'], Decimal('0.02'))
+            self.assertEqual(load.call_count, 2)
+
+            # Written by another process: no signal reaches this one
+            CurrencyRateSnapshot.objects.filter(date=date(2026, 5, 1)).update(
+                rates={'EUR': 0.03}, updated_at=timezone.now())
+            self.assertEqual(build_fx_lookup('EUR')(date(2026, 5, 1)), Decimal('0.03'))
+            self.assertIs(fx_table(), fx_table())
+            self.assertEqual(load.call_count, 3)
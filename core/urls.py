@@ -1,4 +1,5 @@
 from django.urls import path
+from .queue_views import DrainCostRecalcQueueView
 from .views import CustomTokenObtainPairView, DBTestView, LatestCurrencyRatesView, TimerNowView, CombinedJobCostListView
 from rest_framework_simplejwt.views import TokenRefreshView
 
@@ -9,4 +10,5 @@ urlpatterns = [
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
     path('currency-rates/', LatestCurrencyRatesView.as_view(), name="currency-rates"),
     path('reports/combined-job-costs/', CombinedJobCostListView.as_view(), name="combined-job-costs"),
+    path('internal/drain-cost-queue/', DrainCostRecalcQueueView.as_view(), name="drain-cost-recalc-queue"),
 ]
\ No newline at end of file
@@ -0,0 +1,147 @@
+"""
+In-process caches for repeated linear-cutting optimizations.
+
+Planners re-run ``/optimize/`` many times while editing a single part row;
+every other ``(item_id, stock_length)`` group of the session comes back with
+exactly the same inputs.  Groups are therefore cached content-addressed — the
+key is a hash of the normalized parts, kerf, stock length, remnant set and
+solver options — so only groups whose inputs changed are re-optimized.
+
+``passes_for_bar`` output is cached per bar layout as well: the strategy
+search builds the same bar over and over across strategies and re-runs.
+
+Both caches are per process (gunicorn worker / pool worker), bounded LRU,
+and count hits so the hit rate can be logged.  Values are deep-copied on the
+way in and out because callers decorate the returned dicts.
+"""
+
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from .geometry import passes_for_bar
+
+GROUP_CACHE_SIZE = 256
+PASSES_CACHE_SIZE = 4096
+
+
+class LRUCache:
+    """Small thread-safe LRU map with hit/miss counters."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+group_cache = LRUCache(GROUP_CACHE_SIZE)
+passes_cache = LRUCache(PASSES_CACHE_SIZE)
+
+
+def _num(value):
+    return round(float(value or 0), 3)
+
+
+def group_key(parts_data, stock_length_mm, kerf_mm, stock_pieces=None,
+              **options) -> str:
+    """Content hash of one optimizer call.
+
+    Part order is kept — it seeds the deterministic piece order, so a
+    reordered session is a different (if equivalent) problem."""
+    payload = {
+        'parts': [
+            [
+                int(p.get('id') or 0), p.get('label', '') or '',
+                p.get('job_no', '') or '', p.get('image_no', '') or '',
+                _num(p.get('nominal_length_mm')), int(p.get('quantity') or 0),
+                _num(p.get('angle_left_deg')), _num(p.get('angle_right_deg')),
+                _num(p.get('profile_height_mm')),
+                bool(p.get('allow_rotation', True)),
+                bool(p.get('requires_bending', False)),
+            ]
+            for p in parts_data
+        ],
+        'stock': _num(stock_length_mm),
+        'kerf': _num(kerf_mm),
+        'remnants': [
+            [int(s.get('id') or 0), _num(s['length_mm']), int(s.get('quantity') or 0)]
+            for s in stock_pieces or []
+        ],
+        'options': options,
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def optimize_cached(parts_data, stock_length_mm, kerf_mm=3.0, stock_pieces=None,
+                    workers=1, **options) -> dict:
+    """``optimizer.optimize`` behind ``group_cache``.  ``workers`` is not part
+    of the key — it never changes the result."""
+    # Imported here: the optimizer imports this module for the pass cache.
+    from .optimizer import optimize
+
+    key = group_key(parts_data, stock_length_mm, kerf_mm, stock_pieces, **options)
+    cached = group_cache.get(key)
+    if cached is not None:
+        return copy.deepcopy(cached)
+    result = optimize(parts_data, stock_length_mm, kerf_mm,
+                      stock_pieces=stock_pieces, workers=workers, **options)
+    group_cache.put(key, copy.deepcopy(result))
+    return result
+
+
+def cached_passes_for_bar(bar: dict, kerf_mm: float) -> list:
+    """``geometry.passes_for_bar`` memoized on the bar's layout."""
+    key = (
+        float(bar.get('stock_length_mm') or 0),
+        bool(bar.get('is_remnant')),
+        float(kerf_mm),
+        tuple(
+            (float(c['offset_mm']), float(c['nominal_mm']),
+             float(c.get('angle_left_deg') or 0), float(c.get('angle_right_deg') or 0),
+             float(c.get('profile_height_mm') or 0), bool(c.get('shared_right')),
+             c.get('label', ''))
+            for c in bar.get('cuts') or []
+        ),
+    )
+    cached = passes_cache.get(key)
+    if cached is None:
+        cached = passes_for_bar(bar, kerf_mm)
+        passes_cache.put(key, cached)
+    return [dict(p) for p in cached]
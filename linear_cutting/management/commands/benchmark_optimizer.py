@@ -0,0 +1,88 @@
+# linear_cutting/management/commands/benchmark_optimizer.py
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from linear_cutting.optimizer import optimize
+
+
+SQUARE_AND_ANGLED = [(0, 0), (0, 0), (45, -45), (45, 45), (30, 0), (-30, 30)]
+ANGLED_ONLY = [(45, -45), (45, 45), (30, 0), (-30, 30), (22.5, -22.5), (60, 0)]
+
+
+def synthetic_parts(piece_count, seed=0, angled=False):
+    """
+    A reproducible mixed-length session of exactly ``piece_count`` pieces:
+    square, parallelogram and trapezoid parts on one 100 mm profile, with
+    quantities of 1–12 per part row (the shape of real planner input).
+    ``angled`` drops the square parts (every boundary needs a gap lookup).
+    """
+    rng = random.Random(seed)
+    angle_pairs = ANGLED_ONLY if angled else SQUARE_AND_ANGLED
+    parts = []
+    remaining = piece_count
+    part_id = 0
+    while remaining > 0:
+        part_id += 1
+        qty = min(remaining, rng.randint(1, 12))
+        al, ar = rng.choice(angle_pairs)
+        parts.append({
+            'id': part_id,
+            'label': f'P{part_id}',
+            'job_no': f'J-{rng.randint(1, 8):02d}',
+            'image_no': '',
+            'nominal_length_mm': rng.randrange(300, 2900, 5),
+            'quantity': qty,
+            'angle_left_deg': al,
+            'angle_right_deg': ar,
+            'profile_height_mm': 100,
+        })
+        remaining -= qty
+    return parts
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks the linear-cutting optimizer on synthetic sessions, "
+            "serial vs. process-pool strategy search.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default='50,500,5000',
+            help='Comma-separated piece counts (default: 50,500,5000)',
+        )
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--stock-length', type=int, default=6000)
+        parser.add_argument('--kerf', type=float, default=3.0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--angled', action='store_true',
+            help='Angled-profile sessions only (no square parts)',
+        )
+
+    def handle(self, *args, **opts):
+        try:
+            sizes = [int(s) for s in opts['sizes'].split(',') if s.strip()]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers')
+
+        stock, kerf, workers = opts['stock_length'], opts['kerf'], opts['workers']
+        self.stdout.write(f"{'pieces':>7} {'bars':>5} {'serial s':>9} "
+                          f"{'x' + str(workers) + ' s':>9} {'speedup':>8}")
+        for size in sizes:
+            parts = synthetic_parts(size, seed=opts['seed'], angled=opts['angled'])
+
+            t0 = time.perf_counter()
+            serial = optimize(parts, stock, kerf, workers=1)
+            t_serial = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            parallel = optimize(parts, stock, kerf, workers=workers)
+            t_parallel = time.perf_counter() - t0
+
+            if parallel != serial:
+                raise CommandError(f'{size} pieces: parallel result differs from serial')
+            self.stdout.write(
+                f"{size:>7} {serial['bars_needed']:>5} {t_serial:>9.2f} "
+                f"{t_parallel:>9.2f} {t_serial / t_parallel:>7.2f}x"
+            )
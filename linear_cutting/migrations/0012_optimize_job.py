@@ -0,0 +1,39 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('linear_cutting', '0011_linearcuttingpart_allow_rotation_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinearCuttingOptimizeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('mode', models.CharField(default='greedy', max_length=16)),
+                ('kerf_mm', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('groups_total', models.PositiveIntegerField(default=0)),
+                ('groups_done', models.PositiveIntegerField(default=0)),
+                ('progress', models.JSONField(blank=True, default=list, help_text='Per finished group: {item_id, item_name, stock_length_mm, bars_needed, efficiency_pct}')),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.BigIntegerField(help_text='Epoch ms')),
+                ('started_at', models.BigIntegerField(blank=True, help_text='Epoch ms', null=True)),
+                ('finished_at', models.BigIntegerField(blank=True, help_text='Epoch ms', null=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='linear_cutting_optimize_jobs', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='optimize_jobs', to='linear_cutting.linearcuttingsession')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['session', '-created_at'], name='linear_cutt_session_637fe1_idx')],
+            },
+        ),
+    ]
@@ -250,3 +250,52 @@ class LinearCuttingTask(BaseTask):
             self.in_plan = False
             self.plan_order = None
         super().save(*args, **kwargs)
+
+
+class LinearCuttingOptimizeJob(models.Model):
+    """
+    One background run of the session optimizer (``POST .../optimize/`` with
+    ``async: true``).  A worker fills ``progress`` group by group; on success
+    ``result`` holds the same ``optimization_result`` saved on the session.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    session = models.ForeignKey(
+        LinearCuttingSession, on_delete=models.CASCADE, related_name='optimize_jobs'
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    mode = models.CharField(max_length=16, default='greedy')
+    kerf_mm = models.DecimalField(max_digits=5, decimal_places=2)
+
+    groups_total = models.PositiveIntegerField(default=0)
+    groups_done = models.PositiveIntegerField(default=0)
+    progress = models.JSONField(
+        default=list, blank=True,
+        help_text="Per finished group: {item_id, item_name, stock_length_mm, bars_needed, efficiency_pct}"
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='linear_cutting_optimize_jobs'
+    )
+    created_at = models.BigIntegerField(help_text="Epoch ms")
+    started_at = models.BigIntegerField(null=True, blank=True, help_text="Epoch ms")
+    finished_at = models.BigIntegerField(null=True, blank=True, help_text="Epoch ms")
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['session', '-created_at'])]
+
+    def __str__(self):
+        return f"Optimize job {self.pk} ({self.session_id}, {self.status})"
@@ -20,16 +20,22 @@ Model (full derivation in ``geometry.py``):
 Packing: pieces are packed by several deterministic strategies
 (order × placement policy); the best complete solution wins
 (fewest new bars, then fewest remnants, least waste, fewest saw passes).
+Strategies are independent, so large jobs spread them over a process pool;
+a shared best-bar-count bound lets hopeless strategies stop early, and ties
+are broken by strategy index so the result matches the serial run exactly.
 """
 
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, replace
 from typing import List, Optional
 
+from .cache import cached_passes_for_bar
 from .geometry import (
     ANGLE_TOL_DEG,
     boundary_gap_mm,
     kerf_axial_mm,
-    passes_for_bar,
     recess_mm,
     rotated_angles,
     validate_piece,
@@ -37,6 +43,18 @@ from .geometry import (
 
 _EPS = 1e-6
 
+# Placement policies tried for every piece order.
+_POLICIES = ('first', 'best_end', 'best_gap')
+
+# Below this many pieces ``workers`` is ignored. Spawning the pool costs
+# ~0.5 s per call, while the serial search takes 0.5 s at 500 pieces, 1.7 s
+# at 1000 and 5.9 s at 2000 (benchmark_optimizer, mixed profiles), so two
+# workers only pay off on the largest sessions.
+_PARALLEL_MIN_PIECES = 2000
+
+# Sentinel for "no complete solution yet" in the shared bar-count bound.
+_NO_BOUND = 2 ** 31 - 1
+
 
 @dataclass(frozen=True)
 class Piece:
@@ -86,6 +104,35 @@ class _BarState:
         return self.stock_length - self.cursor_end
 
 
+class _GapTable:
+    """Per-run lookup tables for the packing hot path.
+
+    Every piece in a run collapses to a handful of ``_piece_key`` classes, so
+    the distinct end faces — ``(angle, height)`` — are few.  The boundary gap
+    for every (right face, left face) pair, the axial blade width for every
+    face angle and each piece's orientations are computed once here; packing
+    then does dict lookups instead of trig and ``dataclasses.replace`` per
+    bar × piece × orientation.  Lookups return exactly what the geometry
+    functions would, so layouts are unchanged.
+    """
+    __slots__ = ('kerf', 'gap', 'axial', 'orients')
+
+    def __init__(self, pieces: List[Piece], kerf: float):
+        self.kerf = float(kerf)
+        self.orients = {p.seq: tuple(p.orientations()) for p in pieces}
+        rights = {(o.ang_r, o.height) for os in self.orients.values() for o in os}
+        lefts = {(o.ang_l, o.height) for os in self.orients.values() for o in os}
+        # (ang_r(A), height(A), ang_l(B), height(B)) -> (gap_mm, shared)
+        self.gap = {
+            (ar, ha, al, hb): boundary_gap_mm(ar, al, ha, hb, self.kerf)
+            for ar, ha in rights for al, hb in lefts
+        }
+        self.axial = {
+            a: kerf_axial_mm(self.kerf, a)
+            for a in {a for a, _ in lefts} | {a for a, _ in rights}
+        }
+
+
 @dataclass(frozen=True)
 class _Candidate:
     end: float
@@ -95,19 +142,20 @@ class _Candidate:
     offset: float
 
 
-def _candidate_for(bar: _BarState, piece: Piece, kerf: float) -> Optional[_Candidate]:
+def _candidate_for(bar: _BarState, piece: Piece,
+                   gaps: _GapTable) -> Optional[_Candidate]:
     """Best feasible way to append ``piece`` to ``bar`` (or None)."""
     best = None
-    for orient in piece.orientations():
+    for orient in gaps.orients[piece.seq]:
         if not bar.placements:
             # Fresh factory end is trusted on new bars; remnant ends are not,
             # so the first pass on a remnant gets a full blade of clearance.
-            lead = kerf_axial_mm(kerf, orient.ang_l) if bar.is_remnant else 0.0
+            lead = gaps.axial[orient.ang_l] if bar.is_remnant else 0.0
             offset, gap, shared = lead, lead, False
         else:
             last = bar.placements[-1][0]
-            gap, shared = boundary_gap_mm(
-                last.ang_r, orient.ang_l, last.height, orient.height, kerf)
+            gap, shared = gaps.gap[
+                (last.ang_r, last.height, orient.ang_l, orient.height)]
             offset = bar.cursor_end + gap
         end = offset + orient.length
         if end > bar.stock_length + _EPS:
@@ -120,25 +168,30 @@ def _candidate_for(bar: _BarState, piece: Piece, kerf: float) -> Optional[_Candi
     return best
 
 
-def _place(bar: _BarState, cand: _Candidate, kerf: float):
+def _place(bar: _BarState, cand: _Candidate, gaps: _GapTable):
     bar.placements.append((cand.orient, cand.offset, cand.shared))
     bar.cursor_end = cand.end
     if cand.shared and bar.placements[-2:]:
         bar.shared_count += 1
-        clearance = kerf_axial_mm(kerf, cand.orient.ang_l)
+        clearance = gaps.axial[cand.orient.ang_l]
         bar.saved_mm += max(0.0, clearance - cand.gap)
 
 
-def _pack(pieces: List[Piece], stock_length: float, kerf: float,
-          stock_seed: list, policy: str) -> Optional[List[_BarState]]:
+def _pack(pieces: List[Piece], stock_length: float, gaps: _GapTable,
+          stock_seed: list, policy: str,
+          bound=None) -> Optional[List[_BarState]]:
+    """Greedy packing for one strategy.  ``bound`` (anything with a
+    ``.value``) is the fewest new bars any finished strategy needed — once
+    this one opens more it can no longer win and gives up (None)."""
     bars = [
         _BarState(s['length_mm'], is_remnant=True, stock_bar_id=s['id'])
         for s in stock_seed
     ]
+    new_bars = 0
     for piece in pieces:
         chosen = None       # (sort_key, bar, candidate)
         for idx, bar in enumerate(bars):
-            cand = _candidate_for(bar, piece, kerf)
+            cand = _candidate_for(bar, piece, gaps)
             if cand is None:
                 continue
             if policy == 'first':
@@ -151,13 +204,16 @@ def _pack(pieces: List[Piece], stock_length: float, kerf: float,
             if chosen is None or key < chosen[0]:
                 chosen = (key, bar, cand)
         if chosen is None:
+            new_bars += 1
+            if bound is not None and new_bars > bound.value:
+                return None     # already worse than a finished strategy
             new_bar = _BarState(stock_length, is_remnant=False)
-            cand = _candidate_for(new_bar, piece, kerf)
+            cand = _candidate_for(new_bar, piece, gaps)
             if cand is None:
                 return None     # cannot place even on a fresh bar
             bars.append(new_bar)
             chosen = (None, new_bar, cand)
-        _place(chosen[1], chosen[2], kerf)
+        _place(chosen[1], chosen[2], gaps)
     return [b for b in bars if b.placements or not b.is_remnant]
 
 
@@ -211,15 +267,15 @@ def _bar_cost(bar: _BarState):
 
 
 def _try_order(order: List[Piece], stock_length: float, is_remnant: bool,
-               stock_bar_id: int, kerf: float) -> Optional[_BarState]:
+               stock_bar_id: int, gaps: _GapTable) -> Optional[_BarState]:
     """Re-place the given pieces on a fresh bar in this exact order
     (orientation re-chosen per boundary). None if the order doesn't fit."""
     bar = _BarState(stock_length, is_remnant, stock_bar_id)
     for piece in order:
-        cand = _candidate_for(bar, piece, kerf)
+        cand = _candidate_for(bar, piece, gaps)
         if cand is None:
             return None
-        _place(bar, cand, kerf)
+        _place(bar, cand, gaps)
     return bar
 
 
@@ -238,7 +294,7 @@ def _piece_key(p: Piece):
 _MAX_REORDER_EVALS = 240
 
 
-def _improve_bar(bar: _BarState, kerf: float) -> _BarState:
+def _improve_bar(bar: _BarState, gaps: _GapTable) -> _BarState:
     """Within-bar local search: greedy packing appends pieces in a global
     order and never reconsiders their arrangement on the bar, which can
     leave e.g. a square piece stranded after an angled chain (an extra
@@ -283,7 +339,7 @@ def _improve_bar(bar: _BarState, kerf: float) -> _BarState:
                 moved = order.pop(i)
                 order.insert(j, moved)
                 cand = _try_order(order, best.stock_length, best.is_remnant,
-                                  best.stock_bar_id, kerf)
+                                  best.stock_bar_id, gaps)
                 if cand is None:
                     continue
                 cost = _bar_cost(cand)
@@ -411,7 +467,7 @@ def _solution_dict(bars: List[_BarState], stock_length: float, kerf: float) -> d
             'shared_cut_count': bar.shared_count,
             'cuts': cuts,
         }
-        bar_dict['passes'] = passes_for_bar(bar_dict, kerf)
+        bar_dict['passes'] = cached_passes_for_bar(bar_dict, kerf)
         bar_dict['saw_setup_changes'] = _saw_setup_changes(bar_dict['passes'])
         for c in cuts:
             c['nominal_mm'] = round(c['nominal_mm'], 1)
@@ -441,11 +497,106 @@ def _solution_dict(bars: List[_BarState], stock_length: float, kerf: float) -> d
     }
 
 
+class _LocalBound:
+    """In-process stand-in for the shared ``multiprocessing.Value`` bound."""
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = _NO_BOUND
+
+    def get_lock(self):
+        return nullcontext()
+
+
+def _strategies(pieces: List[Piece], stock_length: float):
+    """The deterministic strategy grid: ``[(ordered_pieces, policy), ...]``.
+    Its order is the tie-break order, so append new strategies at the end."""
+    return [
+        (ordered, policy)
+        for _, ordered in _orders(pieces, stock_length)
+        for policy in _POLICIES
+    ]
+
+
+def _score(solution: dict):
+    # Material first (user priority #1), then cutting easiness
+    # (priority #2).  With the bar count fixed, the material metric
+    # is the CONSUMED SPAN (piece material is constant, so a smaller
+    # span means less kerf/wedge loss and a larger usable tail —
+    # minimizing leftover would reward the opposite).  Compared in
+    # 1 cm buckets so sub-centimeter noise never outvotes an extra
+    # saw-angle setting change; exact span is a later tie-break to
+    # stay deterministic.
+    total_used = round(sum(b['used_mm'] for b in solution['bars']), 1)
+    return (
+        solution['bars_needed'],
+        solution['remnant_bars_used'],
+        round(total_used / 10.0),
+        solution['saw_setup_changes'],
+        solution['total_pass_count'],
+        total_used,
+        -max((b['waste_mm'] for b in solution['bars']), default=0),
+    )
+
+
+def _run_strategy(ordered: List[Piece], stock_length: float, gaps: _GapTable,
+                  stock_seed: list, policy: str, bound):
+    """Pack, polish and score one strategy.  Returns ``(score, solution)``,
+    or None if it cannot place every piece or was cut off by ``bound``."""
+    bars = _pack(ordered, stock_length, gaps, stock_seed, policy, bound)
+    if bars is None:
+        return None
+    bars = [_improve_bar(b, gaps) for b in bars]
+    solution = _solution_dict(bars, stock_length, gaps.kerf)
+    score = _score(solution)
+    # Publish the bar count so slower strategies can stop early.  A stale
+    # read elsewhere only means less pruning, never a different winner.
+    with bound.get_lock():
+        bound.value = min(bound.value, score[0])
+    return score, solution
+
+
+_worker_bound = None
+_worker_gaps = None
+
+
+def _init_worker(bound, gaps):
+    global _worker_bound, _worker_gaps
+    _worker_bound, _worker_gaps = bound, gaps
+
+
+def _run_strategy_in_worker(ordered, stock_length, stock_seed, policy):
+    return _run_strategy(ordered, stock_length, _worker_gaps, stock_seed,
+                         policy, _worker_bound)
+
+
+def _run_parallel(strategies, stock_length: float, gaps: _GapTable,
+                  stock_seed: list, workers: int) -> list:
+    """Run the strategy grid on a process pool; results keep grid order.
+
+    Workers are spawned, not forked: a forked child would inherit (and on
+    exit tear down) the request's open database connection."""
+    ctx = multiprocessing.get_context('spawn')
+    bound = ctx.Value('i', _NO_BOUND)
+    with ProcessPoolExecutor(max_workers=min(workers, len(strategies)),
+                             mp_context=ctx, initializer=_init_worker,
+                             initargs=(bound, gaps)) as pool:
+        futures = [
+            pool.submit(_run_strategy_in_worker, ordered, stock_length,
+                        stock_seed, policy)
+            for ordered, policy in strategies
+        ]
+        return [f.result() for f in futures]
+
+
 def optimize(
     parts_data: list,
     stock_length_mm: int,
     kerf_mm: float = 3.0,
     stock_pieces: list = None,
+    workers: int = 1,
+    mode: str = 'greedy',
+    time_budget_s: float = 5.0,
 ) -> dict:
     """
     Compute an optimized cutting layout.
@@ -461,6 +612,14 @@ def optimize(
     kerf_mm : blade thickness (perpendicular to the blade)
     stock_pieces : optional remnant/warehouse pieces to use before opening
         fresh bars — dicts of {id, length_mm, quantity}
+    workers : processes to spread the strategy search over (1 = serial).
+        Jobs under ``_PARALLEL_MIN_PIECES`` pieces always run serially;
+        the result is identical either way.
+    mode : ``'greedy'`` (default) or ``'exact'`` — the latter also runs the
+        bounded column-generation search in ``exact.py`` for up to
+        ``time_budget_s`` seconds, keeps the greedy layout unless it finds
+        one with fewer bars, and adds an ``exact`` report (lower bound,
+        optimality gap, ``proven_optimal``) to the result.
 
     Returns a dict: bars_needed, remnant_bars_used, total_waste_mm,
     efficiency_pct, total_pass_count, nest_pairs_formed,
@@ -470,6 +629,8 @@ def optimize(
 
     Raises ``ValueError`` for invalid parts or pieces that fit nowhere.
     """
+    if mode not in ('greedy', 'exact'):
+        raise ValueError(f"Bilinmeyen optimizasyon modu: {mode!r}.")
     stock_length = float(stock_length_mm)
     kerf = float(kerf_mm)
     pieces = _build_pieces(parts_data)
@@ -508,34 +669,26 @@ def optimize(
                 f"stok boyuna sığmıyor."
             )
 
+    gaps = _GapTable(pieces, kerf)
+    strategies = _strategies(pieces, stock_length)
+    if workers > 1 and len(pieces) >= _PARALLEL_MIN_PIECES:
+        results = _run_parallel(strategies, stock_length, gaps, stock_seed,
+                                workers)
+    else:
+        bound = _LocalBound()
+        results = [
+            _run_strategy(ordered, stock_length, gaps, stock_seed, policy, bound)
+            for ordered, policy in strategies
+        ]
+
+    # Lowest score wins; strategy index breaks ties exactly like the serial
+    # "first strictly better" scan did.
     best = None
-    for _, ordered in _orders(pieces, stock_length):
-        for policy in ('first', 'best_end', 'best_gap'):
-            bars = _pack(ordered, stock_length, kerf, stock_seed, policy)
-            if bars is None:
-                continue
-            bars = [_improve_bar(b, kerf) for b in bars]
-            solution = _solution_dict(bars, stock_length, kerf)
-            # Material first (user priority #1), then cutting easiness
-            # (priority #2).  With the bar count fixed, the material metric
-            # is the CONSUMED SPAN (piece material is constant, so a smaller
-            # span means less kerf/wedge loss and a larger usable tail —
-            # minimizing leftover would reward the opposite).  Compared in
-            # 1 cm buckets so sub-centimeter noise never outvotes an extra
-            # saw-angle setting change; exact span is a later tie-break to
-            # stay deterministic.
-            total_used = round(sum(b['used_mm'] for b in solution['bars']), 1)
-            score = (
-                solution['bars_needed'],
-                solution['remnant_bars_used'],
-                round(total_used / 10.0),
-                solution['saw_setup_changes'],
-                solution['total_pass_count'],
-                total_used,
-                -max((b['waste_mm'] for b in solution['bars']), default=0),
-            )
-            if best is None or score < best[0]:
-                best = (score, solution)
+    for outcome in results:
+        if outcome is None:
+            continue
+        if best is None or outcome[0] < best[0]:
+            best = outcome
 
     if best is None:
         # Only possible when an oversize piece lost its remnant to greedy
@@ -544,4 +697,30 @@ def optimize(
             'Parçalar mevcut stok barlara yerleştirilemedi. '
             'Stok boyundan uzun parçalar için yeterli uzunlukta stok bar girin.'
         )
-    return best[1]
+    solution = best[1]
+    if mode == 'exact':
+        solution = _exact_solution(pieces, stock_length, gaps, stock_seed,
+                                   solution, time_budget_s)
+    return solution
+
+
+def _exact_solution(pieces: List[Piece], stock_length: float, gaps: _GapTable,
+                    stock_seed: list, greedy: dict, time_budget_s: float) -> dict:
+    """Run the bounded search with ``greedy`` as the incumbent."""
+    from .exact import solve_exact
+
+    if stock_seed:
+        # Which remnant each piece lands on is outside the pattern
+        # relaxation, so no bound is claimed for remnant jobs.
+        greedy['exact'] = {
+            'lower_bound_bars': None,
+            'optimality_gap_pct': None,
+            'proven_optimal': False,
+            'skipped': 'remnants',
+        }
+        return greedy
+    bars, report = solve_exact(pieces, stock_length, gaps,
+                               greedy['bars_needed'], time_budget_s)
+    solution = greedy if bars is None else _solution_dict(bars, stock_length, gaps.kerf)
+    solution['exact'] = report
+    return solution
@@ -13,11 +13,15 @@ Rendering follows CUTTING_MODEL.md:
   operator dials (measured from the fresh edge of the remaining bar).
 """
 
+import hashlib
 import io
+import json
 import os
 from datetime import date
 
 import reportlab
+from django.conf import settings
+from django.core.cache import cache
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
 from reportlab.lib import colors
@@ -574,6 +578,37 @@ def build_cutting_list_pdf(session) -> bytes:
     return buffer.getvalue()
 
 
+def cutting_list_cache_key(session) -> str:
+    """Everything the cutting list prints: the layout plus the cover fields
+    (the cover carries today's date, so entries roll over at midnight)."""
+    payload = {
+        'key': session.key,
+        'title': session.title,
+        'kerf_mm': str(session.kerf_mm),
+        'prepared_by': session.created_by.get_full_name() if session.created_by else '',
+        'date': str(date.today()),
+        'result': session.optimization_result or {},
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return 'lc-pdf:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def cached_cutting_list_pdf(session) -> bytes:
+    """``build_cutting_list_pdf`` behind the Django cache, keyed by content —
+    a re-optimized or edited session simply misses. Off unless
+    ``LINEAR_CUTTING_PDF_CACHE_TTL_S`` is set (by default only with a
+    shared cache)."""
+    ttl = settings.LINEAR_CUTTING_PDF_CACHE_TTL_S
+    if ttl <= 0:
+        return build_cutting_list_pdf(session)
+    key = cutting_list_cache_key(session)
+    pdf_bytes = cache.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = build_cutting_list_pdf(session)
+        cache.set(key, pdf_bytes, ttl)
+    return pdf_bytes
+
+
 def build_task_pdf(task) -> bytes:
     """Single-bar work-order PDF for one LinearCuttingTask."""
     USABLE_WIDTH = A4[0] - 30 * mm
@@ -2,7 +2,10 @@ from rest_framework import serializers
 from django.db import transaction
 import time
 
-from .models import LinearCuttingSession, LinearCuttingPart, LinearCuttingTask, LinearCuttingStockBar
+from .models import (
+    LinearCuttingSession, LinearCuttingPart, LinearCuttingTask, LinearCuttingStockBar,
+    LinearCuttingOptimizeJob,
+)
 from .geometry import ANGLE_TOL_DEG, MAX_ANGLE_DEG
 from tasks.serializers import BaseTimerSerializer
 
@@ -260,6 +263,23 @@ class LinearCuttingTaskDetailSerializer(serializers.ModelSerializer):
                             'passes_json', 'is_remnant_bar']
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Optimize job serializer
+# ─────────────────────────────────────────────────────────────────────────────
+
+class LinearCuttingOptimizeJobSerializer(serializers.ModelSerializer):
+    session_key = serializers.CharField(source='session_id', read_only=True)
+
+    class Meta:
+        model = LinearCuttingOptimizeJob
+        fields = [
+            'id', 'session_key', 'status', 'mode', 'kerf_mm',
+            'groups_total', 'groups_done', 'progress', 'result', 'error',
+            'created_by', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Timer serializer (extends BaseTimerSerializer with task-specific read fields)
 # ─────────────────────────────────────────────────────────────────────────────
@@ -0,0 +1,452 @@
+"""
+Session-level optimization: validation, per-item grouping and the optimize
+job runner shared by the synchronous endpoint and background jobs.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .cache import optimize_cached
+from .models import LinearCuttingOptimizeJob, LinearCuttingSession, LinearCuttingStockBar
+
+logger = logging.getLogger(__name__)
+
+
+class OptimizationError(ValueError):
+    """Session input the optimizer cannot run on; the message is user-facing."""
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _is_angled(p) -> bool:
+    return abs(float(p.angle_left_deg)) > 0.05 or abs(float(p.angle_right_deg)) > 0.05
+
+
+def validated_parts(session):
+    """
+    Load and validate a session's parts.
+
+    Returns ``(parts, height_by_item)``.  The profile dimension is a property
+    of the MATERIAL: entering it on any one row is enough — same-item parts
+    inherit it from ``height_by_item``.  Raises ``OptimizationError``.
+    """
+    parts = list(session.parts.select_related('item').all())
+    if not parts:
+        raise OptimizationError('Session has no parts. Add parts before optimizing.')
+
+    parts_without_item = [p for p in parts if not p.item_id]
+    if parts_without_item:
+        labels = ', '.join(f'"{p.label}"' for p in parts_without_item[:5])
+        raise OptimizationError(
+            f'Some parts have no catalog item assigned: {labels}. '
+            f'Assign an item to every part before optimizing.'
+        )
+
+    height_by_item: dict[int, float] = {}
+    conflict_items = set()
+    for p in parts:
+        h = float(p.profile_height_mm or 0)
+        if h > 0:
+            prev = height_by_item.get(p.item_id)
+            if prev is not None and abs(prev - h) > 0.5:
+                conflict_items.add(p.item.name if p.item else str(p.item_id))
+            height_by_item[p.item_id] = max(prev or 0, h)
+    if conflict_items:
+        raise OptimizationError(
+            'Aynı malzeme için farklı kesit ölçüleri girilmiş: '
+            + ', '.join(sorted(conflict_items))
+            + '. Malzeme başına tek bir Kesit (mm) değeri kullanın.'
+        )
+    missing_height = sorted({
+        (p.item.name if p.item else str(p.item_id))
+        for p in parts
+        if _is_angled(p)
+        and float(p.profile_height_mm or 0) <= 0
+        and p.item_id not in height_by_item
+    })
+    if missing_height:
+        raise OptimizationError(
+            'Açılı parçalar için Kesit (mm) gerekli — malzeme başına '
+            'bir satırda girilmesi yeterli: ' + ', '.join(missing_height)
+        )
+    return parts, height_by_item
+
+
+def part_dict(p, height_by_item) -> dict:
+    """Optimizer input row for one ``LinearCuttingPart``."""
+    return {
+        'id': p.id,
+        'label': p.label,
+        'job_no': p.job_no,
+        'nominal_length_mm': p.nominal_length_mm,
+        'quantity': p.quantity,
+        'angle_left_deg': float(p.angle_left_deg),
+        'angle_right_deg': float(p.angle_right_deg),
+        'profile_height_mm': (
+            float(p.profile_height_mm or 0)
+            or height_by_item.get(p.item_id, 0)
+        ),
+        'allow_rotation': p.allow_rotation,
+        'requires_bending': p.requires_bending,
+        'image_no': p.image_no,
+    }
+
+
+def group_summary(item_obj, stock_len, kerf_mm, result) -> dict:
+    """One entry of ``optimization_result['groups']``."""
+    group = {
+        'item_id': item_obj.id,
+        'item_name': item_obj.name,
+        'item_code': item_obj.code,
+        'stock_length_mm': stock_len,
+        'kerf_mm': kerf_mm,
+        'bars_needed': result['bars_needed'],
+        'remnant_bars_used': result.get('remnant_bars_used', 0),
+        'total_waste_mm': result['total_waste_mm'],
+        'efficiency_pct': result['efficiency_pct'],
+        'total_pass_count': result.get('total_pass_count', 0),
+        'saw_setup_changes': result.get('saw_setup_changes', 0),
+        'nest_pairs_formed': result.get('nest_pairs_formed', 0),
+        'material_saved_by_nesting_mm': result.get('material_saved_by_nesting_mm', 0.0),
+        'bars': result['bars'],
+    }
+    if 'exact' in result:
+        group['exact'] = result['exact']
+    return group
+
+
+def height_warnings(parts, height_by_item) -> list:
+    """
+    Plausibility guard: a tiny profile size on angled parts almost always
+    means bad data (e.g. "1" typed to pass a form) — the angle geometry,
+    stop distances and nesting savings all scale with it.
+    """
+    warnings = []
+    for item_id, h in height_by_item.items():
+        if 0 < h <= 5 and any(p.item_id == item_id and _is_angled(p) for p in parts):
+            name = next((p.item.name for p in parts
+                         if p.item_id == item_id and p.item), str(item_id))
+            warnings.append(
+                f"«{name}» için Kesit (mm) = {h:g} girilmiş. Bu değer açı "
+                f"geometrisini ölçeklendirir — boru için dış çapı, profil için "
+                f"açı düzlemindeki kesit ölçüsünü girin (örn. 90*8 boru için 90). "
+                f"Küçük bir değer kesim ölçülerini ve ayar mesafelerini bozar."
+            )
+    return warnings
+
+
+def _optimize_group(parts_data, stock_len, kerf_mm, mode, stock_rows, remnants_consumed):
+    """
+    One cached optimizer run on the remnants of ``stock_rows`` not yet in
+    ``remnants_consumed``; the remnants the result uses are added to it.
+    """
+    stock_pieces = []
+    for r in stock_rows:
+        remaining = r['quantity'] - remnants_consumed[r['id']]
+        if remaining > 0:
+            stock_pieces.append(
+                {'id': r['id'], 'length_mm': r['length_mm'], 'quantity': remaining}
+            )
+    try:
+        result = optimize_cached(
+            parts_data, stock_len, kerf_mm, stock_pieces=stock_pieces or None,
+            workers=settings.LINEAR_CUTTING_OPTIMIZER_WORKERS,
+            mode=mode,
+            time_budget_s=settings.LINEAR_CUTTING_EXACT_TIME_BUDGET_S,
+        )
+    except ValueError as exc:
+        raise OptimizationError(str(exc)) from exc
+    for bar in result['bars']:
+        if bar.get('is_remnant') and bar.get('stock_bar_id'):
+            remnants_consumed[bar['stock_bar_id']] += 1
+    return result
+
+
+def optimize_session(session, kerf_mm: float, mode: str = 'greedy', on_group=None) -> dict:
+    """
+    Optimize every ``(item_id, stock_length_mm)`` group of ``session``.
+
+    ``on_group(done, total, group)`` is called after each group (progress
+    reporting for background jobs).  Returns the ``optimization_result``
+    dict; does not save it.  Raises ``OptimizationError``.
+    """
+    parts, height_by_item = validated_parts(session)
+
+    # Group parts by (item_id, effective stock_length_mm)
+    groups_map = defaultdict(list)
+    for p in parts:
+        effective_stock = p.stock_length_mm or session.stock_length_mm
+        groups_map[(p.item_id, effective_stock)].append(p)
+
+    stock_rows = defaultdict(list)
+    for r in LinearCuttingStockBar.objects.filter(session=session).values(
+            'id', 'item_id', 'length_mm', 'quantity'):
+        stock_rows[r['item_id']].append(r)
+
+    groups = []
+    global_bar_index = 0
+    # The same physical stock bars serve every group of an item; track
+    # what earlier groups consumed so a remnant is never handed out twice.
+    remnants_consumed: dict[int, int] = defaultdict(int)
+
+    for (item_id, stock_len), group_parts in groups_map.items():
+        parts_data = [part_dict(p, height_by_item) for p in group_parts]
+        result = _optimize_group(parts_data, stock_len, kerf_mm, mode,
+                                 stock_rows[item_id], remnants_consumed)
+
+        # Assign global bar indices across all groups
+        for bar in result['bars']:
+            global_bar_index += 1
+            bar['global_bar_index'] = global_bar_index
+
+        groups.append(group_summary(group_parts[0].item, stock_len, kerf_mm, result))
+        if on_group is not None:
+            on_group(len(groups), len(groups_map), groups[-1])
+
+    optimization_result = {'groups': groups}
+    warnings = height_warnings(parts, height_by_item)
+    if warnings:
+        optimization_result['warnings'] = warnings
+    return optimization_result
+
+
+def save_optimization_result(session, kerf_mm: float, optimization_result: dict):
+    session.kerf_mm = kerf_mm
+    session.optimization_result = optimization_result
+    session.save(update_fields=['kerf_mm', 'optimization_result'])
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Background optimize jobs
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _stale_before_ms() -> int:
+    return _now_ms() - settings.LINEAR_CUTTING_JOB_STALE_S * 1000
+
+
+def fail_stale_optimize_jobs(jobs=None) -> int:
+    """
+    Mark jobs of ``jobs`` (default: all) that have been ``running`` for
+    longer than ``LINEAR_CUTTING_JOB_STALE_S`` as failed; their worker died
+    without finishing them.  Returns the number of jobs marked.
+    """
+    jobs = LinearCuttingOptimizeJob.objects.all() if jobs is None else jobs
+    return jobs.filter(
+        status=LinearCuttingOptimizeJob.STATUS_RUNNING, started_at__lt=_stale_before_ms(),
+    ).update(
+        status=LinearCuttingOptimizeJob.STATUS_FAILED,
+        error='Optimize job timed out.', finished_at=_now_ms(),
+    )
+
+
+def run_optimize_job(job_id: int):
+    """
+    Execute one queued ``LinearCuttingOptimizeJob``.
+
+    Claimed with a conditional UPDATE, so a redelivered task (Cloud Tasks
+    retries) never runs the same job twice, unless the run it finds has
+    been ``running`` for longer than ``LINEAR_CUTTING_JOB_STALE_S`` (its
+    worker crashed): that one is claimed again.  Every write is tied to the
+    claim's ``started_at``, so a superseded or failed run changes nothing.
+    Progress is written per group.
+    """
+    started_at = _now_ms()
+    claimed = LinearCuttingOptimizeJob.objects.filter(
+        Q(status=LinearCuttingOptimizeJob.STATUS_QUEUED)
+        | Q(status=LinearCuttingOptimizeJob.STATUS_RUNNING, started_at__lt=_stale_before_ms()),
+        pk=job_id,
+    ).update(
+        status=LinearCuttingOptimizeJob.STATUS_RUNNING, started_at=started_at,
+        groups_done=0, progress=[],
+    )
+    if not claimed:
+        return
+    this_run = LinearCuttingOptimizeJob.objects.filter(
+        pk=job_id, status=LinearCuttingOptimizeJob.STATUS_RUNNING, started_at=started_at,
+    )
+    job = LinearCuttingOptimizeJob.objects.select_related('session').get(pk=job_id)
+    kerf_mm = float(job.kerf_mm)
+    progress = []
+
+    def on_group(done, total, group):
+        progress.append({
+            'item_id': group['item_id'],
+            'item_name': group['item_name'],
+            'stock_length_mm': group['stock_length_mm'],
+            'bars_needed': group['bars_needed'],
+            'efficiency_pct': group['efficiency_pct'],
+        })
+        this_run.update(groups_done=done, groups_total=total, progress=progress)
+
+    try:
+        result = optimize_session(job.session, kerf_mm, job.mode, on_group=on_group)
+    except OptimizationError as exc:
+        _finish_job(this_run, LinearCuttingOptimizeJob.STATUS_FAILED, error=str(exc))
+        return
+    except Exception as exc:
+        logger.exception('LC optimize job %s failed', job_id)
+        _finish_job(this_run, LinearCuttingOptimizeJob.STATUS_FAILED, error=str(exc))
+        return
+
+    with transaction.atomic():
+        session = LinearCuttingSession.objects.select_for_update().get(pk=job.session_id)
+        if _finish_job(this_run, LinearCuttingOptimizeJob.STATUS_SUCCEEDED, result=result):
+            save_optimization_result(session, kerf_mm, result)
+
+
+def _finish_job(this_run, status, result=None, error='') -> int:
+    return this_run.update(status=status, result=result, error=error, finished_at=_now_ms())
+
+
+def _run_job_in_thread(job_id: int):
+    try:
+        run_optimize_job(job_id)
+    finally:
+        connection.close()
+
+
+def enqueue_optimize_job(job):
+    """
+    Hand ``job`` to a worker once the creating transaction commits: a Cloud
+    Tasks push to the internal run endpoint in production, or a background
+    thread in this process when ``USE_CLOUD_TASKS`` is off (local dev).
+    """
+    if not getattr(settings, 'USE_CLOUD_TASKS', True):
+        transaction.on_commit(lambda: threading.Thread(
+            target=_run_job_in_thread, args=(job.pk,), daemon=True,
+        ).start())
+        return
+
+    def _push():
+        try:
+            from .tasks import enqueue_run_optimize_job
+            enqueue_run_optimize_job(job.pk)
+        except Exception:
+            logger.exception('Failed to enqueue LC optimize job %s', job.pk)
+            _finish_job(
+                LinearCuttingOptimizeJob.objects.filter(
+                    pk=job.pk, status=LinearCuttingOptimizeJob.STATUS_QUEUED),
+                LinearCuttingOptimizeJob.STATUS_FAILED, error='İş kuyruğa alınamadı.',
+            )
+
+    transaction.on_commit(_push)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cross-session batch optimization
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _material_totals(groups) -> dict:
+    return {
+        'bars_needed': sum(g['bars_needed'] for g in groups),
+        'remnant_bars_used': sum(g['remnant_bars_used'] for g in groups),
+        'stock_used_mm': sum(b['stock_length_mm'] for g in groups for b in g['bars']),
+        'total_waste_mm': sum(g['total_waste_mm'] for g in groups),
+    }
+
+
+def optimize_batch(sessions, kerf_mm: float, mode: str = 'greedy') -> dict:
+    """
+    Optimize several sessions as one job.
+
+    Pieces are pooled per ``(item_id, stock_length_mm)`` across sessions and
+    packed against the remnants of all of them; every bar is then attributed
+    to the sessions whose pieces it carries (``bar['session_keys']`` — more
+    than one key means the bar is shared).  The plan is compared with
+    optimizing each session on its own, so ``savings`` is what pooling buys.
+
+    A planning report: nothing is saved — sessions still confirm their own
+    ``optimization_result``.  Raises ``OptimizationError``.
+    """
+    sessions = list(sessions)
+    session_of_part: dict[int, str] = {}
+    height_by_item: dict[int, float] = {}
+    groups_map = defaultdict(list)
+    all_parts = []
+    for session in sessions:
+        try:
+            parts, heights = validated_parts(session)
+        except OptimizationError as exc:
+            raise OptimizationError(f'{session.key}: {exc}') from exc
+        for item_id, h in heights.items():
+            prev = height_by_item.get(item_id)
+            if prev is not None and abs(prev - h) > 0.5:
+                name = next(p.item.name for p in parts if p.item_id == item_id)
+                raise OptimizationError(
+                    f'Oturumlar arasında «{name}» için farklı Kesit (mm) değerleri var.'
+                )
+            height_by_item[item_id] = max(prev or 0, h)
+        for p in parts:
+            session_of_part[p.id] = session.key
+            groups_map[(p.item_id, p.stock_length_mm or session.stock_length_mm)].append(p)
+        all_parts.extend(parts)
+
+    # Baseline: each session alone (group results come from the cache when
+    # the sessions were optimized before).
+    separate_bars = defaultdict(int)
+    separate_groups = []
+    for session in sessions:
+        for g in optimize_session(session, kerf_mm, mode)['groups']:
+            separate_bars[(g['item_id'], g['stock_length_mm'])] += g['bars_needed']
+            separate_groups.append(g)
+
+    stock_rows = defaultdict(list)
+    for r in LinearCuttingStockBar.objects.filter(
+            session__in=[s.key for s in sessions]).values(
+            'id', 'item_id', 'length_mm', 'quantity'):
+        stock_rows[r['item_id']].append(r)
+
+    per_session = {
+        s.key: {'session_key': s.key, 'title': s.title,
+                'bar_indices': [], 'shared_bar_count': 0}
+        for s in sessions
+    }
+    groups = []
+    global_bar_index = 0
+    remnants_consumed: dict[int, int] = defaultdict(int)
+
+    for (item_id, stock_len), group_parts in groups_map.items():
+        parts_data = [part_dict(p, height_by_item) for p in group_parts]
+        result = _optimize_group(parts_data, stock_len, kerf_mm, mode,
+                                 stock_rows[item_id], remnants_consumed)
+
+        for bar in result['bars']:
+            global_bar_index += 1
+            bar['global_bar_index'] = global_bar_index
+            keys = list(dict.fromkeys(session_of_part[c['part_id']] for c in bar['cuts']))
+            bar['session_keys'] = keys
+            for key in keys:
+                per_session[key]['bar_indices'].append(global_bar_index)
+                if len(keys) > 1:
+                    per_session[key]['shared_bar_count'] += 1
+
+        group = group_summary(group_parts[0].item, stock_len, kerf_mm, result)
+        group['session_keys'] = sorted({session_of_part[p.id] for p in group_parts})
+        group['separate_bars_needed'] = separate_bars[(item_id, stock_len)]
+        groups.append(group)
+
+    pooled = _material_totals(groups)
+    separate = _material_totals(separate_groups)
+    batch_result = {
+        'session_keys': [s.key for s in sessions],
+        'groups': groups,
+        'sessions': list(per_session.values()),
+        'pooled': pooled,
+        'separate': separate,
+        'savings': {
+            'bars_saved': separate['bars_needed'] - pooled['bars_needed'],
+            'stock_saved_mm': separate['stock_used_mm'] - pooled['stock_used_mm'],
+            'waste_saved_mm': separate['total_waste_mm'] - pooled['total_waste_mm'],
+        },
+    }
+    warnings = height_warnings(all_parts, height_by_item)
+    if warnings:
+        batch_result['warnings'] = warnings
+    return batch_result
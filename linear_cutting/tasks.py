@@ -0,0 +1,40 @@
+"""
+Cloud Tasks integration for background optimize jobs.
+
+enqueue_run_optimize_job() creates an HTTP push task that calls:
+    POST /linear_cutting/tasks/run-optimize-job/
+
+The callback view (RunOptimizeJobTaskView) runs the job on whichever
+Cloud Run instance receives it, outside the user's request.
+"""
+from __future__ import annotations
+
+import json
+
+from django.conf import settings
+
+
+def enqueue_run_optimize_job(job_id: int) -> None:
+    from google.cloud import tasks_v2
+
+    service_url = settings.CLOUD_RUN_SERVICE_URL
+    task = {
+        'http_request': {
+            'http_method': tasks_v2.HttpMethod.POST,
+            'url': f'{service_url}/linear_cutting/tasks/run-optimize-job/',
+            'headers': {
+                'Content-Type': 'application/json',
+                'X-Task-Secret': settings.QUEUE_SECRET,
+            },
+            'body': json.dumps({'job_id': job_id}).encode('utf-8'),
+            'oidc_token': {
+                'service_account_email': settings.CLOUD_TASKS_SERVICE_ACCOUNT,
+                'audience': service_url,
+            },
+        }
+    }
+
+    client = tasks_v2.CloudTasksClient()
+    parent = (f'projects/{settings.GCP_PROJECT_ID}/locations/{settings.GCP_LOCATION}'
+              f'/queues/{settings.LINEAR_CUTTING_TASKS_QUEUE}')
+    client.create_task(parent=parent, task=task)
@@ -7,6 +7,9 @@ Pure-python (no DB): run with
 
 import math
 import unittest
+from unittest import mock
+
+from . import cache, optimizer
 
 from .geometry import (
     boundary_gap_mm,
@@ -428,6 +431,127 @@ class ProductionRegressionTests(unittest.TestCase):
                     self.assertNotEqual(str(val), '-0.0')
 
 
+class ParallelSearchTests(unittest.TestCase):
+    """The process-pool strategy search must reproduce the serial winner."""
+
+    PARTS = ProductionRegressionTests.PARTS + [
+        part('KARE', 1400, qty=4),
+        part('PARA', 500, qty=5, al=45, ar=-45, h=70),
+    ]
+
+    def test_parallel_matches_serial(self):
+        serial = optimize(self.PARTS, 6000, kerf_mm=3)
+        with mock.patch.object(optimizer, '_PARALLEL_MIN_PIECES', 0):
+            parallel = optimize(self.PARTS, 6000, kerf_mm=3, workers=2)
+        self.assertEqual(parallel, serial)
+
+    def test_bound_stops_losing_strategy(self):
+        pieces = optimizer._build_pieces([part('P', 2000, qty=4)])
+        gaps = optimizer._GapTable(pieces, 3.0)
+        bound = optimizer._LocalBound()
+        bound.value = 1     # a finished strategy already needed one bar
+        self.assertIsNone(
+            optimizer._pack(pieces, 6000, gaps, [], 'first', bound))
+        bound.value = 2
+        self.assertEqual(
+            len(optimizer._pack(pieces, 6000, gaps, [], 'first', bound)), 2)
+
+
+class ExactModeTests(unittest.TestCase):
+    """mode='exact': bounded search with the greedy layout as incumbent."""
+
+    # Greedy opens 8 bars here; 7 is reachable and the LP bound proves it.
+    PARTS = [
+        part('P1', 1625, qty=7, al=45, ar=45, h=100, id=1),
+        part('P2', 1850, qty=9, al=45, ar=45, h=100, id=2),
+        part('P3', 2880, qty=4, al=45, ar=-45, h=100, id=3),
+    ]
+
+    def test_beats_greedy_and_proves_optimal(self):
+        greedy = optimize(self.PARTS, 6000, kerf_mm=3)
+        exact = optimize(self.PARTS, 6000, kerf_mm=3, mode='exact')
+        self.assertEqual(greedy['bars_needed'], 8)
+        self.assertEqual(exact['bars_needed'], 7)
+        self.assertTrue(exact['exact']['proven_optimal'])
+        self.assertEqual(exact['exact']['optimality_gap_pct'], 0.0)
+        self.assertEqual(len(all_cuts(exact)), 20)
+        for bar in exact['bars']:
+            self.assertLessEqual(bar['used_mm'], bar['stock_length_mm'])
+
+    def test_zero_budget_keeps_greedy_with_valid_bound(self):
+        greedy = optimize(self.PARTS, 6000, kerf_mm=3)
+        exact = optimize(self.PARTS, 6000, kerf_mm=3, mode='exact',
+                         time_budget_s=0)
+        self.assertEqual(exact['bars'], greedy['bars'])
+        self.assertLessEqual(exact['exact']['lower_bound_bars'], 7)
+        self.assertFalse(exact['exact']['improved_on_greedy'])
+
+    def test_remnant_jobs_claim_no_bound(self):
+        res = optimize([part('P', 1000, qty=3)], 6000, kerf_mm=3,
+                       stock_pieces=[{'id': 9, 'length_mm': 2500, 'quantity': 1}],
+                       mode='exact')
+        self.assertIsNone(res['exact']['lower_bound_bars'])
+        self.assertFalse(res['exact']['proven_optimal'])
+
+    def test_unknown_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            optimize([part('P', 1000)], 6000, mode='fast')
+
+
+class GapTableTests(unittest.TestCase):
+
+    def test_lookups_match_geometry(self):
+        pieces = optimizer._build_pieces([
+            part('A', 1000, qty=2, al=45, ar=-45, h=100),
+            part('B', 800, al=30, ar=0, h=100),
+            part('C', 600, al=22.5, ar=22.5, h=60),
+        ])
+        gaps = optimizer._GapTable(pieces, 3.0)
+        orients = [o for p in pieces for o in p.orientations()]
+        for a in orients:
+            for b in orients:
+                self.assertEqual(
+                    gaps.gap[(a.ang_r, a.height, b.ang_l, b.height)],
+                    boundary_gap_mm(a.ang_r, b.ang_l, a.height, b.height, 3.0))
+            self.assertEqual(gaps.axial[a.ang_l], kerf_axial_mm(3.0, a.ang_l))
+
+
+class OptimizeCacheTests(unittest.TestCase):
+
+    PARTS = [part('A', 1200, qty=3, al=45, ar=-45, h=80, id=1),
+             part('B', 900, qty=2, id=2)]
+
+    def setUp(self):
+        cache.group_cache.clear()
+
+    def test_unchanged_group_is_served_from_cache(self):
+        first = cache.optimize_cached(self.PARTS, 6000, 3.0)
+        first['bars'][0]['global_bar_index'] = 1     # callers decorate results
+        second = cache.optimize_cached(self.PARTS, 6000, 3.0)
+        self.assertEqual(second, optimize(self.PARTS, 6000, kerf_mm=3))
+        self.assertEqual(cache.group_cache.stats()['hits'], 1)
+
+    def test_changed_inputs_miss(self):
+        cache.optimize_cached(self.PARTS, 6000, 3.0)
+        cache.optimize_cached(self.PARTS, 6000, 2.5)
+        edited = [dict(self.PARTS[0], quantity=4), self.PARTS[1]]
+        cache.optimize_cached(edited, 6000, 3.0)
+        cache.optimize_cached(self.PARTS, 6000, 3.0,
+                              stock_pieces=[{'id': 1, 'length_mm': 3000, 'quantity': 1}])
+        self.assertEqual(cache.group_cache.stats()['hits'], 0)
+        self.assertEqual(cache.group_cache.stats()['misses'], 4)
+
+    def test_lru_eviction(self):
+        lru = cache.LRUCache(2)
+        lru.put('a', 1)
+        lru.put('b', 2)
+        lru.get('a')
+        lru.put('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.stats()['hit_rate'], round(2 / 3, 4))
+
+
 class BackCompatKeysTests(unittest.TestCase):
 
     def test_result_keys(self):
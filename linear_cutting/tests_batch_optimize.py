@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from linear_cutting.models import LinearCuttingPart, LinearCuttingSession
+from procurement.models import Item
+
+User = get_user_model()
+
+URL = '/linear_cutting/sessions/batch-optimize/'
+
+
+class BatchOptimizeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='lc-batch')
+        cls.item = Item.objects.create(code='0300 0000 0002 000 000', name='60x60 PROFİL', unit='metre')
+        cls.sessions = []
+        for key, length in (('LC-B-1', 3500), ('LC-B-2', 2400)):
+            session = LinearCuttingSession.objects.create(
+                key=key, title=key, stock_length_mm=6000, created_by=cls.user)
+            LinearCuttingPart.objects.create(
+                session=session, item=cls.item, label=key, nominal_length_mm=length, quantity=1)
+            cls.sessions.append(session)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_pooled_plan_shares_a_bar(self):
+        resp = self.client.post(URL, {'session_keys': ['LC-B-1', 'LC-B-2']}, format='json')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        data = resp.data
+        self.assertEqual(data['separate']['bars_needed'], 2)
+        self.assertEqual(data['pooled']['bars_needed'], 1)
+        self.assertEqual(data['savings']['bars_saved'], 1)
+        self.assertEqual(data['savings']['stock_saved_mm'], 6000)
+
+        [group] = data['groups']
+        self.assertEqual(group['separate_bars_needed'], 2)
+        [bar] = group['bars']
+        self.assertEqual(bar['session_keys'], ['LC-B-1', 'LC-B-2'])
+        for s in data['sessions']:
+            self.assertEqual((s['bar_indices'], s['shared_bar_count']), ([1], 1))
+
+        # A report only — sessions keep their own result.
+        for session in self.sessions:
+            session.refresh_from_db()
+            self.assertIsNone(session.optimization_result)
+
+    def test_rejects_bad_input(self):
+        self.assertEqual(self.client.post(URL, {'session_keys': ['LC-B-1']},
+                                          format='json').status_code, 400)
+        self.assertEqual(self.client.post(URL, {'session_keys': ['LC-B-1', 'nope']},
+                                          format='json').status_code, 404)
+        self.assertEqual(self.client.post(URL, {'session_keys': 'LC-B-1'},
+                                          format='json').status_code, 400)
@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from linear_cutting.models import LinearCuttingOptimizeJob, LinearCuttingPart, LinearCuttingSession
+from linear_cutting.services import run_optimize_job
+from procurement.models import Item
+
+User = get_user_model()
+
+
+@override_settings(USE_CLOUD_TASKS=True, QUEUE_SECRET='s3cret')
+class OptimizeJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='lc-user')
+        cls.item = Item.objects.create(code='0300 0000 0001 000 000', name='40x40 PROFİL', unit='metre')
+        cls.session = LinearCuttingSession.objects.create(
+            key='LC-TEST-1', title='t', stock_length_mm=6000, created_by=cls.user)
+        LinearCuttingPart.objects.create(
+            session=cls.session, item=cls.item, label='A', nominal_length_mm=2500, quantity=3)
+        LinearCuttingPart.objects.create(
+            session=cls.session, item=cls.item, label='B', nominal_length_mm=1200, quantity=4)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def url(self, suffix=''):
+        return f'/linear_cutting/sessions/{self.session.key}/optimize/{suffix}'
+
+    def queue_job(self):
+        with mock.patch('linear_cutting.tasks.enqueue_run_optimize_job') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(self.url(), {'async': True, 'kerf_mm': 3}, format='json')
+        self.assertEqual(resp.status_code, 202)
+        enqueue.assert_called_once_with(resp.data['id'])
+        return resp.data['id']
+
+    def test_async_job_runs_once_and_saves_result(self):
+        job_id = self.queue_job()
+        self.assertEqual(LinearCuttingOptimizeJob.objects.get(pk=job_id).status, 'queued')
+
+        run_optimize_job(job_id)
+        run_optimize_job(job_id)   # redelivered task: no-op
+
+        job = LinearCuttingOptimizeJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, 'succeeded')
+        self.assertEqual((job.groups_done, job.groups_total), (1, 1))
+        self.assertEqual(len(job.progress), 1)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.optimization_result, job.result)
+
+        resp = self.client.get(self.url('status/'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['id'], job_id)
+        self.assertEqual(resp.data['status'], 'succeeded')
+
+    def test_sync_and_async_results_match(self):
+        sync = self.client.post(self.url(), {'kerf_mm': 3}, format='json')
+        self.assertEqual(sync.status_code, 200)
+        job_id = self.queue_job()
+        run_optimize_job(job_id)
+        self.assertEqual(LinearCuttingOptimizeJob.objects.get(pk=job_id).result, sync.data)
+
+    def test_async_validates_before_queueing(self):
+        LinearCuttingPart.objects.create(
+            session=self.session, label='no item', nominal_length_mm=500, quantity=1)
+        resp = self.client.post(self.url(), {'async': True}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(LinearCuttingOptimizeJob.objects.exists())
+
+    def test_status_unknown_job(self):
+        self.assertEqual(self.client.get(self.url('status/')).status_code, 404)
+        self.assertEqual(self.client.get(self.url('status/?job_id=x')).status_code, 400)
+
+    def test_task_endpoint_requires_secret(self):
+        job_id = self.queue_job()
+        url = '/linear_cutting/tasks/run-optimize-job/'
+        resp = self.client.post(url, {'job_id': job_id}, format='json')
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.post(url, {'job_id': job_id}, format='json',
+                                HTTP_X_TASK_SECRET='s3cret')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(LinearCuttingOptimizeJob.objects.get(pk=job_id).status, 'succeeded')
+
+    def test_crashed_running_job_is_retried_or_failed(self):
+        job_id = self.queue_job()
+        stale = LinearCuttingOptimizeJob.objects.filter(pk=job_id)
+        stale.update(status='running', started_at=1)   # worker died long ago
+        run_optimize_job(job_id)   # redelivered task takes it over
+        self.assertEqual(stale.get().status, 'succeeded')
+
+        job_id = self.queue_job()
+        stale = LinearCuttingOptimizeJob.objects.filter(pk=job_id)
+        stale.update(status='running', started_at=1)
+        resp = self.client.get(self.url(f'status/?job_id={job_id}'))
+        self.assertEqual((resp.data['status'], resp.data['error']), ('failed', 'Optimize job timed out.'))
+
+        with override_settings(LINEAR_CUTTING_JOB_STALE_S=10 ** 12):
+            job_id = self.queue_job()
+            LinearCuttingOptimizeJob.objects.filter(pk=job_id).update(status='running', started_at=1)
+            run_optimize_job(job_id)   # still within the cutoff: left alone
+            self.assertEqual(LinearCuttingOptimizeJob.objects.get(pk=job_id).status, 'running')
+
+    def test_failed_enqueue_fails_the_job(self):
+        client = mock.Mock()
+        client.create_task.side_effect = RuntimeError('queue unavailable')
+        with mock.patch('google.cloud.tasks_v2.CloudTasksClient', return_value=client):
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(self.url(), {'async': True, 'kerf_mm': 3}, format='json')
+        self.assertEqual(resp.status_code, 202)
+        client.create_task.assert_called_once()
+        job = LinearCuttingOptimizeJob.objects.get(pk=resp.data['id'])
+        self.assertEqual((job.status, job.error), ('failed', 'İş kuyruğa alınamadı.'))
+        self.assertIsNotNone(job.finished_at)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from linear_cutting import pdf
+from linear_cutting.models import LinearCuttingPart, LinearCuttingSession
+from procurement.models import Item
+
+User = get_user_model()
+
+
+class CuttingListPDFTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='lc-pdf')
+        item = Item.objects.create(code='0300 0000 0003 000 000', name='80x40 PROFİL', unit='metre')
+        cls.session = LinearCuttingSession.objects.create(
+            key='LC-PDF-1', title='PDF', stock_length_mm=6000, created_by=cls.user)
+        LinearCuttingPart.objects.create(
+            session=cls.session, item=item, label='A', nominal_length_mm=1500,
+            quantity=5, angle_left_deg=45, profile_height_mm=80)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = f'/linear_cutting/sessions/{self.session.key}/pdf/'
+
+    def download(self):
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('LC-PDF-1_cutting_list.pdf', resp['Content-Disposition'])
+        return resp.content
+
+    @override_settings(LINEAR_CUTTING_PDF_CACHE_TTL_S=3600)
+    def test_repeat_download_is_cached_until_the_layout_changes(self):
+        self.assertEqual(self.client.get(self.url).status_code, 400)
+        self.client.post(f'/linear_cutting/sessions/{self.session.key}/optimize/', {}, format='json')
+
+        with mock.patch.object(pdf, 'build_cutting_list_pdf',
+                               wraps=pdf.build_cutting_list_pdf) as build:
+            first = self.download()
+            second = self.download()
+            self.assertTrue(first.startswith(b'%PDF'))
+            self.assertEqual(first, second)
+            self.assertEqual(build.call_count, 1)
+
+            self.client.post(f'/linear_cutting/sessions/{self.session.key}/optimize/',
+                             {'kerf_mm': 5}, format='json')
+            self.download()
+            self.assertEqual(build.call_count, 2)
@@ -6,6 +6,9 @@ from .views import (
     LinearCuttingTaskViewSet,
     LinearCuttingStockBarViewSet,
     OptimizeView,
+    BatchOptimizeView,
+    OptimizeStatusView,
+    RunOptimizeJobTaskView,
     ConfirmView,
     CuttingListPDFView,
     TaskPDFView,
@@ -28,10 +31,15 @@ router.register(r'stock-bars', LinearCuttingStockBarViewSet, basename='stock-bar
 
 urlpatterns = [
     # Session actions
+    path('sessions/batch-optimize/', BatchOptimizeView.as_view(), name='session-batch-optimize'),
     path('sessions/<str:key>/optimize/', OptimizeView.as_view(), name='session-optimize'),
+    path('sessions/<str:key>/optimize/status/', OptimizeStatusView.as_view(), name='session-optimize-status'),
     path('sessions/<str:key>/confirm/', ConfirmView.as_view(), name='session-confirm'),
     path('sessions/<str:key>/pdf/', CuttingListPDFView.as_view(), name='session-pdf'),
 
+    # Internal Cloud Tasks callback
+    path('tasks/run-optimize-job/', RunOptimizeJobTaskView.as_view(), name='run-optimize-job-task'),
+
     # Task actions
     path('tasks/<str:key>/pdf/', TaskPDFView.as_view(), name='task-pdf'),
     path('tasks/mark-completed/', MarkTaskCompletedView.as_view(), name='mark-task-completed'),
@@ -1,3 +1,4 @@
+import json
 import time
 import logging
 from collections import defaultdict
@@ -5,7 +6,10 @@ from decimal import Decimal
 from django.db import models, transaction
 from django.db.models import Q
 from django.utils import timezone
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
@@ -14,7 +18,10 @@ from rest_framework import status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 
-from .models import LinearCuttingSession, LinearCuttingPart, LinearCuttingTask, LinearCuttingStockBar
+from .models import (
+    LinearCuttingSession, LinearCuttingPart, LinearCuttingTask, LinearCuttingStockBar,
+    LinearCuttingOptimizeJob,
+)
 from .serializers import (
     LinearCuttingSessionListSerializer,
     LinearCuttingSessionDetailSerializer,
@@ -23,10 +30,22 @@ from .serializers import (
     LinearCuttingTaskDetailSerializer,
     LinearCuttingTimerSerializer,
     LinearCuttingStockBarSerializer,
+    LinearCuttingOptimizeJobSerializer,
     resequence_session_parts,
 )
-from .optimizer import optimize
-from .pdf import build_cutting_list_pdf, build_task_pdf
+from .cache import group_cache
+from .services import (
+    OptimizationError,
+    enqueue_optimize_job,
+    fail_stale_optimize_jobs,
+    optimize_batch,
+    optimize_session,
+    run_optimize_job,
+    save_optimization_result,
+    validated_parts,
+)
+from .pdf import build_task_pdf, cached_cutting_list_pdf
+from core.internal_tasks import verify_task_secret
 from tasks.views import (
     GenericTimerStartView,
     GenericTimerStopView,
@@ -40,6 +59,28 @@ from tasks.views import (
 logger = logging.getLogger(__name__)
 
 
+def _truthy(value) -> bool:
+    return value is True or str(value).lower() in ('1', 'true', 'yes')
+
+
+def _optimize_options(data, default_kerf):
+    """``(kerf_mm, mode)`` from an optimize request body; ValueError if invalid."""
+    raw_kerf = data.get('kerf_mm', None)
+    try:
+        kerf_mm = float(raw_kerf) if raw_kerf not in (None, '') else float(default_kerf)
+    except (TypeError, ValueError):
+        raise ValueError('Geçersiz testere payı (kerf) değeri.')
+    if kerf_mm < 0:
+        raise ValueError('Testere payı negatif olamaz.')
+
+    # 'exact' adds a bounded search + optimality gap per group (opt-in:
+    # it spends up to LINEAR_CUTTING_EXACT_TIME_BUDGET_S per group).
+    mode = data.get('mode') or 'greedy'
+    if mode not in ('greedy', 'exact'):
+        raise ValueError("mode must be 'greedy' or 'exact'.")
+    return kerf_mm, mode
+
+
 def _notify_stock_entry_complete(session, actor):
     try:
         from notifications.service import notify, render_notification
@@ -100,9 +141,15 @@ class OptimizeView(APIView):
     POST /linear_cutting/sessions/{key}/optimize/
 
     Groups parts by (item_id, stock_length_mm) and runs FFD bin-packing
-    separately for each group.  Result is stored on the session as:
+    separately for each group.  Groups whose inputs did not change since an
+    earlier run are served from ``cache.group_cache``.  Result is stored on
+    the session as:
         {"groups": [{item_id, item_name, item_code, stock_length_mm, kerf_mm,
                      bars_needed, total_waste_mm, efficiency_pct, bars: [...]}]}
+
+    With ``{"async": true}`` the run is queued as a LinearCuttingOptimizeJob
+    instead and 202 + the job is returned at once; poll
+    ``GET .../optimize/status/?job_id=`` for progress and the final result.
     """
     permission_classes = [IsAuthenticated]
 
@@ -114,171 +161,126 @@ class OptimizeView(APIView):
         except LinearCuttingSession.DoesNotExist:
             return Response({'error': 'Session not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        raw_kerf = request.data.get('kerf_mm', None)
         try:
-            kerf_mm = float(raw_kerf) if raw_kerf not in (None, '') else float(session.kerf_mm)
-        except (TypeError, ValueError):
-            return Response({'error': 'Geçersiz testere payı (kerf) değeri.'},
+            kerf_mm, mode = _optimize_options(request.data, session.kerf_mm)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if _truthy(request.data.get('async')):
+            try:
+                validated_parts(session)
+            except OptimizationError as exc:
+                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                job = LinearCuttingOptimizeJob.objects.create(
+                    session=session,
+                    mode=mode,
+                    kerf_mm=kerf_mm,
+                    created_by=request.user,
+                    created_at=int(time.time() * 1000),
+                )
+                enqueue_optimize_job(job)
+            return Response(LinearCuttingOptimizeJobSerializer(job).data,
+                            status=status.HTTP_202_ACCEPTED)
+
+        try:
+            optimization_result = optimize_session(session, kerf_mm, mode)
+        except OptimizationError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        save_optimization_result(session, kerf_mm, optimization_result)
+
+        logger.debug('LC optimize %s: group cache %s', session.key, group_cache.stats())
+        return Response(optimization_result)
+
+
+class BatchOptimizeView(APIView):
+    """
+    POST /linear_cutting/sessions/batch-optimize/
+
+    Body: {"session_keys": ["LC-0001", "LC-0002", ...], "kerf_mm"?: 3, "mode"?: "greedy"}
+
+    Optimizes the sessions together — pieces pooled per (item_id,
+    stock_length_mm), remnants of every session shared — and reports the
+    pooled plan, which sessions each bar serves, and the material saved
+    versus optimizing each session separately.  Nothing is saved.
+    ``kerf_mm`` defaults to the sessions' kerf when they all agree.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        keys = request.data.get('session_keys')
+        if not isinstance(keys, list) or not all(isinstance(k, str) for k in keys):
+            return Response({'error': 'session_keys must be a list of session keys.'},
                             status=status.HTTP_400_BAD_REQUEST)
-        if kerf_mm < 0:
-            return Response({'error': 'Testere payı negatif olamaz.'},
+        keys = list(dict.fromkeys(keys))
+        if len(keys) < 2:
+            return Response({'error': 'Select at least two sessions.'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        parts_qs = list(session.parts.select_related('item').all())
-        if not parts_qs:
-            return Response(
-                {'error': 'Session has no parts. Add parts before optimizing.'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        by_key = LinearCuttingSession.objects.in_bulk(keys)
+        missing = [k for k in keys if k not in by_key]
+        if missing:
+            return Response({'error': f'Session not found: {", ".join(missing)}.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        sessions = [by_key[k] for k in keys]
 
-        # Check all parts have an item assigned
-        parts_without_item = [p for p in parts_qs if not p.item_id]
-        if parts_without_item:
-            labels = ', '.join(f'"{p.label}"' for p in parts_without_item[:5])
-            return Response(
-                {'error': f'Some parts have no catalog item assigned: {labels}. Assign an item to every part before optimizing.'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        kerfs = {s.kerf_mm for s in sessions}
+        if request.data.get('kerf_mm') in (None, '') and len(kerfs) > 1:
+            return Response({'error': 'Sessions use different kerf values; pass kerf_mm.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            kerf_mm, mode = _optimize_options(request.data, sessions[0].kerf_mm)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # The profile dimension is a property of the MATERIAL: entering it on
-        # any one row is enough — same-item parts inherit it here.
-        height_by_item: dict[int, float] = {}
-        conflict_items = set()
-        for p in parts_qs:
-            h = float(p.profile_height_mm or 0)
-            if h > 0:
-                prev = height_by_item.get(p.item_id)
-                if prev is not None and abs(prev - h) > 0.5:
-                    conflict_items.add(p.item.name if p.item else str(p.item_id))
-                height_by_item[p.item_id] = max(prev or 0, h)
-        if conflict_items:
-            return Response(
-                {'error': 'Aynı malzeme için farklı kesit ölçüleri girilmiş: '
-                          + ', '.join(sorted(conflict_items))
-                          + '. Malzeme başına tek bir Kesit (mm) değeri kullanın.'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        missing_height = sorted({
-            (p.item.name if p.item else str(p.item_id))
-            for p in parts_qs
-            if (abs(float(p.angle_left_deg)) > 0.05 or abs(float(p.angle_right_deg)) > 0.05)
-            and float(p.profile_height_mm or 0) <= 0
-            and p.item_id not in height_by_item
-        })
-        if missing_height:
-            return Response(
-                {'error': 'Açılı parçalar için Kesit (mm) gerekli — malzeme başına '
-                          'bir satırda girilmesi yeterli: ' + ', '.join(missing_height)},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        try:
+            batch_result = optimize_batch(sessions, kerf_mm, mode)
+        except OptimizationError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(batch_result)
 
-        # Group parts by (item_id, effective stock_length_mm)
-        # Each group key is (item_id, stock_length_mm_for_group)
-        groups_map = defaultdict(list)
-        for p in parts_qs:
-            effective_stock = p.stock_length_mm or session.stock_length_mm
-            groups_map[(p.item_id, effective_stock)].append(p)
-
-        groups = []
-        global_bar_index = 0
-        # The same physical stock bars serve every group of an item; track
-        # what earlier groups consumed so a remnant is never handed out twice.
-        remnants_consumed: dict[int, int] = defaultdict(int)
-
-        for (item_id, stock_len), group_parts in groups_map.items():
-            item_obj = group_parts[0].item
-            parts_data = [
-                {
-                    'id': p.id,
-                    'label': p.label,
-                    'job_no': p.job_no,
-                    'nominal_length_mm': p.nominal_length_mm,
-                    'quantity': p.quantity,
-                    'angle_left_deg': float(p.angle_left_deg),
-                    'angle_right_deg': float(p.angle_right_deg),
-                    'profile_height_mm': (
-                        float(p.profile_height_mm or 0)
-                        or height_by_item.get(p.item_id, 0)
-                    ),
-                    'allow_rotation': p.allow_rotation,
-                    'requires_bending': p.requires_bending,
-                    'image_no': p.image_no,
-                }
-                for p in group_parts
-            ]
-
-            # Collect stock bars declared by warehouse for this session/item
-            stock_bars_qs = LinearCuttingStockBar.objects.filter(
-                session=session,
-                item_id=item_id,
-            ).values('id', 'length_mm', 'quantity')
-            stock_pieces = []
-            for r in stock_bars_qs:
-                remaining = r['quantity'] - remnants_consumed[r['id']]
-                if remaining > 0:
-                    stock_pieces.append(
-                        {'id': r['id'], 'length_mm': r['length_mm'], 'quantity': remaining}
-                    )
-            stock_pieces = stock_pieces or None
 
-            try:
-                result = optimize(parts_data, stock_len, kerf_mm, stock_pieces=stock_pieces)
-            except ValueError as exc:
-                return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+class OptimizeStatusView(APIView):
+    """
+    GET /linear_cutting/sessions/{key}/optimize/status/?job_id=<id>
 
-            # Assign global bar indices across all groups
-            for bar in result['bars']:
-                global_bar_index += 1
-                bar['global_bar_index'] = global_bar_index
-                if bar.get('is_remnant') and bar.get('stock_bar_id'):
-                    remnants_consumed[bar['stock_bar_id']] += 1
-
-            groups.append({
-                'item_id': item_id,
-                'item_name': item_obj.name,
-                'item_code': item_obj.code,
-                'stock_length_mm': stock_len,
-                'kerf_mm': kerf_mm,
-                'bars_needed': result['bars_needed'],
-                'remnant_bars_used': result.get('remnant_bars_used', 0),
-                'total_waste_mm': result['total_waste_mm'],
-                'efficiency_pct': result['efficiency_pct'],
-                'total_pass_count': result.get('total_pass_count', 0),
-                'saw_setup_changes': result.get('saw_setup_changes', 0),
-                'nest_pairs_formed': result.get('nest_pairs_formed', 0),
-                'material_saved_by_nesting_mm': result.get('material_saved_by_nesting_mm', 0.0),
-                'bars': result['bars'],
-            })
-
-        # Plausibility guard: a tiny profile size on angled parts almost
-        # always means bad data (e.g. "1" typed to pass a form) — the angle
-        # geometry, stop distances and nesting savings all scale with it.
-        warnings = []
-        for item_id, h in height_by_item.items():
-            if 0 < h <= 5 and any(
-                p.item_id == item_id
-                and (abs(float(p.angle_left_deg)) > 0.05
-                     or abs(float(p.angle_right_deg)) > 0.05)
-                for p in parts_qs
-            ):
-                name = next((p.item.name for p in parts_qs
-                             if p.item_id == item_id and p.item), str(item_id))
-                warnings.append(
-                    f"«{name}» için Kesit (mm) = {h:g} girilmiş. Bu değer açı "
-                    f"geometrisini ölçeklendirir — boru için dış çapı, profil için "
-                    f"açı düzlemindeki kesit ölçüsünü girin (örn. 90*8 boru için 90). "
-                    f"Küçük bir değer kesim ölçülerini ve ayar mesafelerini bozar."
-                )
+    Progress of a background optimize job (the session's latest job when
+    ``job_id`` is omitted).  ``result`` is filled once ``status`` is
+    ``succeeded``; ``error`` carries the message when it is ``failed``
+    (including jobs whose worker died, see ``fail_stale_optimize_jobs``).
+    """
+    permission_classes = [IsAuthenticated]
 
-        optimization_result = {'groups': groups}
-        if warnings:
-            optimization_result['warnings'] = warnings
+    def get(self, request, key):
+        jobs = LinearCuttingOptimizeJob.objects.filter(session_id=key)
+        fail_stale_optimize_jobs(jobs)
+        job_id = request.query_params.get('job_id')
+        if job_id:
+            if not str(job_id).isdigit():
+                return Response({'error': 'Invalid job_id.'}, status=status.HTTP_400_BAD_REQUEST)
+            jobs = jobs.filter(pk=job_id)
+        job = jobs.order_by('-created_at', '-id').first()
+        if job is None:
+            return Response({'error': 'Optimize job not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(LinearCuttingOptimizeJobSerializer(job).data)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RunOptimizeJobTaskView(View):
+    """
+    POST /linear_cutting/tasks/run-optimize-job/
 
-        session.kerf_mm = kerf_mm
-        session.optimization_result = optimization_result
-        session.save(update_fields=['kerf_mm', 'optimization_result'])
+    Internal Cloud Tasks callback: runs one queued optimize job.
+    """
 
-        return Response(optimization_result)
+    def post(self, request):
+        verify_task_secret(request)
+        try:
+            job_id = int(json.loads(request.body).get('job_id'))
+        except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        run_optimize_job(job_id)
+        return HttpResponse(status=200)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -521,7 +523,9 @@ class CuttingListPDFView(APIView):
     GET /linear_cutting/sessions/{key}/pdf/
 
     Returns a printable A4 PDF cutting list for the session.
-    Each item group is rendered as a separate section.
+    Each item group is rendered as a separate section.  With a shared cache,
+    repeat downloads of an unchanged session skip rendering (see
+    ``pdf.cached_cutting_list_pdf``).
     """
     permission_classes = [IsAuthenticated]
 
@@ -537,7 +541,7 @@ class CuttingListPDFView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        pdf_bytes = build_cutting_list_pdf(session)
+        pdf_bytes = cached_cutting_list_pdf(session)
         response = HttpResponse(pdf_bytes, content_type='application/pdf')
         response['Content-Disposition'] = f'attachment; filename="{session.key}_cutting_list.pdf"'
         return response
@@ -0,0 +1,69 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from machining.services.timers import (
+    categorize_timer_segments,
+    categorize_timers_segments,
+    split_timer_by_local_day_and_bucket,
+    split_timers_by_local_day_and_bucket,
+)
+
+DAY_MS = 86_400_000
+
+
+def synthetic_timers(count, seed=0):
+    """(start_ms, finish_ms) lists shaped like shop-floor timers: mostly a few
+    hours, some overnight or multi-day, a few empty."""
+    rng = random.Random(seed)
+    starts, finishes = [], []
+    for _ in range(count):
+        start = rng.randrange(1_704_067_200_000, 1_798_761_600_000)   # 2024-2026
+        roll = rng.random()
+        if roll < 0.02:
+            finish = start
+        elif roll < 0.85:
+            finish = start + rng.randrange(60_000, 10 * 3_600_000)
+        else:
+            finish = start + rng.randrange(DAY_MS // 2, 4 * DAY_MS)
+        starts.append(start)
+        finishes.append(finish)
+    return starts, finishes
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks the NumPy batch timer splitting (split_timers_by_local_day_and_bucket, "
+            "categorize_timers_segments) against the per-timer functions on synthetic timers, "
+            "and checks that both give identical results.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timers', type=int, default=100_000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _time(self, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - t0) * 1000
+
+    def handle(self, *args, **opts):
+        starts, finishes = synthetic_timers(opts['timers'], opts['seed'])
+        pairs = list(zip(starts, finishes))
+        self.stdout.write(f"timers: {len(pairs)}")
+
+        scalar, scalar_ms = self._time(lambda: [split_timer_by_local_day_and_bucket(s, f) for s, f in pairs])
+        batch, batch_ms = self._time(lambda: split_timers_by_local_day_and_bucket(starts, finishes))
+        same = batch.for_timer_lists(len(pairs)) == scalar
+        self.stdout.write(f"split:      scalar {scalar_ms:9.1f} ms   batch {batch_ms:7.1f} ms   "
+                          f"{len(batch.seconds)} segments   identical={same}")
+
+        scalar, scalar_ms = self._time(lambda: [categorize_timer_segments(s, f) for s, f in pairs])
+        batch, batch_ms = self._time(lambda: categorize_timers_segments(starts, finishes))
+        same = all(
+            scalar[i] == {bucket: float(seconds[i]) for bucket, seconds in batch.items()}
+            for i in range(len(pairs))
+        )
+        self.stdout.write(f"categorize: scalar {scalar_ms:9.1f} ms   batch {batch_ms:7.1f} ms   "
+                          f"identical={same}")
+        if not same:
+            self.stderr.write("batch results differ from the scalar functions")
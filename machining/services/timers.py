@@ -1,8 +1,9 @@
 # machining/services/reports.py
 from datetime import datetime, timedelta, time
-from typing import Dict
+from typing import Dict, NamedTuple
 from zoneinfo import ZoneInfo
 
+import numpy as np
 from django.conf import settings
 from django.utils import timezone
 
@@ -133,4 +134,158 @@ def split_timer_by_local_day_and_bucket(start_ms: int, finish_ms: int, tz="Europ
 
         cur = day_end
 
-    return out
\ No newline at end of file
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Batch versions (NumPy)
+# ---------------------------------------------------------------------------
+#
+# Both scalar functions above subtract and compare aware datetimes that share
+# one tzinfo, which Python does on local wall-clock values. The batch versions
+# therefore shift every epoch-ms to local wall-clock ms once (UTC offsets are
+# resolved per distinct UTC day, per timestamp only on days with a DST
+# change) and work on integer ms from there: local day d spans
+# [d * DAY_MS, (d + 1) * DAY_MS) and its work window 07:30-17:00 is a fixed
+# offset inside it. Seconds are truncated and floats summed in the same order
+# as the scalar code, so results match it exactly.
+
+BUCKETS = ("weekday_work", "after_hours", "sunday")
+BUCKET_WEEKDAY_WORK, BUCKET_AFTER_HOURS, BUCKET_SUNDAY = range(3)
+
+DAY_MS = 86_400_000
+_W_START_MS = (W_START.hour * 60 + W_START.minute) * 60_000
+_W_END_MS = (W_END.hour * 60 + W_END.minute) * 60_000
+
+
+class TimerSegments(NamedTuple):
+    """Parallel arrays, one entry per (timer, local date, bucket), ordered by
+    timer, then date, then bucket code (see BUCKETS)."""
+    timer: np.ndarray     # index into the input arrays
+    day: np.ndarray       # local date as datetime64[D]
+    bucket: np.ndarray    # BUCKET_* code
+    seconds: np.ndarray   # int64
+
+    def for_timer_lists(self, n_timers):
+        """Per-timer lists of {date, bucket, seconds} dicts, the
+        split_timer_by_local_day_and_bucket shape."""
+        out = [[] for _ in range(n_timers)]
+        days = self.day.astype(object)
+        for i, d, b, secs in zip(self.timer.tolist(), days, self.bucket.tolist(), self.seconds.tolist()):
+            out[i].append({"date": d, "bucket": BUCKETS[b], "seconds": secs})
+        return out
+
+
+def _offset_ms(ms: int, z: ZoneInfo) -> int:
+    return int(datetime.fromtimestamp(ms / 1000, tz=z).utcoffset() / timedelta(milliseconds=1))
+
+
+def _to_local_ms(epoch_ms: np.ndarray, z: ZoneInfo) -> np.ndarray:
+    """Epoch ms -> local wall-clock ms (epoch-based) in zone ``z``."""
+    if epoch_ms.size == 0:
+        return epoch_ms.copy()
+    utc_days, inverse = np.unique(epoch_ms // DAY_MS, return_inverse=True)
+    first = np.array([_offset_ms(int(d) * DAY_MS, z) for d in utc_days], dtype=np.int64)
+    last = np.array([_offset_ms(int(d) * DAY_MS + DAY_MS - 1, z) for d in utc_days], dtype=np.int64)
+    offsets = first[inverse]
+    changing = (first != last)[inverse]
+    if changing.any():
+        idx = np.flatnonzero(changing)
+        offsets[idx] = [_offset_ms(int(ms), z) for ms in epoch_ms[idx]]
+    return epoch_ms + offsets
+
+
+def _day_spans(local_start: np.ndarray, local_end: np.ndarray):
+    """
+    Expand timers into one row per local day they touch (scalar loop order).
+    Returns (timer index, local day number, span start, span end) arrays.
+    """
+    first_day = local_start // DAY_MS
+    n_days = np.where(local_end > local_start, local_end // DAY_MS - first_day + 1, 0)
+    timer = np.repeat(np.arange(local_start.size), n_days)
+    group_start = np.repeat(np.cumsum(n_days) - n_days, n_days)
+    day = first_day[timer] + (np.arange(timer.size) - group_start)
+    day_start = day * DAY_MS
+    span_start = np.maximum(local_start[timer], day_start)
+    span_end = np.minimum(local_end[timer], day_start + DAY_MS)
+    return timer, day, span_start, span_end
+
+
+def _window_overlap_ms(day, span_start, span_end):
+    day_start = day * DAY_MS
+    return np.maximum(
+        np.minimum(span_end, day_start + _W_END_MS) - np.maximum(span_start, day_start + _W_START_MS),
+        0,
+    )
+
+
+def _weekday(day):
+    return (day + 3) % 7   # 1970-01-01 was a Thursday; Mon=0 ... Sun=6
+
+
+def split_timers_by_local_day_and_bucket(start_ms, finish_ms, tz="Europe/Istanbul") -> TimerSegments:
+    """
+    split_timer_by_local_day_and_bucket for many timers at once.
+
+    ``start_ms`` / ``finish_ms`` are equal-length sequences of epoch ms.
+    Timers that finish on/before their start contribute nothing.
+    """
+    z = ZoneInfo(tz)
+    start = np.asarray(start_ms, dtype=np.int64)
+    finish = np.asarray(finish_ms, dtype=np.int64)
+    timer, day, span_start, span_end = _day_spans(_to_local_ms(start, z), _to_local_ms(finish, z))
+
+    seconds = (span_end - span_start) // 1000
+    keep = seconds > 0
+    timer, day, span_start, span_end, seconds = (
+        timer[keep], day[keep], span_start[keep], span_end[keep], seconds[keep])
+
+    sunday = _weekday(day) == 6
+    ww = np.where(sunday, 0, _window_overlap_ms(day, span_start, span_end) // 1000)
+    ah = np.where(sunday, 0, seconds - ww)
+    su = np.where(sunday, seconds, 0)
+
+    parts = [(code, secs > 0, secs) for code, secs in
+             ((BUCKET_WEEKDAY_WORK, ww), (BUCKET_AFTER_HOURS, ah), (BUCKET_SUNDAY, su))]
+    timer_out = np.concatenate([timer[mask] for _, mask, _ in parts])
+    day_out = np.concatenate([day[mask] for _, mask, _ in parts])
+    bucket_out = np.concatenate([np.full(int(mask.sum()), code, dtype=np.int8) for code, mask, _ in parts])
+    seconds_out = np.concatenate([secs[mask] for _, mask, secs in parts])
+
+    order = np.lexsort((bucket_out, day_out, timer_out))
+    return TimerSegments(
+        timer=timer_out[order],
+        day=day_out[order].astype("datetime64[D]"),
+        bucket=bucket_out[order],
+        seconds=seconds_out[order],
+    )
+
+
+def categorize_timers_segments(start_ms, finish_ms) -> Dict[str, np.ndarray]:
+    """
+    categorize_timer_segments for many timers at once: {bucket: float64
+    array of seconds per timer}, in the input order.
+    """
+    z = _get_business_tz()
+    start = np.asarray(start_ms, dtype=np.int64)
+    finish = np.asarray(finish_ms, dtype=np.int64)
+    n = start.size
+    local_start, local_end = _to_local_ms(start, z), _to_local_ms(finish, z)
+    # The scalar version rejects on the UTC instants, then loops in local time
+    local_end = np.where(finish > start, local_end, local_start)
+    timer, day, span_start, span_end = _day_spans(local_start, local_end)
+
+    weekday = _weekday(day)
+    day_secs = (span_end - span_start) / 1000.0
+    work_secs = np.where(weekday <= 4, _window_overlap_ms(day, span_start, span_end) / 1000.0, 0.0)
+    after_secs = np.where(weekday <= 4, np.maximum(0.0, day_secs - work_secs),
+                          np.where(weekday == 5, day_secs, 0.0))
+    sunday_secs = np.where(weekday == 6, day_secs, 0.0)
+
+    # bincount adds in row order (timer, then day), like the scalar loop
+    return {
+        "weekday_work": np.bincount(timer, weights=work_secs, minlength=n),
+        "after_hours": np.bincount(timer, weights=after_secs, minlength=n),
+        "sunday": np.bincount(timer, weights=sunday_secs, minlength=n),
+    }
+
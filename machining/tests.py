@@ -1,3 +1,71 @@
-from django.test import TestCase
+import random
+from datetime import date, datetime, timezone
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from machining.services.timers import (
+    categorize_timer_segments,
+    categorize_timers_segments,
+    split_timer_by_local_day_and_bucket,
+    split_timers_by_local_day_and_bucket,
+)
+
+HOUR_MS = 3_600_000
+
+
+def _ist_ms(y, m, d, hh=0, mm=0):
+    """Epoch ms of an Istanbul wall-clock time (UTC+3 since 2016)."""
+    return int(datetime(y, m, d, hh, mm, tzinfo=timezone.utc).timestamp() * 1000) - 3 * HOUR_MS
+
+
+@override_settings(APP_DEFAULT_TZ='Europe/Istanbul')
+class TimerBatchSplitTests(SimpleTestCase):
+
+    def timers(self):
+        rng = random.Random(3)
+        starts = [
+            _ist_ms(2026, 3, 6, 16, 0),     # Friday into Saturday
+            _ist_ms(2026, 3, 8, 22, 0),     # Sunday night into Monday
+            _ist_ms(2026, 3, 9, 8, 0),      # ends exactly at midnight
+            _ist_ms(2026, 3, 9, 9, 0),      # finish before start
+            _ist_ms(2015, 3, 29, 2, 0),     # across the last Istanbul DST change
+        ]
+        finishes = [
+            _ist_ms(2026, 3, 7, 9, 0) + 500,
+            _ist_ms(2026, 3, 9, 8, 30),
+            _ist_ms(2026, 3, 10),
+            _ist_ms(2026, 3, 9, 8, 0),
+            _ist_ms(2015, 3, 29, 6, 0),
+        ]
+        for _ in range(500):
+            start = rng.randrange(_ist_ms(2024, 1, 1), _ist_ms(2027, 1, 1))
+            starts.append(start)
+            finishes.append(start + rng.randrange(0, 3 * 24 * HOUR_MS))
+        return starts, finishes
+
+    def test_split_matches_the_scalar_version(self):
+        starts, finishes = self.timers()
+        segments = split_timers_by_local_day_and_bucket(starts, finishes)
+        self.assertEqual(
+            segments.for_timer_lists(len(starts)),
+            [split_timer_by_local_day_and_bucket(s, f) for s, f in zip(starts, finishes)],
+        )
+        self.assertEqual(segments.for_timer_lists(len(starts))[0], [
+            {'date': date(2026, 3, 6), 'bucket': 'weekday_work', 'seconds': 3600},
+            {'date': date(2026, 3, 6), 'bucket': 'after_hours', 'seconds': 7 * 3600},
+            {'date': date(2026, 3, 7), 'bucket': 'weekday_work', 'seconds': 5400},
+            {'date': date(2026, 3, 7), 'bucket': 'after_hours', 'seconds': 27000},
+        ])
+
+    def test_categorize_matches_the_scalar_version(self):
+        starts, finishes = self.timers()
+        buckets = categorize_timers_segments(starts, finishes)
+        for i, (start, finish) in enumerate(zip(starts, finishes)):
+            self.assertEqual(
+                {name: float(seconds[i]) for name, seconds in buckets.items()},
+                categorize_timer_segments(start, finish),
+            )
+
+    def test_empty_input(self):
+        self.assertEqual(len(split_timers_by_local_day_and_bucket([], []).seconds), 0)
+        self.assertEqual(len(categorize_timers_segments([], [])['sunday']), 0)
@@ -7,7 +7,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from machines.models import Machine
-from machining.services.timers import categorize_timer_segments, _get_business_tz, W_START, W_END
+from machining.services.timers import categorize_timer_segments, categorize_timers_segments, _get_business_tz, W_START, W_END
 from .services.timeline import _build_bulk_machine_timelines, _ensure_valid_range
 from tasks.models import Timer
 from tasks.views import (
@@ -403,15 +403,18 @@ class JobHoursReportView(APIView):
         # Aggregate per (job_no -> user -> buckets)
         per_job_user = defaultdict(lambda: defaultdict(lambda: {"weekday_work": 0.0, "after_hours": 0.0, "sunday": 0.0}))
 
-        for t in timers:
-            buckets = categorize_timer_segments(t.start_time, t.finish_time)
+        timers = list(timers)
+        buckets = categorize_timers_segments(
+            [t.start_time for t in timers], [t.finish_time for t in timers])
+        ww_secs, ah_secs, su_secs = (buckets[k].tolist() for k in ("weekday_work", "after_hours", "sunday"))
+        for i, t in enumerate(timers):
             # Access job_no through operation.part.job_no
             j = getattr(getattr(t.issue_key, 'part', None), 'job_no', '') or ""
             u = t.user.username
             d = per_job_user[j][u]
-            d["weekday_work"] += buckets["weekday_work"] / 3600.0
-            d["after_hours"]  += buckets["after_hours"]  / 3600.0
-            d["sunday"]       += buckets["sunday"]       / 3600.0
+            d["weekday_work"] += ww_secs[i] / 3600.0
+            d["after_hours"]  += ah_secs[i] / 3600.0
+            d["sunday"]       += su_secs[i] / 3600.0
 
         # Build response
         results = []
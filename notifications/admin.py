@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification, NotificationConfig, NotificationPreference
+from .models import EmailOutbox, Notification, NotificationConfig, NotificationPreference
 
 
 @admin.register(Notification)
@@ -24,3 +24,12 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
     list_display  = ['user', 'notification_type', 'send_email', 'send_in_app']
     list_filter   = ['notification_type', 'send_email', 'send_in_app']
     search_fields = ['user__username']
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display  = ['id', 'to', 'subject', 'attempts', 'next_attempt_at', 'dead_at', 'created_at']
+    list_filter   = ['dead_at']
+    search_fields = ['to', 'subject', 'last_error']
+    readonly_fields = ['created_at', 'claimed_until']
+    ordering      = ['created_at']
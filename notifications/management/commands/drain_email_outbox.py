@@ -0,0 +1,27 @@
+# notifications/management/commands/drain_email_outbox.py
+from django.core.management.base import BaseCommand
+
+from notifications.models import EmailOutbox
+from notifications.outbox import TRANSPORTS, drain_email_outbox_fully, requeue_dead
+
+
+class Command(BaseCommand):
+    help = "Delivers queued notification emails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max", type=int, default=100, help="Rows claimed per batch")
+        parser.add_argument("--transport", choices=sorted(TRANSPORTS),
+                            help="Override EMAIL_OUTBOX_TRANSPORT for this run")
+        parser.add_argument("--requeue-dead", action="store_true",
+                            help="Retry dead-letter rows before draining")
+
+    def handle(self, *args, **opts):
+        if opts["requeue_dead"]:
+            revived = requeue_dead()
+            self.stdout.write(f"Requeued {revived} dead-letter emails")
+
+        totals = drain_email_outbox_fully(opts["max"], opts["transport"])
+        dead = EmailOutbox.objects.filter(dead_at__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['sent']} emails, {totals['failed']} failed, {dead} in dead letters"
+        ))
@@ -0,0 +1,16 @@
+# notifications/management/commands/recount_unread_notifications.py
+from django.core.management.base import BaseCommand
+
+from notifications.realtime import recount_unread
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-user unread notification counters from Notification."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", type=int, action="append", dest="users",
+                            help="Only recount this user id (repeatable)")
+
+    def handle(self, *args, **opts):
+        written = recount_unread(opts["users"])
+        self.stdout.write(self.style.SUCCESS(f"Recounted unread notifications for {written} users"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0038_alter_notification_notification_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to', models.CharField(max_length=254)),
+                ('subject', models.CharField(max_length=998)),
+                ('body', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_until', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('dead_at', models.DateTimeField(blank=True, null=True)),
+                ('notification', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='notifications.notification')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('dead_at__isnull', True)), fields=['next_attempt_at'], name='email_outbox_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Notification = apps.get_model('notifications', 'Notification')
+    NotificationUnreadCounter = apps.get_model('notifications', 'NotificationUnreadCounter')
+    NotificationUnreadCounter.objects.bulk_create(
+        [
+            NotificationUnreadCounter(user_id=row['user_id'], unread=row['n'])
+            for row in (
+                Notification.objects.filter(is_read=False)
+                .order_by().values('user_id').annotate(n=Count('id'))
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0039_emailoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationUnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -281,7 +281,14 @@ class Notification(models.Model):
         if not self.is_read:
             self.is_read = True
             self.read_at = timezone.now()
-            self.save(update_fields=['is_read', 'read_at'])
+            # Conditional update: only the request that flips the flag moves
+            # the unread counter
+            updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+                is_read=True, read_at=self.read_at,
+            )
+            if updated:
+                from .realtime import adjust_unread
+                adjust_unread({self.user_id: -1})
 
 
 class NotificationConfig(models.Model):
@@ -367,3 +374,58 @@ class NotificationPreference(models.Model):
 
     def __str__(self):
         return f'{self.user_id} | {self.notification_type}'
+
+
+class EmailOutbox(models.Model):
+    """
+    Transactional outbox for notification emails (see notifications.outbox).
+
+    notify()/bulk_notify() write rows in the caller's transaction instead of
+    calling Cloud Tasks per recipient; the dispatcher delivers them in
+    batches after commit. Delivered rows are deleted; rows that keep failing
+    are retried with backoff and finally parked with ``dead_at`` set.
+    """
+    to           = models.CharField(max_length=254)
+    subject      = models.CharField(max_length=998)
+    body         = models.TextField(blank=True)
+    notification = models.ForeignKey(
+        Notification,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+    )
+    created_at      = models.DateTimeField(default=timezone.now)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_until   = models.DateTimeField(null=True, blank=True)
+    attempts        = models.PositiveIntegerField(default=0)
+    last_error      = models.TextField(blank=True, default='')
+    dead_at         = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_attempt_at'], name='email_outbox_due_idx',
+                         condition=models.Q(dead_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f'{self.to} | {self.subject[:40]}' + (' (dead)' if self.dead_at else '')
+
+
+class NotificationUnreadCounter(models.Model):
+    """
+    Unread in-app notifications per user, maintained incrementally by
+    notifications.realtime (creates add, reads subtract) so unread_count and
+    the event stream never run a COUNT. ``manage.py recount_unread_notifications``
+    rebuilds it from Notification.
+    """
+    user   = models.OneToOneField(
+        User,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='notification_unread_counter',
+    )
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id} | {self.unread}'
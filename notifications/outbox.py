@@ -0,0 +1,260 @@
+"""
+Notification email outbox.
+
+notify()/bulk_notify() used to build a CloudTasksClient and make a blocking
+create_task call per recipient inside the request. They now write EmailOutbox
+rows in the caller's transaction (``queue_emails``, one INSERT), and the
+dispatcher delivers them once it commits:
+
+* ``drain_email_outbox`` claims due rows with SELECT ... FOR UPDATE SKIP
+  LOCKED plus a lease (like core.cost_queue), so several dispatchers can run
+  at once, and hands them to the configured transport:
+
+  - ``cloud_tasks``: one shared client, create_task calls fanned out over
+    EMAIL_OUTBOX_SEND_WORKERS threads; SendEmailTaskView sends the mail.
+  - ``smtp``: Django's EMAIL_BACKEND over a single connection per batch, and
+    the linked Notification is marked emailed. Tests get the locmem backend,
+    local setups can point EMAIL_BACKEND at the console/file backends.
+
+* Delivered rows are deleted. Failures back off exponentially and after
+  MAX_ATTEMPTS are parked with ``dead_at`` set (``drain_email_outbox
+  --requeue-dead`` retries them).
+
+Each commit that queued mail hands exactly those rows to the transport
+before the request returns (``deliver_queued``, EMAIL_OUTBOX_DISPATCH_ON_COMMIT):
+Cloud Run throttles CPU between requests, so nothing is left to a background
+thread. Rows that fail, or were queued with dispatch off, are picked up by
+POST /notifications/tasks/drain-email-outbox/ (Cloud Scheduler, see
+cloudbuild.yaml) or ``manage.py drain_email_outbox``.
+"""
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import EmailOutbox, Notification
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+RETRY_BASE_S = 60
+RETRY_MAX_S = 3600
+CLAIM_LEASE = timedelta(minutes=5)
+
+TRANSPORT_CLOUD_TASKS = 'cloud_tasks'
+TRANSPORT_SMTP = 'smtp'
+
+
+# ---------------------------------------------------------------------------
+# Producers
+# ---------------------------------------------------------------------------
+
+def queue_emails(emails) -> int:
+    """
+    Write (to, subject, body, notification_id) tuples to the outbox with one
+    INSERT and deliver them once the transaction commits.
+    Returns the number of rows queued.
+    """
+    rows = [
+        EmailOutbox(to=to, subject=subject[:998], body=body or '', notification_id=notification_id)
+        for to, subject, body, notification_id in emails
+        if to
+    ]
+    if not rows:
+        return 0
+    EmailOutbox.objects.bulk_create(rows)
+    if getattr(settings, 'EMAIL_OUTBOX_DISPATCH_ON_COMMIT', True):
+        ids = [row.pk for row in rows]
+        transaction.on_commit(lambda: deliver_queued(ids))
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Transports
+# ---------------------------------------------------------------------------
+
+def _transport() -> str:
+    transport = getattr(settings, 'EMAIL_OUTBOX_TRANSPORT', '')
+    if transport:
+        return transport
+    return TRANSPORT_CLOUD_TASKS if getattr(settings, 'USE_CLOUD_TASKS', True) else TRANSPORT_SMTP
+
+
+def _send_cloud_tasks(rows) -> dict:
+    """{row id: exception or None}; the create_task RPCs run concurrently on
+    the shared client."""
+    from .tasks import build_send_email_task, cloud_tasks_client, send_email_queue_path
+
+    client = cloud_tasks_client()
+    parent = send_email_queue_path()
+
+    def push(row):
+        try:
+            client.create_task(
+                parent=parent,
+                task=build_send_email_task(row.to, row.subject, row.body, row.notification_id),
+            )
+            return None
+        except Exception as exc:
+            return exc
+
+    workers = max(1, min(getattr(settings, 'EMAIL_OUTBOX_SEND_WORKERS', 8), len(rows)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip((row.id for row in rows), pool.map(push, rows)))
+
+
+def _send_smtp(rows) -> dict:
+    """{row id: exception or None}; one backend connection for the batch."""
+    from django.core.mail import EmailMessage, get_connection
+
+    results = {}
+    mail = get_connection(fail_silently=False)
+    try:
+        mail.open()
+        for row in rows:
+            message = EmailMessage(
+                subject=row.subject, body=row.body,
+                from_email=settings.DEFAULT_FROM_EMAIL, to=[row.to], connection=mail,
+            )
+            try:
+                message.send(fail_silently=False)
+                results[row.id] = None
+            except Exception as exc:
+                results[row.id] = exc
+    except Exception as exc:
+        # Could not connect at all: the whole batch failed
+        results.update({row.id: exc for row in rows if row.id not in results})
+    finally:
+        try:
+            mail.close()
+        except Exception:
+            pass
+
+    sent_ids = [row.notification_id for row in rows if row.notification_id and results[row.id] is None]
+    if sent_ids:
+        Notification.objects.filter(pk__in=sent_ids).update(
+            is_emailed=True, emailed_at=timezone.now(), email_error='',
+        )
+    return results
+
+
+TRANSPORTS = {
+    TRANSPORT_CLOUD_TASKS: _send_cloud_tasks,
+    TRANSPORT_SMTP: _send_smtp,
+}
+
+
+# ---------------------------------------------------------------------------
+# Dispatcher
+# ---------------------------------------------------------------------------
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=min(RETRY_BASE_S * 2 ** (attempts - 1), RETRY_MAX_S))
+
+
+def _claim(limit, ids=None):
+    """Lease up to ``limit`` due rows (of ``ids`` when given), oldest first."""
+    now = timezone.now()
+    due = (
+        EmailOutbox.objects
+        .select_for_update(skip_locked=True)
+        .filter(dead_at__isnull=True, next_attempt_at__lte=now)
+        .filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+    )
+    if ids is not None:
+        due = due.filter(id__in=ids)
+    with transaction.atomic():
+        ids = list(due.order_by('created_at', 'id').values_list('id', flat=True)[:limit])
+        if ids:
+            EmailOutbox.objects.filter(id__in=ids).update(claimed_until=now + CLAIM_LEASE)
+    return list(EmailOutbox.objects.filter(id__in=ids).order_by('created_at', 'id'))
+
+
+def _record_failure(row, exc) -> bool:
+    """Back the row off (or park it); returns True when it went dead."""
+    attempts = row.attempts + 1
+    now = timezone.now()
+    dead = attempts >= MAX_ATTEMPTS
+    logger.warning(
+        'email to %s failed (attempt %s/%s)%s: %r',
+        row.to, attempts, MAX_ATTEMPTS, '; moved to dead letters' if dead else '', exc,
+    )
+    EmailOutbox.objects.filter(pk=row.pk).update(
+        attempts=attempts,
+        last_error=repr(exc)[:2000],
+        claimed_until=None,
+        next_attempt_at=now + _retry_delay(attempts),
+        dead_at=now if dead else None,
+    )
+    if dead and row.notification_id:
+        Notification.objects.filter(pk=row.notification_id).update(email_error=str(exc)[:2000])
+    return dead
+
+
+def _deliver(rows, transport=None) -> dict:
+    if not rows:
+        return {'sent': 0, 'failed': 0, 'dead': 0}
+
+    send = TRANSPORTS[transport or _transport()]
+    try:
+        results = send(rows)
+    except Exception as exc:
+        logger.exception('email outbox transport failed for a batch of %s', len(rows))
+        results = {row.id: exc for row in rows}
+
+    sent = [row.id for row in rows if results.get(row.id) is None]
+    EmailOutbox.objects.filter(id__in=sent).delete()
+    failed = dead = 0
+    for row in rows:
+        exc = results.get(row.id)
+        if exc is not None:
+            failed += 1
+            dead += _record_failure(row, exc)
+    return {'sent': len(sent), 'failed': failed, 'dead': dead}
+
+
+def drain_email_outbox(max_rows: int = 100, transport: str | None = None) -> dict:
+    """
+    Deliver up to ``max_rows`` due outbox rows.
+
+    Returns {"sent": N, "failed": M, "dead": D}.
+    """
+    return _deliver(_claim(max_rows), transport)
+
+
+def deliver_queued(ids, transport: str | None = None) -> dict:
+    """
+    Deliver the outbox rows ``ids`` now, in the calling request (the
+    on-commit hook of ``queue_emails``). Rows another dispatcher holds are
+    skipped; failures back off for the scheduled drain like any other.
+    """
+    try:
+        return _deliver(_claim(len(ids), ids=ids), transport)
+    except Exception:
+        logger.exception('email outbox delivery after commit failed')
+        return {'sent': 0, 'failed': 0, 'dead': 0}
+
+
+def drain_email_outbox_fully(max_rows: int = 100, transport: str | None = None) -> dict:
+    """drain_email_outbox until a pass finds nothing due; summed counters.
+    Failed rows back off, so they cannot keep the loop busy."""
+    totals = {'sent': 0, 'failed': 0, 'dead': 0}
+    while True:
+        result = drain_email_outbox(max_rows, transport)
+        for key in totals:
+            totals[key] += result[key]
+        if not any(result.values()):
+            return totals
+
+
+def requeue_dead() -> int:
+    """Give dead-letter rows a fresh set of attempts."""
+    return EmailOutbox.objects.filter(dead_at__isnull=False).update(
+        dead_at=None, attempts=0, next_attempt_at=timezone.now(), claimed_until=None,
+    )
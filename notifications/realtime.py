@@ -0,0 +1,218 @@
+"""
+Live notification events: unread counters and the Postgres LISTEN/NOTIFY bus.
+
+Frontends used to poll ``unread_count``, a COUNT over Notification per user
+per poll. Instead:
+
+* ``NotificationUnreadCounter`` holds each user's unread total. Creating
+  notifications adds to it (``INSERT ... ON CONFLICT DO UPDATE``) and
+  marking them read subtracts (``UPDATE ... FROM (VALUES ...)``); both
+  statements of ``adjust_unread`` return the new totals.
+* Every change is published with ``pg_notify`` on NOTIFY_CHANNEL inside the
+  writing transaction; Postgres only delivers it on commit, so rolled back
+  notifications never reach a client. Payloads are JSON lists of
+  ``{"u": user_id, "n": notification_id or null, "c": unread, "d": delta}``.
+* Each ASGI process runs one ``NotificationBus`` thread that LISTENs on a
+  dedicated connection and fans events out to the asyncio queues of the
+  streams open in that process (``notifications.views.notification_stream``).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import select
+import threading
+import time
+
+from django.db import connection, connections
+
+from .models import Notification, NotificationUnreadCounter
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'notification_events'
+# pg_notify payloads must stay under 8000 bytes
+_MAX_PAYLOAD = 7000
+
+
+# ---------------------------------------------------------------------------
+# Unread counters
+# ---------------------------------------------------------------------------
+
+def adjust_unread(deltas: dict, notification_ids: dict | None = None) -> dict:
+    """
+    Add ``deltas`` ({user_id: +n / -n}) to the users' unread counters and
+    publish the new totals; ``notification_ids`` ({user_id: [id, ...]}) names
+    the created notifications to push. Returns {user_id: unread}.
+    """
+    deltas = {uid: delta for uid, delta in deltas.items() if uid and delta}
+    if not deltas:
+        return {}
+    table = NotificationUnreadCounter._meta.db_table
+    ups = [(uid, delta) for uid, delta in deltas.items() if delta > 0]
+    downs = [(uid, -delta) for uid, delta in deltas.items() if delta < 0]
+
+    totals = {}
+    with connection.cursor() as cursor:
+        if ups:
+            cursor.execute(
+                f'INSERT INTO {table} (user_id, unread) VALUES {", ".join(["(%s, %s)"] * len(ups))} '
+                f'ON CONFLICT (user_id) DO UPDATE SET unread = {table}.unread + EXCLUDED.unread '
+                f'RETURNING user_id, unread',
+                [value for pair in ups for value in pair],
+            )
+            totals.update(cursor.fetchall())
+        if downs:
+            # A user without a counter row has nothing unread to subtract from
+            cursor.execute(
+                f'UPDATE {table} AS c SET unread = GREATEST(c.unread - v.n, 0) '
+                f'FROM (VALUES {", ".join(["(%s, %s)"] * len(downs))}) AS v(user_id, n) '
+                f'WHERE c.user_id = v.user_id RETURNING c.user_id, c.unread',
+                [value for pair in downs for value in pair],
+            )
+            totals.update(cursor.fetchall())
+
+    events = []
+    for uid, unread in totals.items():
+        ids = (notification_ids or {}).get(uid) or [None]
+        events += [{'u': uid, 'n': nid, 'c': unread, 'd': deltas[uid]} for nid in ids]
+    publish(events)
+    return totals
+
+
+def unread_count(user_id) -> int:
+    """Current unread total (one primary-key read)."""
+    return (
+        NotificationUnreadCounter.objects.filter(user_id=user_id)
+        .values_list('unread', flat=True).first()
+        or 0
+    )
+
+
+def recount_unread(user_ids=None) -> int:
+    """Rebuild counters from Notification (all users, or ``user_ids``);
+    returns the number of counters written."""
+    from django.db.models import Count
+
+    rows = Notification.objects.filter(is_read=False)
+    counters = NotificationUnreadCounter.objects.all()
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+        counters = counters.filter(user_id__in=user_ids)
+    counts = dict(rows.order_by().values('user_id').annotate(n=Count('id')).values_list('user_id', 'n'))
+    counters.exclude(user_id__in=list(counts)).update(unread=0)
+    NotificationUnreadCounter.objects.bulk_create(
+        [NotificationUnreadCounter(user_id=uid, unread=n) for uid, n in counts.items()],
+        update_conflicts=True, unique_fields=['user'], update_fields=['unread'], batch_size=1000,
+    )
+    return len(counts)
+
+
+# ---------------------------------------------------------------------------
+# Publishing
+# ---------------------------------------------------------------------------
+
+def publish(events) -> None:
+    """pg_notify ``events`` in chunks that fit a NOTIFY payload (delivered
+    when the current transaction commits)."""
+    if not events or connection.vendor != 'postgresql':
+        return
+    chunk, size = [], 2
+    with connection.cursor() as cursor:
+        for event in events:
+            encoded = json.dumps(event, separators=(',', ':'))
+            if chunk and size + len(encoded) + 1 > _MAX_PAYLOAD:
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, '[' + ','.join(chunk) + ']'])
+                chunk, size = [], 2
+            chunk.append(encoded)
+            size += len(encoded) + 1
+        cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, '[' + ','.join(chunk) + ']'])
+
+
+# ---------------------------------------------------------------------------
+# Listener
+# ---------------------------------------------------------------------------
+
+class NotificationBus:
+    """One LISTEN connection per process, fanned out to subscriber queues."""
+
+    POLL_S = 5
+    RECONNECT_MAX_S = 30
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[int, set] = {}
+        self._thread = None
+
+    def subscribe(self, user_id, loop, queue) -> None:
+        """Deliver ``user_id``'s events to ``queue`` (an asyncio.Queue of ``loop``)."""
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add((loop, queue))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='notification-bus', daemon=True)
+                self._thread.start()
+
+    def unsubscribe(self, user_id, loop, queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard((loop, queue))
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def dispatch(self, payload: str) -> int:
+        """Hand a NOTIFY payload to the subscribed queues; returns how many
+        events were delivered."""
+        try:
+            events = json.loads(payload)
+        except ValueError:
+            logger.warning('notification bus: unreadable payload %.200r', payload)
+            return 0
+        delivered = 0
+        with self._lock:
+            targets = [(event, list(self._subscribers.get(event.get('u'), ()))) for event in events]
+        for event, subscribers in targets:
+            for loop, queue in subscribers:
+                try:
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+                    delivered += 1
+                except RuntimeError:
+                    pass   # loop already closed; the stream unsubscribes itself
+        return delivered
+
+    def _listen(self):
+        wrapper = connections.create_connection('default')
+        try:
+            wrapper.ensure_connection()
+            raw = wrapper.connection
+            with raw.cursor() as cursor:
+                cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        return
+                if select.select([raw], [], [], self.POLL_S) == ([], [], []):
+                    continue
+                raw.poll()
+                while raw.notifies:
+                    self.dispatch(raw.notifies.pop(0).payload)
+        finally:
+            wrapper.close()
+
+    def _run(self):
+        delay = 1
+        while True:
+            try:
+                self._listen()
+                delay = 1
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+            except Exception:
+                logger.exception('notification bus connection lost; reconnecting in %ss', delay)
+                time.sleep(delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_S)
+
+
+bus = NotificationBus()
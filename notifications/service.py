@@ -15,8 +15,6 @@ import logging
 import threading
 from typing import Iterable
 
-from django.conf import settings
-
 from .models import Notification, NotificationConfig, NotificationPreference
 
 logger = logging.getLogger(__name__)
@@ -997,7 +995,7 @@ def notify(
     Dispatch a single notification to one user.
 
     Creates an in-app Notification record if the user's preference allows.
-    Enqueues a Cloud Tasks email job if the user's preference allows.
+    Queues an outbox email if the user's preference allows.
     Returns the created Notification (or None if in-app is disabled).
     """
     send_email, send_in_app = _get_user_prefs(user, notification_type)
@@ -1017,6 +1015,8 @@ def notify(
             )
         except Exception:
             logger.exception('Failed to create in-app notification for user %s type %s', user, notification_type)
+        else:
+            _count_unread({user.id: [notification.id]})
 
     if send_email and getattr(user, 'email', ''):
         _enqueue_email(
@@ -1042,8 +1042,8 @@ def bulk_notify(
 ) -> list[Notification]:
     """
     Dispatch the same notification to multiple users efficiently.
-    Uses bulk_create for in-app records (single INSERT), then enqueues
-    one email task per eligible recipient.
+    Uses bulk_create for in-app records (single INSERT), then writes one
+    outbox row per eligible recipient (single INSERT).
     """
     users = list(users)
     if not users:
@@ -1084,45 +1084,46 @@ def bulk_notify(
             created = Notification.objects.bulk_create(to_create)
         except Exception:
             logger.exception('bulk_create failed for notification type %s', notification_type)
+        else:
+            created_ids: dict[int, list[int]] = {}
+            for n in created:
+                created_ids.setdefault(n.user_id, []).append(n.id)
+            _count_unread(created_ids)
 
-    for email, idx in email_recipients:
-        notification_id = created[idx].id if (idx is not None and idx < len(created)) else None
-        _enqueue_email(
-            to=email,
-            subject=email_subject or title,
-            body=email_body or body,
-            notification_id=notification_id,
+    from .outbox import queue_emails
+    try:
+        queue_emails(
+            (
+                email,
+                email_subject or title,
+                email_body or body,
+                created[idx].id if (idx is not None and idx < len(created)) else None,
+            )
+            for email, idx in email_recipients
         )
+    except Exception:
+        logger.exception('Failed to queue emails for notification type %s', notification_type)
 
     return created
 
 
+def _count_unread(created_ids: dict[int, list[int]]) -> None:
+    """Add new in-app notifications to the unread counters and push them to
+    open streams (notifications.realtime)."""
+    from .realtime import adjust_unread
+    try:
+        adjust_unread({uid: len(ids) for uid, ids in created_ids.items()}, created_ids)
+    except Exception:
+        logger.exception('Failed to count unread notifications for users %s', list(created_ids))
+
+
 def _enqueue_email(to: str, subject: str, body: str, notification_id: int | None = None):
     """
-    Enqueue an email via Google Cloud Tasks (HTTP push).
-    Falls back to synchronous send when USE_CLOUD_TASKS is False (local dev).
+    Queue an email in the outbox (notifications.outbox); it is delivered
+    after the current transaction commits.
     """
-    if not getattr(settings, 'USE_CLOUD_TASKS', True):
-        from core.emails import send_plain_email
-        try:
-            send_plain_email(subject=subject, body=body, to=to)
-            if notification_id:
-                from django.utils import timezone
-                Notification.objects.filter(pk=notification_id).update(
-                    is_emailed=True,
-                    emailed_at=timezone.now(),
-                )
-        except Exception:
-            logger.exception('Synchronous email failed to %s', to)
-        return
-
+    from .outbox import queue_emails
     try:
-        from notifications.tasks import enqueue_send_email
-        enqueue_send_email(
-            to=to,
-            subject=subject,
-            body=body,
-            notification_id=notification_id,
-        )
+        queue_emails([(to, subject, body, notification_id)])
     except Exception:
-        logger.exception('Failed to enqueue email task to %s', to)
+        logger.exception('Failed to queue email to %s', to)
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Notification
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_unread(sender, instance, **kwargs):
+    """Keep NotificationUnreadCounter in step when unread rows are deleted
+    (user deletes cascade the counter away with them)."""
+    if not instance.is_read:
+        from .realtime import adjust_unread
+        adjust_unread({instance.user_id: -1})
@@ -6,9 +6,12 @@ enqueue_send_email() creates an HTTP push task that calls:
 
 Cloud Tasks retries on failure (configurable on the queue).
 The callback view (SendEmailTaskView) handles the actual SMTP send.
+The outbox dispatcher (notifications.outbox) creates tasks through one
+shared client instead of building a client per email.
 """
 from __future__ import annotations
 
+import functools
 import json
 import logging
 
@@ -17,23 +20,31 @@ from django.conf import settings
 logger = logging.getLogger(__name__)
 
 
-def enqueue_send_email(
+@functools.lru_cache(maxsize=None)
+def cloud_tasks_client():
+    """Process-wide CloudTasksClient (thread-safe; creating one per call costs
+    a channel setup)."""
+    from google.cloud import tasks_v2
+    return tasks_v2.CloudTasksClient()
+
+
+def send_email_queue_path() -> str:
+    return (
+        f'projects/{settings.GCP_PROJECT_ID}/locations/{settings.GCP_LOCATION}'
+        f'/queues/{settings.CLOUD_TASKS_QUEUE}'
+    )
+
+
+def build_send_email_task(
     to: str,
     subject: str,
     body: str,
     notification_id: int | None = None,
-) -> None:
-    """
-    Enqueue an HTTP push task to the Cloud Tasks queue.
-    The task will POST to /notifications/tasks/send-email/ with an OIDC token.
-    """
+) -> dict:
+    """HTTP push task that POSTs the email to /notifications/tasks/send-email/."""
     from google.cloud import tasks_v2
 
-    project_id  = settings.GCP_PROJECT_ID
-    location    = settings.GCP_LOCATION
-    queue_name  = settings.CLOUD_TASKS_QUEUE
     service_url = settings.CLOUD_RUN_SERVICE_URL
-    sa_email    = settings.CLOUD_TASKS_SERVICE_ACCOUNT
 
     payload = json.dumps({
         'notification_id': notification_id,
@@ -42,7 +53,7 @@ def enqueue_send_email(
         'body': body,
     }).encode('utf-8')
 
-    task = {
+    return {
         'http_request': {
             'http_method': tasks_v2.HttpMethod.POST,
             'url': f'{service_url}/notifications/tasks/send-email/',
@@ -52,12 +63,24 @@ def enqueue_send_email(
             },
             'body': payload,
             'oidc_token': {
-                'service_account_email': sa_email,
+                'service_account_email': settings.CLOUD_TASKS_SERVICE_ACCOUNT,
                 'audience': service_url,
             },
         }
     }
 
-    client = tasks_v2.CloudTasksClient()
-    parent = f'projects/{project_id}/locations/{location}/queues/{queue_name}'
-    client.create_task(parent=parent, task=task)
+
+def enqueue_send_email(
+    to: str,
+    subject: str,
+    body: str,
+    notification_id: int | None = None,
+) -> None:
+    """
+    Enqueue an HTTP push task to the Cloud Tasks queue.
+    The task will POST to /notifications/tasks/send-email/ with an OIDC token.
+    """
+    cloud_tasks_client().create_task(
+        parent=send_email_queue_path(),
+        task=build_send_email_task(to, subject, body, notification_id),
+    )
@@ -0,0 +1,153 @@
+import asyncio
+import json
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from notifications import outbox
+from notifications.models import EmailOutbox, Notification, NotificationUnreadCounter
+from notifications.outbox import drain_email_outbox, requeue_dead
+from notifications.realtime import NotificationBus, recount_unread, unread_count
+from notifications.service import bulk_notify, notify
+from notifications.views import _stream_user
+from projects.tests_meeting_brief import _allowed_host
+
+User = get_user_model()
+
+
+@override_settings(EMAIL_OUTBOX_TRANSPORT='smtp', EMAIL_OUTBOX_DISPATCH_ON_COMMIT=False)
+class EmailOutboxTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create(username=f'outbox-{i}', email=f'outbox-{i}@example.com') for i in range(3)
+        ]
+
+    def notify_all(self):
+        return bulk_notify(self.users, Notification.JOB_ON_HOLD, title='Job on hold', body='Details')
+
+    def test_bulk_notify_writes_the_outbox_in_one_insert(self):
+        # preferences, notifications, unread counters, pg_notify, outbox
+        with self.assertNumQueries(5):
+            created = self.notify_all()
+        self.assertEqual(EmailOutbox.objects.count(), 3)
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(drain_email_outbox(), {'sent': 3, 'failed': 0, 'dead': 0})
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), [u.email for u in self.users])
+        self.assertFalse(EmailOutbox.objects.exists())
+        self.assertEqual(Notification.objects.filter(pk__in=[n.pk for n in created], is_emailed=True).count(), 3)
+
+    def test_failures_back_off_and_go_dead(self):
+        self.notify_all()
+
+        def flaky(rows):
+            return {row.id: (OSError('refused') if row.to == self.users[0].email else None) for row in rows}
+
+        with mock.patch.dict(outbox.TRANSPORTS, {'smtp': flaky}):
+            self.assertEqual(drain_email_outbox(), {'sent': 2, 'failed': 1, 'dead': 0})
+            self.assertEqual(drain_email_outbox(), {'sent': 0, 'failed': 0, 'dead': 0})   # backing off
+
+            stuck = EmailOutbox.objects.get()
+            self.assertEqual(stuck.attempts, 1)
+            for _ in range(outbox.MAX_ATTEMPTS - 1):
+                EmailOutbox.objects.update(next_attempt_at=stuck.created_at)
+                drain_email_outbox()
+        stuck.refresh_from_db()
+        self.assertIsNotNone(stuck.dead_at)
+
+        self.assertEqual(requeue_dead(), 1)
+        self.assertEqual(drain_email_outbox()['sent'], 1)
+
+    @override_settings(EMAIL_OUTBOX_DISPATCH_ON_COMMIT=True)
+    def test_committed_emails_are_sent_before_the_request_returns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notify_all()
+            self.assertEqual(mail.outbox, [])
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    @override_settings(USE_CLOUD_TASKS=False)
+    def test_drain_endpoint_validates_max(self):
+        self.notify_all()
+        url = '/notifications/tasks/drain-email-outbox/'
+        for body in ({'max': 'lots'}, {'max': 0}, {'max': [1]}, [1]):
+            resp = self.client.post(url, json.dumps(body), content_type='application/json',
+                                    HTTP_HOST=_allowed_host())
+            self.assertEqual(resp.status_code, 400, body)
+        resp = self.client.post(url, json.dumps({'max': 10 ** 9}), content_type='application/json',
+                                HTTP_HOST=_allowed_host())
+        self.assertEqual(resp.json(), {'sent': 3, 'failed': 0, 'dead': 0})
+
+    @override_settings(EMAIL_OUTBOX_TRANSPORT='cloud_tasks')
+    def test_cloud_tasks_transport_reuses_one_client(self):
+        self.notify_all()
+        client = mock.Mock()
+        with mock.patch('notifications.tasks.cloud_tasks_client', return_value=client) as factory, \
+                mock.patch('notifications.tasks.build_send_email_task', side_effect=lambda *a: a):
+            self.assertEqual(drain_email_outbox()['sent'], 3)
+        factory.assert_called_once()
+        self.assertEqual(client.create_task.call_count, 3)
+
+
+@override_settings(EMAIL_OUTBOX_DISPATCH_ON_COMMIT=False)
+class UnreadCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create(username='unread-alice')
+        cls.bob = User.objects.create(username='unread-bob')
+
+    def test_counters_follow_creates_and_reads(self):
+        first = notify(self.alice, Notification.TASK_ASSIGNED, title='One')
+        bulk_notify([self.alice, self.bob], Notification.JOB_ON_HOLD, title='Two')
+        self.assertEqual((unread_count(self.alice.id), unread_count(self.bob.id)), (2, 1))
+
+        first.mark_as_read()
+        Notification.objects.get(pk=first.pk).mark_as_read()   # already read: no second decrement
+        self.assertEqual(unread_count(self.alice.id), 1)
+
+        client = APIClient(HTTP_HOST=_allowed_host())
+        client.force_authenticate(user=self.alice)
+        self.assertEqual(client.get('/notifications/unread_count/').data, {'count': 1})
+        client.post('/notifications/mark_all_read/')
+        self.assertEqual(client.get('/notifications/unread_count/').data, {'count': 0})
+
+        Notification.objects.filter(user=self.bob).delete()
+        self.assertEqual(unread_count(self.bob.id), 0)
+
+    def test_recount_repairs_drift(self):
+        bulk_notify([self.alice, self.bob], Notification.JOB_ON_HOLD, title='Drift')
+        NotificationUnreadCounter.objects.update(unread=7)
+        self.assertEqual(recount_unread(), 2)
+        self.assertEqual((unread_count(self.alice.id), unread_count(self.bob.id)), (1, 1))
+
+    def test_bus_fans_events_out_to_subscribed_streams(self):
+        bus = NotificationBus()
+        loop = asyncio.new_event_loop()
+        try:
+            queue = asyncio.Queue()
+            with mock.patch.object(bus, '_run'):
+                bus.subscribe(self.alice.id, loop, queue)
+            payload = json.dumps([{'u': self.alice.id, 'n': 5, 'c': 3, 'd': 1},
+                                  {'u': self.bob.id, 'n': 6, 'c': 1, 'd': 1}])
+            self.assertEqual(bus.dispatch(payload), 1)
+            loop.run_until_complete(asyncio.sleep(0))
+            self.assertEqual(queue.get_nowait()['c'], 3)
+
+            bus.unsubscribe(self.alice.id, loop, queue)
+            self.assertEqual(bus.dispatch(payload), 0)
+        finally:
+            loop.close()
+
+    def test_stream_takes_the_token_from_the_header_only(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = str(AccessToken.for_user(self.alice))
+        factory = RequestFactory()
+        self.assertEqual(_stream_user(factory.get('/notifications/stream/', HTTP_AUTHORIZATION=f'Bearer {token}')), self.alice)
+        self.assertIsNone(_stream_user(factory.get('/notifications/stream/', {'token': token})))
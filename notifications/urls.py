@@ -1,7 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
-from .views import NotificationPreferenceViewSet, NotificationConfigViewSet, NotificationViewSet, SendEmailTaskView
+from .views import (
+    DrainEmailOutboxTaskView, NotificationPreferenceViewSet, NotificationConfigViewSet, NotificationViewSet,
+    SendEmailTaskView, notification_stream,
+)
 
 notification_router = DefaultRouter()
 notification_router.register(r'', NotificationViewSet, basename='notification')
@@ -14,6 +17,9 @@ aux_router.register(r'config', NotificationConfigViewSet, basename='notification
 urlpatterns = [
     # Internal Cloud Tasks callback
     path('tasks/send-email/', SendEmailTaskView.as_view(), name='notification-send-email-task'),
+    path('tasks/drain-email-outbox/', DrainEmailOutboxTaskView.as_view(), name='notification-drain-email-outbox'),
+    # Server-sent events (ASGI only)
+    path('stream/', notification_stream, name='notification-stream'),
     # Preferences and routes must come before the empty-prefix router catch-all
     path('', include(aux_router.urls)),
     path('', include(notification_router.urls)),
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 
+from asgiref.sync import sync_to_async
+
 from django.conf import settings
-from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse, JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
@@ -17,8 +20,10 @@ from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
 from core.emails import send_plain_email
+from core.internal_tasks import parse_batch_limit, verify_task_secret
 
 from .models import Notification, NotificationPreference, NotificationConfig
+from .realtime import adjust_unread, bus, unread_count
 from .serializers import NotificationPreferenceSerializer, NotificationConfigSerializer, NotificationSerializer, TEAM_CHOICES
 from .service import NOTIFICATION_DEFAULTS, NOTIFICATION_CONFIG_DEFAULTS, invalidate_config_cache
 
@@ -39,6 +44,8 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     POST /notifications/{id}/mark_read/         — mark one as read
     POST /notifications/mark_all_read/          — mark all as read
     GET  /notifications/unread_count/           — {"count": N}
+
+    Live updates: GET /notifications/stream/ (notification_stream).
     """
     serializer_class   = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -65,6 +72,7 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
             user=request.user,
             is_read=False,
         ).update(is_read=True, read_at=timezone.now())
+        adjust_unread({request.user.id: -updated})
         return Response({
             'status': 'success',
             'message': f'{updated} bildirim okundu olarak işaretlendi.',
@@ -72,8 +80,89 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'])
     def unread_count(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'count': count})
+        return Response({'count': unread_count(request.user.id)})
+
+
+# =============================================================================
+# Live stream (server-sent events)
+# =============================================================================
+
+def _stream_user(request):
+    """User of the simplejwt access token in the Authorization header. Tokens
+    are not accepted in the query string, where they would end up in access
+    logs; clients read the stream with fetch() rather than EventSource, which
+    cannot send headers."""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else None
+    if raw is None:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _serialize_notification(notification_id):
+    notification = Notification.objects.filter(pk=notification_id).first()
+    return NotificationSerializer(notification).data if notification else None
+
+
+def _sse(event: str, data) -> str:
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n'
+
+
+async def notification_stream(request):
+    """
+    GET /notifications/stream/   (Authorization: Bearer <access token>)
+
+    Server-sent events, served by the ASGI application (config.asgi, which
+    the container runs under uvicorn):
+      event: unread        data: {"count": N, "delta": d}  — on connect and on every change
+      event: notification  data: <NotificationSerializer>  — each new notification
+    plus a comment line every NOTIFICATION_STREAM_HEARTBEAT_S to keep proxies
+    from closing an idle connection. Events arrive through Postgres
+    LISTEN/NOTIFY (notifications.realtime), not by polling.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI Django would buffer the endless iterator; clients fall
+        # back to polling unread_count
+        return JsonResponse({'detail': 'Event stream is only served by the ASGI application.'}, status=501)
+
+    user = await sync_to_async(_stream_user)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    heartbeat = getattr(settings, 'NOTIFICATION_STREAM_HEARTBEAT_S', 20)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    async def events():
+        bus.subscribe(user.id, loop, queue)
+        try:
+            yield 'retry: 5000\n\n'
+            yield _sse('unread', {'count': await sync_to_async(unread_count)(user.id), 'delta': None})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if event.get('n'):
+                    data = await sync_to_async(_serialize_notification)(event['n'])
+                    if data is not None:
+                        yield _sse('notification', data)
+                yield _sse('unread', {'count': event['c'], 'delta': event['d']})
+        finally:
+            bus.unsubscribe(user.id, loop, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 # =============================================================================
@@ -265,26 +354,6 @@ class NotificationConfigViewSet(
 # Cloud Tasks callback — internal endpoint
 # =============================================================================
 
-def _verify_task_secret(request):
-    """
-    Verify the shared secret sent by Cloud Tasks in the X-Task-Secret header.
-    Raises PermissionDenied if the secret is missing or incorrect.
-
-    Skipped when USE_CLOUD_TASKS=False (local dev).
-    """
-    if not getattr(settings, 'USE_CLOUD_TASKS', True):
-        return  # skip verification in local dev
-
-    secret = getattr(settings, 'QUEUE_SECRET', '')
-    if not secret:
-        logger.warning('QUEUE_SECRET is not set — task endpoint is unprotected')
-        return
-
-    incoming = request.headers.get('X-Task-Secret', '')
-    if incoming != secret:
-        raise PermissionDenied('Invalid task secret')
-
-
 @method_decorator(csrf_exempt, name='dispatch')
 class SendEmailTaskView(View):
     """
@@ -295,7 +364,7 @@ class SendEmailTaskView(View):
     """
 
     def post(self, request):
-        _verify_task_secret(request)
+        verify_task_secret(request)
 
         try:
             data = json.loads(request.body)
@@ -330,3 +399,33 @@ class SendEmailTaskView(View):
             )
 
         return HttpResponse(status=200)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class DrainEmailOutboxTaskView(View):
+    """
+    POST /notifications/tasks/drain-email-outbox/
+
+    Scheduler backstop for the email outbox (commits normally deliver their
+    own emails; Cloud Scheduler job "drain-email-outbox", see cloudbuild.yaml).
+    Body: {"max": 100} (optional).
+    Response: {"sent": N, "failed": M, "dead": D}
+    """
+
+    def post(self, request):
+        verify_task_secret(request)
+
+        try:
+            data = json.loads(request.body or b'{}')
+        except (json.JSONDecodeError, ValueError):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        try:
+            max_rows = parse_batch_limit(data.get('max'), default=100)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+
+        from .outbox import drain_email_outbox_fully
+        return JsonResponse(drain_email_outbox_fully(max_rows))
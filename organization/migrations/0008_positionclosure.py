@@ -0,0 +1,43 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    Position = apps.get_model('organization', 'Position')
+    PositionClosure = apps.get_model('organization', 'PositionClosure')
+    parents = dict(Position.objects.values_list('id', 'parent_id'))
+    rows = []
+    for position_id in parents:
+        ancestor, depth, seen = position_id, 0, set()
+        while ancestor and ancestor not in seen:
+            rows.append(PositionClosure(ancestor_id=ancestor, descendant_id=position_id, depth=depth))
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+    PositionClosure.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organization', '0007_remove_usergroup_organization_usergroup_slug_unique_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PositionClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='organization.position')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='organization.position')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='position_closure_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='uniq_position_closure_pair')],
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+    ]
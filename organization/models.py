@@ -43,11 +43,34 @@ class Position(models.Model):
 
     def ancestors(self):
         """All ancestors from direct parent to root, ordered nearest-first."""
-        result, pos = [], self
-        while pos.parent_id:
-            pos = pos.parent
-            result.append(pos)
-        return result
+        return list(
+            Position.objects
+            .filter(descendant_links__descendant=self, descendant_links__depth__gt=0)
+            .order_by('descendant_links__depth')
+        )
+
+
+class PositionClosure(models.Model):
+    """
+    Ancestor/descendant index of the Position tree: one row per pair, the
+    position itself at depth 0. Rebuilt by signals whenever a position is
+    created, re-parented or deleted (see services.rebuild_position_closure),
+    so chain walks and supervisor checks are single indexed lookups.
+    """
+    ancestor   = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='descendant_links')
+    descendant = models.ForeignKey(Position, on_delete=models.CASCADE, related_name='ancestor_links')
+    depth      = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='uniq_position_closure_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='position_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
 
 
 class UserGroup(models.Model):
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from django.contrib.auth.models import User, Permission
 
+from users.permissions import invalidate_role_perms
+
 
 def sync_user_permissions(user: User, position) -> None:
     """
@@ -25,6 +27,7 @@ def sync_user_permissions(user: User, position) -> None:
     # Clear Django's internal permission cache so has_perm() reflects the change
     for attr in ('_perm_cache', '_user_perm_cache', '_user_obj_perm_cache'):
         user.__dict__.pop(attr, None)
+    invalidate_role_perms(user)
 
 
 def resolve_chain_approvers(position, climb: int) -> list[int]:
@@ -43,26 +46,32 @@ def resolve_chain_approvers(position, climb: int) -> list[int]:
     """
     from users.models import UserProfile
 
-    steps_taken = 0
-    pos = position
-
-    while pos.parent_id:
-        pos = pos.parent
-        if not pos.is_active:
-            continue
-        holder_ids = list(
-            UserProfile.objects.filter(
-                position=pos,
-                user__is_active=True,
-            ).values_list('user_id', flat=True)
+    if position is None or climb < 1:
+        return []
+
+    # Active holders of every active ancestor, nearest ancestor first — one
+    # query on the closure index instead of one per level.
+    rows = (
+        UserProfile.objects
+        .filter(
+            position__descendant_links__descendant=position,
+            position__descendant_links__depth__gt=0,
+            position__is_active=True,
+            user__is_active=True,
         )
-        if not holder_ids:
-            continue
-        steps_taken += 1
-        if steps_taken == climb:
-            return list(dict.fromkeys(holder_ids))
+        .order_by('position__descendant_links__depth', 'id')
+        .values_list('position__descendant_links__depth', 'user_id')
+    )
+    steps_taken, current_depth, holder_ids = 0, None, []
+    for depth, user_id in rows:
+        if depth != current_depth:
+            if steps_taken == climb:
+                break
+            steps_taken += 1
+            current_depth, holder_ids = depth, []
+        holder_ids.append(user_id)
 
-    return []
+    return list(dict.fromkeys(holder_ids)) if steps_taken == climb else []
 
 
 def is_org_supervisor(supervisor_user, subordinate_user) -> bool:
@@ -83,14 +92,35 @@ def is_org_supervisor(supervisor_user, subordinate_user) -> bool:
     if sup_pos is None or sub_pos is None or not sup_pos.is_active:
         return False
 
-    seen = set()
-    pos = sub_pos
-    while pos.parent_id and pos.parent_id not in seen:
-        if pos.parent_id == sup_pos.pk:
-            return True
-        seen.add(pos.parent_id)
-        pos = pos.parent
-    return False
+    from .models import PositionClosure
+    return PositionClosure.objects.filter(
+        ancestor_id=sup_pos.pk, descendant_id=sub_pos.pk, depth__gt=0,
+    ).exists()
+
+
+def is_supervisor_of_many(supervisor_user, subordinate_user_ids) -> set[int]:
+    """
+    Bulk ``is_org_supervisor`` for list views: the subset of
+    ``subordinate_user_ids`` whose position sits below supervisor_user's
+    active position, in one query.
+    """
+    from users.models import UserProfile
+
+    sup_pos = _position_of(supervisor_user) if supervisor_user else None
+    if sup_pos is None or not sup_pos.is_active:
+        return set()
+    ids = {uid for uid in subordinate_user_ids if uid and uid != supervisor_user.pk}
+    if not ids:
+        return set()
+    return set(
+        UserProfile.objects
+        .filter(
+            user_id__in=ids,
+            position__ancestor_links__ancestor_id=sup_pos.pk,
+            position__ancestor_links__depth__gt=0,
+        )
+        .values_list('user_id', flat=True)
+    )
 
 
 def _position_of(user):
@@ -98,6 +128,31 @@ def _position_of(user):
     return profile.position if profile else None
 
 
+def rebuild_position_closure() -> int:
+    """
+    Recompute PositionClosure from the parent FKs. The org tree is a few
+    hundred rows, so every structural change simply rebuilds it (a deleted
+    position orphans its reports through SET_NULL, which an incremental
+    update would have to chase). Returns the row count.
+    """
+    from django.db import transaction
+    from .models import Position, PositionClosure
+
+    parents = dict(Position.objects.values_list('id', 'parent_id'))
+    rows = []
+    for position_id in parents:
+        ancestor, depth, seen = position_id, 0, set()
+        while ancestor and ancestor not in seen:
+            rows.append(PositionClosure(ancestor_id=ancestor, descendant_id=position_id, depth=depth))
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+    with transaction.atomic():
+        PositionClosure.objects.all().delete()
+        PositionClosure.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
 def get_dept_members(dept_code: str):
     """
     Return a queryset of active users whose position has the given department_code tag.
@@ -1,6 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from .models import Position
+
 
 @receiver(post_save, sender='users.UserProfile')
 def sync_permissions_on_profile_save(sender, instance, **kwargs):
@@ -17,3 +19,25 @@ def sync_permissions_on_profile_save(sender, instance, **kwargs):
 
     from .services import sync_user_permissions
     sync_user_permissions(instance.user, instance.position)
+
+
+@receiver(pre_save, sender=Position)
+def capture_position_parent(sender, instance, **kwargs):
+    """Remember the stored parent so post_save can tell a move from an edit."""
+    instance._old_parent_id = (
+        Position.objects.filter(pk=instance.pk).values_list('parent_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Position)
+def rebuild_closure_on_position_move(sender, instance, created, **kwargs):
+    if created or getattr(instance, '_old_parent_id', None) != instance.parent_id:
+        from .services import rebuild_position_closure
+        rebuild_position_closure()
+
+
+@receiver(post_delete, sender=Position)
+def rebuild_closure_on_position_delete(sender, instance, **kwargs):
+    from .services import rebuild_position_closure
+    rebuild_position_closure()
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from organization.models import Position, PositionClosure
+from organization.services import (
+    is_org_supervisor, is_supervisor_of_many, rebuild_position_closure, resolve_chain_approvers,
+)
+
+User = get_user_model()
+
+
+class PositionClosureTests(TestCase):
+    """gm > director > (vacant) manager > staff; a second staff under director."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.gm = Position.objects.create(title='GM', level=2)
+        cls.director = Position.objects.create(title='Director', level=3, parent=cls.gm)
+        cls.manager = Position.objects.create(title='Manager', level=4, parent=cls.director)
+        cls.staff = Position.objects.create(title='Staff', level=6, parent=cls.manager)
+        cls.other_staff = Position.objects.create(title='Other staff', level=6, parent=cls.director)
+
+        cls.users = {}
+        for name, position in (('gm', cls.gm), ('director', cls.director), ('director2', cls.director),
+                               ('staff', cls.staff), ('other', cls.other_staff)):
+            user = User.objects.create(username=f'org-{name}')
+            user.profile.position = position
+            user.profile.save()
+            cls.users[name] = user
+
+    def test_chain_skips_vacant_positions(self):
+        u = self.users
+        self.assertEqual(resolve_chain_approvers(self.staff, 1), [u['director'].id, u['director2'].id])
+        self.assertEqual(resolve_chain_approvers(self.staff, 2), [u['gm'].id])
+        self.assertEqual(resolve_chain_approvers(self.staff, 3), [])
+
+        Position.objects.filter(pk=self.director.pk).update(is_active=False)
+        self.assertEqual(resolve_chain_approvers(self.staff, 1), [u['gm'].id])
+
+    def test_supervisor_checks(self):
+        u = self.users
+        self.assertTrue(is_org_supervisor(u['gm'], u['staff']))
+        self.assertFalse(is_org_supervisor(u['staff'], u['gm']))
+        self.assertFalse(is_org_supervisor(u['director'], u['director2']))   # peers
+        self.assertEqual(
+            is_supervisor_of_many(u['director'], [v.id for v in u.values()]),
+            {u['staff'].id, u['other'].id},
+        )
+
+    def test_moves_and_deletes_keep_the_index_current(self):
+        self.staff.parent = self.other_staff
+        self.staff.save()
+        self.assertEqual([p.title for p in self.staff.ancestors()], ['Other staff', 'Director', 'GM'])
+
+        self.director.delete()   # reports become roots (SET_NULL)
+        self.assertEqual(list(Position.objects.get(pk=self.staff.pk).ancestors()),
+                         [Position.objects.get(pk=self.other_staff.pk)])
+        maintained = set(PositionClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+        rebuild_position_closure()
+        self.assertEqual(
+            set(PositionClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth')), maintained)
@@ -16,7 +16,7 @@ from zoneinfo import ZoneInfo
 from django.contrib.contenttypes.models import ContentType
 
 from tasks.models import Operation, Timer
-from machining.services.timers import split_timer_by_local_day_and_bucket
+from machining.services.timers import split_timers_by_local_day_and_bucket
 
 from ..models import OvertimeEntry
 
@@ -102,9 +102,11 @@ def build_machining_overtime_report(*, start_date=None, end_date=None, user_id=N
 
     # (op_key, user_id, date) -> worked seconds
     worked = defaultdict(int)
-    for t in timers:
-        for seg in split_timer_by_local_day_and_bucket(int(t["start_time"]), int(t["finish_time"])):
-            worked[(t["object_id"], t["user_id"], seg["date"])] += seg["seconds"]
+    segs = split_timers_by_local_day_and_bucket(
+        [int(t["start_time"]) for t in timers], [int(t["finish_time"]) for t in timers])
+    for i, day, seconds in zip(segs.timer.tolist(), segs.day.astype(object), segs.seconds.tolist()):
+        t = timers[i]
+        worked[(t["object_id"], t["user_id"], day)] += seconds
 
     rows = []
     for e in entries:
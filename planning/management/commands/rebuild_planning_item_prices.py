@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from planning.price_index import REFRESH_BATCH, rebuild_planning_item_prices
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the resolved-price index (PlanningRequestItemPrice) of every "
+        "planning request item. Run once after deploying the index, and after "
+        "writes that bypass model signals (QuerySet.update(), bulk_create()); "
+        "safe to run any time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REFRESH_BATCH,
+            help=f"Planning items priced per batch (default {REFRESH_BATCH}).",
+        )
+
+    def handle(self, *args, **opts):
+        written = rebuild_planning_item_prices(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed the resolved price of {written} planning item(s)."))
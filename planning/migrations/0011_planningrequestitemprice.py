@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-16 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning', '0010_planningrequestitem_consumed_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlanningRequestItemPrice',
+            fields=[
+                ('planning_request_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resolved_price', serialize=False, to='planning.planningrequestitem')),
+                ('tier', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('price_source', models.CharField(blank=True, max_length=20)),
+                ('unit_price_eur', models.DecimalField(blank=True, decimal_places=6, max_digits=21, null=True)),
+                ('original_unit_price', models.DecimalField(blank=True, decimal_places=6, max_digits=21, null=True)),
+                ('original_currency', models.CharField(blank=True, max_length=3)),
+                ('price_date', models.DateField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -740,6 +740,30 @@ class PlanningRequestItem(models.Model):
         return (earned, total)
 
 
+class PlanningRequestItemPrice(models.Model):
+    """
+    Materialized result of the price cascade (planning.price_utils) for one
+    PlanningRequestItem, kept current by planning.price_index. A row with
+    ``tier`` NULL means no tier found a price.
+    """
+    planning_request_item = models.OneToOneField(
+        PlanningRequestItem,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='resolved_price'
+    )
+    tier = models.PositiveSmallIntegerField(null=True, blank=True)  # 1-5, see price_utils
+    price_source = models.CharField(max_length=20, blank=True)
+    unit_price_eur = models.DecimalField(max_digits=21, decimal_places=6, null=True, blank=True)
+    original_unit_price = models.DecimalField(max_digits=21, decimal_places=6, null=True, blank=True)
+    original_currency = models.CharField(max_length=3, blank=True)
+    price_date = models.DateField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.planning_request_item_id}: {self.unit_price_eur} EUR ({self.price_source or 'none'})"
+
+
 class FileAsset(models.Model):
     """
     Physical file stored once. Can be linked to any request/item via FileAttachment.
@@ -0,0 +1,206 @@
+"""
+Resolved-price index for PlanningRequestItem.
+
+The 5-tier cascade in planning.price_utils used to run on every read: the
+planning item list (include_price=true), job cost estimates and the meeting
+brief each prefetched PO lines and offers and annotated eight subqueries per
+row. Its result now lives in PlanningRequestItemPrice (one row per planning
+item, ``tier`` NULL when nothing is priced) and readers select_related it.
+
+Rows are refreshed when their inputs change (planning.signals):
+
+* PO line / PurchaseRequestItem / PO (status, ordered_at, tax_rate,
+  currency) / PR status changes reprice the FK-linked planning items
+  (tiers 1, 3, 4) and every planning item of the same catalog items
+  (tiers 2 and 5 match on item);
+* ItemOffer and SupplierOffer (tax_rate, currency) changes reprice the
+  FK-linked planning items (tiers 3, 4);
+* PR <-> planning item M2M changes and planning item saves reprice those
+  planning items;
+* a new CurrencyRateSnapshot reprices the foreign-currency rows it may
+  convert differently.
+
+``mark_prices_stale`` collects the ids and refreshes them in one batch when
+the transaction commits, so rolled-back changes never reach the index.
+QuerySet.update() and bulk_create() bypass the signals;
+``manage.py rebuild_planning_item_prices`` recomputes every row.
+"""
+from __future__ import annotations
+
+import threading
+
+from django.db import transaction
+from django.db.models import Q
+
+REFRESH_BATCH = 500
+
+PO_PRICE_FIELDS = {'status', 'ordered_at', 'tax_rate', 'currency'}
+SUPPLIER_OFFER_PRICE_FIELDS = {'tax_rate', 'currency'}
+
+_pending = threading.local()
+
+
+# ---------------------------------------------------------------------------
+# Refresh
+# ---------------------------------------------------------------------------
+
+def _price_row(pri):
+    from .models import PlanningRequestItemPrice
+    from .price_utils import compute_planning_item_price
+
+    price = compute_planning_item_price(pri)
+    if price is None:
+        return PlanningRequestItemPrice(planning_request_item_id=pri.pk)
+    return PlanningRequestItemPrice(
+        planning_request_item_id=pri.pk,
+        tier=price['tier'],
+        price_source=price['price_source'],
+        unit_price_eur=price['unit_price_eur'],
+        original_unit_price=price['original_unit_price'],
+        original_currency=price['original_currency'] or '',
+        price_date=price['price_date'],
+    )
+
+
+def _refresh(queryset, batch_size) -> int:
+    from .models import PlanningRequestItem, PlanningRequestItemPrice
+    from .price_utils import with_price_inputs
+
+    ids = list(queryset.order_by('id').values_list('id', flat=True))
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        chunk = PlanningRequestItem.objects.filter(pk__in=ids[start:start + batch_size])
+        rows = [_price_row(pri) for pri in with_price_inputs(chunk).order_by('id')]
+        PlanningRequestItemPrice.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['planning_request_item'],
+            update_fields=[
+                'tier', 'price_source', 'unit_price_eur', 'original_unit_price',
+                'original_currency', 'price_date', 'refreshed_at',
+            ],
+        )
+        written += len(rows)
+    return written
+
+
+def refresh_planning_item_prices(pri_ids=(), item_ids=(), batch_size: int = REFRESH_BATCH) -> int:
+    """
+    Re-run the cascade for planning items ``pri_ids`` and for every planning
+    item of catalog items ``item_ids``; returns the number of rows written.
+    """
+    from .models import PlanningRequestItem
+
+    pri_ids = {i for i in pri_ids if i}
+    item_ids = {i for i in item_ids if i}
+    if not pri_ids and not item_ids:
+        return 0
+    return _refresh(
+        PlanningRequestItem.objects.filter(Q(pk__in=pri_ids) | Q(item_id__in=item_ids)),
+        batch_size,
+    )
+
+
+def rebuild_planning_item_prices(batch_size: int = REFRESH_BATCH) -> int:
+    """Recompute the row of every planning item; returns rows written."""
+    from .models import PlanningRequestItem
+
+    return _refresh(PlanningRequestItem.objects.all(), batch_size)
+
+
+# ---------------------------------------------------------------------------
+# Deferred refresh
+# ---------------------------------------------------------------------------
+
+def mark_prices_stale(pri_ids=(), item_ids=()) -> None:
+    """
+    Refresh planning items ``pri_ids`` and the planning items of catalog
+    items ``item_ids`` once the current transaction commits (right away in
+    autocommit). Marks made in the same transaction share one refresh.
+    """
+    pri_ids = {i for i in pri_ids if i}
+    item_ids = {i for i in item_ids if i}
+    if not pri_ids and not item_ids:
+        return
+    pending = getattr(_pending, 'ids', None)
+    if pending is None:
+        pending = _pending.ids = (set(), set())
+    pending[0].update(pri_ids)
+    pending[1].update(item_ids)
+    transaction.on_commit(flush_stale_prices, robust=True)
+
+
+def flush_stale_prices() -> int:
+    """Refresh everything marked so far in this thread."""
+    pending = getattr(_pending, 'ids', None)
+    _pending.ids = None
+    if not pending:
+        return 0
+    return refresh_planning_item_prices(*pending)
+
+
+# ---------------------------------------------------------------------------
+# Change -> affected planning items
+# ---------------------------------------------------------------------------
+
+def request_items_changed(request_item_ids, offers_only: bool = False) -> None:
+    """
+    PurchaseRequestItems whose PO lines or offers changed. ``offers_only``
+    limits the refresh to the FK-linked planning items (offers only feed
+    tiers 3 and 4).
+    """
+    from procurement.models import PurchaseRequestItem
+
+    request_item_ids = [i for i in request_item_ids if i]
+    if not request_item_ids:
+        return
+    rows = list(
+        PurchaseRequestItem.objects
+        .filter(pk__in=request_item_ids)
+        .values_list('planning_request_item_id', 'item_id')
+    )
+    mark_prices_stale(
+        pri_ids=[pri_id for pri_id, _ in rows],
+        item_ids=() if offers_only else [item_id for _, item_id in rows],
+    )
+
+
+def purchase_orders_changed(po_ids) -> None:
+    from procurement.models import PurchaseRequestItem
+
+    request_item_ids = PurchaseRequestItem.objects.filter(po_lines__po_id__in=list(po_ids)).values_list('id', flat=True)
+    request_items_changed(list(request_item_ids))
+
+
+def purchase_requests_changed(pr_ids) -> None:
+    from procurement.models import PurchaseRequestItem
+
+    request_item_ids = PurchaseRequestItem.objects.filter(purchase_request_id__in=list(pr_ids)).values_list('id', flat=True)
+    request_items_changed(list(request_item_ids))
+
+
+def supplier_offers_changed(supplier_offer_ids) -> None:
+    from procurement.models import ItemOffer
+
+    request_item_ids = (
+        ItemOffer.objects.filter(supplier_offer_id__in=list(supplier_offer_ids))
+        .values_list('purchase_request_item_id', flat=True)
+    )
+    request_items_changed(list(request_item_ids), offers_only=True)
+
+
+def fx_snapshot_added(snapshot_date) -> None:
+    """
+    A rate snapshot for ``snapshot_date`` changes conversions on/after that
+    date, and before it too when it is the new earliest snapshot.
+    """
+    from core.fx import invalidate_fx_rates
+    from core.models import CurrencyRateSnapshot
+
+    from .models import PlanningRequestItemPrice
+
+    invalidate_fx_rates()   # the refresh must not convert with the old table
+    rows = PlanningRequestItemPrice.objects.filter(tier__isnull=False).exclude(original_currency='EUR')
+    if CurrencyRateSnapshot.objects.filter(date__lt=snapshot_date).exists():
+        rows = rows.filter(price_date__gte=snapshot_date)
+    mark_prices_stale(pri_ids=list(rows.values_list('planning_request_item_id', flat=True)))
@@ -18,11 +18,18 @@ Returns:
         'original_currency': str,
         'price_source': str,   # 'po_line' | 'recommended_offer' | 'any_offer' | 'historical_po'
         'price_date': date,
+        'tier': int,
     }
     or None if no price found at any tier.
+
+The cascade (compute_planning_item_price) runs when planning.price_index
+refreshes PlanningRequestItemPrice; readers go through
+resolve_planning_item_price, which reads that row.
 """
 from decimal import Decimal
 
+from django.core.exceptions import ObjectDoesNotExist
+
 
 def _ex_tax(gross, tax_rate):
     rate = tax_rate or Decimal('0')
@@ -31,16 +38,111 @@ def _ex_tax(gross, tax_rate):
     return gross / (1 + rate / Decimal('100'))
 
 
+def with_price_inputs(queryset):
+    """
+    Prefetches and _t2_*/_t5_* annotations compute_planning_item_price needs
+    on a PlanningRequestItem queryset.
+    """
+    from django.db.models import OuterRef, Prefetch, Q, Subquery
+    from django.db.models.functions import Coalesce
+    from procurement.models import ItemOffer, PurchaseOrderLine, PurchaseRequestItem
+
+    # Tier 2: latest PO line via M2M path (raw values for Python-side EUR conversion)
+    pol_m2m_base = PurchaseOrderLine.objects.filter(
+        purchase_request_item__purchase_request__planning_request_items=OuterRef('pk'),
+        purchase_request_item__item_id=OuterRef('item_id'),
+    ).exclude(
+        Q(purchase_request_item__purchase_request__status='cancelled') |
+        Q(po__status='cancelled')
+    ).order_by('-po__ordered_at', '-po__created_at', '-id')
+
+    # Tier 5: latest historical PO line for same item across any job
+    pol_hist_base = PurchaseOrderLine.objects.filter(
+        purchase_request_item__item_id=OuterRef('item_id'),
+    ).exclude(
+        Q(purchase_request_item__purchase_request__status='cancelled') |
+        Q(po__status='cancelled')
+    ).order_by('-po__ordered_at', '-po__created_at', '-id')
+
+    return (
+        queryset
+        .prefetch_related(
+            Prefetch(
+                'purchase_request_items',
+                queryset=PurchaseRequestItem.objects.select_related('purchase_request'),
+            ),
+            Prefetch(
+                'purchase_request_items__po_lines',
+                queryset=PurchaseOrderLine.objects.select_related('po').order_by('-id'),
+            ),
+            Prefetch(
+                'purchase_request_items__offers',
+                queryset=ItemOffer.objects.select_related('supplier_offer').order_by('-id'),
+            ),
+        )
+        .annotate(
+            _t2_price=Subquery(pol_m2m_base.values('unit_price')[:1]),
+            _t2_currency=Subquery(pol_m2m_base.values('po__currency')[:1]),
+            _t2_tax=Subquery(pol_m2m_base.values('po__tax_rate')[:1]),
+            _t2_date=Subquery(
+                pol_m2m_base.annotate(_ref_date=Coalesce('po__ordered_at', 'po__created_at'))
+                .values('_ref_date')[:1]
+            ),
+            _t5_price=Subquery(pol_hist_base.values('unit_price')[:1]),
+            _t5_currency=Subquery(pol_hist_base.values('po__currency')[:1]),
+            _t5_tax=Subquery(pol_hist_base.values('po__tax_rate')[:1]),
+            _t5_date=Subquery(
+                pol_hist_base.annotate(_ref_date=Coalesce('po__ordered_at', 'po__created_at'))
+                .values('_ref_date')[:1]
+            ),
+        )
+    )
+
+
+def price_loaded(pri):
+    """True when ``pri`` was fetched with select_related('resolved_price')."""
+    from .models import PlanningRequestItem
+
+    return PlanningRequestItem.resolved_price.is_cached(pri)
+
+
 def resolve_planning_item_price(pri):
     """
-    Run the 5-tier price cascade for a PlanningRequestItem instance.
+    Resolved price of a PlanningRequestItem, read from its
+    PlanningRequestItemPrice row (select_related('resolved_price') to avoid a
+    query per item). Items not indexed yet are refreshed on the spot.
+    """
+    try:
+        row = pri.resolved_price
+    except ObjectDoesNotExist:
+        from .models import PlanningRequestItemPrice
+        from .price_index import refresh_planning_item_prices
+
+        refresh_planning_item_prices(pri_ids=[pri.pk])
+        row = PlanningRequestItemPrice.objects.filter(pk=pri.pk).first()
+    if row is None or row.tier is None:
+        return None
+    return {
+        'unit_price_eur': row.unit_price_eur,
+        'original_unit_price': row.original_unit_price,
+        'original_currency': row.original_currency,
+        'price_source': row.price_source,
+        'price_date': row.price_date,
+        'tier': row.tier,
+    }
+
+
+def compute_planning_item_price(pri):
+    """
+    Run the 5-tier price cascade for a PlanningRequestItem instance fetched
+    through with_price_inputs().
 
     Tiers 1, 3, 4 use prefetched purchase_request_items__po_lines__po and
     purchase_request_items__offers__supplier_offer (no extra DB queries).
     Tiers 3/4 filter in Python to avoid re-querying the prefetch cache.
 
-    Tiers 2 and 5 read from queryset annotations (_t2_* and _t5_*) set by
-    PlanningRequestItemViewSet.get_queryset() — also no per-item DB queries.
+    Tiers 2 and 5 read from the _t2_* and _t5_* annotations — also no
+    per-item DB queries.
     """
     from projects.services.costing import convert_to_eur
 
@@ -67,6 +169,7 @@ def resolve_planning_item_price(pri):
             'original_currency': po_line.po.currency,
             'price_source': 'po_line',
             'price_date': ref_date,
+            'tier': 1,
         }
 
     # --- Tier 2: PurchaseOrderLine via M2M (annotation) ---
@@ -83,6 +186,7 @@ def resolve_planning_item_price(pri):
             'original_currency': t2_currency,
             'price_source': 'po_line',
             'price_date': ref_date,
+            'tier': 2,
         }
 
     # --- Tier 3: Recommended ItemOffer (prefetched, filtered in Python) ---
@@ -105,6 +209,7 @@ def resolve_planning_item_price(pri):
             'original_currency': offer.supplier_offer.currency,
             'price_source': 'recommended_offer',
             'price_date': ref_date,
+            'tier': 3,
         }
 
     # --- Tier 4: Any ItemOffer (prefetched, filtered in Python) ---
@@ -126,6 +231,7 @@ def resolve_planning_item_price(pri):
             'original_currency': offer.supplier_offer.currency,
             'price_source': 'any_offer',
             'price_date': ref_date,
+            'tier': 4,
         }
 
     # --- Tier 5: Latest historical PO line for same item (annotation) ---
@@ -142,6 +248,7 @@ def resolve_planning_item_price(pri):
             'original_currency': t5_currency,
             'price_source': 'historical_po',
             'price_date': ref_date,
+            'tier': 5,
         }
 
     return None
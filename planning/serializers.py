@@ -383,7 +383,8 @@ class PlanningRequestItemListSerializer(serializers.ModelSerializer):
                             'is_consumed', 'consumed_at', 'consumed_by']
 
     def _price_requested(self, obj):
-        return hasattr(obj, '_t2_price')
+        from .price_utils import price_loaded
+        return price_loaded(obj)
 
     def _resolve_price(self, obj):
         if not self._price_requested(obj):
@@ -537,7 +538,8 @@ class PlanningRequestItemSerializer(serializers.ModelSerializer):
         return list(result.values()) if result else None
 
     def _price_requested(self, obj):
-        return hasattr(obj, '_t2_price')
+        from .price_utils import price_loaded
+        return price_loaded(obj)
 
     def _resolve_price(self, obj):
         if not self._price_requested(obj):
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 from decimal import Decimal
 
+from procurement.models import PurchaseRequest
+
+from . import price_index
+
 
 @receiver(post_save, sender='planning.PlanningRequestItem')
 def reopen_procurement_task_on_new_item(sender, instance, created, **kwargs):
@@ -26,3 +30,74 @@ def reopen_procurement_task_on_new_item(sender, instance, created, **kwargs):
 
     for task in completed_tasks:
         task.uncomplete()
+
+
+# ---------------------------------------------------------------------------
+# Resolved-price index (see planning.price_index)
+# ---------------------------------------------------------------------------
+
+def _touches(update_fields, fields):
+    return update_fields is None or bool(set(update_fields) & fields)
+
+
+@receiver(post_save, sender='planning.PlanningRequestItem')
+def reprice_planning_item(sender, instance, created, update_fields=None, **kwargs):
+    if created or _touches(update_fields, {'item'}):
+        price_index.mark_prices_stale(pri_ids=[instance.pk])
+
+
+@receiver(post_save, sender='procurement.PurchaseRequestItem')
+@receiver(post_delete, sender='procurement.PurchaseRequestItem')
+def reprice_on_request_item_change(sender, instance, **kwargs):
+    price_index.mark_prices_stale(
+        pri_ids=[instance.planning_request_item_id], item_ids=[instance.item_id],
+    )
+
+
+@receiver(post_save, sender='procurement.PurchaseOrderLine')
+@receiver(post_delete, sender='procurement.PurchaseOrderLine')
+def reprice_on_po_line_change(sender, instance, **kwargs):
+    price_index.request_items_changed([instance.purchase_request_item_id])
+
+
+@receiver(post_save, sender='procurement.PurchaseOrder')
+def reprice_on_po_change(sender, instance, created, update_fields=None, **kwargs):
+    # A new PO has no lines yet; each line reprices itself
+    if not created and _touches(update_fields, price_index.PO_PRICE_FIELDS):
+        price_index.purchase_orders_changed([instance.pk])
+
+
+@receiver(post_save, sender='procurement.PurchaseRequest')
+def reprice_on_pr_status_change(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, {'status'}):
+        price_index.purchase_requests_changed([instance.pk])
+
+
+@receiver(post_save, sender='procurement.ItemOffer')
+@receiver(post_delete, sender='procurement.ItemOffer')
+def reprice_on_item_offer_change(sender, instance, **kwargs):
+    price_index.request_items_changed([instance.purchase_request_item_id], offers_only=True)
+
+
+@receiver(post_save, sender='procurement.SupplierOffer')
+def reprice_on_supplier_offer_change(sender, instance, created, update_fields=None, **kwargs):
+    if not created and _touches(update_fields, price_index.SUPPLIER_OFFER_PRICE_FIELDS):
+        price_index.supplier_offers_changed([instance.pk])
+
+
+@receiver(m2m_changed, sender=PurchaseRequest.planning_request_items.through)
+def reprice_on_pr_planning_items_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        pri_ids = [instance.pk]
+    elif action == 'pre_clear':
+        pri_ids = list(instance.planning_request_items.values_list('id', flat=True))
+    else:
+        pri_ids = pk_set or ()
+    price_index.mark_prices_stale(pri_ids=pri_ids)
+
+
+@receiver(post_save, sender='core.CurrencyRateSnapshot')
+def reprice_on_fx_snapshot(sender, instance, **kwargs):
+    price_index.fx_snapshot_added(instance.date)
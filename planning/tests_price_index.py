@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from planning.models import PlanningRequest, PlanningRequestItem, PlanningRequestItemPrice
+from planning.price_index import rebuild_planning_item_prices
+from planning.price_utils import resolve_planning_item_price
+from procurement.models import (
+    Item, ItemOffer, PurchaseOrder, PurchaseOrderLine, PurchaseRequest,
+    PurchaseRequestItem, Supplier, SupplierOffer,
+)
+from projects.services.costing import _planning_items_with_prices
+
+User = get_user_model()
+
+ITEMS_URL = '/planning/items/'
+
+
+class PlanningItemPriceIndexTests(TestCase):
+    """Prices are stored per planning item and follow PO / offer / PR changes
+    once the writing transaction commits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='price-index', is_superuser=True)
+        cls.item = Item.objects.create(code='PX-0001', name='Flanş DN50', unit='adet')
+        planning_request = PlanningRequest.objects.create(
+            request_number='PL-PX-1', title='t', created_by=cls.user)
+        cls.ordered = PlanningRequestItem.objects.create(
+            planning_request=planning_request, item=cls.item, job_no='960-01', quantity=Decimal('4'))
+        cls.other_job = PlanningRequestItem.objects.create(
+            planning_request=planning_request, item=cls.item, job_no='960-02', quantity=Decimal('2'))
+        cls.supplier = Supplier.objects.create(name='Price Index Supplier', default_currency='EUR')
+
+    def _request_with_offer(self, unit_price):
+        pr = PurchaseRequest.objects.create(request_number='PR-PX-1', title='t', requestor=self.user)
+        pr_item = PurchaseRequestItem.objects.create(
+            purchase_request=pr, item=self.item, quantity=Decimal('4'), planning_request_item=self.ordered)
+        supplier_offer = SupplierOffer.objects.create(
+            purchase_request=pr, supplier=self.supplier, currency='EUR', tax_rate=Decimal('0'))
+        offer = ItemOffer.objects.create(
+            purchase_request_item=pr_item, supplier_offer=supplier_offer,
+            unit_price=Decimal(unit_price), total_price=Decimal(unit_price) * 4, is_recommended=True)
+        return pr, pr_item, offer
+
+    def _price(self, pri):
+        pri = PlanningRequestItem.objects.select_related('resolved_price').get(pk=pri.pk)
+        price = resolve_planning_item_price(pri)
+        return (price['price_source'], price['unit_price_eur']) if price else None
+
+    def test_index_follows_offers_orders_and_cancellations(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            pr, pr_item, offer = self._request_with_offer('100')
+        self.assertEqual(self._price(self.ordered), ('recommended_offer', Decimal('100')))
+        self.assertIsNone(self._price(self.other_job))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po = PurchaseOrder.objects.create(
+                pr=pr, supplier_offer=offer.supplier_offer, supplier=self.supplier,
+                currency='EUR', tax_rate=Decimal('0'), ordered_at=timezone.now())
+            PurchaseOrderLine.objects.create(
+                po=po, item_offer=offer, purchase_request_item=pr_item,
+                quantity=Decimal('4'), unit_price=Decimal('90'), total_price=Decimal('360'))
+        self.assertEqual(self._price(self.ordered), ('po_line', Decimal('90')))
+        # Same catalog item, other job: priced from the order history (tier 5)
+        self.assertEqual(self._price(self.other_job), ('historical_po', Decimal('90')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            po.status = 'cancelled'
+            po.save(update_fields=['status'])
+        self.assertEqual(self._price(self.ordered), ('recommended_offer', Decimal('100')))
+        self.assertIsNone(self._price(self.other_job))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            pr.status = 'cancelled'
+            pr.save(update_fields=['status'])
+        self.assertIsNone(self._price(self.ordered))
+
+    def test_readers_use_the_joined_row(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._request_with_offer('100')
+        PlanningRequestItemPrice.objects.filter(pk=self.ordered.pk).update(unit_price_eur=Decimal('55'))
+
+        with self.assertNumQueries(1):
+            prices = {pri.pk: resolve_planning_item_price(pri) for pri in _planning_items_with_prices(['960-01'])}
+        self.assertEqual(prices[self.ordered.pk]['unit_price_eur'], Decimal('55'))
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        resp = client.get(ITEMS_URL, {'include_price': 'true'})
+        rows = resp.data['results'] if isinstance(resp.data, dict) else resp.data
+        row = next(r for r in rows if r['id'] == self.ordered.pk)
+        self.assertEqual((row['latest_unit_price_eur'], row['latest_unit_price_source']), (55.0, 'recommended_offer'))
+
+        # The rebuild recomputes from the source rows
+        self.assertEqual(rebuild_planning_item_prices(), 2)
+        self.assertEqual(self._price(self.ordered), ('recommended_offer', Decimal('100')))
+
+    def test_unindexed_items_are_priced_on_read(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._request_with_offer('100')
+        PlanningRequestItemPrice.objects.all().delete()
+        self.assertEqual(self._price(self.ordered), ('recommended_offer', Decimal('100')))
+        self.assertTrue(PlanningRequestItemPrice.objects.filter(pk=self.ordered.pk).exists())
@@ -5,7 +5,7 @@ from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
-from django.db.models import Q, F, OuterRef, Exists, Subquery
+from django.db.models import F, OuterRef, Exists, Subquery
 from django.db.models.query import Prefetch
 from django.contrib.contenttypes.models import ContentType
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
@@ -15,6 +15,7 @@ from .models import (
     FileAttachment, FileAsset, InventoryAllocation
 )
 from procurement.models import Item
+from procurement.search import suggest_items
 from .serializers import (
     DepartmentRequestSerializer,
     DepartmentRequestListSerializer,
@@ -785,7 +786,7 @@ class PlanningRequestItemViewSet(viewsets.ModelViewSet):
         from django.db.models import Count, Sum, OuterRef, Subquery, Q, Value
         from django.db.models.functions import Coalesce, Greatest
         from decimal import Decimal
-        from procurement.models import PurchaseRequestItem, PurchaseOrderLine, ItemOffer
+        from procurement.models import PurchaseRequestItem
 
         # Subquery: request_number of the latest active PR linked via FK path
         pr_number_sq = PurchaseRequestItem.objects.filter(
@@ -806,64 +807,9 @@ class PlanningRequestItemViewSet(viewsets.ModelViewSet):
         ).values('total')[:1]
         cnc_cuts_count_expr = Coalesce(Subquery(cnc_cuts_sq), Value(0))
 
-        # Tier 2 subquery: latest PO line via M2M path (raw values for Python-side EUR conversion)
-        _pol_m2m_base = PurchaseOrderLine.objects.filter(
-            purchase_request_item__purchase_request__planning_request_items=OuterRef('pk'),
-            purchase_request_item__item_id=OuterRef('item_id'),
-        ).exclude(
-            Q(purchase_request_item__purchase_request__status='cancelled') |
-            Q(po__status='cancelled')
-        ).order_by('-po__ordered_at', '-po__created_at', '-id')
-        tier2_price_sq    = _pol_m2m_base.values('unit_price')[:1]
-        tier2_currency_sq = _pol_m2m_base.values('po__currency')[:1]
-        tier2_tax_sq      = _pol_m2m_base.values('po__tax_rate')[:1]
-        tier2_date_sq     = _pol_m2m_base.annotate(
-            _ref_date=Coalesce('po__ordered_at', 'po__created_at')
-        ).values('_ref_date')[:1]
-
-        # Tier 5 subquery: latest historical PO line for same item across any job
-        _pol_hist_base = PurchaseOrderLine.objects.filter(
-            purchase_request_item__item_id=OuterRef('item_id'),
-        ).exclude(
-            Q(purchase_request_item__purchase_request__status='cancelled') |
-            Q(po__status='cancelled')
-        ).order_by('-po__ordered_at', '-po__created_at', '-id')
-        tier5_price_sq    = _pol_hist_base.values('unit_price')[:1]
-        tier5_currency_sq = _pol_hist_base.values('po__currency')[:1]
-        tier5_tax_sq      = _pol_hist_base.values('po__tax_rate')[:1]
-        tier5_date_sq     = _pol_hist_base.annotate(
-            _ref_date=Coalesce('po__ordered_at', 'po__created_at')
-        ).values('_ref_date')[:1]
-
-        # Prefetch: PO lines and offers for tiers 1, 3, 4 (FK path — covered by prefetch)
+        # Resolved prices come from the PlanningRequestItemPrice index (planning.price_index)
         include_price = self.request.query_params.get('include_price') == 'true'
 
-        price_prefetches = [
-            Prefetch(
-                'purchase_request_items',
-                queryset=PurchaseRequestItem.objects.select_related('purchase_request'),
-            ),
-            Prefetch(
-                'purchase_request_items__po_lines',
-                queryset=PurchaseOrderLine.objects.select_related('po').order_by('-id'),
-            ),
-            Prefetch(
-                'purchase_request_items__offers',
-                queryset=ItemOffer.objects.select_related('supplier_offer').order_by('-id'),
-            ),
-        ]
-
-        price_annotations = dict(
-            _t2_price=Subquery(tier2_price_sq),
-            _t2_currency=Subquery(tier2_currency_sq),
-            _t2_tax=Subquery(tier2_tax_sq),
-            _t2_date=Subquery(tier2_date_sq),
-            _t5_price=Subquery(tier5_price_sq),
-            _t5_currency=Subquery(tier5_currency_sq),
-            _t5_tax=Subquery(tier5_tax_sq),
-            _t5_date=Subquery(tier5_date_sq),
-        )
-
         # For list views, use minimal prefetching
         if self.action == 'list':
             simple = self.request.query_params.get('fields') == 'simple'
@@ -914,7 +860,7 @@ class PlanningRequestItemViewSet(viewsets.ModelViewSet):
                 )
 
                 if include_price:
-                    qs = qs.prefetch_related(*price_prefetches).annotate(**price_annotations)
+                    qs = qs.select_related('resolved_price')
         else:
             # For detail views, prefetch all related data
             qs = PlanningRequestItem.objects.select_related(
@@ -927,7 +873,7 @@ class PlanningRequestItemViewSet(viewsets.ModelViewSet):
             )
 
             if include_price:
-                qs = qs.prefetch_related(*price_prefetches).annotate(**price_annotations)
+                qs = qs.select_related('resolved_price')
 
         # Filter by planning_request param if provided
         pr_id = self.request.query_params.get('planning_request')
@@ -1425,8 +1371,8 @@ class FileAttachmentViewSet(viewsets.GenericViewSet):
 
 class ItemSuggestionView(APIView):
     """
-    Suggest catalog items based on a text description.
-    Uses simple keyword matching for now.
+    Suggest catalog items based on a text description, ranked by the
+    catalog search index (procurement.search).
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -1441,39 +1387,18 @@ class ItemSuggestionView(APIView):
         if not description:
             return Response({"detail": "Description is required."}, status=400)
 
-        # Simple keyword matching
-        words = description.lower().split()
-
-        # Filter items that contain any of the keywords
-        q_objects = Q()
-        for word in words:
-            if len(word) >= 3:  # Skip very short words
-                q_objects |= Q(name__icontains=word) | Q(code__icontains=word)
-
-        if not q_objects:
-            return Response({"suggestions": []})
-
-        items = Item.objects.filter(q_objects).distinct()[:10]
-
-        # Calculate simple match scores (count of matching words)
-        suggestions = []
-        for item in items:
-            item_text = f"{item.code} {item.name}".lower()
-            matches = sum(1 for word in words if len(word) >= 3 and word in item_text)
-            score = int((matches / len([w for w in words if len(w) >= 3])) * 100) if words else 0
-
-            suggestions.append({
+        suggestions = [
+            {
                 'item_id': item.id,
                 'code': item.code,
                 'name': item.name,
                 'unit': item.unit,
                 'match_score': score,
-            })
-
-        # Sort by score descending
-        suggestions.sort(key=lambda x: x['match_score'], reverse=True)
+            }
+            for item, score in suggest_items(description, limit=5)
+        ]
 
         return Response({
             'description': description,
-            'suggestions': suggestions[:5]  # Top 5
+            'suggestions': suggestions,
         })
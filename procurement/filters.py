@@ -1,5 +1,9 @@
 import django_filters
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+
 from .models import PurchaseRequest, Item
+from .search import search_items
 
 class ItemFilter(django_filters.FilterSet):
     code = django_filters.CharFilter(field_name="code", lookup_expr="icontains")
@@ -13,6 +17,22 @@ class ItemFilter(django_filters.FilterSet):
             "item_type": ["exact"],
         }
 
+class ItemSearchFilter(SearchFilter):
+    """
+    ?search= over the folded search index (procurement.search) instead of
+    icontains on code/name: every term must match, best matches first unless
+    an explicit ?ordering= is given.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not query.strip():
+            return queryset
+        queryset = search_items(queryset, query)
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', 'code')
+        return queryset
+
 class PurchaseRequestFilter(django_filters.FilterSet):
     created_at__gte = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="gte")
     created_at__lte = django_filters.DateTimeFilter(field_name="created_at", lookup_expr="lte")
@@ -0,0 +1,87 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from procurement.models import Item
+from procurement.search import item_search_fields, search_items, suggest_items
+
+WORDS = [
+    'Çelik', 'Boru', 'Sac', 'Levha', 'Flanş', 'Cıvata', 'Somun', 'Pul', 'Dirsek', 'Vana',
+    'Paslanmaz', 'Galvaniz', 'Profil', 'Kutu', 'Köşebent', 'Lama', 'Mil', 'Rulman', 'Kaynak',
+    'Teli', 'Elektrot', 'Boya', 'Astar', 'İnceltici', 'Conta', 'Şerit', 'Taşlama', 'Diski',
+    'Kesme', 'Hidrolik', 'Hortum', 'Rakor', 'Kelepçe', 'Zincir', 'Halat', 'Kanca', 'Motor',
+    'Redüktör', 'Kaplin', 'Dişli', 'Yağ', 'Gres', 'Sensör', 'Kablo', 'Şalter', 'Röle',
+]
+QUERIES = ['celik boru', 'ÇELİK', 'flans dn100', 'cıvata m16', '0100', '0100-00', 'kaynak teli 1.2',
+           'paslanmaz sac 3mm', 'hidrolik hortum', 'rulman 6205']
+
+
+def synthetic_items(count, seed=0):
+    rng = random.Random(seed)
+    for i in range(count):
+        name = ' '.join(rng.sample(WORDS, rng.randint(2, 4)))
+        name += rng.choice(['', f' DN{rng.choice([25, 50, 80, 100, 150])}', f' M{rng.choice([8, 10, 12, 16, 20])}',
+                            f' {rng.randint(1, 30)}mm', f' {rng.randint(6000, 6320)}'])
+        code = f'{rng.choice(["0100", "0200", "0310", "0450", "0999"])}-{i:06d}'
+        yield Item(code=code, name=name, unit='adet', **item_search_fields(code, name))
+
+
+def legacy_search(query):
+    """The icontains scan the views used before the search index."""
+    q = Q()
+    for word in query.split():
+        q &= Q(code__icontains=word) | Q(name__icontains=word)
+    return Item.objects.filter(q)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks catalog item search (ItemViewSet ?search= and item suggestions) "
+            "against the old icontains scan on a synthetic catalog.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100_000,
+                            help='Synthetic items inserted (rolled back afterwards; 0 = use the live catalog)')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                if opts['items']:
+                    Item.objects.bulk_create(synthetic_items(opts['items'], opts['seed']), batch_size=5000)
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'ANALYZE {Item._meta.db_table}')
+                self._run(opts['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _time(self, fn, repeat):
+        fn()   # warm up
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+    def _run(self, repeat):
+        self.stdout.write(f"catalog: {Item.objects.count()} items")
+        self.stdout.write(f"{'query':<22} {'legacy p50':>10} {'search p50':>10} {'p95':>7} "
+                          f"{'suggest p50':>11} {'p95':>7}  (ms)")
+        for query in QUERIES:
+            legacy, _ = self._time(lambda: list(legacy_search(query)[:100]), repeat)
+            search, search_p95 = self._time(
+                lambda: list(search_items(Item.objects.all(), query).order_by('-search_rank', 'code')[:100]), repeat)
+            suggest, suggest_p95 = self._time(lambda: suggest_items(query), repeat)
+            self.stdout.write(f"{query:<22} {legacy:>10.1f} {search:>10.1f} {search_p95:>7.1f} "
+                              f"{suggest:>11.1f} {suggest_p95:>7.1f}")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from procurement.search import rebuild_item_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the folded search columns of catalog items (Item.search_code, "
+        "Item.search_text). Needed after writes that bypass Item.save(), such as "
+        "bulk imports or QuerySet.update(); safe to run any time."
+    )
+
+    def handle(self, *args, **options):
+        changed = rebuild_item_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Updated the search columns of {changed} item(s)."))
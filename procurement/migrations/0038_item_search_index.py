@@ -0,0 +1,70 @@
+# Generated by Django 5.2.3 on 2026-10-17 00:55
+
+import re
+import unicodedata
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+# Frozen copy of procurement.search.fold_search_text as of this migration
+_TR_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ü': 'u', 'ü': 'u',
+    'Ö': 'o', 'ö': 'o',
+    'Ç': 'c', 'ç': 'c',
+})
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def _fold(text):
+    text = str(text or '').translate(_TR_FOLD).lower()
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return ' '.join(_SEPARATORS.sub(' ', text).split())
+
+
+def fill_search_columns(apps, schema_editor):
+    Item = apps.get_model('procurement', 'Item')
+    batch = []
+    for item in Item.objects.only('id', 'code', 'name').iterator(chunk_size=2000):
+        folded_code = _fold(item.code)
+        item.search_code = folded_code[:255]
+        item.search_text = f'{folded_code} {_fold(item.name)}'.strip()[:512]
+        batch.append(item)
+        if len(batch) >= 2000:
+            Item.objects.bulk_update(batch, ['search_code', 'search_text'])
+            batch = []
+    if batch:
+        Item.objects.bulk_update(batch, ['search_code', 'search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('procurement', '0037_supplier_last_evaluated_at_and_more'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='item',
+            name='search_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='search_text',
+            field=models.CharField(blank=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunPython(fill_search_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='item_search_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['search_code'], name='item_search_code_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.utils import timezone
 from decimal import Decimal
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.indexes import GinIndex
 from approvals.models import ApprovalWorkflow
 
 # Create your models here.
@@ -209,9 +210,28 @@ class Item(models.Model):
         help_text="Birim ağırlığı (ilerleme hesaplaması için)"
     )
 
+    # Folded copies of code / "code name" for procurement.search (kept by save())
+    search_code = models.CharField(max_length=255, blank=True, default='', editable=False)
+    search_text = models.CharField(max_length=512, blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_text'], opclasses=['gin_trgm_ops'], name='item_search_trgm_idx'),
+            models.Index(fields=['search_code'], opclasses=['varchar_pattern_ops'], name='item_search_code_idx'),
+        ]
+
     def __str__(self):
         return f"{self.code} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        from procurement.search import item_search_fields
+        fields = item_search_fields(self.code, self.name)
+        self.search_code, self.search_text = fields['search_code'], fields['search_text']
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'code', 'name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_code', 'search_text'}
+        super().save(*args, **kwargs)
+
 class PurchaseRequest(models.Model):
     PRIORITY_CHOICES = [
         ('normal', 'Normal'),
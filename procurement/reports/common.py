@@ -1,7 +1,6 @@
 from __future__ import annotations
 from decimal import Decimal, ROUND_HALF_UP
-from django.utils import timezone
-from core.models import CurrencyRateSnapshot  # if you keep it here
+from core.fx import fx_table
 
 
 def bool_param(val: str | None) -> bool | None:
@@ -40,15 +39,9 @@ def extract_rates(snapshot_like: dict | None) -> dict[str, Decimal]:
 def get_fallback_rates() -> dict[str, Decimal]:
     """
     Fallback to today's (or latest) TRY-based snapshot if PR’s snapshot is missing.
+    Read from the process-wide core.fx table instead of a query per report.
     """
-    if CurrencyRateSnapshot is None:
-        return {}
-    today = timezone.now().date()
-    snap = (CurrencyRateSnapshot.objects.filter(date=today).first()
-            or CurrencyRateSnapshot.objects.order_by("-date").first())
-    if snap and getattr(snap, "rates", None):
-        return extract_rates({"rates": snap.rates})
-    return {}
+    return fx_table().fallback_rates()
 
 def to_eur(amount, from_currency: str | None,
            pr_rates: dict[str, Decimal],
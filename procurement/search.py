@@ -0,0 +1,146 @@
+"""
+Catalog item search.
+
+``Item.search_code`` / ``Item.search_text`` hold the code and "code name"
+folded by ``fold_search_text``: Turkish letters mapped to their ASCII base
+(İ/I/ı -> i, ş -> s, ğ -> g, ü -> u, ö -> o, ç -> c), other accents
+stripped, lower-cased, punctuation collapsed to single spaces. Queries are
+folded the same way, so "ÇELİK BORU", "celik boru" and "Çelik  Boru" match
+alike. Item.save() keeps both columns current (``rebuild_item_search_index``
+for bulk writes).
+
+Lookups are index-backed:
+* every token is a ``LIKE '%token%'`` on search_text, served by a pg_trgm
+  GIN index;
+* code prefixes (``0100...``) are a ``LIKE 'prefix%'`` on search_code, served
+  by a varchar_pattern_ops b-tree.
+
+Ranking (``search_rank``) counts matched tokens, with extra weight for a code
+prefix hit and for tokens that start a word, and breaks ties by pg_trgm word
+similarity to the whole query.
+"""
+import re
+import unicodedata
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Cast
+
+_TR_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ü': 'u', 'ü': 'u',
+    'Ö': 'o', 'ö': 'o',
+    'Ç': 'c', 'ç': 'c',
+})
+_SEPARATORS = re.compile(r'[\W_]+')
+
+# Shorter tokens are too unselective for suggestions (and below the trigram
+# length, so they cannot use the index)
+MIN_SUGGESTION_TOKEN = 3
+
+
+def fold_search_text(text) -> str:
+    """Turkish-aware search normalization (see module docstring)."""
+    text = str(text or '').translate(_TR_FOLD).lower()
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return ' '.join(_SEPARATORS.sub(' ', text).split())
+
+
+def item_search_fields(code, name) -> dict:
+    """Values of Item.search_code / Item.search_text for ``code`` and ``name``."""
+    folded_code = fold_search_text(code)
+    return {
+        'search_code': folded_code[:255],
+        'search_text': f'{folded_code} {fold_search_text(name)}'.strip()[:512],
+    }
+
+
+def query_tokens(query) -> list:
+    """Distinct folded tokens of ``query``, in order."""
+    return list(dict.fromkeys(fold_search_text(query).split()))
+
+
+def _word_start(token):
+    return Q(search_text__startswith=token) | Q(search_text__contains=f' {token}')
+
+
+def _rank(folded_query, tokens):
+    """search_rank expression: 3 per code prefix hit, 1 per matched token,
+    +1 when it starts a word, plus word similarity (0..1)."""
+    score = Case(When(search_code__startswith=folded_query, then=Value(3)),
+                 default=Value(0), output_field=IntegerField())
+    for token in tokens:
+        score = score + Case(When(search_text__contains=token, then=Value(1)),
+                             default=Value(0), output_field=IntegerField())
+        score = score + Case(When(_word_start(token), then=Value(1)),
+                             default=Value(0), output_field=IntegerField())
+    return Cast(score, FloatField()) + TrigramWordSimilarity(Value(folded_query), 'search_text')
+
+
+def matched_tokens(tokens):
+    """Expression counting how many of ``tokens`` an item contains."""
+    count = Value(0, output_field=IntegerField())
+    for token in tokens:
+        count = count + Case(When(search_text__contains=token, then=Value(1)),
+                             default=Value(0), output_field=IntegerField())
+    return count
+
+
+def search_items(queryset, query):
+    """
+    Items of ``queryset`` whose code or name contain every token of ``query``
+    (SearchFilter semantics), annotated with ``search_rank``. Returns
+    ``queryset`` unchanged for a blank query.
+    """
+    tokens = query_tokens(query)
+    if not tokens:
+        return queryset
+    for token in tokens:
+        queryset = queryset.filter(search_text__contains=token)
+    return queryset.annotate(search_rank=_rank(' '.join(tokens), tokens))
+
+
+def suggest_items(description, limit=5):
+    """
+    Best ``limit`` catalog items for a free-text description: any token of 3+
+    characters or a code prefix may match, ranked by search_rank. Returns
+    [(item, match_score 0-100), ...].
+    """
+    from procurement.models import Item
+
+    tokens = [t for t in query_tokens(description) if len(t) >= MIN_SUGGESTION_TOKEN]
+    if not tokens:
+        return []
+    folded = ' '.join(tokens)
+    candidates = Q(search_code__startswith=folded)
+    for token in tokens:
+        candidates |= Q(search_text__contains=token)
+
+    items = (
+        Item.objects.filter(candidates)
+        .annotate(search_rank=_rank(folded, tokens), search_matches=matched_tokens(tokens))
+        .order_by('-search_matches', '-search_rank', 'code')[:limit]
+    )
+    return [(item, int(item.search_matches * 100 / len(tokens))) for item in items]
+
+
+def rebuild_item_search_index(batch_size=2000) -> int:
+    """Recompute search_code/search_text of every item whose stored values
+    are stale (bulk imports, QuerySet.update); returns how many changed."""
+    from procurement.models import Item
+
+    changed, stale = 0, []
+    for item in Item.objects.only('id', 'code', 'name', 'search_code', 'search_text').iterator(chunk_size=batch_size):
+        fields = item_search_fields(item.code, item.name)
+        if (item.search_code, item.search_text) != (fields['search_code'], fields['search_text']):
+            item.search_code, item.search_text = fields['search_code'], fields['search_text']
+            stale.append(item)
+        if len(stale) >= batch_size:
+            Item.objects.bulk_update(stale, ['search_code', 'search_text'])
+            changed, stale = changed + len(stale), []
+    if stale:
+        Item.objects.bulk_update(stale, ['search_code', 'search_text'])
+        changed += len(stale)
+    return changed
@@ -25,7 +25,8 @@ def _set_scheduled(value: bool):
 
 def _flush_job_order_updates():
     """Called once after transaction commit. Processes all collected PR pks at once."""
-    from projects.models import JobOrder
+    from projects.models import JobOrderDepartmentTask
+    from projects.services.completion import recompute_job_completion
 
     prs = _get_pending_prs().copy()
     _get_pending_prs().clear()
@@ -46,16 +47,19 @@ def _flush_job_order_updates():
     if not job_nos:
         return
 
-    # Update each job order once
-    for job_order in JobOrder.objects.filter(job_no__in=job_nos):
-        job_order.update_completion_percentage()
-
-        procurement_task = job_order.department_tasks.filter(
-            department='procurement',
-            parent__isnull=True
-        ).first()
-        if procurement_task:
-            procurement_task.check_auto_complete()
+    # Update every job order (and its ancestors) in one set-based pass
+    recompute_job_completion(job_nos)
+
+    checked = set()
+    for procurement_task in JobOrderDepartmentTask.objects.filter(
+        job_order_id__in=job_nos,
+        department='procurement',
+        parent__isnull=True
+    ).select_related('job_order'):
+        if procurement_task.job_order_id in checked:
+            continue
+        checked.add(procurement_task.job_order_id)
+        procurement_task.check_auto_complete()
 
 
 def _schedule_job_order_update(pr_pk):
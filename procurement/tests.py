@@ -1,3 +1,36 @@
 from django.test import TestCase
 
-# Create your tests here.
+from procurement.models import Item
+from procurement.search import fold_search_text, search_items, suggest_items
+
+
+class ItemSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.pipe = Item.objects.create(code='0100-0001', name='ÇELİK BORU DN100', unit='metre')
+        cls.flange = Item.objects.create(code='0100-0002', name='Flanş DN100 Paslanmaz', unit='adet')
+        cls.bolt = Item.objects.create(code='0200-0001', name='Cıvata M16 Galvaniz', unit='adet')
+
+    def test_folding_is_turkish_aware(self):
+        self.assertEqual(fold_search_text('ÇELİK  Şerit/Işık-Göğüs'), 'celik serit isik gogus')
+        self.assertEqual(self.pipe.search_text, '0100 0001 celik boru dn100')
+
+    def test_every_term_must_match_best_first(self):
+        found = list(search_items(Item.objects.all(), 'dn100').order_by('-search_rank', 'code'))
+        self.assertEqual(set(found), {self.pipe, self.flange})
+        self.assertEqual(list(search_items(Item.objects.all(), 'celik DN100')), [self.pipe])
+        self.assertEqual(list(search_items(Item.objects.all(), 'civata')), [self.bolt])
+
+        by_code = search_items(Item.objects.all(), '0100-000').order_by('-search_rank', 'code')
+        self.assertEqual([i.code for i in by_code], ['0100-0001', '0100-0002'])
+
+    def test_renames_reindex(self):
+        self.bolt.name = 'Somun M16'
+        self.bolt.save(update_fields=['name'])
+        self.assertFalse(search_items(Item.objects.all(), 'civata').exists())
+
+    def test_suggestions_rank_by_matched_terms(self):
+        ranked = suggest_items('paslanmaz flans 100 adet')
+        self.assertEqual(ranked[0], (self.flange, 75))   # 'adet' is not in the text
+        self.assertEqual(suggest_items('xy'), [])
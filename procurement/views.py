@@ -4,7 +4,7 @@ from rest_framework.response import Response
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter, SearchFilter
-from procurement.filters import PurchaseRequestFilter, ItemFilter
+from procurement.filters import PurchaseRequestFilter, ItemFilter, ItemSearchFilter
 from rest_framework.views import APIView
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -299,10 +299,9 @@ class ItemViewSet(viewsets.ModelViewSet):
     serializer_class = ItemSerializer
     permission_classes = [IsAuthenticated]
 
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ItemSearchFilter]
     filterset_class = ItemFilter
     ordering_fields = ["code", "name"]
-    search_fields = ["code", "name"]
 
     def get_queryset(self):
         from django.db.models import Prefetch
@@ -9,7 +9,7 @@ Handles all side-effects when a job order is cancelled:
   4. Cancel pending QCReviews (and their open approval workflows)
   5. Cancel open ExpectedReceipts linked to this job
   6. Retire SubcontractingAssignments on the job's tasks
-  7. Delete SubcontractorCostRecalcQueue entry for this job
+  7. Delete the queued subcontractor cost recalc for this job
   8. Cascade status on the JobOrder itself, children, and department tasks
 """
 from __future__ import annotations
@@ -167,9 +167,11 @@ def _retire_subcontracting_assignments(job_order):
 
 def _drain_subcontractor_recalc_queue(job_order):
     """Remove any stale background recalc queue entry for this job."""
-    from subcontracting.models import SubcontractorCostRecalcQueue
+    from core.models import CostRecalcJob
 
-    SubcontractorCostRecalcQueue.objects.filter(job_no=job_order.job_no).delete()
+    CostRecalcJob.objects.filter(
+        kind=CostRecalcJob.KIND_SUBCONTRACTOR, key=job_order.job_no,
+    ).delete()
 
 
 def _cancel_job_and_cascade(job_order, user):
@@ -0,0 +1,74 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from projects.services.schedule import (
+    WorkingCalendar,
+    add_working_days,
+    load_holiday_calendar,
+    span_end,
+    today_local,
+    working_day_delta,
+    working_days_inclusive,
+)
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks the working-day arithmetic of the production-plan forecast: '
+            'day-by-day walk over the holiday dict vs. the WorkingCalendar index.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = today_local()
+        start = today - timedelta(days=365)
+        end = today + timedelta(days=365 + 400)   # + CALENDAR_LOOKAHEAD_DAYS
+
+        # The calls _task_dict/_compute_forecast make per task: variances,
+        # planned duration, elapsed, and the forward projection.
+        calls = []
+        for _ in range(options['tasks']):
+            target_start = start + timedelta(days=rng.randrange(0, 600))
+            target_end = target_start + timedelta(days=rng.randrange(1, 120))
+            duration = Decimal(rng.randrange(1, 120))
+            calls.append((target_start, target_end, duration))
+
+        def run(calendar):
+            out = []
+            for target_start, target_end, duration in calls:
+                out.append((
+                    working_day_delta(target_end, today, calendar),
+                    working_day_delta(target_start, today, calendar),
+                    working_days_inclusive(target_start, target_end, calendar),
+                    add_working_days(today, duration, calendar),
+                    span_end(target_start, duration, calendar),
+                    working_day_delta(target_end, span_end(today, duration, calendar), calendar),
+                ))
+            return out
+
+        holidays = load_holiday_calendar(start, end)
+        t0 = time.perf_counter()
+        walked = run(holidays)
+        t_walk = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        indexed_calendar = WorkingCalendar(start, end, holidays)
+        t_build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        indexed = run(indexed_calendar)
+        t_indexed = time.perf_counter() - t0
+
+        if walked != indexed:
+            self.stderr.write(self.style.ERROR('WorkingCalendar results differ from the walk'))
+            return
+        self.stdout.write(
+            f"{options['tasks']} tasks, {len(holidays)} holidays: "
+            f"walk {t_walk:.3f}s, indexed {t_indexed:.3f}s "
+            f"(+{t_build * 1000:.1f}ms build), {t_walk / t_indexed:.1f}x"
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import JobOrder
+from projects.services.cost_table import refresh_cost_table_rows
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds JobOrderCostTableRow (the cost table sort columns) for every '
+            'job order tree, or one tree with --job-no.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job-no',
+            dest='job_no',
+            help='Rebuild the tree of this root job order only',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=50,
+            help='Root trees per pass',
+        )
+
+    def handle(self, *args, **options):
+        job_no = options.get('job_no')
+        if job_no:
+            roots = [job_no]
+        else:
+            roots = list(
+                JobOrder.objects.filter(parent__isnull=True).order_by('job_no').values_list('job_no', flat=True)
+            )
+
+        batch = max(options['batch'], 1)
+        written = 0
+        for i in range(0, len(roots), batch):
+            written += refresh_cost_table_rows(roots[i:i + batch])
+            self.stdout.write(f'Processed {min(i + batch, len(roots))}/{len(roots)} trees')
+        self.stdout.write(self.style.SUCCESS(f'Done. {written} rows written.'))
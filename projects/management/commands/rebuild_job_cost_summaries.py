@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from projects.models import JobOrder, JobOrderClosure
+from projects.services.costing import recompute_job_cost_summaries
+from projects.services.hierarchy import ancestor_job_nos, descendant_job_nos
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds JobOrderCostSummary for every job order (or one tree) with the '
+            'set-based recompute_job_cost_summaries, and reports how long each phase took.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job-no',
+            dest='job_no',
+            help='Rebuild this job order, its descendants and its ancestors only',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=0,
+            help='Job orders per transaction (0 = all at once)',
+        )
+
+    def handle(self, *args, **options):
+        job_no = options.get('job_no')
+        if job_no:
+            job_nos = sorted(descendant_job_nos([job_no]))
+        else:
+            job_nos = list(JobOrder.objects.order_by('job_no').values_list('job_no', flat=True))
+
+        batch = options['batch'] or len(job_nos) or 1
+        timings = {'compute': 0.0, 'persist': 0.0, 'estimated': 0.0}
+        rebuilt = set()
+        started = time.perf_counter()
+
+        def rebuild(chunk):
+            phase = {}
+            rebuilt.update(recompute_job_cost_summaries(chunk, timings=phase, include_ancestors=False))
+            for key, seconds in phase.items():
+                timings[key] += seconds
+
+        # Deepest first: a parent then reads the totals its children stored
+        # in earlier batches, so no batch re-rolls the shared ancestors; those
+        # outside the set are rolled up once at the end.
+        depths = JobOrderClosure.objects.values('descendant_id').annotate(depth=Max('depth'))
+        if job_no:
+            depths = depths.filter(descendant_id__in=job_nos)
+        depths = dict(depths.values_list('descendant_id', 'depth'))
+        job_nos.sort(key=lambda j: (-depths.get(j, 0), j))
+        for i in range(0, len(job_nos), batch):
+            rebuild(job_nos[i:i + batch])
+            if batch < len(job_nos):
+                self.stdout.write(f'Processed {min(i + batch, len(job_nos))}/{len(job_nos)}')
+        if job_no:
+            rebuild(sorted(ancestor_job_nos([job_no], include_self=False)))
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write("\n" + "=" * 60)
+        self.stdout.write(f"Job orders requested: {len(job_nos)}")
+        self.stdout.write(f"Summaries rebuilt:    {len(rebuilt)}")
+        self.stdout.write(f"  components + rollup {timings['compute']:8.2f}s")
+        self.stdout.write(f"  bulk write          {timings['persist']:8.2f}s")
+        self.stdout.write(f"  estimated totals    {timings['estimated']:8.2f}s")
+        self.stdout.write(f"Total                 {elapsed:8.2f}s"
+                          + (f" ({len(rebuilt) / elapsed:.1f} jobs/s)" if elapsed > 0 else ""))
+        self.stdout.write("=" * 60 + "\n")
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from projects.services.hierarchy import rebuild_job_order_closure
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the JobOrderClosure hierarchy index from the parent FKs.'
+
+    def handle(self, *args, **options):
+        rows = rebuild_job_order_closure()
+        self.stdout.write(self.style.SUCCESS(f'Done. {rows} ancestor/descendant rows written.'))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-16 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0061_jobordercostsummary_machine_rental_cost'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionPlanSnapshot',
+            fields=[
+                ('job_order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='plan_snapshot', serialize=False, to='projects.joborder')),
+                ('payload', models.JSONField(default=dict)),
+                ('as_of', models.DateField(blank=True, null=True)),
+                ('generated_at', models.DateTimeField(blank=True, null=True)),
+                ('dirty_version', models.PositiveIntegerField(default=1)),
+                ('built_version', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Üretim Planı Özeti',
+                'verbose_name_plural': 'Üretim Planı Özetleri',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0062_production_plan_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobOrderCostTableRow',
+            fields=[
+                ('job_order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost_table_row', serialize=False, to='projects.joborder')),
+                ('subtree_weight_kg', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('margin_eur', models.DecimalField(blank=True, decimal_places=2, max_digits=16, null=True)),
+                ('margin_pct', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('price_per_kg', models.DecimalField(blank=True, decimal_places=2, max_digits=16, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Maliyet Tablosu Satırı',
+                'verbose_name_plural': 'Maliyet Tablosu Satırları',
+                'indexes': [models.Index(fields=['margin_eur', 'job_order'], name='cost_table_margin_eur_idx'), models.Index(fields=['margin_pct', 'job_order'], name='cost_table_margin_pct_idx'), models.Index(fields=['price_per_kg', 'job_order'], name='cost_table_price_kg_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.3 on 2026-10-16 23:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_closure(apps, schema_editor):
+    """One (ancestor, descendant, depth) row per pair of the parent FK tree."""
+    JobOrder = apps.get_model('projects', 'JobOrder')
+    JobOrderClosure = apps.get_model('projects', 'JobOrderClosure')
+    parents = dict(JobOrder.objects.values_list('job_no', 'parent_id'))
+    rows = []
+    for job_no in parents:
+        ancestor, depth, seen = job_no, 0, set()
+        while ancestor and ancestor not in seen:
+            rows.append(JobOrderClosure(ancestor_id=ancestor, descendant_id=job_no, depth=depth))
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+    JobOrderClosure.objects.bulk_create(rows, batch_size=5000)
+
+
+# Same dynamic SQL as 0038/0054: recreate every FK that references
+# projects_joborder(job_no) with ON UPDATE CASCADE, so rename_job_no carries
+# the closure rows (and the snapshot / cost table rows of 0062-0063) along.
+# The reverse is a no-op: the constraints stay valid either way.
+ADD_ON_UPDATE_CASCADE = """
+DO $$
+DECLARE
+    r RECORD;
+BEGIN
+    FOR r IN
+        SELECT
+            tc.table_schema,
+            tc.table_name,
+            tc.constraint_name,
+            kcu.column_name,
+            rc.delete_rule
+        FROM
+            information_schema.table_constraints AS tc
+            JOIN information_schema.key_column_usage AS kcu
+                ON tc.constraint_name = kcu.constraint_name
+                AND tc.table_schema = kcu.table_schema
+            JOIN information_schema.referential_constraints AS rc
+                ON tc.constraint_name = rc.constraint_name
+                AND tc.constraint_schema = rc.constraint_schema
+            JOIN information_schema.constraint_column_usage AS ccu
+                ON rc.unique_constraint_name = ccu.constraint_name
+                AND rc.unique_constraint_schema = ccu.constraint_schema
+        WHERE
+            tc.constraint_type = 'FOREIGN KEY'
+            AND ccu.table_name = 'projects_joborder'
+            AND ccu.column_name = 'job_no'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE %I.%I DROP CONSTRAINT %I',
+            r.table_schema, r.table_name, r.constraint_name
+        );
+        EXECUTE format(
+            'ALTER TABLE %I.%I ADD CONSTRAINT %I '
+            'FOREIGN KEY (%I) REFERENCES %I.projects_joborder(job_no) '
+            'ON DELETE %s ON UPDATE CASCADE',
+            r.table_schema, r.table_name, r.constraint_name,
+            r.column_name,
+            r.table_schema,
+            r.delete_rule
+        );
+    END LOOP;
+END $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0063_jobordercosttablerow'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobOrderClosure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='descendant_links', to='projects.joborder')),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ancestor_links', to='projects.joborder')),
+            ],
+            options={
+                'verbose_name': 'İş Emri Hiyerarşi Bağı',
+                'verbose_name_plural': 'İş Emri Hiyerarşi Bağları',
+                'indexes': [models.Index(fields=['descendant', 'depth'], name='joborder_closure_desc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='uniq_joborder_closure_pair')],
+            },
+        ),
+        migrations.RunPython(backfill_closure, migrations.RunPython.noop),
+        migrations.RunSQL(sql=ADD_ON_UPDATE_CASCADE, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -280,6 +280,12 @@ class JobOrder(models.Model):
     def __str__(self):
         return f"{self.job_no} - {self.title}"
 
+    def clean(self):
+        super().clean()
+        if self.parent_id and not self._state.adding:
+            from projects.services.hierarchy import check_parent
+            check_parent(self.job_no, self.parent_id)
+
     @property
     def effective_template_node(self):
         """Return the template node from source_offer_item if available, else the manually assigned template_node."""
@@ -287,28 +293,35 @@ class JobOrder(models.Model):
             return self.source_offer_item.template_node
         return self.template_node
 
+    def _ancestors_with_offer(self):
+        """Ancestors carrying a source offer, nearest first: one query on the
+        hierarchy index (a parent walk for jobs not saved yet)."""
+        if self._state.adding:
+            chain, parent = [], self.parent
+            while parent:
+                if parent.source_offer_id:
+                    chain.append(parent)
+                parent = parent.parent
+            return chain
+        from projects.services.hierarchy import ancestors_of
+        return list(ancestors_of(self.job_no).filter(source_offer__isnull=False)
+                    .select_related('source_offer'))
+
     def _resolve_offer_order_no(self):
         offer = self.source_offer
         if offer and (offer.order_no or '').strip():
             return (offer.order_no or '').strip()
-        parent = self.parent
-        while parent:
-            if parent.source_offer_id:
-                offer = parent.source_offer
-                if offer and (offer.order_no or '').strip():
-                    return (offer.order_no or '').strip()
-            parent = parent.parent
+        for parent in self._ancestors_with_offer():
+            offer = parent.source_offer
+            if offer and (offer.order_no or '').strip():
+                return (offer.order_no or '').strip()
         return ''
 
     def _resolve_source_offer(self):
         if self.source_offer_id:
             return self.source_offer
-        parent = self.parent
-        while parent:
-            if parent.source_offer_id:
-                return parent.source_offer
-            parent = parent.parent
-        return None
+        ancestors = self._ancestors_with_offer()
+        return ancestors[0].source_offer if ancestors else None
 
     def get_effective_customer_order_no(self):
         """Customer order number from the linked sales offer's order_no."""
@@ -340,10 +353,6 @@ class JobOrder(models.Model):
         """True if this (engineering) job order has been split into production phases."""
         return self.phase_mirrors.exists()
 
-    def _has_phase_nodes(self):
-        """True if this job has top-level production phase children (e.g. 270-01/P1)."""
-        return self.children.filter(source_job_order_id=self.job_no).exists()
-
     def _aggregatable_children(self):
         """
         Children that count toward this job's completion roll-up and status cascade.
@@ -379,7 +388,8 @@ class JobOrder(models.Model):
 
     def update_completion_percentage(self):
         """
-        Calculate completion based on department task progress using nested weights.
+        Calculate completion based on department task progress using nested weights,
+        then roll it up through every ancestor.
 
         For procurement tasks:
             - Progress comes from PlanningRequestItem procurement status
@@ -394,139 +404,14 @@ class JobOrder(models.Model):
             - Pending/in_progress contributes 0
 
         Skipped main tasks are excluded from the total weight calculation.
+        Jobs split into production phases (or without main tasks) roll up from
+        their children instead. See projects/services/completion.py, which
+        recomputes whole sets of job orders in a fixed number of queries.
         """
-        from django.db.models import Sum
-        _old_pct = self.completion_percentage
-
-        # Jobs split into production phases roll up from their phase children,
-        # not from their own (engineering) department tasks.
-        if self._has_phase_nodes():
-            self.update_completion_from_children()
-            return
-
-        # Only count main tasks (no parent), excluding skipped and cancelled
-        main_tasks = self.department_tasks.filter(parent__isnull=True).exclude(status__in=['skipped', 'cancelled'])
-
-        if not main_tasks.exists():
-            if self._aggregatable_children().exists():
-                self.update_completion_from_children()
-                return
-            self.completion_percentage = Decimal('0.00')
-        else:
-            total_weight = Decimal('0.00')
-            earned_weight = Decimal('0.00')
-
-            for task in main_tasks:
-                task_weight = Decimal(task.weight)
-                total_weight += task_weight
-
-                if task.department == 'procurement':
-                    # Procurement-specific: use PlanningRequestItem progress
-                    pr_earned, pr_total = task.get_procurement_progress()
-                    if pr_total > 0:
-                        task_progress = pr_earned / pr_total
-                        earned_weight += task_progress * task_weight
-                    elif task.status == 'completed':
-                        # No items to procure but task is complete
-                        earned_weight += task_weight
-                else:
-                    # Check if task has subtasks (exclude skipped and cancelled)
-                    subtasks = task.subtasks.exclude(status__in=['skipped', 'cancelled'])
-
-                    if subtasks.exists():
-                        # Nested calculation: use subtask weights with special handling
-                        subtask_total_weight = Decimal('0')
-                        subtask_earned_weight = Decimal('0')
-
-                        for subtask in subtasks:
-                            subtask_weight = Decimal(subtask.weight)
-                            subtask_total_weight += subtask_weight
-
-                            # Handle CNC Kesim subtask specially
-                            is_cnc_task = subtask.task_type == 'cnc_cutting' or subtask.title == 'CNC Kesim'
-                            if is_cnc_task:
-                                cnc_earned, cnc_total = subtask.get_cnc_progress()
-                                if cnc_total > 0:
-                                    subtask_progress = cnc_earned / cnc_total
-                                    subtask_earned_weight += subtask_progress * subtask_weight
-                                elif subtask.status == 'completed':
-                                    subtask_earned_weight += subtask_weight
-                            # Handle Talaşlı İmalat subtask specially
-                            else:
-                                is_machining_task = subtask.task_type == 'machining' or subtask.title == 'Talaşlı İmalat'
-                                if is_machining_task:
-                                    machining_earned, machining_total = subtask.get_machining_progress()
-                                    if machining_total > 0:
-                                        subtask_progress = machining_earned / machining_total
-                                        subtask_earned_weight += subtask_progress * subtask_weight
-                                    elif subtask.status == 'completed':
-                                        subtask_earned_weight += subtask_weight
-                                else:
-                                    subtask_pct = subtask.get_completion_percentage()
-                                    subtask_earned_weight += (subtask_pct / Decimal('100')) * subtask_weight
-
-                        if subtask_total_weight > 0:
-                            # Proportional contribution based on subtask completion
-                            earned_weight += (subtask_earned_weight / subtask_total_weight) * task_weight
-                        elif task.status == 'completed':
-                            # No non-skipped subtasks but task is complete
-                            earned_weight += task_weight
-                    else:
-                        # No subtasks: use manual_progress or status
-                        if task.status == 'completed':
-                            earned_weight += task_weight
-                        elif task.manual_progress > 0:
-                            earned_weight += (task.manual_progress / Decimal('100')) * task_weight
-
-            if total_weight > 0:
-                pct = (
-                    (earned_weight / total_weight) * 100
-                ).quantize(Decimal('0.01'))
-                # Cap at 99% unless job order is actually completed
-                if self.status != 'completed':
-                    pct = min(pct, Decimal('99.00'))
-                self.completion_percentage = pct
-            else:
-                self.completion_percentage = Decimal('0.00')
-
-        self.save(update_fields=['completion_percentage'])
-        self._log_progress_change(_old_pct)
+        from projects.services.completion import recompute_job_completion
 
-        # Update parent if exists
-        if self.parent:
-            self.parent.update_completion_from_children()
-
-    def update_completion_from_children(self):
-        """Update completion based on children progress (for parent jobs)."""
-        agg_children = self._aggregatable_children()
-        if not agg_children.exists():
-            return
-
-        _old_pct = self.completion_percentage
-
-        # Average of children completion (phased masters excluded)
-        from django.db.models import Avg
-        child_avg = agg_children.aggregate(avg=Avg('completion_percentage'))['avg'] or Decimal('0.00')
-        pct = Decimal(child_avg).quantize(Decimal('0.01'))
-        # Cap at 99% unless job order is actually completed
-        if self.status != 'completed':
-            pct = min(pct, Decimal('99.00'))
-        self.completion_percentage = pct
-        save_fields = ['completion_percentage']
-
-        # If percentage dropped below 100 and job was completed, revert to active
-        if self.status == 'completed' and pct < Decimal('100.00'):
-            self.status = 'active'
-            self.completed_at = None
-            self.completed_by = None
-            save_fields += ['status', 'completed_at', 'completed_by']
-
-        self.save(update_fields=save_fields)
-        self._log_progress_change(_old_pct)
-
-        # Recursively update parent
-        if self.parent:
-            self.parent.update_completion_from_children()
+        recompute_job_completion([self.job_no])
+        self.refresh_from_db(fields=['completion_percentage', 'status', 'completed_at', 'completed_by'])
 
     def update_status_from_children(self):
         """Cascading status: if all children completed, mark self completed."""
@@ -2386,3 +2271,90 @@ class JobOrderTargetDateRevision(models.Model):
             f"{self.previous_date} -> {self.new_date} "
             f"({self.changed_at:%Y-%m-%d})"
         )
+
+
+class ProductionPlanSnapshot(models.Model):
+    """
+    Materialized production-plan overview card (forecast + summary) of one
+    ROOT job order — see services/plan_snapshot.py.
+
+    ``dirty_version`` is bumped by signals whenever something in the root's
+    subtree changes; the row is current while ``built_version`` matches it
+    and ``as_of`` is today (the forecast is relative to today).
+    """
+    job_order = models.OneToOneField(
+        JobOrder, on_delete=models.CASCADE, primary_key=True,
+        related_name='plan_snapshot'
+    )
+    payload = models.JSONField(default=dict)
+    as_of = models.DateField(null=True, blank=True)
+    generated_at = models.DateTimeField(null=True, blank=True)
+    dirty_version = models.PositiveIntegerField(default=1)
+    built_version = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Üretim Planı Özeti'
+        verbose_name_plural = 'Üretim Planı Özetleri'
+
+    def __str__(self):
+        return f"{self.job_order_id} ({self.as_of})"
+
+
+class JobOrderCostTableRow(models.Model):
+    """
+    Sort columns of the cost table that SQL cannot derive from a single row
+    (see services/cost_table.py): margins against the representative selling
+    price, price per kg and the aggregated weight of parent jobs. Rebuilt one
+    tree at a time by the ``cost_table`` kind of the cost queue.
+    """
+    job_order = models.OneToOneField(
+        JobOrder, on_delete=models.CASCADE, primary_key=True,
+        related_name='cost_table_row'
+    )
+    subtree_weight_kg = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    margin_eur = models.DecimalField(max_digits=16, decimal_places=2, null=True, blank=True)
+    margin_pct = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    price_per_kg = models.DecimalField(max_digits=16, decimal_places=2, null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Maliyet Tablosu Satırı'
+        verbose_name_plural = 'Maliyet Tablosu Satırları'
+        indexes = [
+            models.Index(fields=['margin_eur', 'job_order'], name='cost_table_margin_eur_idx'),
+            models.Index(fields=['margin_pct', 'job_order'], name='cost_table_margin_pct_idx'),
+            models.Index(fields=['price_per_kg', 'job_order'], name='cost_table_price_kg_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_order_id} ({self.margin_eur} EUR)"
+
+
+class JobOrderClosure(models.Model):
+    """
+    Ancestor/descendant index of the JobOrder tree (closure table): one row
+    per (ancestor, descendant) pair including the job itself at depth 0, so
+    a subtree or an ancestor chain is one indexed query. Maintained by
+    services/hierarchy.py from JobOrder signals; renames follow through
+    ON UPDATE CASCADE like every other FK to job_no.
+    """
+    ancestor = models.ForeignKey(
+        JobOrder, on_delete=models.CASCADE, related_name='descendant_links'
+    )
+    descendant = models.ForeignKey(
+        JobOrder, on_delete=models.CASCADE, related_name='ancestor_links'
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        verbose_name = 'İş Emri Hiyerarşi Bağı'
+        verbose_name_plural = 'İş Emri Hiyerarşi Bağları'
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='uniq_joborder_closure_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['descendant', 'depth'], name='joborder_closure_desc_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
@@ -0,0 +1,268 @@
+"""
+Set-based recompute of ``JobOrder.completion_percentage``.
+
+The per-instance path walked main tasks and subtasks one query at a time,
+asked every CNC / machining / procurement task for its domain progress
+separately and then saved each ancestor on the way up — a single CncTask save
+could fire dozens of queries. ``recompute_job_completion`` does the same work
+for a whole set of job orders:
+
+* one JobOrder query per tree level for the targets and their ancestors, one
+  for their children and one for phased-master detection;
+* one query for every department task of the targets;
+* ``_batched_domain_progress`` for the CNC / machining / procurement inputs
+  (a fixed handful of queries, only when a target has such a task);
+* one ``bulk_update`` and one ``bulk_create`` of ``JobOrderProgressLog``.
+
+Semantics are those of the per-instance methods, branch for branch:
+
+* a target rolls up from its children when it has production phase nodes, or
+  when it has no main tasks but has aggregatable children; otherwise it is
+  the weight-weighted progress of its main tasks;
+* every ancestor is then re-averaged over its aggregatable children
+  (phased masters excluded), bottom-up; an ancestor without aggregatable
+  children stops the roll-up;
+* non-completed jobs are capped at 99%; a completed ancestor whose average
+  drops below 100% reverts to ``active``.
+
+When a target is also an ancestor of another target, its own rule is applied
+last, as if it had been recomputed after its descendants.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from projects.models import JobOrder, JobOrderDepartmentTask, JobOrderProgressLog
+
+_ZERO = Decimal('0.00')
+_HUNDRED = Decimal('100.00')
+_MAX_IN_PROGRESS = Decimal('99.00')
+_EXCLUDED = ('skipped', 'cancelled')
+_NO_PROGRESS = (Decimal('0'), Decimal('0'))
+
+
+def _is_cnc(task):
+    return task.task_type == 'cnc_cutting' or task.title == 'CNC Kesim'
+
+
+def _is_machining(task):
+    return task.task_type == 'machining' or task.title == 'Talaşlı İmalat'
+
+
+def _domain(domains, name, task):
+    return domains[name].get(task.job_order_id, _NO_PROGRESS)
+
+
+def _capped_ratio(earned, total):
+    return min(((earned / total) * 100).quantize(Decimal('0.01')), _MAX_IN_PROGRESS)
+
+
+def _task_pct(task, subtasks, domains):
+    """``JobOrderDepartmentTask.get_completion_percentage()`` (full path) from
+    preloaded subtasks and domain progress."""
+    if task.status in ('completed', 'skipped'):
+        return _HUNDRED
+    if task.status == 'cancelled':
+        return _ZERO
+
+    if _is_cnc(task) or _is_machining(task):
+        earned, total = _domain(domains, 'cnc' if _is_cnc(task) else 'machining', task)
+        return _capped_ratio(earned, total) if total > 0 else _ZERO
+    if task.department == 'procurement':
+        earned, total = _domain(domains, 'procurement', task)
+        if total > 0:
+            return _capped_ratio(earned, total)
+        # No purchaseable items — fall through to the manual/subtask path
+
+    if task.status in ('pending', 'blocked'):
+        return _ZERO
+
+    children = subtasks.get(task.id)
+    if children:
+        total_weight = _ZERO
+        earned_weight = _ZERO
+        for subtask in children:
+            if subtask.status in _EXCLUDED:
+                continue
+            weight = Decimal(str(subtask.weight))
+            total_weight += weight
+            earned_weight += (_task_pct(subtask, subtasks, domains) / 100) * weight
+        return _capped_ratio(earned_weight, total_weight) if total_weight > 0 else _ZERO
+    return min(task.manual_progress, _MAX_IN_PROGRESS)
+
+
+def _subtask_earned(subtask, subtasks, domains):
+    """Weight a subtask earns inside its main task."""
+    weight = Decimal(subtask.weight)
+    if _is_cnc(subtask) or _is_machining(subtask):
+        earned, total = _domain(domains, 'cnc' if _is_cnc(subtask) else 'machining', subtask)
+        if total > 0:
+            return (earned / total) * weight
+        return weight if subtask.status == 'completed' else _ZERO
+    return (_task_pct(subtask, subtasks, domains) / Decimal('100')) * weight
+
+
+def _pct_from_tasks(job, main_tasks, subtasks, domains):
+    """Weighted main-task progress of ``job`` (``main_tasks`` is non-empty)."""
+    total_weight = _ZERO
+    earned_weight = _ZERO
+    for task in main_tasks:
+        task_weight = Decimal(task.weight)
+        total_weight += task_weight
+
+        if task.department == 'procurement':
+            earned, total = _domain(domains, 'procurement', task)
+            if total > 0:
+                earned_weight += (earned / total) * task_weight
+            elif task.status == 'completed':
+                earned_weight += task_weight
+            continue
+
+        live = [s for s in subtasks.get(task.id, ()) if s.status not in _EXCLUDED]
+        if live:
+            sub_total = sum((Decimal(s.weight) for s in live), Decimal('0'))
+            sub_earned = sum((_subtask_earned(s, subtasks, domains) for s in live), Decimal('0'))
+            if sub_total > 0:
+                earned_weight += (sub_earned / sub_total) * task_weight
+            elif task.status == 'completed':
+                earned_weight += task_weight
+        elif task.status == 'completed':
+            earned_weight += task_weight
+        elif task.manual_progress > 0:
+            earned_weight += (task.manual_progress / Decimal('100')) * task_weight
+
+    if total_weight <= 0:
+        return _ZERO
+    pct = ((earned_weight / total_weight) * 100).quantize(Decimal('0.01'))
+    if job.status != 'completed':
+        pct = min(pct, _MAX_IN_PROGRESS)
+    return pct
+
+
+def _load_jobs(job_nos):
+    """Targets plus all their ancestors, one query on the hierarchy index."""
+    from projects.services.hierarchy import ancestor_job_nos
+    return {
+        job.job_no: job
+        for job in JobOrder.objects.filter(job_no__in=ancestor_job_nos(job_nos) | set(job_nos)).only(
+            'job_no', 'parent_id', 'status', 'completion_percentage',
+            'total_weight_kg', 'completed_at', 'completed_by')
+    }
+
+
+def _depth(job_no, jobs):
+    depth = 0
+    parent = jobs[job_no].parent_id
+    while parent in jobs:
+        depth += 1
+        parent = jobs[parent].parent_id
+    return depth
+
+
+def recompute_job_completion(job_nos):
+    """Recompute ``completion_percentage`` for ``job_nos`` and roll it up to
+    every ancestor. Returns the set of job_nos whose row changed.
+
+    Bypasses ``JobOrder.save`` (``bulk_update``): the plan snapshots of the
+    changed jobs and the cached cost_table responses are invalidated
+    explicitly.
+    """
+    from projects.services.cost_table import invalidate_cost_table_cache
+    from projects.services.plan_snapshot import mark_plans_stale
+    from projects.services.production_plan import _batched_domain_progress
+
+    job_nos = {j for j in job_nos if j}
+    jobs = _load_jobs(job_nos)
+    targets = job_nos & jobs.keys()
+    if not targets:
+        return set()
+
+    # Children of every loaded node: phase-node detection, roll-up inputs.
+    children = defaultdict(list)
+    pct = {}
+    phase_parents = set()
+    for child_no, parent_id, source_id, child_pct in JobOrder.objects.filter(
+            parent_id__in=jobs.keys()).values_list(
+            'job_no', 'parent_id', 'source_job_order_id', 'completion_percentage'):
+        children[parent_id].append(child_no)
+        pct[child_no] = child_pct
+        if source_id == parent_id:
+            phase_parents.add(parent_id)
+    phased_masters = set(JobOrder.objects.filter(
+        source_job_order_id__in=pct.keys()).values_list('source_job_order_id', flat=True))
+    aggregatable = {
+        job_no: [c for c in kids if c not in phased_masters]
+        for job_no, kids in children.items()
+    }
+    for job_no, job in jobs.items():
+        pct[job_no] = job.completion_percentage
+
+    main_tasks = defaultdict(list)
+    subtasks = defaultdict(list)
+    special_jobs = set()
+    for task in JobOrderDepartmentTask.objects.filter(job_order_id__in=targets).only(
+            'id', 'job_order_id', 'parent_id', 'department', 'task_type', 'title',
+            'status', 'weight', 'manual_progress'):
+        if task.parent_id is None:
+            if task.status not in _EXCLUDED:
+                main_tasks[task.job_order_id].append(task)
+        else:
+            subtasks[task.parent_id].append(task)
+        if task.department == 'procurement' or _is_cnc(task) or _is_machining(task):
+            special_jobs.add(task.job_order_id)
+    domains = _batched_domain_progress(special_jobs)
+
+    old = {job_no: (job.completion_percentage, job.status) for job_no, job in jobs.items()}
+    reached = set()
+    for job_no in sorted(jobs, key=lambda j: _depth(j, jobs), reverse=True):
+        if job_no not in targets and job_no not in reached:
+            continue
+        job = jobs[job_no]
+        agg = aggregatable.get(job_no)
+        from_children = job_no not in targets or job_no in phase_parents or (
+            not main_tasks.get(job_no) and agg)
+
+        if not from_children:
+            job.completion_percentage = (
+                _pct_from_tasks(job, main_tasks[job_no], subtasks, domains)
+                if main_tasks.get(job_no) else _ZERO)
+        elif not agg:
+            continue
+        else:
+            avg = sum((pct[c] for c in agg), Decimal('0')) / len(agg)
+            new_pct = avg.quantize(Decimal('0.01'))
+            if job.status != 'completed':
+                new_pct = min(new_pct, _MAX_IN_PROGRESS)
+            job.completion_percentage = new_pct
+            if job.status == 'completed' and new_pct < _HUNDRED:
+                job.status = 'active'
+                job.completed_at = None
+                job.completed_by = None
+
+        pct[job_no] = job.completion_percentage
+        if job.parent_id:
+            reached.add(job.parent_id)
+
+    changed = [job for job_no, job in jobs.items()
+               if (job.completion_percentage, job.status) != old[job_no]]
+    if not changed:
+        return set()
+
+    JobOrder.objects.bulk_update(
+        changed, ['completion_percentage', 'status', 'completed_at', 'completed_by'])
+    logs = []
+    for job in changed:
+        old_pct = old[job.job_no][0]
+        if job.completion_percentage == old_pct:
+            continue
+        delta = None
+        if job.total_weight_kg is not None:
+            delta = job.total_weight_kg * (job.completion_percentage - old_pct) / Decimal('100')
+        logs.append(JobOrderProgressLog(
+            job_order=job, old_pct=old_pct, new_pct=job.completion_percentage,
+            delta_weight_kg=delta))
+    JobOrderProgressLog.objects.bulk_create(logs)
+
+    changed_nos = {job.job_no for job in changed}
+    mark_plans_stale(changed_nos)
+    invalidate_cost_table_cache()
+    return changed_nos
@@ -0,0 +1,314 @@
+"""
+Cost table read model.
+
+``JobOrderViewSet.cost_table`` used to load ``(job_no, parent_id)`` of every
+filtered job, pick the roots in Python, page a list and serialize it — all of
+it again on every sort or filter change. It now works like this:
+
+* ``JobOrderCostTableRow`` holds the sort columns a single SQL row cannot
+  express: margins against the representative (possibly derived) selling
+  price, price per kg and the aggregated weight of parent jobs. Derived prices
+  flow both up and down a tree, so rows are rebuilt a whole tree at a time by
+  the ``cost_table`` kind of the cost queue; ``recompute_job_cost_summaries``
+  and job order signals feed it.
+* Roots (jobs whose parent is not in the filtered set) and ``has_children``
+  are resolved in SQL, so a page is a LIMIT/OFFSET or, with ``?cursor=``, a
+  keyset seek on (sort value, job_no).
+* Response payloads are cached per query string under a version key that
+  summary and job order changes replace. Only a shared cache carries the
+  replaced key to every process, so ``COST_TABLE_CACHE_TTL_S`` is 0 (no
+  caching) unless ``CACHE_REDIS_URL`` is set.
+"""
+import base64
+import hashlib
+import json
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OrderBy, OuterRef, Prefetch, Q, Sum, Value
+from django.db.models.functions import Concat
+from rest_framework.exceptions import NotFound
+
+from core.cost_queue import enqueue_cost_recalcs
+from core.models import CostRecalcJob
+from projects.models import JobOrder, JobOrderClosure, JobOrderCostTableRow, JobOrderDepartmentTask
+from projects.services.hierarchy import descendant_job_nos, root_job_nos
+
+CACHE_VERSION_KEY = 'cost-table:version'
+
+# ?ordering= value -> (sort expression, descending). NULLs always sort last.
+ORDERINGS = {
+    'job_no':         ('job_no', False),
+    'title':          ('title', False),
+    'weight':         ('total_weight_kg', False),
+    'actual_cost':    ('cost_summary__actual_total_cost', False),
+    'selling_price':  ('cost_summary__selling_price', False),
+    'completion_pct': ('completion_percentage', False),
+    'date':           ('target_completion_date', False),
+    'created_at':     ('created_at', False),
+    'last_updated':   ('cost_summary__last_updated', False),
+    'margin_eur':     ('cost_table_row__margin_eur', False),
+    'margin_pct':     ('cost_table_row__margin_pct', False),
+    'price_per_kg':   ('cost_table_row__price_per_kg', False),
+}
+ORDERINGS.update({f'-{k}': (field, True) for k, (field, _) in list(ORDERINGS.items())})
+
+
+def cost_table_queryset():
+    """JobOrders with everything CostTableRowSerializer reads, one query."""
+    from sales.models import SalesOfferPriceRevision
+
+    # Masters split into production phases: they have phase mirrors that
+    # live under phase nodes (parent != master). Their selling price is
+    # suppressed in favour of the allocations' quantity-split prices.
+    phased_master_sq = (
+        JobOrder.objects
+        .filter(source_job_order_id=OuterRef('pk'))
+        .exclude(parent_id=OuterRef('pk'))
+    )
+
+    # Jobs with no manufacturing (İmalat) department task anywhere in their
+    # subtree were not manufactured in-house (e.g. trading / fully
+    # outsourced items). Checked on self plus descendants via the
+    # hierarchical job_no prefix ('-' children, '/' phase jobs), so parent
+    # containers and phased masters roll up from their leaves. The
+    # parent_id clause covers phase nodes, whose allocation children
+    # (270-01-01/P1 under 270-01/P1) do not share the node's prefix.
+    manufacturing_task_sq = JobOrderDepartmentTask.objects.filter(
+        department='manufacturing',
+    ).exclude(
+        status__in=['skipped', 'cancelled'],
+    ).filter(
+        Q(job_order_id=OuterRef('pk'))
+        | Q(job_order__parent_id=OuterRef('pk'))
+        | Q(job_order__job_no__startswith=Concat(OuterRef('pk'), Value('-')))
+        | Q(job_order__job_no__startswith=Concat(OuterRef('pk'), Value('/')))
+    )
+
+    return (
+        JobOrder.objects
+        .select_related('cost_summary', 'cost_table_row', 'customer', 'source_offer', 'source_job_order')
+        .annotate(
+            _is_phased_master=Exists(phased_master_sq),
+            _is_manufactured=Exists(manufacturing_task_sq),
+        )
+        .prefetch_related(
+            Prefetch(
+                'source_offer__price_revisions',
+                queryset=SalesOfferPriceRevision.objects.filter(is_current=True),
+                to_attr='_current_price_revisions',
+            ),
+            # Needed to pro-rate the offer's current_price across phase job
+            # orders (Option 3) without per-row queries in the serializer.
+            'source_offer__items',
+        )
+        .exclude(job_no='LEGACY-ARCHIVE')
+    )
+
+
+def aggregated_weights(parent_nos):
+    """
+    For each job_no in parent_nos, sum total_weight_kg of all descendants
+    and return a {job_no: Decimal} map (one query on the hierarchy index).
+    Only entries with a non-zero total are included.
+    """
+    if not parent_nos:
+        return {}
+    totals = (
+        JobOrderClosure.objects
+        .filter(ancestor_id__in=parent_nos, depth__gt=0)
+        .order_by()
+        .values('ancestor_id')
+        .annotate(total=Sum('descendant__total_weight_kg'))
+        .values_list('ancestor_id', 'total')
+    )
+    return {jno: total for jno, total in totals if total}
+
+
+def page_aggregated_weights(jobs, parent_nos):
+    """aggregated_weights for the parents on one page, read from their
+    JobOrderCostTableRow where one exists."""
+    weights, missing = {}, set()
+    for job in jobs:
+        if job.job_no not in parent_nos:
+            continue
+        try:
+            row = job.cost_table_row
+        except JobOrderCostTableRow.DoesNotExist:
+            missing.add(job.job_no)
+            continue
+        if row.subtree_weight_kg:
+            weights[job.job_no] = row.subtree_weight_kg
+    weights.update(aggregated_weights(missing))
+    return weights
+
+
+# ---------------------------------------------------------------------------
+# Row maintenance
+# ---------------------------------------------------------------------------
+
+def _decimal(value):
+    if value is None:
+        return None
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+
+
+def refresh_cost_table_rows(root_nos) -> int:
+    """
+    Rebuild the JobOrderCostTableRow of every job in the trees of
+    ``root_nos`` from CostTableRowSerializer, so the stored sort columns are
+    exactly what the table shows. Returns the number of rows written.
+    """
+    from projects.services.costing import ensure_estimated_totals_cached
+    from projects.services.selling_price import DerivedSellingPriceResolver
+    from projects.serializers import CostTableRowSerializer
+
+    job_nos = descendant_job_nos(root_nos)
+    jobs = list(cost_table_queryset().filter(job_no__in=job_nos))
+    if not jobs:
+        return 0
+
+    parents = set(
+        JobOrder.objects.filter(parent_id__in=job_nos).values_list('parent_id', flat=True)
+    )
+    weights = aggregated_weights(parents)
+    ensure_estimated_totals_cached(jobs)
+    data = CostTableRowSerializer(jobs, many=True, context={
+        'aggregated_weights': weights,
+        'derived_price_resolver': DerivedSellingPriceResolver([j.job_no for j in jobs]),
+    }).data
+
+    rows = [
+        JobOrderCostTableRow(
+            job_order_id=item['job_no'],
+            subtree_weight_kg=weights.get(item['job_no']),
+            margin_eur=_decimal(item['margin_eur']),
+            margin_pct=_decimal(item['margin_pct']),
+            price_per_kg=_decimal(item['price_per_kg']),
+        )
+        for item in data
+    ]
+    JobOrderCostTableRow.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['job_order'],
+        update_fields=['subtree_weight_kg', 'margin_eur', 'margin_pct', 'price_per_kg', 'refreshed_at'],
+    )
+    invalidate_cost_table_cache()
+    return len(rows)
+
+
+def mark_cost_table_stale(job_nos) -> None:
+    """Queue the trees above ``job_nos`` for a row rebuild and drop cached
+    cost_table responses once the current transaction commits."""
+    job_nos = {j for j in job_nos if j}
+    if not job_nos:
+        return
+    enqueue_cost_recalcs(CostRecalcJob.KIND_COST_TABLE, sorted(root_job_nos(job_nos)))
+    invalidate_cost_table_cache()
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+def invalidate_cost_table_cache() -> None:
+    """Retire every cached cost_table response (after commit)."""
+    transaction.on_commit(lambda: cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def cost_table_cache_key(request) -> str:
+    """Per query string (and host, since page links are absolute) under the
+    current version."""
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(CACHE_VERSION_KEY, version, None)
+        version = cache.get(CACHE_VERSION_KEY, version)
+    params = sorted((k, v) for k in request.query_params for v in request.query_params.getlist(k))
+    raw = json.dumps([request.get_host(), params], separators=(',', ':'))
+    return f'cost-table:{version}:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def cached_cost_table_response(request, build):
+    """``build()`` behind the Django cache (``COST_TABLE_CACHE_TTL_S``)."""
+    ttl = settings.COST_TABLE_CACHE_TTL_S
+    if ttl <= 0:
+        return build()
+    key = cost_table_cache_key(request)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, ttl)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Roots and keyset paging
+# ---------------------------------------------------------------------------
+
+def root_queryset(filtered_qs, ordering):
+    """
+    Jobs of ``filtered_qs`` whose parent is not itself in the filtered set,
+    ordered by ``ordering`` (a key of ORDERINGS, NULLs last in both
+    directions) with job_no as tiebreaker and the sort value annotated as
+    ``_sort_value`` for cursors.
+    """
+    field, descending = ORDERINGS.get(ordering, ORDERINGS['job_no'])
+    return (
+        filtered_qs
+        .exclude(parent_id__in=filtered_qs.order_by().values('job_no'))
+        .annotate(_sort_value=F(field))
+        .order_by(OrderBy(F('_sort_value'), descending=descending, nulls_last=True), 'job_no')
+    )
+
+
+def children_with_children(filtered_qs, job_nos):
+    """Subset of ``job_nos`` with at least one child in the filtered set."""
+    if not job_nos:
+        return set()
+    return set(
+        filtered_qs.order_by()
+        .filter(parent_id__in=job_nos)
+        .values_list('parent_id', flat=True)
+        .distinct()
+    )
+
+
+def encode_cursor(job) -> str:
+    # str() keeps Decimals exact; the lookup parses dates/datetimes back
+    raw = json.dumps([job._sort_value, job.job_no], default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """(sort value, job_no) of the last row served; NotFound when garbled."""
+    try:
+        value, job_no = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise NotFound('Invalid cursor')
+    if not isinstance(job_no, str):
+        raise NotFound('Invalid cursor')
+    return value, job_no
+
+
+def seek(roots_qs, ordering, cursor):
+    """Rows of ``roots_qs`` (from root_queryset) after ``cursor``."""
+    if not cursor:
+        return roots_qs
+    value, job_no = decode_cursor(cursor)
+    if value is None:
+        return roots_qs.filter(_sort_value__isnull=True, job_no__gt=job_no)
+    _, descending = ORDERINGS.get(ordering, ORDERINGS['job_no'])
+    beyond = '_sort_value__lt' if descending else '_sort_value__gt'
+    return roots_qs.filter(
+        Q(**{beyond: value})
+        | Q(_sort_value=value, job_no__gt=job_no)
+        | Q(_sort_value__isnull=True)
+    )
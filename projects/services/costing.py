@@ -1,52 +1,19 @@
 from __future__ import annotations
 
-from bisect import bisect_right
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import date
 from decimal import Decimal
-from functools import lru_cache
 
 from django.db import transaction
-from django.db.models import F, Q, Sum
-from django.db.models.functions import Coalesce
+from django.db.models import F, Sum
 
-
-q2 = lambda x: Decimal(x).quantize(Decimal('0.01'))  # noqa: E731
-
-
-@lru_cache(maxsize=4)
-def _rate_table(_cache_day: date) -> tuple:
-    """
-    Every CurrencyRateSnapshot as an ascending ((date, rates), ...) tuple.
-
-    ``_cache_day`` is only a cache key: passing today's date means the table is
-    fetched once per process per calendar day, so newly added snapshots appear
-    the next day exactly as the old per-date cache behaved.
-    """
-    from core.models import CurrencyRateSnapshot
-
-    return tuple(
-        (r['date'], r['rates'] or {})
-        for r in CurrencyRateSnapshot.objects.order_by('date').values('date', 'rates')
-    )
+from core.fx import fx_table
 
 
-def _fetch_rates(on_date: date) -> dict:
-    """
-    Rates dict from the snapshot nearest to on_date: the last one on/before it,
-    falling back to the earliest.
-
-    Resolved in memory against the whole table rather than one query per date —
-    callers such as resolve_planning_item_price convert at each line's own date,
-    so a per-date cache never hit and every distinct date cost a round-trip
-    (15 queries in a single overtime cost-impact response).
-    """
-    table = _rate_table(date.today())
-    if not table:
-        return {}
-    idx = bisect_right([d for d, _ in table], on_date) - 1
-    if idx < 0:
-        idx = 0  # on_date precedes every snapshot — use the earliest
-    return table[idx][1]
+q2 = lambda x: Decimal(x).quantize(Decimal('0.01'))  # noqa: E731
 
 
 def convert_to_eur(amount: Decimal, currency: str, on_date: date) -> Decimal:
@@ -54,29 +21,11 @@ def convert_to_eur(amount: Decimal, currency: str, on_date: date) -> Decimal:
     Convert an amount in any supported currency to EUR using CurrencyRateSnapshot.
     Uses the last snapshot on/before on_date (or earliest if none found before).
     Returns Decimal('0.00') if no snapshot is available or rate is missing.
-    """
-    if not amount:
-        return Decimal('0.00')
-    amount = Decimal(str(amount))
-    if currency == 'EUR':
-        return amount
-
-    rates = _fetch_rates(on_date)  # single DB hit per date, then cached
-    if not rates:
-        return Decimal('0.00')
-
-    if currency == 'TRY':
-        eur_rate = Decimal(str(rates.get('EUR', 0)))
-        if eur_rate == 0:
-            return Decimal('0.00')
-        return q2(amount * eur_rate)
 
-    # Cross-rate via TRY: 1 src_currency = (rates['EUR'] / rates[src]) EUR
-    eur_rate = Decimal(str(rates.get('EUR', 0)))
-    src_rate = Decimal(str(rates.get(currency, 0)))
-    if src_rate == 0 or eur_rate == 0:
-        return Decimal('0.00')
-    return q2(amount * (eur_rate / src_rate))
+    Rates come from the process-wide core.fx table (no query per call); use
+    ``fx_table().to_eur_many`` to convert batches.
+    """
+    return fx_table().to_eur(amount, currency, on_date)
 
 
 def _decimal_str(value: Decimal) -> str:
@@ -315,61 +264,16 @@ def _effective_selling_price(job_order, summary=None, ctx=None) -> dict:
     }
 
 
-def _planning_items_with_price_annotations(job_nos: list[str]):
-    from django.db.models import OuterRef, Prefetch, Subquery
+def _planning_items_with_prices(job_nos: list[str]):
+    """Planning items of ``job_nos`` with their resolved price row joined
+    (read through planning.price_utils.resolve_planning_item_price)."""
     from planning.models import PlanningRequestItem
-    from procurement.models import PurchaseOrderLine, PurchaseRequestItem, ItemOffer
-
-    pol_m2m_base = PurchaseOrderLine.objects.filter(
-        purchase_request_item__purchase_request__planning_request_items=OuterRef('pk'),
-        purchase_request_item__item_id=OuterRef('item_id'),
-    ).exclude(
-        Q(purchase_request_item__purchase_request__status='cancelled') |
-        Q(po__status='cancelled')
-    ).order_by('-po__ordered_at', '-po__created_at', '-id')
-
-    pol_hist_base = PurchaseOrderLine.objects.filter(
-        purchase_request_item__item_id=OuterRef('item_id'),
-    ).exclude(
-        Q(purchase_request_item__purchase_request__status='cancelled') |
-        Q(po__status='cancelled')
-    ).order_by('-po__ordered_at', '-po__created_at', '-id')
 
     return (
         PlanningRequestItem.objects
         .filter(job_no__in=list(job_nos))
         .exclude(planning_request__status='cancelled')
-        .select_related('item')
-        .prefetch_related(
-            Prefetch(
-                'purchase_request_items',
-                queryset=PurchaseRequestItem.objects.select_related('purchase_request'),
-            ),
-            Prefetch(
-                'purchase_request_items__po_lines',
-                queryset=PurchaseOrderLine.objects.select_related('po').order_by('-id'),
-            ),
-            Prefetch(
-                'purchase_request_items__offers',
-                queryset=ItemOffer.objects.select_related('supplier_offer').order_by('-id'),
-            ),
-        )
-        .annotate(
-            _t2_price=Subquery(pol_m2m_base.values('unit_price')[:1]),
-            _t2_currency=Subquery(pol_m2m_base.values('po__currency')[:1]),
-            _t2_tax=Subquery(pol_m2m_base.values('po__tax_rate')[:1]),
-            _t2_date=Subquery(
-                pol_m2m_base.annotate(_ref_date=Coalesce('po__ordered_at', 'po__created_at'))
-                .values('_ref_date')[:1]
-            ),
-            _t5_price=Subquery(pol_hist_base.values('unit_price')[:1]),
-            _t5_currency=Subquery(pol_hist_base.values('po__currency')[:1]),
-            _t5_tax=Subquery(pol_hist_base.values('po__tax_rate')[:1]),
-            _t5_date=Subquery(
-                pol_hist_base.annotate(_ref_date=Coalesce('po__ordered_at', 'po__created_at'))
-                .values('_ref_date')[:1]
-            ),
-        )
+        .select_related('item', 'resolved_price')
         .order_by('id')
     )
 
@@ -437,7 +341,7 @@ def _estimate_material_cost(job_no: str, *, procurement_lines=None, planning_ite
             .order_by('order', 'id')
         )
     if planning_items is None:
-        planning_items = _planning_items_with_price_annotations([job_no])
+        planning_items = _planning_items_with_prices([job_no])
 
     procurement_by_pri: dict[int, list] = {}
     orphan_procurement_lines = []
@@ -604,7 +508,7 @@ def build_payload_context_for(root_job_orders) -> dict:
         JobOrder, JobOrderCostSummary, JobOrderDepartmentTask, JobOrderProcurementLine,
     )
 
-    # Subtree walk, one query per depth level, across all roots at once.
+    # Every subtree in one query on the hierarchy index, across all roots.
     children_map: dict[str, list] = {}
     nodes: list = []
     seen: set = set()
@@ -613,28 +517,25 @@ def build_payload_context_for(root_job_orders) -> dict:
             seen.add(root.job_no)
             nodes.append(root)
     all_nos = list(seen)
-    frontier = list(seen)
-    while frontier:
-        level = list(
-            JobOrder.objects
-            .filter(parent_id__in=frontier)
-            .select_related('source_offer')
-            .prefetch_related('source_offer__items')
-            .order_by('job_no')
-        )
-        if not level:
-            break
-        next_frontier = []
-        for child in level:
-            children_map.setdefault(child.parent_id, []).append(child)
-            # A root can also be a descendant of another root; keep the
-            # parent->child link but do not walk or count it twice.
-            if child.job_no not in seen:
-                seen.add(child.job_no)
-                all_nos.append(child.job_no)
-                nodes.append(child)
-                next_frontier.append(child.job_no)
-        frontier = next_frontier
+    descendants = (
+        JobOrder.objects
+        .filter(ancestor_links__ancestor_id__in=list(seen), ancestor_links__depth__gt=0)
+        .select_related('source_offer')
+        .prefetch_related('source_offer__items')
+        .order_by('ancestor_links__depth', 'job_no')
+    )
+    linked: set = set()
+    for child in descendants:
+        # A job under two requested roots (one root inside another) comes
+        # back once per root; keep one parent->child link and one node.
+        if child.job_no in linked:
+            continue
+        linked.add(child.job_no)
+        children_map.setdefault(child.parent_id, []).append(child)
+        if child.job_no not in seen:
+            seen.add(child.job_no)
+            all_nos.append(child.job_no)
+            nodes.append(child)
 
     summaries = {
         s.job_order_id: s
@@ -701,7 +602,7 @@ def build_payload_context_for(root_job_orders) -> dict:
         procurement_lines.setdefault(pl.job_order_id, []).append(pl)
 
     planning_items: dict[str, list] = {}
-    for pri in _planning_items_with_price_annotations(all_nos):
+    for pri in _planning_items_with_prices(all_nos):
         planning_items.setdefault(pri.job_no, []).append(pri)
 
     offer_ids = {n.source_offer_id for n in nodes if getattr(n, 'source_offer_id', None)}
@@ -759,6 +660,10 @@ def build_job_cost_payload(job_order, _ctx=None, derived_resolver=None) -> dict:
     """
     if _ctx is None:
         _ctx = _build_payload_context(job_order)
+    # Optional per-context memo (batched recomputes ask for every tree node)
+    memo = _ctx.get('payload_memo')
+    if memo is not None and job_order.job_no in memo:
+        return memo[job_order.job_no]
 
     # Resolved up front because the child recursion below needs to pass it on.
     # Callers handling several jobs should build one resolver and pass it in —
@@ -888,7 +793,7 @@ def build_job_cost_payload(job_order, _ctx=None, derived_resolver=None) -> dict:
     # (`resolver` is set at the top of this function.)
     display = resolver.display(job_order.job_no, selling_price['amount_eur'])
 
-    return {
+    payload = {
         'job_order': job_order.job_no,
         'total_weight_kg': str(total_weight) if job_order.total_weight_kg is not None else None,
         'completion_pct': str(completion),
@@ -934,6 +839,9 @@ def build_job_cost_payload(job_order, _ctx=None, derived_resolver=None) -> dict:
         },
         'last_updated': summary.last_updated.isoformat() if summary.last_updated else None,
     }
+    if memo is not None:
+        memo[job_no] = payload
+    return payload
 
 
 _ESTIMATED_COMPONENT_ORDER = (
@@ -1267,6 +1175,36 @@ def ensure_estimated_totals_cached(jobs) -> None:
             summary.refresh_from_db(fields=['estimated_total_cost'])
 
 
+_summary_deferral = threading.local()
+
+
+@contextmanager
+def defer_job_cost_summaries():
+    """
+    Collect recompute_job_cost_summary calls made on this thread instead of
+    running them, and yield the set of job_nos they asked for.
+
+    Used by the cost queue worker: 200 part recomputes on one job then cost a
+    single summary rebuild, run by the caller once the batch is done.
+    """
+    outer = getattr(_summary_deferral, 'job_nos', None)
+    job_nos = set()
+    _summary_deferral.job_nos = job_nos
+    try:
+        yield job_nos
+    finally:
+        _summary_deferral.job_nos = outer
+        if outer is not None:
+            outer |= job_nos
+
+
+_SUMMARY_COST_FIELDS = (
+    'labor_cost', 'material_cost', 'subcontractor_cost', 'paint_cost',
+    'qc_cost', 'shipping_cost', 'paint_material_cost', 'general_expenses_cost',
+    'employee_overhead_cost', 'machine_rental_cost',
+)
+
+
 @transaction.atomic
 def recompute_job_cost_summary(job_no: str) -> None:
     """
@@ -1284,266 +1222,275 @@ def recompute_job_cost_summary(job_no: str) -> None:
       general_expenses_cost = general_expenses_rate (TRY/kg) × total_weight_kg → EUR
       employee_overhead_cost = employee_overhead_rate × own labor_cost
       actual_total_cost   = sum of all above
+
+    Parents are recomputed too (their totals include this job's).
+    Inside ``defer_job_cost_summaries()`` the job_no is only recorded.
+    """
+    recompute_job_cost_summaries([job_no])
+
+
+def _with_ancestors(job_nos, include_ancestors=True) -> dict:
+    """
+    {job_no: JobOrder fields} for the existing job orders in ``job_nos`` plus
+    all their ancestors (one query on the hierarchy index).
+    """
+    from projects.models import JobOrder
+    from projects.services.hierarchy import ancestor_job_nos
+
+    job_nos = {j for j in job_nos if j}
+    rows = (
+        JobOrder.objects
+        .filter(job_no__in=ancestor_job_nos(job_nos) | job_nos if include_ancestors else job_nos)
+        .values('job_no', 'parent_id', 'total_weight_kg', 'general_expenses_rate')
+    )
+    return {r['job_no']: r for r in rows}
+
+
+def _own_cost_components(job_nos, jobs, existing, today) -> dict:
+    """
+    Each job's own (not rolled-up) summary components, q2-rounded exactly as
+    the per-job recompute always did, in a fixed number of grouped queries.
     """
     from welding.models import WeldingJobCostAgg
     from tasks.models import PartCostAgg
     from subcontracting.models import SubcontractingAssignment, SubcontractorStatementLine, SubcontractorStatementAdjustment
     from cranes.models import CraneRequest
     from projects.models import (
-        JobOrder, JobOrderCostSummary,
         JobOrderProcurementLine, JobOrderQCCostLine, JobOrderShippingCostLine,
         JobOrderDepartmentTask,
     )
 
-    today = date.today()
+    def grouped_sum(qs, group_field, sum_field):
+        return dict(
+            qs.filter(**{f'{group_field}__in': job_nos})
+            .order_by()
+            .values(group_field)
+            .annotate(s=Sum(sum_field))
+            .values_list(group_field, 's')
+        )
 
-    # ------------------------------------------------------------------
-    # 0. Fetch job order fields needed for new cost components
-    # ------------------------------------------------------------------
-    job_fields = (
-        JobOrder.objects
-        .values('total_weight_kg', 'general_expenses_rate')
-        .filter(job_no=job_no)
-        .first()
-    )
-    if job_fields is None:
-        return
-    total_weight_kg = Decimal(str(job_fields['total_weight_kg'] or 0))
-    general_expenses_rate = Decimal(str(job_fields['general_expenses_rate'] or 0))
+    zero = Decimal('0')
 
-    # ------------------------------------------------------------------
     # 1. Labor = welding + machining (both already stored in EUR)
-    # ------------------------------------------------------------------
-    welding = (
-        WeldingJobCostAgg.objects
-        .filter(job_no=job_no)
-        .values_list('total_cost', flat=True)
-        .first()
-    ) or Decimal('0')
-
-    machining = (
-        PartCostAgg.objects
-        .filter(job_no_cached=job_no)
-        .aggregate(s=Sum('total_cost'))['s']
-    ) or Decimal('0')
-
-    own_labor = q2(Decimal(welding) + Decimal(machining))
-    labor = own_labor
-
-    # ------------------------------------------------------------------
-    # 2. Material = sum of saved procurement lines (unit_price is EUR)
-    # ------------------------------------------------------------------
-    material = q2(
-        JobOrderProcurementLine.objects
-        .filter(job_order_id=job_no)
-        .aggregate(s=Sum('amount_eur'))['s']
-        or Decimal('0')
+    welding = dict(
+        WeldingJobCostAgg.objects.filter(job_no__in=job_nos).values_list('job_no', 'total_cost')
     )
+    machining = grouped_sum(PartCostAgg.objects, 'job_no_cached', 'total_cost')
 
-    # ------------------------------------------------------------------
-    # 3. Subcontractor = non-paint assignments with price_tier + weight
-    # ------------------------------------------------------------------
-    sc_assignments = (
+    # 2 / 5. Material, QC and shipping lines (amount_eur already stored)
+    material = grouped_sum(JobOrderProcurementLine.objects, 'job_order_id', 'amount_eur')
+    qc = grouped_sum(JobOrderQCCostLine.objects, 'job_order_id', 'amount_eur')
+    shipping = grouped_sum(JobOrderShippingCostLine.objects, 'job_order_id', 'amount_eur')
+
+    # 3 / 4. Subcontractor (non-paint) and unbilled paint assignments
+    subcontractor = defaultdict(Decimal)
+    paint = defaultdict(Decimal)
+    assignments = (
         SubcontractingAssignment.objects
         .filter(
-            department_task__job_order_id=job_no,
+            department_task__job_order_id__in=job_nos,
             price_tier__isnull=False,
             allocated_weight_kg__gt=0,
             is_retired=False,
         )
-        .exclude(price_tier__tier_type='paint')
         .select_related('price_tier', 'department_task')
     )
-    subcontractor = q2(sum(
-        convert_to_eur(a.current_cost, a.cost_currency, today)
-        for a in sc_assignments
-    ))
+    for a in assignments:
+        job_no = a.department_task.job_order_id
+        if a.price_tier.tier_type == 'paint':
+            paint[job_no] += convert_to_eur(a.unbilled_cost, a.cost_currency, today)
+        else:
+            subcontractor[job_no] += convert_to_eur(a.current_cost, a.cost_currency, today)
+    subcontractor = {j: q2(v) for j, v in subcontractor.items()}
 
-    # Add approved statement adjustments linked to this job order
-    sc_adjustments = (
+    # Approved statement adjustments linked to the job order
+    for adj in (
         SubcontractorStatementAdjustment.objects
-        .filter(
-            job_order_id=job_no,
-            statement__status='approved',
-        )
+        .filter(job_order_id__in=job_nos, statement__status='approved')
         .select_related('statement')
-    )
-    for adj in sc_adjustments:
-        subcontractor += convert_to_eur(adj.amount, adj.statement.currency, adj.statement.approved_at.date())
-    subcontractor = q2(subcontractor)
-
-    # ------------------------------------------------------------------
-    # 4. Paint = paint assignments
-    #    Billed portion: approved statement lines → use statement.approved_at for FX
-    #    Unbilled portion: use today's rate
-    # ------------------------------------------------------------------
-    paint_statement_lines = (
+    ):
+        subcontractor[adj.job_order_id] = subcontractor.get(adj.job_order_id, zero) + convert_to_eur(
+            adj.amount, adj.statement.currency, adj.statement.approved_at.date())
+
+    # Billed paint: approved statement lines at statement.approved_at FX
+    for line in (
         SubcontractorStatementLine.objects
         .filter(
-            assignment__department_task__job_order_id=job_no,
+            assignment__department_task__job_order_id__in=job_nos,
             assignment__price_tier__tier_type='paint',
             statement__status='approved',
         )
-        .select_related('statement', 'assignment')
-    )
-    paint_billed = sum(
-        convert_to_eur(
-            line.cost_amount,
-            line.assignment.cost_currency,
-            line.statement.approved_at.date(),
-        )
-        for line in paint_statement_lines
-        if line.statement.approved_at
-    )
-
-    paint_assignments = (
-        SubcontractingAssignment.objects
-        .filter(
-            department_task__job_order_id=job_no,
-            price_tier__tier_type='paint',
-            allocated_weight_kg__gt=0,
-            is_retired=False,
-        )
-        .select_related('price_tier', 'department_task')
-    )
-    paint_unbilled = sum(
-        convert_to_eur(a.unbilled_cost, a.cost_currency, today)
-        for a in paint_assignments
-    )
-
-    paint = q2(Decimal(paint_billed) + Decimal(paint_unbilled))
-
-    # ------------------------------------------------------------------
-    # 5. QC and Shipping (amount_eur already stored by user)
-    # ------------------------------------------------------------------
-    qc = q2(
-        JobOrderQCCostLine.objects
-        .filter(job_order_id=job_no)
-        .aggregate(s=Sum('amount_eur'))['s']
-        or Decimal('0')
-    )
-
-    shipping = q2(
-        JobOrderShippingCostLine.objects
-        .filter(job_order_id=job_no)
-        .aggregate(s=Sum('amount_eur'))['s']
-        or Decimal('0')
-    )
+        .select_related('statement', 'assignment__department_task')
+    ):
+        if line.statement.approved_at:
+            paint[line.assignment.department_task.job_order_id] += convert_to_eur(
+                line.cost_amount, line.assignment.cost_currency, line.statement.approved_at.date())
 
-    # ------------------------------------------------------------------
-    # 5b. Machine rental = completed crane/platform rental requests
-    #     (invoice amounts → EUR at completion-date FX)
-    # ------------------------------------------------------------------
-    machine_rental = Decimal('0')
-    rental_rows = (
+    # 5b. Machine rental = completed crane/platform rentals at completion-date FX
+    machine_rental = defaultdict(Decimal)
+    for job_no, amount, currency, completed_at in (
         CraneRequest.objects
-        .filter(job_no=job_no, status='completed', actual_cost__isnull=False)
-        .values_list('actual_cost', 'actual_cost_currency', 'completed_at')
-    )
-    for amount, currency, completed_at in rental_rows:
+        .filter(job_no__in=job_nos, status='completed', actual_cost__isnull=False)
+        .values_list('job_no', 'actual_cost', 'actual_cost_currency', 'completed_at')
+    ):
         fx_date = completed_at.date() if completed_at else today
-        machine_rental += convert_to_eur(amount, currency or 'TRY', fx_date)
-    machine_rental = q2(machine_rental)
-
-    # ------------------------------------------------------------------
-    # 6. Paint material cost = paint_material_rate (TRY/kg) × total_weight_kg → EUR
-    #    Only if job has at least one non-skipped painting task
-    #    Preserve user-customized rate; fall back to default 4.00
-    # ------------------------------------------------------------------
-    existing = JobOrderCostSummary.objects.filter(job_order_id=job_no).values(
-        'paint_material_rate', 'employee_overhead_rate'
-    ).first()
-
-    paint_material_rate = (
-        Decimal(str(existing['paint_material_rate']))
-        if existing else Decimal('4.00')
-    )
+        machine_rental[job_no] += convert_to_eur(amount, currency or 'TRY', fx_date)
 
-    painting_task = (
+    # 6. First non-skipped painting task per job drives paint material
+    painting_progress = {}
+    for job_no, progress in (
         JobOrderDepartmentTask.objects
-        .filter(job_order_id=job_no, task_type='painting')
+        .filter(job_order_id__in=job_nos, task_type='painting')
         .exclude(status='skipped')
-        .values('manual_progress')
-        .first()
-    )
-    painting_progress = Decimal(str(painting_task['manual_progress'] or 0)) if painting_task else Decimal('0')
-    paint_material = q2(
-        convert_to_eur(paint_material_rate * total_weight_kg * (painting_progress / Decimal('100')), 'TRY', today)
-        if (total_weight_kg > 0 and painting_progress > 0) else Decimal('0')
-    )
+        .values_list('job_order_id', 'manual_progress')
+    ):
+        painting_progress.setdefault(job_no, Decimal(str(progress or 0)))
+
+    out = {}
+    for job_no in job_nos:
+        fields = jobs[job_no]
+        total_weight_kg = Decimal(str(fields['total_weight_kg'] or 0))
+        general_expenses_rate = Decimal(str(fields['general_expenses_rate'] or 0))
+        rates = existing.get(job_no)
+        paint_material_rate = Decimal(str(rates['paint_material_rate'])) if rates else Decimal('4.00')
+        employee_overhead_rate = Decimal(str(rates['employee_overhead_rate'])) if rates else Decimal('0.65')
+
+        own_labor = q2(Decimal(welding.get(job_no) or zero) + Decimal(machining.get(job_no) or zero))
+        progress = painting_progress.get(job_no, zero)
+        out[job_no] = {
+            'labor_cost': own_labor,
+            'material_cost': q2(material.get(job_no) or zero),
+            'subcontractor_cost': q2(subcontractor.get(job_no, zero)),
+            'paint_cost': q2(paint.get(job_no, zero)),
+            'qc_cost': q2(qc.get(job_no) or zero),
+            'shipping_cost': q2(shipping.get(job_no) or zero),
+            'machine_rental_cost': q2(machine_rental.get(job_no, zero)),
+            'paint_material_cost': q2(
+                convert_to_eur(paint_material_rate * total_weight_kg * (progress / Decimal('100')), 'TRY', today)
+                if (total_weight_kg > 0 and progress > 0) else zero
+            ),
+            'general_expenses_cost': q2(
+                general_expenses_rate * total_weight_kg
+                if (general_expenses_rate > 0 and total_weight_kg > 0) else zero
+            ),
+            'employee_overhead_cost': q2(employee_overhead_rate * own_labor),
+        }
+    return out
 
-    # ------------------------------------------------------------------
-    # 7. General expenses = general_expenses_rate (EUR/kg) × total_weight_kg
-    # ------------------------------------------------------------------
-    general_expenses = q2(
-        general_expenses_rate * total_weight_kg
-        if (general_expenses_rate > 0 and total_weight_kg > 0) else Decimal('0')
-    )
 
-    # ------------------------------------------------------------------
-    # 8. Employee overhead = employee_overhead_rate × own labor_cost
-    #    Preserve user-customized rate; fall back to default 0.65
-    # ------------------------------------------------------------------
-    employee_overhead_rate = (
-        Decimal(str(existing['employee_overhead_rate']))
-        if existing else Decimal('0.65')
-    )
-    employee_overhead = q2(employee_overhead_rate * own_labor)
-
-    # ------------------------------------------------------------------
-    # 9. Add direct children's rolled-up costs
-    #    Each child's summary already includes its own descendants, so
-    #    summing direct children avoids double-counting.
-    # ------------------------------------------------------------------
-    children_summaries = list(
-        JobOrderCostSummary.objects.filter(job_order__parent_id=job_no)
-    )
-    if children_summaries:
-        labor             += sum(s.labor_cost             for s in children_summaries)
-        material          += sum(s.material_cost          for s in children_summaries)
-        subcontractor     += sum(s.subcontractor_cost     for s in children_summaries)
-        paint             += sum(s.paint_cost             for s in children_summaries)
-        qc                += sum(s.qc_cost               for s in children_summaries)
-        shipping          += sum(s.shipping_cost          for s in children_summaries)
-        paint_material    += sum(s.paint_material_cost    for s in children_summaries)
-        general_expenses  += sum(s.general_expenses_cost  for s in children_summaries)
-        employee_overhead += sum(s.employee_overhead_cost for s in children_summaries)
-        machine_rental    += sum(s.machine_rental_cost    for s in children_summaries)
-
-    # ------------------------------------------------------------------
-    # 10. Total and upsert
-    # ------------------------------------------------------------------
-    total = q2(
-        labor + material + subcontractor + paint + qc + shipping
-        + paint_material + general_expenses + employee_overhead + machine_rental
-    )
+def _store_estimated_total_costs(job_nos) -> None:
+    """Batched ``_store_estimated_total_cost``: one payload context and one
+    price resolver for all jobs, each tree node's payload built once."""
+    from projects.models import JobOrder, JobOrderCostSummary
+    from projects.services.selling_price import DerivedSellingPriceResolver
 
-    JobOrderCostSummary.objects.update_or_create(
-        job_order_id=job_no,
-        defaults={
-            'labor_cost': q2(labor),
-            'material_cost': q2(material),
-            'subcontractor_cost': q2(subcontractor),
-            'paint_cost': q2(paint),
-            'qc_cost': q2(qc),
-            'shipping_cost': q2(shipping),
-            'paint_material_cost': q2(paint_material),
-            'general_expenses_cost': q2(general_expenses),
-            'employee_overhead_cost': q2(employee_overhead),
-            'machine_rental_cost': q2(machine_rental),
-            'actual_total_cost': total,
-        },
+    job_orders = list(
+        JobOrder.objects
+        .filter(job_no__in=job_nos)
+        .select_related('source_offer')
+        .prefetch_related('source_offer__items')
     )
+    if not job_orders:
+        return
+    ctx = build_payload_context_for(job_orders)
+    ctx['payload_memo'] = {}
+    resolver = DerivedSellingPriceResolver([jo.job_no for jo in job_orders])
+
+    summaries = []
+    for jo in job_orders:
+        estimated = build_job_cost_payload(jo, ctx, derived_resolver=resolver)['estimated']['total_cost']
+        summaries.append(JobOrderCostSummary(
+            job_order_id=jo.job_no, estimated_total_cost=q2(Decimal(str(estimated))),
+        ))
+    JobOrderCostSummary.objects.bulk_update(summaries, ['estimated_total_cost'], batch_size=500)
 
-    _store_estimated_total_cost(job_no)
 
-    # ------------------------------------------------------------------
-    # 11. Chain up: if this job has a parent, recompute the parent too
-    # ------------------------------------------------------------------
-    parent_id = (
-        JobOrder.objects
-        .values_list('parent_id', flat=True)
-        .get(job_no=job_no)
+@transaction.atomic
+def recompute_job_cost_summaries(job_nos, timings: dict | None = None,
+                                 include_ancestors: bool = True) -> list[str]:
+    """
+    Set-based ``recompute_job_cost_summary`` for many job orders at once.
+
+    ``job_nos`` and all their ancestors (only ``job_nos`` with
+    ``include_ancestors=False``) are recomputed: every cost component
+    is fetched with GROUP BY over the whole set in a fixed number of queries,
+    children roll up into parents in memory (deepest first), and the summaries
+    are written with one bulk_update. ``timings`` (optional) receives seconds
+    spent per phase. Returns the recomputed job_nos.
+    """
+    deferred = getattr(_summary_deferral, 'job_nos', None)
+    if deferred is not None:
+        deferred.update(j for j in job_nos if j)
+        return []
+
+    from django.utils import timezone
+    from projects.models import JobOrderCostSummary
+
+    clock = time.perf_counter()
+    today = date.today()
+
+    jobs = _with_ancestors(job_nos, include_ancestors)
+    if not jobs:
+        return []
+    targets = list(jobs)
+    existing = {
+        r['job_order_id']: r
+        for r in JobOrderCostSummary.objects.filter(job_order_id__in=targets)
+        .values('job_order_id', 'paint_material_rate', 'employee_overhead_rate')
+    }
+    own = _own_cost_components(targets, jobs, existing, today)
+
+    # Children outside the set contribute their stored (already rolled-up) totals
+    rolled = {j: dict(v) for j, v in own.items()}
+    for row in (
+        JobOrderCostSummary.objects
+        .filter(job_order__parent_id__in=targets)
+        .exclude(job_order_id__in=targets)
+        .values('job_order__parent_id', *_SUMMARY_COST_FIELDS)
+    ):
+        acc = rolled[row['job_order__parent_id']]
+        for f in _SUMMARY_COST_FIELDS:
+            acc[f] += row[f]
+
+    # Children inside the set contribute their fresh totals; deepest first
+    def depth(job_no):
+        d = 0
+        while jobs[job_no]['parent_id'] in jobs and d < len(jobs):
+            job_no = jobs[job_no]['parent_id']
+            d += 1
+        return d
+
+    for job_no in sorted(targets, key=depth, reverse=True):
+        parent_id = jobs[job_no]['parent_id']
+        if parent_id in jobs:
+            for f in _SUMMARY_COST_FIELDS:
+                rolled[parent_id][f] += rolled[job_no][f]
+    if timings is not None:
+        timings['compute'] = time.perf_counter() - clock
+
+    # Persist: create missing rows with their defaults, then one bulk_update
+    clock = time.perf_counter()
+    missing = [j for j in targets if j not in existing]
+    JobOrderCostSummary.objects.bulk_create(
+        [JobOrderCostSummary(job_order_id=j) for j in missing], batch_size=500,
+    )
+    now = timezone.now()
+    summaries = []
+    for job_no in targets:
+        values = {f: q2(rolled[job_no][f]) for f in _SUMMARY_COST_FIELDS}
+        values['actual_total_cost'] = q2(sum(values.values(), Decimal('0')))
+        summaries.append(JobOrderCostSummary(job_order_id=job_no, last_updated=now, **values))
+    JobOrderCostSummary.objects.bulk_update(
+        summaries, [*_SUMMARY_COST_FIELDS, 'actual_total_cost', 'last_updated'], batch_size=500,
     )
-    if parent_id:
-        recompute_job_cost_summary(parent_id)
+    if timings is not None:
+        timings['persist'] = time.perf_counter() - clock
+
+    clock = time.perf_counter()
+    _store_estimated_total_costs(targets)
+    if timings is not None:
+        timings['estimated'] = time.perf_counter() - clock
+
+    from projects.services.cost_table import mark_cost_table_stale
+    mark_cost_table_stale(targets)
+    return targets
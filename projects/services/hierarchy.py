@@ -0,0 +1,161 @@
+"""
+JobOrder hierarchy index (``JobOrderClosure``).
+
+Every (ancestor, descendant) pair of the parent FK tree is stored with its
+distance, the job itself included at depth 0. Subtree and ancestor-chain
+lookups are then a single indexed query instead of one query per tree level
+or a ``job_no__startswith`` scan (which is wrong anyway: "254-1" prefixes
+"254-10", and phase allocations sit under phase nodes they do not prefix).
+
+Maintenance (``projects/signals.py``):
+
+* created job  -> ``link_job_order``: the parent's ancestor rows + 1, plus self;
+* moved job    -> ``move_job_order``: drop the subtree's links to its old
+  ancestors, link it under the new parent's chain (a parent inside the
+  job's own subtree is rejected before the write by ``check_parent``, from
+  ``JobOrder.clean`` and a pre_save receiver);
+* renamed job  -> nothing: both FKs cascade on job_no updates (migration
+  0064), like every other FK to JobOrder;
+* deleted job  -> nothing: the rows cascade with the subtree.
+
+Phase nodes and allocations are created with ``JobOrder.objects.create`` and
+go through the created path. ``rebuild_job_order_closure`` recomputes the
+whole table (``manage.py rebuild_job_order_closure``).
+"""
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from projects.models import JobOrder, JobOrderClosure
+
+
+# ---------------------------------------------------------------------------
+# Lookups
+# ---------------------------------------------------------------------------
+
+def descendant_job_nos(job_nos, include_self=True) -> set:
+    """job_nos of every descendant of ``job_nos``."""
+    links = JobOrderClosure.objects.filter(ancestor_id__in=[j for j in job_nos if j])
+    if not include_self:
+        links = links.filter(depth__gt=0)
+    return set(links.values_list('descendant_id', flat=True))
+
+
+def ancestor_job_nos(job_nos, include_self=True) -> set:
+    """job_nos of every ancestor of ``job_nos``."""
+    links = JobOrderClosure.objects.filter(descendant_id__in=[j for j in job_nos if j])
+    if not include_self:
+        links = links.filter(depth__gt=0)
+    return set(links.values_list('ancestor_id', flat=True))
+
+
+def root_job_nos(job_nos) -> set:
+    """Root job_no of every job in ``job_nos``."""
+    return set(
+        JobOrderClosure.objects
+        .filter(descendant_id__in=[j for j in job_nos if j], ancestor__parent__isnull=True)
+        .values_list('ancestor_id', flat=True)
+    )
+
+
+def subtree_job_nos(root_nos) -> dict:
+    """{root: [job_no, ...]} for each of ``root_nos``, shallowest first."""
+    subtrees = defaultdict(list)
+    for ancestor, descendant in (
+        JobOrderClosure.objects
+        .filter(ancestor_id__in=[j for j in root_nos if j])
+        .order_by('depth', 'descendant_id')
+        .values_list('ancestor_id', 'descendant_id')
+    ):
+        subtrees[ancestor].append(descendant)
+    return subtrees
+
+
+def ancestors_of(job_no):
+    """QuerySet of the ancestors of ``job_no`` (itself excluded), nearest
+    first."""
+    return (
+        JobOrder.objects
+        .filter(descendant_links__descendant_id=job_no, descendant_links__depth__gt=0)
+        .order_by('descendant_links__depth')
+    )
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+def check_parent(job_no, parent_id) -> None:
+    """Raise ValidationError when ``parent_id`` is ``job_no`` or one of its
+    descendants (the move would close a cycle)."""
+    if not job_no or not parent_id:
+        return
+    if parent_id == job_no or JobOrderClosure.objects.filter(
+            ancestor_id=job_no, descendant_id=parent_id).exists():
+        raise ValidationError(
+            {'parent': f"{job_no} kendi alt işi olan {parent_id} altına taşınamaz."})
+
+
+def link_job_order(job_no, parent_id) -> None:
+    """Index a newly created job order under ``parent_id`` (None for roots)."""
+    rows = [JobOrderClosure(ancestor_id=job_no, descendant_id=job_no, depth=0)]
+    if parent_id:
+        rows += [
+            JobOrderClosure(ancestor_id=ancestor, descendant_id=job_no, depth=depth + 1)
+            for ancestor, depth in JobOrderClosure.objects
+            .filter(descendant_id=parent_id)
+            .values_list('ancestor_id', 'depth')
+        ]
+    JobOrderClosure.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+@transaction.atomic
+def move_job_order(job_no, new_parent_id) -> None:
+    """Re-index the subtree of ``job_no`` after its parent changed."""
+    subtree = dict(
+        JobOrderClosure.objects.filter(ancestor_id=job_no).values_list('descendant_id', 'depth')
+    )
+    if not subtree:
+        # Never indexed (created before the table was backfilled)
+        subtree = {job_no: 0}
+        JobOrderClosure.objects.create(ancestor_id=job_no, descendant_id=job_no, depth=0)
+    JobOrderClosure.objects.filter(descendant_id__in=list(subtree)).exclude(
+        ancestor_id__in=list(subtree)).delete()
+    if new_parent_id:
+        new_ancestors = list(
+            JobOrderClosure.objects.filter(descendant_id=new_parent_id).values_list('ancestor_id', 'depth')
+        )
+        JobOrderClosure.objects.bulk_create([
+            JobOrderClosure(ancestor_id=ancestor, descendant_id=descendant,
+                            depth=ancestor_depth + depth + 1)
+            for ancestor, ancestor_depth in new_ancestors
+            for descendant, depth in subtree.items()
+        ], batch_size=1000)
+
+
+def closure_rows(parents: dict) -> list:
+    """(ancestor, descendant, depth) triples for a {job_no: parent_id} map.
+    A malformed cycle stops the walk instead of looping."""
+    rows = []
+    for job_no in parents:
+        ancestor, depth, seen = job_no, 0, set()
+        while ancestor and ancestor not in seen:
+            rows.append((ancestor, job_no, depth))
+            seen.add(ancestor)
+            ancestor = parents.get(ancestor)
+            depth += 1
+    return rows
+
+
+@transaction.atomic
+def rebuild_job_order_closure() -> int:
+    """Recompute the whole index from the parent FKs; returns the row count."""
+    parents = dict(JobOrder.objects.values_list('job_no', 'parent_id'))
+    JobOrderClosure.objects.all().delete()
+    rows = closure_rows(parents)
+    JobOrderClosure.objects.bulk_create(
+        [JobOrderClosure(ancestor_id=a, descendant_id=d, depth=depth) for a, d, depth in rows],
+        batch_size=5000,
+    )
+    return len(rows)
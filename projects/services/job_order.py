@@ -24,18 +24,35 @@ def rename_job_no(old_job_no: str, new_job_no: str) -> None:
         #   "-"  hierarchy children / allocations  -> "OLD-01", "OLD-01/P1"
         #   "/"  production phase nodes            -> "OLD/P1"
         # Both must be renamed so the job_no prefix keeps matching the new root.
-        from django.db.models import Q
-        from projects.models import JobOrder
-
-        descendants = list(
+        # The hierarchy index yields them shallowest first, so every parent
+        # already carries its new job_no when its children are renamed.
+        from projects.models import JobOrder, JobOrderClosure
+
+        prefixes = (old_job_no + '-', old_job_no + '/')
+        subtree = list(
+            JobOrderClosure.objects
+            .filter(ancestor_id=old_job_no, depth__gt=0)
+            .order_by('depth', 'descendant_id')
+            .values_list('descendant_id', flat=True)
+        )
+        # Phase allocations of a product master ("270-01-01/P1") hang under
+        # the phase node ("270-01/P1"), outside the master's subtree; they are
+        # reached through source_job_order and renamed with their own subtrees.
+        mirrors = list(
             JobOrder.objects
-            .filter(
-                Q(job_no__startswith=old_job_no + '-')
-                | Q(job_no__startswith=old_job_no + '/')
-            )
-            .order_by('job_no')   # lexicographic == depth-order for this scheme
+            .filter(source_job_order_id__in=[old_job_no, *subtree])
+            .exclude(job_no__in=subtree)
             .values_list('job_no', flat=True)
         )
+        mirror_subtrees = list(
+            JobOrderClosure.objects
+            .filter(ancestor_id__in=mirrors)
+            .order_by('depth', 'descendant_id')
+            .values_list('descendant_id', flat=True)
+        )
+        descendants = list(dict.fromkeys(
+            job_no for job_no in subtree + mirror_subtrees if job_no.startswith(prefixes)
+        ))
 
         # Rename the root first.  ON UPDATE CASCADE propagates the change to
         # every FK column inside the projects app (including parent_id on child
@@ -72,6 +89,7 @@ def _rename_single(old_no: str, new_no: str) -> None:
             ('subcontracting_subcontractorstatementline', 'job_no'),
             ('welding_time_entry',                       'job_no'),
             ('welding_job_cost_agg_user',                'job_no'),
+            ('welding_entry_cost_contribution',          'job_no'),
             ('overtime_overtimeentry',                   'job_no'),
             # Notification source_id stores job_no as a generic string PK
             ('notifications_notification',              'source_id'),
@@ -80,14 +98,17 @@ def _rename_single(old_no: str, new_no: str) -> None:
         # 3. Tables where job_no is itself the PK — update carefully.
         #    These are small queue/aggregate tables; no other table references them.
         for table in (
-            'subcontracting_cost_recalc_queue',
             'welding_job_cost_agg',
-            'welding_job_cost_recalc_queue',
         ):
             cur.execute(
                 f"UPDATE {table} SET job_no = %s WHERE job_no = %s",  # noqa: S608
                 [new_no, old_no],
             )
+        # Queued cost recalcs are keyed by job_no for every kind but parts
+        cur.execute(
+            "UPDATE core_cost_recalc_job SET key = %s WHERE key = %s AND kind <> 'part'",
+            [new_no, old_no],
+        )
 
 
 def _bulk_update(cur, tables_cols, old_val, new_val):
@@ -106,6 +127,6 @@ def cascade_customer_to_children(job_order) -> None:
     from projects.models import JobOrder
 
     descendants = JobOrder.objects.filter(
-        job_no__startswith=job_order.job_no + '-'
+        ancestor_links__ancestor_id=job_order.job_no, ancestor_links__depth__gt=0,
     )
     descendants.update(customer=job_order.customer)
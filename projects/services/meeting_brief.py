@@ -579,7 +579,7 @@ def _delivered_uncosted_material(job_nos):
     """
     from planning.price_utils import resolve_planning_item_price
     from projects.models import JobOrderProcurementLine
-    from projects.services.costing import _planning_items_with_price_annotations
+    from projects.services.costing import _planning_items_with_prices
 
     covered = set(
         JobOrderProcurementLine.objects
@@ -587,7 +587,7 @@ def _delivered_uncosted_material(job_nos):
         .values_list('planning_request_item_id', flat=True)
     )
     total = Decimal('0')
-    for pri in _planning_items_with_price_annotations(list(job_nos)).filter(is_delivered=True):
+    for pri in _planning_items_with_prices(list(job_nos)).filter(is_delivered=True):
         if pri.pk in covered:
             continue
         price = resolve_planning_item_price(pri)
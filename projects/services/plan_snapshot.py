@@ -0,0 +1,116 @@
+"""
+Materialized production-plan overview.
+
+``build_production_plan_overview`` recomputes tasks, progress, first-progress
+evidence and a forecast for every root on every call.  The overview endpoint
+instead serves one ``ProductionPlanSnapshot`` row per root and rebuilds only
+the roots that are stale:
+
+* never built, or ``built_version != dirty_version`` — signals (see
+  ``projects/signals.py``) bump ``dirty_version`` when a task, timer, CNC,
+  welding, procurement or drawing row of the root's subtree changes, and on
+  every row for a holiday change;
+* built for an earlier day — the forecast is relative to today;
+* older than ``PRODUCTION_PLAN_SNAPSHOT_MAX_AGE_S`` — a backstop for writes
+  that bypass signals (``QuerySet.update``), which are common in this code
+  base.
+
+``?fresh=1`` rebuilds every root of the request.  The rebuild reads
+``dirty_version`` BEFORE computing and stores it as ``built_version``, so a
+change that lands mid-rebuild leaves the row stale instead of being lost.
+"""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from projects.models import ProductionPlanSnapshot
+from projects.services.production_plan import _overview_items, _overview_roots
+from projects.services.schedule import today_local
+
+
+def _root_job_nos(job_nos):
+    """Root job_no of every job in ``job_nos``."""
+    from projects.services.hierarchy import root_job_nos
+    return root_job_nos(job_nos)
+
+
+def _bump(job_nos):
+    roots = _root_job_nos(job_nos)
+    if roots:
+        ProductionPlanSnapshot.objects.filter(job_order_id__in=roots).update(
+            dirty_version=F('dirty_version') + 1)
+
+
+def mark_plans_stale(job_nos):
+    """Invalidate the snapshots of the roots above ``job_nos`` once the
+    current transaction commits (immediately in autocommit)."""
+    job_nos = {j for j in job_nos if j}
+    if job_nos:
+        transaction.on_commit(lambda: _bump(job_nos))
+
+
+def mark_all_plans_stale():
+    """Holiday calendar changed: every forecast may move."""
+    transaction.on_commit(lambda: ProductionPlanSnapshot.objects.update(
+        dirty_version=F('dirty_version') + 1))
+
+
+def _is_current(snapshot, today, oldest_ok):
+    return (snapshot.built_version == snapshot.dirty_version
+            and snapshot.as_of == today
+            and snapshot.generated_at is not None
+            and snapshot.generated_at >= oldest_ok)
+
+
+def _as_json(item):
+    """Exactly what the renderer would send (dates/Decimals/datetimes), so
+    snapshot and freshly computed cards are indistinguishable."""
+    return json.loads(json.dumps(item, cls=JSONEncoder))
+
+
+def production_plan_overview(status_filter='active', fresh=False):
+    """Overview payload served from snapshots, refreshing stale roots.
+
+    ``generated_at`` is the OLDEST card's build time (the staleness marker);
+    ``refreshed`` counts the roots recomputed by this call.
+    """
+    today = today_local()
+    now = timezone.now()
+    oldest_ok = now - timedelta(seconds=settings.PRODUCTION_PLAN_SNAPSHOT_MAX_AGE_S)
+    roots = _overview_roots(status_filter)
+
+    ProductionPlanSnapshot.objects.bulk_create(
+        [ProductionPlanSnapshot(job_order_id=r.job_no) for r in roots],
+        ignore_conflicts=True,
+    )
+    snapshots = ProductionPlanSnapshot.objects.in_bulk([r.job_no for r in roots])
+    stale = [r for r in roots
+             if fresh or not _is_current(snapshots[r.job_no], today, oldest_ok)]
+
+    if stale:
+        versions = {job_no: snapshots[job_no].dirty_version for job_no in
+                    (r.job_no for r in stale)}
+        rebuilt = []
+        for item in _overview_items(stale, today):
+            snapshot = snapshots[item['job_no']]
+            snapshot.payload = _as_json(item)
+            snapshot.as_of = today
+            snapshot.generated_at = now
+            snapshot.built_version = versions[item['job_no']]
+            rebuilt.append(snapshot)
+        ProductionPlanSnapshot.objects.bulk_update(
+            rebuilt, ['payload', 'as_of', 'generated_at', 'built_version'])
+
+    items = [snapshots[r.job_no].payload for r in roots]
+    generated = [snapshots[r.job_no].generated_at for r in roots]
+    return {
+        'items': items,
+        'today': today,
+        'generated_at': min(generated) if generated else now,
+        'refreshed': len(stale),
+    }
@@ -34,11 +34,11 @@ from decimal import Decimal
 
 from django.utils import timezone
 
-from projects.models import JobOrder, JobOrderDepartmentTask
+from projects.models import JobOrder, JobOrderClosure, JobOrderDepartmentTask
 from projects.services.schedule import (
     ZERO,
+    WorkingCalendar,
     add_working_days,
-    load_holiday_calendar,
     local_date,
     next_working_day,
     span_end,
@@ -80,11 +80,12 @@ def _job_no_sort_key(job_no):
 
 
 def _collect_subtree_nodes(root):
-    """BFS on the parent FK (one query per depth level), then DFS-order.
+    """Whole subtree from the hierarchy index (one query), then DFS-order.
 
     job_no__startswith would be wrong here: "254-1" prefixes "254-10", and
     phase allocations ("270-01-01/P1") live under the phase node ("270-01/P1")
-    whose prefix they do not share. The FK walk is the source of truth.
+    whose prefix they do not share. The parent FK (indexed by
+    JobOrderClosure) is the source of truth.
     """
     rows = {
         root.job_no: {
@@ -100,16 +101,14 @@ def _collect_subtree_nodes(root):
         }
     }
     children_map = defaultdict(list)
-    frontier = [root.job_no]
-    while frontier:
-        child_rows = JobOrder.objects.filter(parent_id__in=frontier).values(*_NODE_VALUES)
-        frontier = []
-        for row in child_rows:
-            if row['job_no'] in rows:  # guard against a malformed cycle
-                continue
-            rows[row['job_no']] = row
-            children_map[row['parent_id']].append(row['job_no'])
-            frontier.append(row['job_no'])
+    for row in (JobOrder.objects
+                .filter(ancestor_links__ancestor_id=root.job_no, ancestor_links__depth__gt=0)
+                .order_by('ancestor_links__depth')
+                .values(*_NODE_VALUES)):
+        if row['job_no'] in rows:  # guard against a malformed cycle
+            continue
+        rows[row['job_no']] = row
+        children_map[row['parent_id']].append(row['job_no'])
 
     # Which of these jobs have phase mirrors anywhere (phased engineering masters)?
     mirror_sources = set(
@@ -331,20 +330,22 @@ def _batched_domain_progress(job_nos):
             )
         )
     )
-    machining_acc = defaultdict(lambda: [0.0, 0.0])  # job -> [earned, total]
+    # Decimal arithmetic exactly as the model does it, so the completion
+    # engine (services/completion.py) writes the same percentages.
+    machining_acc = defaultdict(lambda: [Decimal('0.00'), Decimal('0.00')])  # job -> [earned, total]
     for row in op_rows:
-        estimated = float(row['estimated_hours'] or 0)
-        if estimated <= 0:
+        if not row['estimated_hours'] or row['estimated_hours'] <= 0:
             continue
+        estimated = Decimal(str(row['estimated_hours']))
         acc = machining_acc[row['part__job_no']]
         acc[1] += estimated
         if row['completion_date'] is not None:
             acc[0] += estimated
         else:
-            acc[0] += min((row['spent'] or 0.0) / estimated, 1.0) * estimated
+            spent = Decimal(str(row['spent'] or 0.0))
+            acc[0] += min(spent / estimated, Decimal('1.0')) * estimated
     for job_no, (earned, total) in machining_acc.items():
-        domains['machining'][job_no] = (
-            Decimal(str(round(earned, 4))), Decimal(str(round(total, 4))))
+        domains['machining'][job_no] = (earned, total)
 
     # Procurement: per-item stage logic (Python, not expressible as one
     # aggregate) over a fully prefetched queryset — the refactored
@@ -500,7 +501,8 @@ def _compute_progress_map(tasks, domains=None):
 
 def _build_calendar(tasks, today):
     """One holiday query spanning every date the lateness AND forecast math
-    can touch (projections walk into the future)."""
+    can touch (projections walk into the future), indexed once so every
+    delta/span in the plan is a prefix-sum lookup."""
     dates = []
     for task in tasks:
         for d in (
@@ -515,7 +517,7 @@ def _build_calendar(tasks, today):
         return {}
     dates.append(today)
     from datetime import timedelta
-    return load_holiday_calendar(min(dates), max(dates) + timedelta(days=CALENDAR_LOOKAHEAD_DAYS))
+    return WorkingCalendar.load(min(dates), max(dates) + timedelta(days=CALENDAR_LOOKAHEAD_DAYS))
 
 
 def _classify(status, target_end, end_variance, overdue):
@@ -970,42 +972,31 @@ def _visible_task_dicts(task_dicts):
     return [td for td in task_dicts if td['id'] not in parent_ids]
 
 
-def build_production_plan_overview(status_filter='active'):
-    """Portfolio payload: one verdict per ROOT job order, all computed in a
-    fixed number of queries (~18) regardless of portfolio size.
-
-    ``status_filter``: a JobOrder status, or 'all'.
-    """
+def _overview_roots(status_filter):
     roots_qs = (JobOrder.objects.filter(parent__isnull=True)
                 .exclude(job_no='LEGACY-ARCHIVE')
                 .select_related('customer'))
     if status_filter and status_filter != 'all':
         roots_qs = roots_qs.filter(status=status_filter)
-    roots = sorted(roots_qs, key=lambda r: _natural_job_key(r.job_no))
+    return sorted(roots_qs, key=lambda r: _natural_job_key(r.job_no))
+
 
-    # Whole-table parent map (one query) -> subtree job list per root; the
+def _overview_items(roots, today):
+    """One overview card per root, in a fixed number of queries."""
+    # Subtree job list per root from the hierarchy index (one query); the
     # same rows carry per-job progress for weight-based duration estimates.
-    children_map = defaultdict(list)
+    subtree_jobs = defaultdict(list)
     job_progress_all = {}
-    for job_no, parent_id, pct in JobOrder.objects.values_list(
-            'job_no', 'parent_id', 'completion_percentage'):
+    for root_no, job_no, pct in (
+            JobOrderClosure.objects
+            .filter(ancestor_id__in=[r.job_no for r in roots])
+            .order_by('depth', 'descendant_id')
+            .values_list('ancestor_id', 'descendant_id', 'descendant__completion_percentage')):
+        subtree_jobs[root_no].append(job_no)
         job_progress_all[job_no] = float(pct)
-        if parent_id:
-            children_map[parent_id].append(job_no)
-
-    subtree_jobs = {}
-    all_job_nos = []
-    for root in roots:
-        stack, subtree = [root.job_no], []
-        while stack:
-            current = stack.pop()
-            subtree.append(current)
-            stack.extend(children_map.get(current, []))
-        subtree_jobs[root.job_no] = subtree
-        all_job_nos.extend(subtree)
+    all_job_nos = [job_no for root in roots for job_no in subtree_jobs[root.job_no]]
 
     tasks = _fetch_tasks(all_job_nos)
-    today = today_local()
     calendar = _build_calendar(tasks, today)
     progress_map = _compute_progress_map(tasks)
     effective_starts = _effective_start_map(tasks, _first_progress_evidence(all_job_nos))
@@ -1048,9 +1039,19 @@ def build_production_plan_overview(status_filter='active'):
             'forecast': forecast,
             'summary': summary,
         })
+    return items
+
 
+def build_production_plan_overview(status_filter='active'):
+    """Portfolio payload: one verdict per ROOT job order, all computed in a
+    fixed number of queries (~18) regardless of portfolio size.
+
+    ``status_filter``: a JobOrder status, or 'all'.  The endpoint serves the
+    materialized version (``plan_snapshot.production_plan_overview``).
+    """
+    today = today_local()
     return {
-        'items': items,
+        'items': _overview_items(_overview_roots(status_filter), today),
         'today': today,
         'generated_at': timezone.now(),
     }
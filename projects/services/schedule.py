@@ -15,7 +15,14 @@ sums day values over a half-open interval (planned, actual]:
 Consequences: a Friday target completed on Saturday or Sunday is 0 (still
 on time in working-day terms); completed the following Monday is +1; if
 the actual day itself is an Arife it contributes 0.5.
+
+Every function takes ``calendar`` as either the plain ``{date: value}``
+holiday dict or a ``WorkingCalendar``.  The latter carries prefix sums over
+its window, so deltas inside it are O(1) and forward walks are a binary
+search; dates outside the window fall back to the day-by-day walk.
 """
+import math
+from bisect import bisect_left
 from datetime import timedelta
 from decimal import Decimal
 from zoneinfo import ZoneInfo
@@ -62,6 +69,59 @@ def load_holiday_calendar(start, end):
     return calendar
 
 
+class WorkingCalendar:
+    """Day values of the window [start, end] as prefix sums.
+
+    Values are kept in half-day units (0, 1, 2) so the sums stay exact ints;
+    results are converted back to Decimal.  ``get`` makes it usable wherever
+    the holiday dict is expected (``day_value``, ``next_working_day``).
+    """
+
+    def __init__(self, start, end, holidays=None):
+        self.start = start
+        self.end = end
+        self.holidays = holidays if holidays is not None else {}
+        # _prefix[i] = half-day units in [start, start + i days)
+        prefix = [0]
+        for offset in range((end - start).days + 1):
+            d = start + timedelta(days=offset)
+            prefix.append(prefix[-1] + int(day_value(d, self.holidays) * 2))
+        self._prefix = prefix
+
+    @classmethod
+    def load(cls, start, end):
+        """One PublicHoliday query (``load_holiday_calendar``) for [start, end]."""
+        return cls(start, end, load_holiday_calendar(start, end))
+
+    def get(self, d, default=None):
+        return self.holidays.get(d, default)
+
+    def holiday_dates(self):
+        """Full and half-day holidays in the window."""
+        return set(self.holidays)
+
+    def covers(self, first, last):
+        return self.start <= first and last <= self.end
+
+    def _index(self, d):
+        return (d - self.start).days
+
+    def sum_inclusive(self, first, last):
+        """Σ day values over [first, last]; both inside the window."""
+        units = self._prefix[self._index(last) + 1] - self._prefix[self._index(first)]
+        return Decimal(units) / 2
+
+    def first_reaching(self, first, working_days):
+        """Offset (days) from ``first`` of the earliest date ``d`` with
+        Σ [first, d] >= working_days, or None if the window ends first."""
+        need = math.ceil(working_days * 2)
+        lo = self._index(first)
+        k = bisect_left(self._prefix, self._prefix[lo] + need, lo + 1)
+        if k >= len(self._prefix):
+            return None
+        return k - 1 - lo
+
+
 def day_value(d, calendar):
     """Working-day value of a single date: 0 weekend/full holiday, 0.5 Arife, else 1."""
     if d.weekday() >= 5:
@@ -82,6 +142,8 @@ def working_day_delta(planned, actual, calendar):
         sign, first, last = ONE, planned + timedelta(days=1), actual
     else:
         sign, first, last = -ONE, actual + timedelta(days=1), planned
+    if isinstance(calendar, WorkingCalendar) and calendar.covers(first, last):
+        return sign * calendar.sum_inclusive(first, last)
     total = ZERO
     current = first
     while current <= last:
@@ -102,6 +164,8 @@ def working_days_inclusive(start, end, calendar):
     """
     if start is None or end is None or end < start:
         return None
+    if isinstance(calendar, WorkingCalendar) and calendar.covers(start, end):
+        return calendar.sum_inclusive(start, end)
     total = ZERO
     current = start
     while current <= end:
@@ -127,6 +191,11 @@ def add_working_days(start, working_days, calendar):
     """
     if working_days is None or working_days <= 0:
         return start
+    first = start + timedelta(days=1)
+    if isinstance(calendar, WorkingCalendar) and calendar.covers(first, first):
+        offset = calendar.first_reaching(first, working_days)
+        if offset is not None:
+            return first + timedelta(days=min(offset, _MAX_WALK_DAYS - 1))
     total = ZERO
     current = start
     for _ in range(_MAX_WALK_DAYS):
@@ -145,6 +214,10 @@ def span_end(start, duration_wd, calendar):
     """
     if duration_wd is None or duration_wd <= 0:
         return start
+    if isinstance(calendar, WorkingCalendar) and calendar.covers(start, start):
+        offset = calendar.first_reaching(start, duration_wd)
+        if offset is not None:
+            return start + timedelta(days=min(offset, _MAX_WALK_DAYS))
     total = day_value(start, calendar)
     current = start
     for _ in range(_MAX_WALK_DAYS):
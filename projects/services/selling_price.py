@@ -120,8 +120,6 @@ class DerivedSellingPriceResolver:
         return objs
 
     def _load(self, job_nos):
-        from projects.models import JobOrder
-
         self._nodes: dict[str, object] = {}
         self._children: dict[str, list[str]] = {}
         self._weight: dict[str, Decimal] = {}
@@ -140,31 +138,14 @@ class DerivedSellingPriceResolver:
         if not needy:
             return
 
-        # Pass 2 — only for jobs with no price of their own: walk up to their
-        # root (a priced ancestor may be several levels up, and the allocation
+        # Pass 2 — only for jobs with no price of their own: find their root
+        # (a priced ancestor may be several levels up, and the allocation
         # denominator needs every sibling), then load that root's whole subtree.
-        roots: set[str] = set()
-        frontier = set(needy)
-        seen = set(frontier)
-        while frontier:
-            rows = dict(
-                JobOrder.objects.filter(job_no__in=frontier)
-                .values_list("job_no", "parent_id")
-            )
-            frontier = set()
-            for jno, pid in rows.items():
-                if pid is None:
-                    roots.add(jno)          # itself a root — roll-up candidate
-                elif pid not in seen:
-                    seen.add(pid)
-                    frontier.add(pid)
-
-        objs = self._fetch(job_no__in=list(roots))
-        while objs:
-            # Descend from everything fetched, not just what _absorb kept —
-            # nodes already indexed in pass 1 still have children to visit.
-            self._absorb(objs)
-            objs = self._fetch(parent_id__in=[o.job_no for o in objs])
+        from projects.services.hierarchy import root_job_nos
+        roots = root_job_nos(needy)
+        # Every node of those trees in one query on the hierarchy index;
+        # nodes already indexed in pass 1 are skipped by _absorb.
+        self._absorb(self._fetch(ancestor_links__ancestor_id__in=list(roots)))
 
     # ---------- computation ----------
 
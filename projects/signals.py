@@ -23,16 +23,40 @@ def capture_job_order_cost_fields(sender, instance, **kwargs):
     if instance.pk:
         try:
             old = JobOrder.objects.values(
-                'general_expenses_rate', 'total_weight_kg'
+                'general_expenses_rate', 'total_weight_kg', 'parent_id'
             ).get(pk=instance.pk)
             instance._old_general_expenses_rate = old['general_expenses_rate']
             instance._old_total_weight_kg = old['total_weight_kg']
+            instance._old_parent_id = old['parent_id']
         except JobOrder.DoesNotExist:
             instance._old_general_expenses_rate = None
             instance._old_total_weight_kg = None
+            instance._old_parent_id = None
     else:
         instance._old_general_expenses_rate = None
         instance._old_total_weight_kg = None
+        instance._old_parent_id = None
+
+
+@receiver(pre_save, sender=JobOrder)
+def reject_job_order_cycle(sender, instance, **kwargs):
+    """Refuse a re-parent under the job's own subtree before it is written
+    (the closure index could not represent it)."""
+    if instance.pk and getattr(instance, '_old_parent_id', None) != instance.parent_id:
+        from .services.hierarchy import check_parent
+        check_parent(instance.job_no, instance.parent_id)
+
+
+# Registered before every other JobOrder post_save receiver: those may read
+# the hierarchy index (cost table, plan snapshots, summaries).
+@receiver(post_save, sender=JobOrder)
+def maintain_job_order_closure(sender, instance, created, **kwargs):
+    """Keep JobOrderClosure in step with created and re-parented jobs."""
+    from .services.hierarchy import link_job_order, move_job_order
+    if created:
+        link_job_order(instance.job_no, instance.parent_id)
+    elif getattr(instance, '_old_parent_id', None) != instance.parent_id:
+        move_job_order(instance.job_no, instance.parent_id)
 
 
 @receiver(pre_save, sender=JobOrder)
@@ -121,24 +145,18 @@ def on_job_order_cost_fields_changed(sender, instance, created, **kwargs):
     job_no = instance.job_no
 
     def _run():
-        from projects.services.costing import recompute_job_cost_summary
+        from projects.services.costing import recompute_job_cost_summaries
+        from projects.services.hierarchy import descendant_job_nos
 
+        job_nos = [job_no]
         if rate_changed:
-            def _collect(jno):
-                children = list(JobOrder.objects.filter(parent_id=jno).values_list('job_no', flat=True))
-                result = list(children)
-                for c in children:
-                    result.extend(_collect(c))
-                return result
-
-            descendants = _collect(job_no)
+            descendants = sorted(descendant_job_nos([job_no], include_self=False))
             if descendants:
                 JobOrder.objects.filter(job_no__in=descendants).update(general_expenses_rate=new_rate)
-                for djob_no in sorted(descendants):  # children before parents
-                    recompute_job_cost_summary(djob_no)
+                job_nos.extend(descendants)
 
-        # Always recompute this job itself (chains up to parent automatically)
-        recompute_job_cost_summary(job_no)
+        # One set-based pass over the job, its descendants and its ancestors
+        recompute_job_cost_summaries(job_nos)
 
     transaction.on_commit(_run)
 
@@ -673,3 +691,132 @@ def send_revision_rejected_notifications(release, topic, reason, rejecter):
             source_type='drawing_release',
             source_id=release.id,
         )
+
+
+# ============================================================================
+# Production-plan overview snapshot invalidation
+# ============================================================================
+# Each receiver maps the changed row to the job_no(s) it feeds into
+# (services/plan_snapshot.py walks them up to their roots).  Deletes matter as
+# much as saves: a removed part or timer moves progress too.
+
+def _plan_stale(job_nos):
+    from .services.plan_snapshot import mark_plans_stale
+    mark_plans_stale(job_nos)
+
+
+@receiver([post_save, post_delete], sender=JobOrder)
+def plan_stale_on_job_order(sender, instance, **kwargs):
+    # A re-parented job is found under its new root; the old root ages out
+    # (PRODUCTION_PLAN_SNAPSHOT_MAX_AGE_S).
+    _plan_stale([instance.job_no])
+
+
+@receiver([post_save, post_delete], sender='projects.JobOrderDepartmentTask')
+@receiver([post_save, post_delete], sender='projects.TechnicalDrawingRelease')
+def plan_stale_on_job_order_row(sender, instance, **kwargs):
+    _plan_stale([instance.job_order_id])
+
+
+@receiver([post_save, post_delete], sender='cnc_cutting.CncPart')
+@receiver([post_save, post_delete], sender='welding.WeldingTimeEntry')
+@receiver([post_save, post_delete], sender='planning.PlanningRequestItem')
+@receiver([post_save, post_delete], sender='tasks.Part')
+def plan_stale_on_job_no_row(sender, instance, **kwargs):
+    _plan_stale([instance.job_no])
+
+
+@receiver(post_save, sender='cnc_cutting.CncTask')
+def plan_stale_on_cnc_task(sender, instance, **kwargs):
+    from cnc_cutting.models import CncPart
+    _plan_stale(CncPart.objects.filter(cnc_task=instance).values_list('job_no', flat=True))
+
+
+@receiver([post_save, post_delete], sender='tasks.Operation')
+def plan_stale_on_operation(sender, instance, **kwargs):
+    from tasks.models import Part
+    _plan_stale(Part.objects.filter(pk=instance.part_id).values_list('job_no', flat=True))
+
+
+@receiver([post_save, post_delete], sender='tasks.Timer')
+def plan_stale_on_timer(sender, instance, **kwargs):
+    # Only machining progress/evidence reads timers (via Operation).
+    from tasks.models import Operation
+    if not instance.object_id:
+        return
+    _plan_stale(Operation.objects.filter(key=instance.object_id)
+                .values_list('part__job_no', flat=True))
+
+
+@receiver([post_save, post_delete], sender='procurement.PurchaseRequestItem')
+def plan_stale_on_purchase_request_item(sender, instance, **kwargs):
+    from planning.models import PlanningRequestItem
+    _plan_stale(PlanningRequestItem.objects.filter(pk=instance.planning_request_item_id)
+                .values_list('job_no', flat=True))
+
+
+@receiver(post_save, sender='procurement.PurchaseRequest')
+def plan_stale_on_purchase_request(sender, instance, **kwargs):
+    from procurement.models import PurchaseRequestItem
+    _plan_stale(PurchaseRequestItem.objects.filter(purchase_request=instance)
+                .values_list('planning_request_item__job_no', flat=True))
+
+
+@receiver(post_save, sender='procurement.PurchaseOrder')
+def plan_stale_on_purchase_order(sender, instance, **kwargs):
+    from procurement.models import PurchaseOrderLine
+    _plan_stale(PurchaseOrderLine.objects.filter(po=instance)
+                .values_list('purchase_request_item__planning_request_item__job_no', flat=True))
+
+
+@receiver([post_save, post_delete], sender='procurement.PurchaseOrderLine')
+def plan_stale_on_purchase_order_line(sender, instance, **kwargs):
+    from procurement.models import PurchaseRequestItem
+    _plan_stale(PurchaseRequestItem.objects.filter(pk=instance.purchase_request_item_id)
+                .values_list('planning_request_item__job_no', flat=True))
+
+
+@receiver([post_save, post_delete], sender='attendance.PublicHoliday')
+def plan_stale_on_holiday(sender, instance, **kwargs):
+    from .services.plan_snapshot import mark_all_plans_stale
+    mark_all_plans_stale()
+
+
+# ============================================================================
+# Cost table read model invalidation
+# ============================================================================
+# Any change to a job order or its summary retires cached cost_table
+# responses; changes that move sort columns (prices, weights, tree shape) also
+# queue the affected trees for a JobOrderCostTableRow rebuild
+# (services/cost_table.py). Summary rebuilds queue themselves.
+
+@receiver([post_save, post_delete], sender='projects.JobOrderCostSummary')
+def cost_table_stale_on_summary(sender, instance, **kwargs):
+    from .services.cost_table import mark_cost_table_stale
+    mark_cost_table_stale([instance.job_order_id])
+
+
+@receiver(post_save, sender=JobOrder)
+def cost_table_stale_on_job_order(sender, instance, created, **kwargs):
+    from .services.cost_table import invalidate_cost_table_cache, mark_cost_table_stale
+    old_parent = getattr(instance, '_old_parent_id', None)
+    if created or old_parent != instance.parent_id:
+        mark_cost_table_stale([instance.job_no, old_parent])
+    elif getattr(instance, '_old_total_weight_kg', None) != instance.total_weight_kg:
+        mark_cost_table_stale([instance.job_no])
+    else:
+        invalidate_cost_table_cache()
+
+
+@receiver(post_delete, sender=JobOrder)
+def cost_table_stale_on_job_order_delete(sender, instance, **kwargs):
+    from .services.cost_table import invalidate_cost_table_cache, mark_cost_table_stale
+    invalidate_cost_table_cache()
+    mark_cost_table_stale([instance.parent_id])
+
+
+@receiver([post_save, post_delete], sender='sales.SalesOfferPriceRevision')
+def cost_table_stale_on_offer_price(sender, instance, **kwargs):
+    from .services.cost_table import mark_cost_table_stale
+    mark_cost_table_stale(JobOrder.objects.filter(source_offer_id=instance.offer_id)
+                          .values_list('job_no', flat=True))
@@ -0,0 +1,151 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from projects.models import Customer, JobOrder, JobOrderDepartmentTask, JobOrderProgressLog
+from projects.services.completion import recompute_job_completion
+
+User = get_user_model()
+
+
+def _task(job, title, weight, status='in_progress', parent=None, **kwargs):
+    kwargs.setdefault('department', 'manufacturing')
+    return JobOrderDepartmentTask.objects.create(
+        job_order=job, title=title, weight=weight, status=status, parent=parent, **kwargs)
+
+
+class CompletionFixtureMixin:
+    """Root 950-01 (no tasks) over 950-01-01 (procurement, CNC, machining and
+    manual subtasks, plus its own child 950-01-01-01) and 950-01-02; a
+    phased tree 960-01 whose master 960-01-01 is excluded from the roll-up."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from cnc_cutting.models import CncPart, CncTask
+        from planning.models import PlanningRequest, PlanningRequestItem
+        from procurement.models import Item
+        from tasks.models import Operation, Part, Timer
+
+        cls.user = User.objects.create(username='completion-user')
+        customer = Customer.objects.create(code='C-CP', name='Completion Customer')
+
+        def job(job_no, parent=None, **kwargs):
+            kwargs.setdefault('status', 'active')
+            return JobOrder.objects.create(
+                job_no=job_no, title=job_no, customer=customer, parent=parent, **kwargs)
+
+        cls.root = job('950-01')
+        cls.a = job('950-01-01', cls.root, total_weight_kg=Decimal('1000'))
+        cls.b = job('950-01-02', cls.root)
+        cls.aa = job('950-01-01-01', cls.a)
+
+        _task(cls.a, 'Satınalma', 10, department='procurement')
+        manufacturing = _task(cls.a, 'İmalat', 20)
+        _task(cls.a, 'CNC Kesim', 5, parent=manufacturing, task_type='cnc_cutting')
+        _task(cls.a, 'Talaşlı İmalat', 5, parent=manufacturing, task_type='machining')
+        _task(cls.a, 'Kaynak', 10, parent=manufacturing, manual_progress=Decimal('40'))
+        _task(cls.a, 'Boya', 10, status='skipped', parent=manufacturing)
+        _task(cls.a, 'Tasarım', 5, status='completed', department='design')
+        _task(cls.a, 'İptal', 50, status='cancelled')
+        _task(cls.b, 'Montaj', 10, manual_progress=Decimal('30'))
+        _task(cls.aa, 'Montaj', 10, manual_progress=Decimal('75'))
+
+        item = Item.objects.create(code='IT-CP', name='Profil', unit='kg',
+                                   unit_weight=Decimal('2'))
+        request = PlanningRequest.objects.create(
+            request_number='PL-CP-1', title='t', created_by=cls.user)
+        for delivered in (True, False):
+            PlanningRequestItem.objects.create(
+                planning_request=request, item=item, job_no=cls.a.job_no,
+                quantity=Decimal('5'), is_delivered=delivered)
+
+        done = CncTask.objects.create(key='NEST-CP-1', name='n1', completion_date=1)
+        open_ = CncTask.objects.create(key='NEST-CP-2', name='n2')
+        CncPart.objects.create(cnc_task=done, job_no=cls.a.job_no,
+                               weight_kg=Decimal('10'), quantity=1)
+        CncPart.objects.create(cnc_task=open_, job_no=cls.a.job_no,
+                               weight_kg=Decimal('10'), quantity=2)
+
+        part = Part.objects.create(key='PART-CP-1', name='p1', job_no=cls.a.job_no)
+        op = Operation.objects.create(key='OP-CP-1', name='o1', part=part, order=1,
+                                      estimated_hours=Decimal('3'))
+        Timer.objects.create(user=cls.user, start_time=0, finish_time=3600 * 1000,
+                             content_type=ContentType.objects.get_for_model(Operation),
+                             object_id=op.key)
+
+        cls.phased = job('960-01', status='completed', completion_percentage=Decimal('100'))
+        cls.master = job('960-01-01', cls.phased)
+        cls.phase = job('960-01/P1', cls.phased, source_job_order=cls.phased)
+        job('960-01-01/P1', cls.master, source_job_order=cls.master)
+        _task(cls.master, 'Tasarım', 10, manual_progress=Decimal('10'))
+        _task(cls.phase, 'İmalat', 10, manual_progress=Decimal('60'))
+
+    def pct(self, job_no):
+        return JobOrder.objects.get(pk=job_no).completion_percentage
+
+
+class RecomputeJobCompletionTests(CompletionFixtureMixin, TestCase):
+    ALL = ['950-01-01-01', '950-01-02', '950-01-01', '960-01-01/P1', '960-01/P1',
+           '960-01-01', '960-01']
+
+    def setUp(self):
+        # Fixture signals already ran the engine; start from a clean slate.
+        JobOrder.objects.update(completion_percentage=Decimal('0'))
+        JobOrder.objects.filter(pk='960-01').update(status='completed')
+        JobOrderProgressLog.objects.all().delete()
+
+    def test_task_rules_and_roll_up(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            changed = recompute_job_completion(self.ALL)
+        self.assertEqual({j: self.pct(j) for j in self.ALL + ['950-01']}, {
+            '950-01-01-01': Decimal('75.00'),
+            '950-01-02': Decimal('30.00'),
+            # procurement 5/10 + manufacturing 7.33/20 + design 5/5 of 35
+            '950-01-01': Decimal('49.52'),
+            '960-01-01/P1': Decimal('0.00'),
+            '960-01/P1': Decimal('60.00'),
+            '960-01-01': Decimal('0.00'),   # rolls up from its phase node
+            '960-01': Decimal('60.00'),     # phased master excluded
+            '950-01': Decimal('39.76'),
+        })
+        self.assertEqual(JobOrder.objects.get(pk='960-01').status, 'active')
+        self.assertNotIn('960-01-01', changed)
+        log = JobOrderProgressLog.objects.get(job_order=self.a)
+        self.assertEqual((log.old_pct, log.new_pct), (Decimal('0.00'), Decimal('49.52')))
+        self.assertEqual(log.delta_weight_kg, Decimal('495.20'))
+
+    def test_ancestors_average_children(self):
+        recompute_job_completion(['950-01-01-01'])
+        self.assertEqual(self.pct('950-01-01'), Decimal('75.00'))
+        self.assertEqual(self.pct('950-01'), Decimal('37.50'))
+        self.assertEqual(recompute_job_completion(['950-01-01-01']), set())
+
+    def test_query_count_independent_of_task_count(self):
+        def count():
+            JobOrder.objects.update(completion_percentage=Decimal('0'))
+            with CaptureQueriesContext(connection) as ctx:
+                recompute_job_completion(self.ALL)
+            return len(ctx.captured_queries)
+
+        before = count()
+        manufacturing = JobOrderDepartmentTask.objects.get(job_order=self.b, title='Montaj')
+        for n in range(5):
+            _task(self.b, f'CNC Kesim {n}', 1, parent=manufacturing, task_type='cnc_cutting')
+            _task(self.aa, f'Montaj {n}', 1, manual_progress=Decimal('10'))
+        self.assertEqual(count(), before)
+
+    def test_model_method_and_cnc_signal(self):
+        self.a.update_completion_percentage()
+        self.assertEqual(self.a.completion_percentage, Decimal('49.52'))
+        self.assertEqual(self.pct('950-01'), Decimal('24.76'))
+
+        from cnc_cutting.models import CncTask
+        nest = CncTask.objects.get(key='NEST-CP-2')
+        nest.completion_date = 1
+        nest.save()
+        # CNC subtask now 30/30 kg: manufacturing 10.67/20
+        self.assertEqual(self.pct('950-01-01'), Decimal('59.05'))
@@ -0,0 +1,59 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from projects.models import Customer, JobOrder, JobOrderCostSummary, JobOrderQCCostLine
+from projects.services.costing import recompute_job_cost_summaries
+
+
+class BatchedCostSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        customer = Customer.objects.create(code='C-BS', name='Batch Customer')
+        cls.root = JobOrder.objects.create(job_no='960', title='Root', customer=customer)
+        cls.child = JobOrder.objects.create(job_no='960-01', title='Child', customer=customer, parent=cls.root)
+        cls.grandchild = JobOrder.objects.create(
+            job_no='960-01-01', title='Grandchild', customer=customer, parent=cls.child)
+        cls.sibling = JobOrder.objects.create(job_no='960-02', title='Sibling', customer=customer, parent=cls.root)
+
+    def qc(self, job, amount):
+        # bulk_create skips the per-line post_save recompute
+        JobOrderQCCostLine.objects.bulk_create([JobOrderQCCostLine(
+            job_order=job, description='qc', amount=Decimal(amount), amount_eur=Decimal(amount))])
+
+    def totals(self):
+        return dict(JobOrderCostSummary.objects.values_list('job_order_id', 'qc_cost'))
+
+    def test_rolls_up_ancestors_and_stored_siblings(self):
+        self.qc(self.sibling, '7.00')
+        recompute_job_cost_summaries([self.sibling.job_no])
+        self.qc(self.grandchild, '10.00')
+        self.qc(self.child, '5.50')
+
+        recomputed = recompute_job_cost_summaries([self.grandchild.job_no])
+
+        self.assertEqual(set(recomputed), {'960', '960-01', '960-01-01'})
+        self.assertEqual(self.totals(), {
+            '960-01-01': Decimal('10.00'),
+            '960-01': Decimal('15.50'),
+            '960-02': Decimal('7.00'),
+            '960': Decimal('22.50'),
+        })
+        root = JobOrderCostSummary.objects.get(job_order=self.root)
+        self.assertEqual(root.actual_total_cost, Decimal('22.50'))
+        self.assertIsNotNone(root.estimated_total_cost)
+
+    def test_rebuild_command_covers_the_whole_table(self):
+        self.qc(self.grandchild, '3.00')
+        out = StringIO()
+        call_command('rebuild_job_cost_summaries', '--batch', '2', stdout=out)
+        self.assertIn('Summaries rebuilt:    4', out.getvalue())
+        self.assertEqual(self.totals()['960'], Decimal('3.00'))
+
+        self.qc(self.grandchild, '1.00')
+        out = StringIO()
+        call_command('rebuild_job_cost_summaries', '--job-no', '960-01', '--batch', '1', stdout=out)
+        self.assertIn('Summaries rebuilt:    3', out.getvalue())
+        self.assertEqual((self.totals()['960-01'], self.totals()['960']), (Decimal('4.00'), Decimal('4.00')))
@@ -0,0 +1,91 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.models import CostRecalcJob
+from projects.models import Customer, JobOrder, JobOrderCostSummary, JobOrderCostTableRow
+from projects.services.cost_table import refresh_cost_table_rows
+from projects.tests_meeting_brief import _allowed_host
+
+User = get_user_model()
+
+
+class CostTableTests(TestCase):
+    """Roots 970..974 with falling costs; 970 has child 970-01."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='cost-table-user', is_superuser=True)
+        customer = Customer.objects.create(code='C-CT', name='Cost Table Customer')
+        for i in range(5):
+            job = JobOrder.objects.create(job_no=f'97{i}', title=f'Root {i}', customer=customer)
+            JobOrderCostSummary.objects.create(
+                job_order=job, actual_total_cost=Decimal(100 - i * 10),
+                selling_price=Decimal('90.00'), estimated_total_cost=Decimal('0'))
+        cls.child = JobOrder.objects.create(
+            job_no='970-01', title='Child', customer=customer, parent_id='970')
+        JobOrderCostSummary.objects.create(job_order=cls.child, estimated_total_cost=Decimal('0'))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient(HTTP_HOST=_allowed_host())
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, query):
+        resp = self.client.get(f'/projects/job-orders/cost_table/?{query}')
+        self.assertEqual(resp.status_code, 200, resp.data)
+        return resp.data
+
+    def test_keyset_pages_match_page_numbers(self):
+        paged = [r['job_no'] for r in self.get('ordering=-actual_cost&page_size=100')['results']]
+        self.assertEqual(paged, ['970', '971', '972', '973', '974'])
+
+        walked, query = [], 'ordering=-actual_cost&page_size=2&cursor='
+        while True:
+            data = self.get(query)
+            walked += [r['job_no'] for r in data['results']]
+            if not data['next']:
+                break
+            query = data['next'].split('?', 1)[1]
+        self.assertEqual(walked, paged)
+        self.assertTrue(self.get('cursor=&page_size=1')['results'][0]['has_children'])
+
+    def test_filtered_out_parent_promotes_child_to_root(self):
+        JobOrderCostSummary.objects.filter(job_order_id='970').update(cost_not_applicable=True)
+        roots = {r['job_no']: r for r in self.get('page_size=100')['results']}
+        self.assertIn('970-01', roots)
+        self.assertNotIn('970', roots)
+        self.assertFalse(roots['970-01']['has_children'])
+
+    def test_rows_store_displayed_margins_and_sort_by_them(self):
+        self.assertEqual(refresh_cost_table_rows(['970', '971']), 3)
+        row = JobOrderCostTableRow.objects.get(pk='971')
+        self.assertEqual(row.margin_eur, Decimal('0.00'))
+        self.assertEqual(JobOrderCostTableRow.objects.get(pk='970').margin_eur, Decimal('-10.00'))
+
+        ordered = [r['job_no'] for r in self.get('ordering=margin_eur&page_size=100')['results']]
+        self.assertEqual(ordered[:2], ['970', '971'])   # rows without a table row sort last
+
+    @override_settings(COST_TABLE_CACHE_TTL_S=300)
+    def test_cached_until_summary_changes(self):
+        first = self.get('ordering=job_no&page_size=1')['results'][0]['actual_total_cost']
+        JobOrderCostSummary.objects.filter(job_order_id='970').update(actual_total_cost=Decimal('1.00'))
+        self.assertEqual(self.get('ordering=job_no&page_size=1')['results'][0]['actual_total_cost'], first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            JobOrderCostSummary.objects.get(job_order_id='970').save()
+        self.assertEqual(self.get('ordering=job_no&page_size=1')['results'][0]['actual_total_cost'], '1.00')
+        self.assertTrue(CostRecalcJob.objects.filter(kind=CostRecalcJob.KIND_COST_TABLE, key='970').exists())
+
+    def test_weight_edit_queues_the_tree(self):
+        CostRecalcJob.objects.filter(kind=CostRecalcJob.KIND_COST_TABLE).delete()
+        self.child.title = 'Renamed child'
+        self.child.save()
+        self.assertFalse(CostRecalcJob.objects.filter(kind=CostRecalcJob.KIND_COST_TABLE).exists())
+
+        self.child.total_weight_kg = Decimal('125.00')
+        self.child.save()
+        self.assertTrue(CostRecalcJob.objects.filter(kind=CostRecalcJob.KIND_COST_TABLE, key='970').exists())
@@ -0,0 +1,83 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+
+from projects.models import Customer, JobOrder, JobOrderClosure
+from projects.services.hierarchy import (
+    ancestors_of, descendant_job_nos, rebuild_job_order_closure, root_job_nos,
+)
+from projects.services.job_order import cascade_customer_to_children, rename_job_no
+from projects.services.phases import create_phases
+
+
+def closure():
+    return set(JobOrderClosure.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+
+class JobOrderClosureTests(TestCase):
+    """950 > 950-01 > 950-01-01, plus a second root 951."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = Customer.objects.create(code='C-HI', name='Hierarchy Customer')
+        cls.root = JobOrder.objects.create(job_no='950', title='Root', customer=cls.customer)
+        cls.child = JobOrder.objects.create(
+            job_no='950-01', title='Child', customer=cls.customer, parent=cls.root)
+        cls.grandchild = JobOrder.objects.create(
+            job_no='950-01-01', title='Grandchild', customer=cls.customer, parent=cls.child)
+        cls.other = JobOrder.objects.create(job_no='951', title='Other', customer=cls.customer)
+
+    def test_created_jobs_are_indexed(self):
+        self.assertEqual(descendant_job_nos(['950'], include_self=False), {'950-01', '950-01-01'})
+        self.assertEqual(root_job_nos(['950-01-01', '951']), {'950', '951'})
+        self.assertEqual([j.job_no for j in ancestors_of('950-01-01')], ['950-01', '950'])
+        maintained = closure()
+        rebuild_job_order_closure()
+        self.assertEqual(closure(), maintained)
+
+    def test_move_reindexes_the_subtree(self):
+        self.child.parent = self.other
+        self.child.save()
+        self.assertEqual(root_job_nos(['950-01-01']), {'951'})
+        self.assertEqual(descendant_job_nos(['950']), {'950'})
+        maintained = closure()
+        rebuild_job_order_closure()
+        self.assertEqual(closure(), maintained)
+
+        self.root.parent = JobOrder.objects.get(pk='950-01-01')
+        self.root.save()
+        maintained = closure()
+        self.child.parent = self.grandchild
+        with self.assertRaises(ValidationError):
+            self.child.clean()
+        with self.assertRaises(ValidationError):
+            self.child.save()
+        # Rejected before the write: neither the row nor the index moved
+        self.assertEqual(JobOrder.objects.get(pk='950-01').parent_id, '951')
+        self.assertEqual(closure(), maintained)
+
+    def test_rename_carries_the_index(self):
+        rename_job_no('950', '952')
+        self.assertEqual(descendant_job_nos(['952']), {'952', '952-01', '952-01-01'})
+        self.assertFalse(JobOrderClosure.objects.filter(descendant_id__startswith='950').exists())
+
+    def test_rename_carries_phase_allocations_of_a_master(self):
+        # 950/P1 > 950-01/P1 (allocation of master 950-01, outside its subtree)
+        JobOrder.objects.filter(pk='950-01').update(quantity=2)
+        create_phases(self.root, [{'phase_number': 1}],
+                      [{'product_job_no': '950-01', 'quantities': {1: 2}}])
+        rename_job_no('950-01', '950-05')
+
+        allocation = JobOrder.objects.get(pk='950-05/P1')
+        self.assertEqual((allocation.parent_id, allocation.source_job_order_id), ('950/P1', '950-05'))
+        self.assertFalse(JobOrder.objects.filter(job_no__startswith='950-01').exists())
+        self.assertEqual(descendant_job_nos(['950/P1']), {'950/P1', '950-05/P1'})
+
+    def test_customer_cascade_uses_the_index(self):
+        other_customer = Customer.objects.create(code='C-HI2', name='Other Customer')
+        self.root.customer = other_customer
+        self.root.save()
+        cascade_customer_to_children(self.root)
+        self.assertEqual(
+            set(JobOrder.objects.filter(customer=other_customer).values_list('job_no', flat=True)),
+            {'950', '950-01', '950-01-01'},
+        )
@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from attendance.models import PublicHoliday
+from projects.models import Customer, JobOrder, JobOrderDepartmentTask, ProductionPlanSnapshot
+from projects.services.plan_snapshot import _as_json, production_plan_overview
+from projects.services.production_plan import build_production_plan_overview
+from projects.tests_meeting_brief import _allowed_host
+
+User = get_user_model()
+
+
+class PlanSnapshotTests(TestCase):
+    """Two roots (800-01 with child 800-01-01, and 801-01); only the root
+    whose subtree changed is recomputed."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='plan-user')
+        customer = Customer.objects.create(code='C-PS', name='Plan Customer')
+        cls.root = JobOrder.objects.create(
+            job_no='800-01', title='Root', customer=customer, status='active')
+        cls.child = JobOrder.objects.create(
+            job_no='800-01-01', title='Child', customer=customer,
+            parent=cls.root, status='active')
+        cls.other = JobOrder.objects.create(
+            job_no='801-01', title='Other', customer=customer, status='active')
+        for job in (cls.child, cls.other):
+            JobOrderDepartmentTask.objects.create(
+                job_order=job, department='manufacturing', title='İmalat',
+                status='pending', target_start_date=date(2026, 1, 5),
+                target_completion_date=date(2026, 3, 2))
+
+    def overview(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return production_plan_overview('active', **kwargs)
+
+    def test_snapshot_matches_live_overview(self):
+        data = self.overview()
+        self.assertEqual(data['refreshed'], 2)
+        live = build_production_plan_overview('active')
+        self.assertEqual(data['items'], [_as_json(item) for item in live['items']])
+        self.assertEqual(self.overview()['refreshed'], 0)
+
+    def test_only_changed_subtree_is_rebuilt(self):
+        self.overview()
+        with self.captureOnCommitCallbacks(execute=True):
+            JobOrderDepartmentTask.objects.create(
+                job_order=self.child, department='design', title='Tasarım', status='pending')
+        data = self.overview()
+        self.assertEqual(data['refreshed'], 1)
+        self.assertEqual(data['items'][0]['summary'], _as_json(
+            build_production_plan_overview('active')['items'][0]['summary']))
+
+    def test_change_during_rebuild_keeps_row_stale(self):
+        self.overview()
+        snapshot = ProductionPlanSnapshot.objects.get(pk='801-01')
+        snapshot.dirty_version += 1          # a bump that raced a rebuild
+        snapshot.save(update_fields=['dirty_version'])
+        self.assertEqual(self.overview()['refreshed'], 1)
+
+    def test_holiday_and_age_and_fresh(self):
+        self.overview()
+        with self.captureOnCommitCallbacks(execute=True):
+            PublicHoliday.objects.create(date=date(2026, 2, 2), name='x', local_name='x')
+        self.assertEqual(self.overview()['refreshed'], 2)
+
+        ProductionPlanSnapshot.objects.filter(pk='800-01').update(
+            generated_at=timezone.now() - timedelta(
+                seconds=settings.PRODUCTION_PLAN_SNAPSHOT_MAX_AGE_S + 1))
+        self.assertEqual(self.overview()['refreshed'], 1)
+        self.assertEqual(self.overview(fresh=True)['refreshed'], 2)
+
+    def test_endpoint(self):
+        client = APIClient(HTTP_HOST=_allowed_host())
+        client.force_authenticate(user=self.user)
+        resp = client.get('/projects/job-orders/production-plan-overview/?fresh=1')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data['refreshed'], 2)
+        self.assertIn('generated_at', resp.data)
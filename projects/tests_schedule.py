@@ -1,4 +1,5 @@
-from datetime import date, datetime, timezone as dt_timezone
+import random
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
 
 from django.test import SimpleTestCase
@@ -7,9 +8,13 @@ from projects.services.production_plan import _classify
 from projects.services.schedule import (
     HALF,
     ZERO,
+    WorkingCalendar,
+    add_working_days,
     day_value,
     local_date,
+    span_end,
     working_day_delta,
+    working_days_inclusive,
 )
 
 # July 2026: Wed 1, Thu 2, Fri 3, Sat 4, Sun 5, Mon 6, Tue 7, Wed 8, ... Fri 10
@@ -108,3 +113,33 @@ class ClassificationTests(SimpleTestCase):
         self.assertEqual(_classify('on_hold', FRI, None, None), 'in_progress')
         self.assertEqual(_classify('pending', FRI, None, None), 'not_started')
         self.assertEqual(_classify('blocked', FRI, None, None), 'not_started')
+
+
+class WorkingCalendarTests(SimpleTestCase):
+    """The prefix-sum index must agree with the day-by-day walk everywhere,
+    including dates outside its window (walk fallback)."""
+
+    def test_matches_walk(self):
+        rng = random.Random(7)
+        start, end = date(2026, 1, 1), date(2026, 12, 31)
+        holidays = {start + timedelta(days=rng.randrange(365)): rng.choice([ZERO, HALF])
+                    for _ in range(20)}
+        calendar = WorkingCalendar(start, end, holidays)
+
+        def any_day():
+            return start + timedelta(days=rng.randrange(-20, 385))
+
+        for _ in range(2000):
+            a, b = any_day(), any_day()
+            wd = Decimal(rng.randrange(0, 300)) / rng.choice([1, 2, 3])
+            self.assertEqual(working_day_delta(a, b, calendar), working_day_delta(a, b, holidays))
+            self.assertEqual(working_days_inclusive(a, b, calendar),
+                             working_days_inclusive(a, b, holidays))
+            self.assertEqual(add_working_days(a, wd, calendar), add_working_days(a, wd, holidays))
+            self.assertEqual(span_end(a, wd, calendar), span_end(a, wd, holidays))
+
+    def test_half_day_sums(self):
+        calendar = WorkingCalendar(MON, NEXT_FRI, {TUE: HALF})
+        self.assertEqual(working_day_delta(MON, NEXT_FRI, calendar), Decimal('3.5'))
+        self.assertEqual(span_end(MON, Decimal('1.5'), calendar), TUE)
+        self.assertEqual(day_value(TUE, calendar), HALF)
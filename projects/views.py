@@ -1,5 +1,6 @@
 from rest_framework import viewsets, status, permissions, mixins
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
@@ -371,11 +372,14 @@ class JobOrderViewSet(viewsets.ModelViewSet):
         job_order = self.get_object()
         old_pct = job_order.completion_percentage
 
-        # Recalculate children first so parent aggregation is accurate
-        for child in job_order.children.all():
-            child.update_completion_percentage()
-
-        job_order.update_completion_percentage()
+        # Children and the job in one pass; children are computed first so
+        # the parent aggregation is accurate
+        from projects.services.completion import recompute_job_completion
+        recompute_job_completion([
+            job_order.job_no,
+            *job_order.children.values_list('job_no', flat=True),
+        ])
+        job_order.refresh_from_db()
 
         # Auto-complete if all main tasks are now done/skipped
         if job_order.status == 'active':
@@ -515,10 +519,13 @@ class JobOrderViewSet(viewsets.ModelViewSet):
         """
         Portfolio view: schedule verdict per ROOT job order (weekly review).
         ?status=<job order status>|all — defaults to 'active'.
+        Served from per-root snapshots (services/plan_snapshot.py);
+        ``generated_at`` is the oldest card's build time, ?fresh=1 rebuilds all.
         """
-        from .services.production_plan import build_production_plan_overview
+        from .services.plan_snapshot import production_plan_overview
         status_filter = request.query_params.get('status', 'active')
-        return Response(build_production_plan_overview(status_filter))
+        fresh = request.query_params.get('fresh', '').lower() in ('1', 'true', 'yes')
+        return Response(production_plan_overview(status_filter, fresh=fresh))
 
     @action(detail=True, methods=['get'], url_path='meeting-brief',
             permission_classes=[permissions.IsAuthenticated])
@@ -964,92 +971,16 @@ class JobOrderViewSet(viewsets.ModelViewSet):
     @staticmethod
     def _compute_aggregated_weights(parent_nos):
         """
-        For each job_no in parent_nos, recursively sum total_weight_kg of all
-        descendants and return a {job_no: Decimal} map.  Only entries with a
-        non-zero total are included.
+        {job_no: Decimal} of each parent's descendants' summed total_weight_kg
+        (see projects.services.cost_table.aggregated_weights).
         """
-        from decimal import Decimal
-        if not parent_nos:
-            return {}
-
-        child_map = {}   # parent_no -> [child_nos]
-        weight_map = {}  # child job_no -> own weight
-        frontier = set(parent_nos)
-        all_known = set(parent_nos)
-
-        while frontier:
-            rows = list(
-                JobOrder.objects
-                .filter(parent_id__in=frontier)
-                .values_list('job_no', 'parent_id', 'total_weight_kg')
-            )
-            frontier = set()
-            for jno, pid, weight in rows:
-                weight_map[jno] = weight or Decimal(0)
-                child_map.setdefault(pid, []).append(jno)
-                if jno not in all_known:
-                    frontier.add(jno)
-                    all_known.add(jno)
-
-        def subtree_weight(jno):
-            return weight_map.get(jno, Decimal(0)) + sum(
-                subtree_weight(c) for c in child_map.get(jno, [])
-            )
-
-        return {jno: val for jno in parent_nos if (val := subtree_weight(jno))}
+        from projects.services.cost_table import aggregated_weights
+        return aggregated_weights(parent_nos)
 
     @staticmethod
     def _cost_table_base_queryset():
-        from django.db.models import Exists, OuterRef, Prefetch, Q, Value
-        from django.db.models.functions import Concat
-        from sales.models import SalesOfferPriceRevision
-
-        # Masters split into production phases: they have phase mirrors that
-        # live under phase nodes (parent != master). Their selling price is
-        # suppressed in favour of the allocations' quantity-split prices.
-        phased_master_sq = (
-            JobOrder.objects
-            .filter(source_job_order_id=OuterRef('pk'))
-            .exclude(parent_id=OuterRef('pk'))
-        )
-
-        # Jobs with no manufacturing (İmalat) department task anywhere in their
-        # subtree were not manufactured in-house (e.g. trading / fully
-        # outsourced items). Checked on self plus descendants via the
-        # hierarchical job_no prefix ('-' children, '/' phase jobs), so parent
-        # containers and phased masters roll up from their leaves. The
-        # parent_id clause covers phase nodes, whose allocation children
-        # (270-01-01/P1 under 270-01/P1) do not share the node's prefix.
-        manufacturing_task_sq = JobOrderDepartmentTask.objects.filter(
-            department='manufacturing',
-        ).exclude(
-            status__in=['skipped', 'cancelled'],
-        ).filter(
-            Q(job_order_id=OuterRef('pk'))
-            | Q(job_order__parent_id=OuterRef('pk'))
-            | Q(job_order__job_no__startswith=Concat(OuterRef('pk'), Value('-')))
-            | Q(job_order__job_no__startswith=Concat(OuterRef('pk'), Value('/')))
-        )
-
-        return (
-            JobOrder.objects
-            .select_related('cost_summary', 'customer', 'source_offer', 'source_job_order')
-            .annotate(
-                _is_phased_master=Exists(phased_master_sq),
-                _is_manufactured=Exists(manufacturing_task_sq),
-            )
-            .prefetch_related(
-                Prefetch(
-                    'source_offer__price_revisions',
-                    queryset=SalesOfferPriceRevision.objects.filter(is_current=True),
-                    to_attr='_current_price_revisions',
-                ),
-                # Needed to pro-rate the offer's current_price across phase job
-                # orders (Option 3) without per-row queries in the serializer.
-                'source_offer__items',
-            )
-            .exclude(job_no='LEGACY-ARCHIVE')
-        )
+        from projects.services.cost_table import cost_table_queryset
+        return cost_table_queryset()
 
     @staticmethod
     def _apply_not_applicable_filter(qs, request):
@@ -1093,68 +1024,24 @@ class JobOrderViewSet(viewsets.ModelViewSet):
         'count' in the pagination envelope is the total number of roots.
         Filters promote jobs to roots when their parent is excluded.
 
+        ?cursor= (empty for the first page) switches to keyset paging: the
+        envelope is {next, results} and each page seeks past the last row
+        instead of counting and offsetting, so deep pages cost the same as
+        the first. Sorting by margin/price per kg reads the precomputed
+        JobOrderCostTableRow (see projects.services.cost_table); responses
+        are cached per query string until a summary or job order changes.
+
         Jobs flagged cost_not_applicable are hidden unless
         ?include_not_applicable=true; each row carries the flag so they can be
         shown greyed out / badged when included.
         """
-        from django.db.models import ExpressionWrapper, DecimalField, F, Value
-        from django.db.models.functions import NullIf
-        from django.db.models import OrderBy
+        from projects.services.cost_table import cached_cost_table_response
+        return Response(cached_cost_table_response(request, lambda: self._build_cost_table(request)))
 
-        ordering_param = request.query_params.get('ordering', 'job_no')
-
-        # Expressions for computed ordering fields
-        margin_eur_expr = ExpressionWrapper(
-            F('cost_summary__selling_price') - F('cost_summary__actual_total_cost'),
-            output_field=DecimalField(max_digits=16, decimal_places=2),
-        )
-        margin_pct_expr = ExpressionWrapper(
-            (F('cost_summary__selling_price') - F('cost_summary__actual_total_cost'))
-            / NullIf(F('cost_summary__selling_price'), Value(0)) * Value(100),
-            output_field=DecimalField(max_digits=10, decimal_places=4),
-        )
-        price_per_kg_expr = ExpressionWrapper(
-            F('cost_summary__actual_total_cost')
-            / NullIf(F('total_weight_kg'), Value(0)),
-            output_field=DecimalField(max_digits=16, decimal_places=2),
-        )
+    def _build_cost_table(self, request):
+        from projects.services import cost_table
 
-        db_ordering = {
-            'job_no':          ('job_no',),
-            '-job_no':         ('-job_no',),
-            'title':           ('title',),
-            '-title':          ('-title',),
-            'weight':          ('total_weight_kg',),
-            '-weight':         ('-total_weight_kg',),
-            'actual_cost':     ('cost_summary__actual_total_cost',),
-            '-actual_cost':    ('-cost_summary__actual_total_cost',),
-            'selling_price':   ('cost_summary__selling_price',),
-            '-selling_price':  ('-cost_summary__selling_price',),
-            'completion_pct':  ('completion_percentage',),
-            '-completion_pct': ('-completion_percentage',),
-            'date':            (OrderBy(F('target_completion_date'), nulls_last=True),),
-            '-date':           (OrderBy(F('target_completion_date'), descending=True, nulls_last=True),),
-            'created_at':      ('created_at',),
-            '-created_at':     ('-created_at',),
-            'last_updated':    ('cost_summary__last_updated',),
-            '-last_updated':   ('-cost_summary__last_updated',),
-            # Computed via annotated expressions (applied below)
-            'margin_eur':      None,
-            '-margin_eur':     None,
-            'margin_pct':      None,
-            '-margin_pct':     None,
-            'price_per_kg':    None,
-            '-price_per_kg':   None,
-        }
-
-        annotation_ordering = {
-            'margin_eur':   ('margin_eur_order',  margin_eur_expr,  False),
-            '-margin_eur':  ('margin_eur_order',  margin_eur_expr,  True),
-            'margin_pct':   ('margin_pct_order',  margin_pct_expr,  False),
-            '-margin_pct':  ('margin_pct_order',  margin_pct_expr,  True),
-            'price_per_kg': ('price_per_kg_order', price_per_kg_expr, False),
-            '-price_per_kg':('price_per_kg_order', price_per_kg_expr, True),
-        }
+        ordering_param = request.query_params.get('ordering', 'job_no')
 
         base_qs = self._apply_not_applicable_filter(
             self._cost_table_base_queryset(), request
@@ -1208,51 +1095,41 @@ class JobOrderViewSet(viewsets.ModelViewSet):
                     _Q(template_node__in=expanded)
                 ).distinct()
 
-        if ordering_param in annotation_ordering:
-            ann_name, ann_expr, descending = annotation_ordering[ordering_param]
-            base_qs = base_qs.annotate(**{ann_name: ann_expr})
-            db_order = f'-{ann_name}' if descending else ann_name
+        # Apply DRF filter backends first; root_queryset() sets our own
+        # ordering last so OrderingFilter (which only knows `ordering_fields`
+        # and would reset computed sorts like margin_pct) cannot clobber it.
+        filtered_qs = self.filter_queryset(base_qs)
+        roots_qs = cost_table.root_queryset(filtered_qs, ordering_param)
+
+        cursor = request.query_params.get('cursor')
+        next_link = None
+        if cursor is not None and self.paginator is not None:
+            page_size = self.paginator.get_page_size(request)
+            rows = list(cost_table.seek(roots_qs, ordering_param, cursor)[:page_size + 1])
+            root_jobs = rows[:page_size]
+            if len(rows) > page_size:
+                next_link = replace_query_param(
+                    request.build_absolute_uri(), 'cursor', cost_table.encode_cursor(root_jobs[-1]),
+                )
+            page = None
         else:
-            db_order = db_ordering.get(ordering_param, ('job_no',))[0]
-
-        # Apply DRF filter backends first, then our own ordering last so that
-        # OrderingFilter (which only knows about `ordering_fields` and would
-        # otherwise reset to the default `-created_at` for computed/aliased
-        # sorts like margin_pct/margin_eur/price_per_kg) cannot clobber it.
-        filtered_qs = self.filter_queryset(base_qs).order_by(db_order)
-
-        # One lightweight query to learn the full parent/child structure.
-        # Use values_list to get an ordered list of (job_no, parent_id) pairs;
-        # the queryset already has order_by applied so DB returns them sorted.
-        job_meta = list(filtered_qs.values_list('job_no', 'parent_id'))
-        job_no_set = {m[0] for m in job_meta}
-        jobs_with_children = {m[1] for m in job_meta if m[1] in job_no_set}
-        root_nos = [
-            m[0] for m in job_meta
-            if not m[1] or m[1] not in job_no_set
-        ]
-
-        # Paginate the root list (DRF paginators accept Python lists).
-        page = self.paginate_queryset(root_nos)
-        root_page_nos = page if page is not None else root_nos
-
-        root_jobs = list(filtered_qs.filter(job_no__in=root_page_nos)) if root_page_nos else []
-        # Restore the paginated order (filter(in=) doesn't guarantee it).
-        order_map = {no: i for i, no in enumerate(root_page_nos)}
-        root_jobs.sort(key=lambda j: order_map[j.job_no])
+            page = self.paginate_queryset(roots_qs)
+            root_jobs = list(page if page is not None else roots_qs)
 
-        parent_root_nos = {j.job_no for j in root_jobs if j.job_no in jobs_with_children}
-        aggregated_weights = self._compute_aggregated_weights(parent_root_nos)
+        root_nos = [j.job_no for j in root_jobs]
+        jobs_with_children = cost_table.children_with_children(filtered_qs, root_nos)
         ctx = {
             **self.get_serializer_context(),
-            'aggregated_weights': aggregated_weights,
-            'derived_price_resolver': self._derived_price_resolver([j.job_no for j in root_jobs]),
+            'aggregated_weights': cost_table.page_aggregated_weights(root_jobs, jobs_with_children),
+            'derived_price_resolver': self._derived_price_resolver(root_nos),
         }
         data = self._serialize_cost_rows(root_jobs, jobs_with_children, ctx)
 
+        if cursor is not None and self.paginator is not None:
+            return {'next': next_link, 'results': data}
         if page is not None:
-            return self.get_paginated_response(data)
-        return Response(data)
+            return self.get_paginated_response(data).data
+        return data
 
     @action(detail=True, methods=['get'], url_path='cost_children', permission_classes=[IsCostAuthorized])
     def cost_children(self, request, job_no=None):
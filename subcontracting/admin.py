@@ -3,7 +3,6 @@ from .models import (
     Subcontractor,
     SubcontractingPriceTier,
     SubcontractingAssignment,
-    SubcontractorCostRecalcQueue,
     SubcontractorStatement,
     SubcontractorStatementLine,
     SubcontractorStatementAdjustment,
@@ -43,11 +42,6 @@ class SubcontractingAssignmentAdmin(admin.ModelAdmin):
     readonly_fields = ['current_cost', 'cost_currency', 'last_billed_progress', 'created_at', 'updated_at']
 
 
-@admin.register(SubcontractorCostRecalcQueue)
-class SubcontractorCostRecalcQueueAdmin(admin.ModelAdmin):
-    list_display = ['job_no', 'enqueued_at']
-
-
 class SubcontractorStatementLineInline(admin.TabularInline):
     model = SubcontractorStatementLine
     extra = 0
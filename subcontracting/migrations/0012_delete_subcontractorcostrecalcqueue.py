@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_costrecalcjob'),
+        ('subcontracting', '0011_add_tier_type_to_price_tier'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='SubcontractorCostRecalcQueue',
+        ),
+    ]
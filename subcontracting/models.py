@@ -230,21 +230,6 @@ class MonthlyPaintInput(models.Model):
         return f"Boya {self.year}/{self.month:02d} – {self.total_kg} kg"
 
 
-class SubcontractorCostRecalcQueue(models.Model):
-    """
-    Queue for background subcontractor cost recalculation per job order.
-    Processed by DrainSubcontractorCostQueueView.
-    """
-    job_no = models.CharField(max_length=50, primary_key=True)
-    enqueued_at = models.DateTimeField(auto_now=True)
-
-    class Meta:
-        db_table = 'subcontracting_cost_recalc_queue'
-
-    def __str__(self):
-        return self.job_no
-
-
 class SubcontractorStatement(models.Model):
     """
     Monthly payment document for a subcontractor.
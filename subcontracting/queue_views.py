@@ -1,14 +1,11 @@
-import logging
-
-from django.db import transaction
-from rest_framework.response import Response
+from rest_framework import status
 from rest_framework.views import APIView
+from rest_framework.response import Response
 
+from core.cost_queue import drain_cost_queue
+from core.internal_tasks import parse_batch_limit
+from core.models import CostRecalcJob
 from machining.permissions import HasQueueSecret
-from subcontracting.models import SubcontractorCostRecalcQueue
-from subcontracting.services.costing import recompute_subcontractor_cost
-
-logger = logging.getLogger(__name__)
 
 
 class DrainSubcontractorCostQueueView(APIView):
@@ -18,48 +15,21 @@ class DrainSubcontractorCostQueueView(APIView):
 
     POST /subcontracting/internal/drain-cost-queue/
     Headers: X-Queue-Secret: <secret>
-    Body: {"max": 200}  (optional, default 200)
+    Body: {"max": 200}  (optional, default 200, at most 1000)
     Response: {"processed": N, "failed": M}
 
-    A bounded batch is fetched once and each job_no is processed at most once per
-    request, in its own transaction. A job_no whose recompute raises is logged
-    and left in the queue for the next run — it is no longer deleted on failure
-    (which silently dropped the recalculation) and can never spin the CPU.
+    Kept for existing schedulers: drains only the subcontractor rows of the unified
+    cost queue (core.cost_queue), then the job summaries they touched.
+    Response also carries {"summaries": S}.
     """
     authentication_classes = []
     permission_classes = [HasQueueSecret]
 
     def post(self, request):
-        max_rows = int(request.data.get('max', 200))
-
-        job_nos = list(
-            SubcontractorCostRecalcQueue.objects
-            .order_by('enqueued_at')
-            .values_list('job_no', flat=True)[:max_rows]
-        )
-
-        processed = 0
-        failed = 0
-        for job_no in job_nos:
-            try:
-                with transaction.atomic():
-                    locked = (
-                        SubcontractorCostRecalcQueue.objects
-                        .select_for_update(skip_locked=True)
-                        .filter(pk=job_no)
-                        .first()
-                    )
-                    if locked is None:
-                        # Row is gone or held by another worker — skip it.
-                        continue
-                    recompute_subcontractor_cost(job_no)
-                    SubcontractorCostRecalcQueue.objects.filter(pk=job_no).delete()
-                processed += 1
-            except Exception:
-                logger.exception(
-                    "subcontractor cost recompute failed for job_no=%s; left in queue",
-                    job_no,
-                )
-                failed += 1
-
-        return Response({'processed': processed, 'failed': failed})
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            max_rows = parse_batch_limit(request.data.get("max"), default=200)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(drain_cost_queue(max_rows, [CostRecalcJob.KIND_SUBCONTRACTOR]))
@@ -4,7 +4,9 @@ from decimal import Decimal
 
 from django.db import transaction
 
-from subcontracting.models import SubcontractingAssignment, SubcontractorCostRecalcQueue
+from core.cost_queue import enqueue_cost_recalc
+from core.models import CostRecalcJob
+from subcontracting.models import SubcontractingAssignment
 
 
 @transaction.atomic
@@ -35,7 +37,4 @@ def recompute_subcontractor_cost(job_no: str) -> Decimal:
 
 def enqueue_subcontractor_cost_recalc(job_no: str) -> None:
     """Upsert the job_no into the recalc queue (idempotent)."""
-    SubcontractorCostRecalcQueue.objects.update_or_create(
-        job_no=job_no,
-        defaults={}
-    )
+    enqueue_cost_recalc(CostRecalcJob.KIND_SUBCONTRACTOR, job_no)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tasks.services.timer_totals import rebuild_task_timer_totals
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-task finished-timer totals (TaskTimerTotal) read by "
+        "the timer lists. Run after writes that bypass model signals "
+        "(QuerySet.update(), bulk_create()); safe to run any time."
+    )
+
+    def handle(self, *args, **opts):
+        written = rebuild_task_timer_totals()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed the timer totals of {written} task(s)."))
@@ -0,0 +1,60 @@
+# tasks/management/commands/verify_part_costs.py
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+
+class Command(BaseCommand):
+    help = ('Verifies incrementally maintained part costs against a full rebuild '
+            'and reports any drift (optionally repairs it)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--part-key',
+            type=str,
+            help='Specific part key to verify (optional)'
+        )
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Run a full rebuild for every part that drifted'
+        )
+
+    def handle(self, *args, **options):
+        from machining.fx_utils import build_fx_lookup
+        from tasks.models import Part
+        from tasks.services.costing import part_cost_drift, recompute_part_cost_snapshot
+
+        if options.get('part_key'):
+            part_keys = [options['part_key']]
+        else:
+            # Parts that have (or should have) cost records
+            part_keys = (
+                Part.objects
+                .filter(Q(cost_agg__isnull=False)
+                        | Q(timer_cost_contributions__isnull=False)
+                        | Q(operations__isnull=False))
+                .distinct()
+                .order_by('key')
+                .values_list('key', flat=True)
+            )
+
+        fx = build_fx_lookup("EUR")
+        checked = 0
+        drifted = 0
+        for part_key in part_keys:
+            checked += 1
+            drift = part_cost_drift(part_key, fx=fx)
+            if not drift:
+                continue
+            drifted += 1
+            self.stdout.write(self.style.WARNING(f"✗ {part_key}"))
+            for line in drift:
+                self.stdout.write(f"    {line}")
+            if options['repair']:
+                recompute_part_cost_snapshot(part_key)
+                self.stdout.write(self.style.SUCCESS(f"    ✓ rebuilt {part_key}"))
+
+        self.stdout.write("\n" + "="*60)
+        self.stdout.write(f"Checked: {checked}")
+        self.stdout.write(f"Drifted: {drifted}" + (" (repaired)" if options['repair'] and drifted else ""))
+        self.stdout.write("="*60 + "\n")
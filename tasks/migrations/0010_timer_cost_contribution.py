@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-16 21:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_merge_20260707_0936'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimerCostContribution',
+            fields=[
+                ('timer_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('hours_ww', models.DecimalField(decimal_places=10, default=0, max_digits=22)),
+                ('hours_ah', models.DecimalField(decimal_places=10, default=0, max_digits=22)),
+                ('hours_su', models.DecimalField(decimal_places=10, default=0, max_digits=22)),
+                ('cost_ww', models.DecimalField(decimal_places=10, default=0, max_digits=26)),
+                ('cost_ah', models.DecimalField(decimal_places=10, default=0, max_digits=26)),
+                ('cost_su', models.DecimalField(decimal_places=10, default=0, max_digits=26)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('part', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timer_cost_contributions', to='tasks.part')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'tasks_timercostcontribution',
+                'indexes': [models.Index(fields=['part', 'user'], name='tasks_timer_part_id_dfe061_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_costrecalcjob'),
+        ('tasks', '0010_timer_cost_contribution'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='PartCostRecalcQueue',
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def fill_task_timer_totals(apps, schema_editor):
+    Timer = apps.get_model('tasks', 'Timer')
+    TaskTimerTotal = apps.get_model('tasks', 'TaskTimerTotal')
+    rows = (
+        Timer.objects
+        .filter(content_type__isnull=False, object_id__isnull=False, finish_time__isnull=False)
+        .values('content_type_id', 'object_id')
+        .annotate(total_ms=Sum(F('finish_time') - F('start_time')), timer_count=Count('id'))
+        .order_by()
+    )
+    TaskTimerTotal.objects.bulk_create(
+        (TaskTimerTotal(**row) for row in rows.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('tasks', '0011_delete_partcostrecalcqueue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTimerTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255)),
+                ('total_ms', models.BigIntegerField(default=0)),
+                ('timer_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_type', 'object_id'), name='unique_task_timer_total')],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timer',
+            index=models.Index(fields=['finish_time', 'id'], name='tasks_timer_finish_id_idx'),
+        ),
+        migrations.RunPython(fill_task_timer_totals, migrations.RunPython.noop),
+    ]
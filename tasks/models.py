@@ -173,6 +173,8 @@ class Timer(models.Model):
         ordering = ['-start_time']
         indexes = [
             models.Index(fields=["content_type", "object_id"]),
+            # Keyset pagination of the timer lists (tasks.views.GenericTimerListView)
+            models.Index(fields=["finish_time", "id"], name="tasks_timer_finish_id_idx"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -183,6 +185,33 @@ class Timer(models.Model):
         ]
 
 
+class TaskTimerTotal(models.Model):
+    """
+    Finished-timer time of one task (any BaseTask subclass or Operation).
+
+    Kept by tasks.signals via tasks.services.timer_totals so timer lists can
+    show each task's total hours without summing all of its timers per row.
+    Tasks without finished timers have no row.
+    """
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.CharField(max_length=255)
+    total_ms = models.BigIntegerField(default=0)
+    timer_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id'], name='unique_task_timer_total'),
+        ]
+
+    @property
+    def total_hours(self) -> float:
+        return self.total_ms / 3600000.0
+
+    def __str__(self):
+        return f"{self.object_id}: {self.total_ms} ms"
+
+
 class TaskFile(models.Model):
     """
     Represents a file attached to any task model that inherits from BaseTask.
@@ -441,21 +470,36 @@ class PartCostAggUser(models.Model):
         return f"{self.part.key} - {self.user.username} - {self.total_cost} {self.currency}"
 
 
-class PartCostRecalcQueue(models.Model):
+class TimerCostContribution(models.Model):
     """
-    Queue for recalculating part costs.
-    Replaces machining.JobCostRecalcQueue.
+    One finished operation timer's share of its part's cost aggregates.
 
-    When a timer changes on any operation, the parent part is enqueued here.
-    A background job processes this queue to recalculate costs.
+    Stored unrounded (10 decimal places) so PartCostAgg / PartCostAggUser are
+    exactly the rounded sums of these rows; a timer change then only re-splits
+    that one timer instead of every timer on the part.
     """
-    part = models.OneToOneField(Part, on_delete=models.CASCADE, primary_key=True)
-    enqueued_at = models.DateTimeField(auto_now=True)
+    # Plain id, not a FK: the row must survive the timer's delete so the
+    # delete can be subtracted from the aggregates.
+    timer_id = models.BigIntegerField(primary_key=True)
+    part = models.ForeignKey(Part, on_delete=models.CASCADE, related_name='timer_cost_contributions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    hours_ww = models.DecimalField(max_digits=22, decimal_places=10, default=0)
+    hours_ah = models.DecimalField(max_digits=22, decimal_places=10, default=0)
+    hours_su = models.DecimalField(max_digits=22, decimal_places=10, default=0)
+    cost_ww = models.DecimalField(max_digits=26, decimal_places=10, default=0)
+    cost_ah = models.DecimalField(max_digits=26, decimal_places=10, default=0)
+    cost_su = models.DecimalField(max_digits=26, decimal_places=10, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        db_table = 'tasks_partcostrecalcqueue'
-        verbose_name = "Part Cost Recalc Queue"
-        verbose_name_plural = "Part Cost Recalc Queue"
+        db_table = 'tasks_timercostcontribution'
+        indexes = [
+            models.Index(fields=['part', 'user']),
+        ]
 
     def __str__(self):
-        return f"{self.part.key} - queued at {self.enqueued_at}"
+        return f"timer {self.timer_id} -> {self.part_id}"
+
+
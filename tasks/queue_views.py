@@ -1,14 +1,11 @@
-import logging
-
+from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.db import transaction
 
+from core.cost_queue import drain_cost_queue
+from core.internal_tasks import parse_batch_limit
+from core.models import CostRecalcJob
 from machining.permissions import HasQueueSecret
-from tasks.models import PartCostRecalcQueue
-from tasks.services.costing import recompute_part_cost_snapshot
-
-logger = logging.getLogger(__name__)
 
 
 class DrainCostQueueView(APIView):
@@ -18,49 +15,22 @@ class DrainCostQueueView(APIView):
 
     POST /tasks/internal/drain-part-cost-queue/
     Headers: X-Queue-Secret: <secret>
-    Body: {"max": 200}  # optional, default 200
+    Body: {"max": 200}  # optional, default 200, at most 1000
 
     Response: {"processed": 5, "failed": 0}
 
-    A bounded batch is fetched once and each part is processed at most once per
-    request, in its own transaction. A part whose recompute raises is logged and
-    left in the queue for the next run, so one bad part can neither wedge the
-    queue (it no longer aborts the whole run) nor spin the CPU.
+    Kept for existing schedulers: drains only the part rows of the unified
+    cost queue (core.cost_queue), then the job summaries they touched.
+    Response also carries {"summaries": S}.
     """
     authentication_classes = []
     permission_classes = [HasQueueSecret]
 
     def post(self, request):
-        max_rows = int(request.data.get("max", 200))
-
-        part_ids = list(
-            PartCostRecalcQueue.objects
-            .order_by("enqueued_at")
-            .values_list("part_id", flat=True)[:max_rows]
-        )
-
-        processed = 0
-        failed = 0
-        for part_id in part_ids:
-            try:
-                with transaction.atomic():
-                    locked = (
-                        PartCostRecalcQueue.objects
-                        .select_for_update(skip_locked=True)
-                        .filter(pk=part_id)
-                        .first()
-                    )
-                    if locked is None:
-                        # Row is gone or held by another worker — skip it.
-                        continue
-                    recompute_part_cost_snapshot(part_id)
-                    PartCostRecalcQueue.objects.filter(pk=part_id).delete()
-                processed += 1
-            except Exception:
-                logger.exception(
-                    "part cost recompute failed for part_id=%s; left in queue",
-                    part_id,
-                )
-                failed += 1
-
-        return Response({"processed": processed, "failed": failed})
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            max_rows = parse_batch_limit(request.data.get("max"), default=200)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(drain_cost_queue(max_rows, [CostRecalcJob.KIND_PART]))
@@ -4,7 +4,7 @@ Part cost calculation service.
 Adapted from machining.services.costing for the Part/Operation system.
 """
 from __future__ import annotations
-from django.db.models import Avg
+from django.db.models import Avg, Count, Sum
 from collections import defaultdict
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
@@ -14,7 +14,7 @@ from django.db import transaction
 from django.contrib.contenttypes.models import ContentType
 
 from users.models import WageRate
-from tasks.models import Part, Operation, PartCostAgg, PartCostAggUser, Timer
+from tasks.models import Part, Operation, PartCostAgg, PartCostAggUser, Timer, TimerCostContribution
 from machining.services.timers import split_timer_by_local_day_and_bucket
 from machining.fx_utils import build_fx_lookup
 
@@ -91,6 +91,138 @@ def _build_wage_picker(user_ids):
     return pick
 
 
+BUCKET_FIELDS = ("hours_ww", "hours_ah", "hours_su", "cost_ww", "cost_ah", "cost_su")
+_CONTRIBUTION_PLACES = Decimal("0.0000000001")
+
+# Quantize at write time
+q2 = lambda x: x.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _zero_buckets():
+    return dict.fromkeys(BUCKET_FIELDS, Decimal("0"))
+
+
+def _timer_contribution(timer, pick_wage, fx):
+    """
+    Hours and EUR cost of one finished timer, split by work type (ww/ah/su).
+    Stored unrounded (10 places) as a TimerCostContribution.
+    """
+    v = _zero_buckets()
+    segs = split_timer_by_local_day_and_bucket(
+        int(timer.start_time),
+        int(timer.finish_time),
+        tz="Europe/Istanbul"
+    )
+    for s in segs:
+        d = s["date"]
+        bucket = s["bucket"]
+        hrs = Decimal(s["seconds"]) / Decimal(3600)
+
+        wage = pick_wage(timer.user_id, d)
+        if not wage:
+            continue
+
+        base_monthly = Decimal(wage["base_monthly"])
+        base_hourly = (base_monthly / WAGE_MONTH_HOURS)
+
+        ah_mul = Decimal(wage["after_hours_multiplier"])
+        su_mul = Decimal(wage["sunday_multiplier"])
+
+        try_to_eur = fx(d)
+        if try_to_eur == 0:
+            continue
+
+        if bucket == "weekday_work":
+            c_try = hrs * base_hourly
+            v["hours_ww"] += hrs
+            v["cost_ww"] += (c_try * try_to_eur)
+        elif bucket == "after_hours":
+            c_try = hrs * base_hourly * ah_mul
+            v["hours_ah"] += hrs
+            v["cost_ah"] += (c_try * try_to_eur)
+        else:  # sunday
+            c_try = hrs * base_hourly * su_mul
+            v["hours_su"] += hrs
+            v["cost_su"] += (c_try * try_to_eur)
+
+    return {k: x.quantize(_CONTRIBUTION_PLACES, rounding=ROUND_HALF_UP) for k, x in v.items()}
+
+
+def _operation_timers(part_key):
+    """Finished timers across all operations of the part."""
+    return Timer.objects.filter(
+        content_type=ContentType.objects.get_for_model(Operation),
+        object_id__in=Operation.objects.filter(part_id=part_key).values("key"),
+        finish_time__isnull=False,
+    )
+
+
+def compute_part_contributions(part_key, pick_wage=None, fx=None):
+    """
+    Fresh {timer_id: (user_id, buckets)} for every finished timer of the part,
+    re-split from the timers. Used by the full rebuild and by verification.
+    """
+    timers = list(_operation_timers(part_key).only("id", "user_id", "start_time", "finish_time"))
+    if not timers:
+        return {}
+    if pick_wage is None:
+        pick_wage = _build_wage_picker({t.user_id for t in timers})
+    if fx is None:
+        fx = build_fx_lookup("EUR")
+    return {t.id: (t.user_id, _timer_contribution(t, pick_wage, fx)) for t in timers}
+
+
+def _finalize(v):
+    out = {k: q2(v[k] or Decimal("0")) for k in BUCKET_FIELDS}
+    out["total_cost"] = q2(sum((v[k] or Decimal("0") for k in ("cost_ww", "cost_ah", "cost_su")),
+                               Decimal("0")))
+    return out
+
+
+def sum_contributions(contributions):
+    """
+    Rounded aggregates from contributions (an iterable of (user_id, buckets)):
+    (part_totals, {user_id: user_totals}), each with the BUCKET_FIELDS plus
+    total_cost — exactly what PartCostAgg / PartCostAggUser store.
+    part_totals is None when there are no contributions.
+    """
+    per_user = defaultdict(_zero_buckets)
+    totals = _zero_buckets()
+    for user_id, buckets in contributions:
+        acc = per_user[user_id]
+        for k in BUCKET_FIELDS:
+            acc[k] += buckets[k]
+            totals[k] += buckets[k]
+    if not per_user:
+        return None, {}
+    return _finalize(totals), {uid: _finalize(v) for uid, v in per_user.items()}
+
+
+def _save_part_aggregates(part_key, job_no_label, totals, per_user, user_ids=None):
+    """
+    Upsert PartCostAgg (deleted when ``totals`` is None) and replace the
+    PartCostAggUser rows of ``user_ids`` (all users when None) by ``per_user``.
+    """
+    user_rows = PartCostAggUser.objects.filter(part_id=part_key)
+    if user_ids is not None:
+        user_rows = user_rows.filter(user_id__in=user_ids)
+    user_rows.delete()
+
+    if totals is None:
+        PartCostAgg.objects.filter(part_id=part_key).delete()
+        return
+
+    PartCostAgg.objects.update_or_create(
+        part_id=part_key,
+        defaults=dict(job_no_cached=job_no_label, currency="EUR", **totals),
+    )
+    PartCostAggUser.objects.bulk_create([
+        PartCostAggUser(part_id=part_key, user_id=uid, job_no_cached=job_no_label,
+                        currency="EUR", **v)
+        for uid, v in per_user.items()
+    ])
+
+
 @transaction.atomic
 def recompute_part_cost_snapshot(part_key: str):
     """
@@ -98,132 +230,196 @@ def recompute_part_cost_snapshot(part_key: str):
 
     This function:
     1. Collects all timers from all operations on the part
-    2. Calculates hours and costs by work type (ww/ah/su)
+    2. Calculates hours and costs by work type (ww/ah/su), stored per timer
+       as TimerCostContribution rows
     3. Updates PartCostAgg and PartCostAggUser tables
 
+    This is the full rebuild; timer changes normally go through the
+    incremental ``apply_timer_cost_change``.
+
     Args:
         part_key: The primary key of the Part to recompute costs for
     """
-    operation_content_type = ContentType.objects.get_for_model(Operation)
-
-    # Get the part
-    try:
-        part = Part.objects.get(key=part_key)
-    except Part.DoesNotExist:
-        # Part doesn't exist, clean up any cost records
-        PartCostAgg.objects.filter(part_id=part_key).delete()
-        PartCostAggUser.objects.filter(part_id=part_key).delete()
-        return
-
-    # Get all operations for this part
-    operation_keys = list(part.operations.values_list('key', flat=True))
-
-    if not operation_keys:
-        # No operations, clean up cost records
-        PartCostAgg.objects.filter(part_id=part_key).delete()
-        PartCostAggUser.objects.filter(part_id=part_key).delete()
-        return
-
-    # Get all timers across all operations
-    timers = list(
-        Timer.objects.select_related("user")
-        .filter(
-            content_type=operation_content_type,
-            object_id__in=operation_keys,
-            finish_time__isnull=False
-        )
-    )
+    # Locked like apply_timer_cost_change, so the two never interleave
+    part = Part.objects.select_for_update().filter(key=part_key).only("key", "job_no").first()
 
     # Wipe existing cost records
+    TimerCostContribution.objects.filter(part_id=part_key).delete()
     PartCostAgg.objects.filter(part_id=part_key).delete()
     PartCostAggUser.objects.filter(part_id=part_key).delete()
 
-    if not timers:
+    if part is None:
+        return
+
+    contributions = compute_part_contributions(part_key)
+    if not contributions:
         return
 
     job_no_label = part.job_no or ""
+    TimerCostContribution.objects.bulk_create([
+        TimerCostContribution(timer_id=timer_id, part_id=part_key, user_id=uid, **buckets)
+        for timer_id, (uid, buckets) in contributions.items()
+    ])
+    totals, per_user = sum_contributions(contributions.values())
+    _save_part_aggregates(part_key, job_no_label, totals, per_user)
 
-    user_ids = {t.user_id for t in timers}
-    pick_wage = _build_wage_picker(user_ids)
-    fx = build_fx_lookup("EUR")
+    if job_no_label:
+        from projects.services.costing import recompute_job_cost_summary
+        recompute_job_cost_summary(job_no_label)
 
-    per_user = defaultdict(lambda: {
-        "h_ww": Decimal("0"), "h_ah": Decimal("0"), "h_su": Decimal("0"),
-        "c_ww": Decimal("0"), "c_ah": Decimal("0"), "c_su": Decimal("0"),
-    })
 
-    for t in timers:
-        segs = split_timer_by_local_day_and_bucket(
-            int(t.start_time),
-            int(t.finish_time),
-            tz="Europe/Istanbul"
-        )
-        for s in segs:
-            d = s["date"]
-            bucket = s["bucket"]
-            hrs = Decimal(s["seconds"]) / Decimal(3600)
-
-            wage = pick_wage(t.user_id, d)
-            if not wage:
-                continue
-
-            base_monthly = Decimal(wage["base_monthly"])
-            base_hourly = (base_monthly / WAGE_MONTH_HOURS)
-
-            ah_mul = Decimal(wage["after_hours_multiplier"])
-            su_mul = Decimal(wage["sunday_multiplier"])
-
-            try_to_eur = fx(d)
-            if try_to_eur == 0:
-                continue
-
-            if bucket == "weekday_work":
-                c_try = hrs * base_hourly
-                per_user[t.user_id]["h_ww"] += hrs
-                per_user[t.user_id]["c_ww"] += (c_try * try_to_eur)
-            elif bucket == "after_hours":
-                c_try = hrs * base_hourly * ah_mul
-                per_user[t.user_id]["h_ah"] += hrs
-                per_user[t.user_id]["c_ah"] += (c_try * try_to_eur)
-            else:  # sunday
-                c_try = hrs * base_hourly * su_mul
-                per_user[t.user_id]["h_su"] += hrs
-                per_user[t.user_id]["c_su"] += (c_try * try_to_eur)
-
-    # Finalize, quantize at write time
-    q2 = lambda x: x.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-    tot_h_ww = sum((v["h_ww"] for v in per_user.values()), Decimal("0"))
-    tot_h_ah = sum((v["h_ah"] for v in per_user.values()), Decimal("0"))
-    tot_h_su = sum((v["h_su"] for v in per_user.values()), Decimal("0"))
-    tot_c_ww = sum((v["c_ww"] for v in per_user.values()), Decimal("0"))
-    tot_c_ah = sum((v["c_ah"] for v in per_user.values()), Decimal("0"))
-    tot_c_su = sum((v["c_su"] for v in per_user.values()), Decimal("0"))
-    total_cost = q2(tot_c_ww + tot_c_ah + tot_c_su)
-
-    # Create aggregate record
-    PartCostAgg.objects.create(
-        part_id=part_key,
-        job_no_cached=job_no_label,
-        currency="EUR",
-        hours_ww=q2(tot_h_ww), hours_ah=q2(tot_h_ah), hours_su=q2(tot_h_su),
-        cost_ww=q2(tot_c_ww), cost_ah=q2(tot_c_ah), cost_su=q2(tot_c_su),
-        total_cost=total_cost,
+def _contributions_complete(part_key, timer_id):
+    """True when every other finished timer of the part has its contribution
+    stored, i.e. the part's aggregates are the sum of its contributions."""
+    timers = _operation_timers(part_key).exclude(pk=timer_id).count()
+    stored = TimerCostContribution.objects.filter(part_id=part_key).exclude(timer_id=timer_id).count()
+    return timers == stored
+
+
+def _refresh_part_aggregates(part_key, user_ids):
+    """Re-sum PartCostAgg and the PartCostAggUser rows of ``user_ids`` from
+    the stored contributions. Returns the part's job_no ('' if none)."""
+    rows = TimerCostContribution.objects.filter(part_id=part_key)
+    sums = {k: Sum(k) for k in BUCKET_FIELDS}
+    totals = rows.aggregate(timers=Count("timer_id"), **sums)
+    per_user = {
+        r.pop("user_id"): _finalize(r)
+        for r in rows.filter(user_id__in=user_ids).values("user_id").annotate(**sums)
+    }
+    job_no_label = Part.objects.filter(key=part_key).values_list("job_no", flat=True).first() or ""
+    _save_part_aggregates(
+        part_key, job_no_label,
+        _finalize(totals) if totals.pop("timers") else None,
+        per_user, user_ids,
     )
+    return job_no_label
 
-    # Create per-user records
-    for uid, v in per_user.items():
-        u_tot = q2(v["c_ww"] + v["c_ah"] + v["c_su"])
-        PartCostAggUser.objects.create(
-            part_id=part_key,
-            user_id=uid,
-            job_no_cached=job_no_label,
-            currency="EUR",
-            hours_ww=q2(v["h_ww"]), hours_ah=q2(v["h_ah"]), hours_su=q2(v["h_su"]),
-            cost_ww=q2(v["c_ww"]), cost_ah=q2(v["c_ah"]), cost_su=q2(v["c_su"]),
-            total_cost=u_tot,
-        )
 
-    if job_no_label:
-        from projects.services.costing import recompute_job_cost_summary
-        recompute_job_cost_summary(job_no_label)
+def _lock_parts(part_keys) -> set:
+    """SELECT ... FOR UPDATE the parts ``part_keys`` in key order; returns
+    the keys locked."""
+    return set(
+        Part.objects.select_for_update()
+        .filter(key__in=[k for k in part_keys if k is not None])
+        .order_by("key")
+        .values_list("key", flat=True)
+    )
+
+
+def _rebuild_part(part_key) -> set:
+    """Full rebuild of one part; returns {job_no} of the summary it
+    recomputed (empty without a job_no)."""
+    recompute_part_cost_snapshot(part_key)
+    job_no = Part.objects.filter(key=part_key).values_list("job_no", flat=True).first()
+    return {job_no} if job_no else set()
+
+
+@transaction.atomic
+def apply_timer_cost_change(timer_id: int):
+    """
+    Incremental counterpart of ``recompute_part_cost_snapshot`` for one timer
+    that was created, edited or deleted.
+
+    Only this timer is re-split and costed; its TimerCostContribution is
+    replaced and the aggregates of the affected part(s) and user(s) are
+    re-summed from the stored contributions. A part whose other timers have
+    no stored contribution yet (costed before incremental mode) is seeded
+    with a full rebuild instead, including the part a moved timer left.
+    The affected parts stay locked until commit, so concurrent changes to
+    one part are applied one after the other.
+
+    Returns the set of job_nos whose cost summary was recomputed.
+    """
+    operation_content_type = ContentType.objects.get_for_model(Operation)
+
+    old_part = TimerCostContribution.objects.filter(timer_id=timer_id).values_list("part_id", flat=True).first()
+    timer = (
+        Timer.objects
+        .filter(pk=timer_id, content_type=operation_content_type, finish_time__isnull=False)
+        .only("id", "user_id", "object_id", "start_time", "finish_time")
+        .first()
+    )
+    part_key = None
+    if timer is not None:
+        part_key = Operation.objects.filter(key=timer.object_id).values_list("part_id", flat=True).first()
+    if old_part is None and part_key is None:
+        return set()
+
+    # The aggregates are re-summed from every contribution of the part, so
+    # concurrent changes to the same part must not interleave: lock the part
+    # rows (in key order) before reading anything they cover.
+    locked = _lock_parts({old_part, part_key})
+    old = TimerCostContribution.objects.select_for_update().filter(timer_id=timer_id).first()
+    if old is not None and old.part_id not in locked:
+        _lock_parts({old.part_id})
+
+    touched = defaultdict(set)   # part_key -> user_ids to re-sum
+    if old is not None:
+        touched[old.part_id].add(old.user_id)
+        old.delete()
+
+    rebuilt_jobs = set()
+    if part_key is not None:
+        if _contributions_complete(part_key, timer_id):
+            buckets = _timer_contribution(
+                timer, _build_wage_picker({timer.user_id}), build_fx_lookup("EUR"))
+            TimerCostContribution.objects.create(
+                timer_id=timer_id, part_id=part_key, user_id=timer.user_id, **buckets)
+            touched[part_key].add(timer.user_id)
+        else:
+            touched.pop(part_key, None)
+            rebuilt_jobs |= _rebuild_part(part_key)
+    # A part the timer moved away from is only re-summed when the sum of its
+    # contributions is its whole cost
+    for moved_from in [p for p in touched if p != part_key]:
+        if not _contributions_complete(moved_from, timer_id):
+            touched.pop(moved_from)
+            rebuilt_jobs |= _rebuild_part(moved_from)
+
+    job_nos = set()
+    for touched_part, user_ids in touched.items():
+        job_no = _refresh_part_aggregates(touched_part, user_ids)
+        if job_no:
+            job_nos.add(job_no)
+
+    if job_nos - rebuilt_jobs:
+        from projects.services.costing import recompute_job_cost_summaries
+        recompute_job_cost_summaries(job_nos - rebuilt_jobs)
+    return job_nos | rebuilt_jobs
+
+
+def part_cost_drift(part_key: str, fx=None):
+    """
+    Compare a part's stored contributions and aggregates with a fresh
+    re-split of its timers. Returns a list of human-readable differences
+    (empty when the incremental state matches a full rebuild).
+    """
+    fresh = compute_part_contributions(part_key, fx=fx)
+    stored = {
+        c.timer_id: (c.user_id, {k: getattr(c, k) for k in BUCKET_FIELDS})
+        for c in TimerCostContribution.objects.filter(part_id=part_key)
+    }
+    drift = []
+    for timer_id in sorted(fresh.keys() | stored.keys()):
+        if timer_id not in stored:
+            drift.append(f"timer {timer_id}: contribution missing")
+        elif timer_id not in fresh:
+            drift.append(f"timer {timer_id}: stale contribution")
+        elif fresh[timer_id] != stored[timer_id]:
+            drift.append(f"timer {timer_id}: contribution differs")
+
+    totals, per_user = sum_contributions(fresh.values())
+    fields = BUCKET_FIELDS + ("total_cost",)
+    agg = PartCostAgg.objects.filter(part_id=part_key).values(*fields).first()
+    if agg != totals:
+        drift.append(f"part total: stored {agg and agg['total_cost']}, "
+                     f"expected {totals and totals['total_cost']}")
+    stored_users = {
+        r.pop("user_id"): r
+        for r in PartCostAggUser.objects.filter(part_id=part_key).values("user_id", *fields)
+    }
+    for uid in sorted(per_user.keys() | stored_users.keys()):
+        if per_user.get(uid) != stored_users.get(uid):
+            drift.append(f"user {uid}: stored {(stored_users.get(uid) or {}).get('total_cost')}, "
+                         f"expected {(per_user.get(uid) or {}).get('total_cost')}")
+    return drift
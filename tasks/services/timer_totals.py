@@ -0,0 +1,121 @@
+# tasks/services/timer_totals.py
+"""
+Per-task finished-timer totals (TaskTimerTotal).
+
+Timer lists used to annotate every row with a correlated subquery summing
+all finished timers of the row's task. The sums now live in TaskTimerTotal,
+keyed by (content_type_id, object_id), and the list reads them for the
+tasks on the page in one query.
+
+tasks.signals marks a task stale whenever one of its timers is saved or
+deleted (both the old and the new task when a timer is moved); the marked
+tasks are re-summed from Timer in one batch when the transaction commits,
+so rolled-back writes never reach the table. QuerySet.update() and
+bulk_create() bypass the signals; ``manage.py rebuild_task_timer_totals``
+recomputes every row.
+"""
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from tasks.models import TaskTimerTotal, Timer
+
+_pending = threading.local()
+
+
+def _keys_filter(keys) -> Q:
+    by_type = defaultdict(set)
+    for content_type_id, object_id in keys:
+        by_type[content_type_id].add(object_id)
+    query = Q()
+    for content_type_id, object_ids in by_type.items():
+        query |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+    return query
+
+
+def _clean_keys(keys) -> set:
+    return {(ct, str(obj)) for ct, obj in keys if ct and obj}
+
+
+def _write_totals(timers) -> list:
+    rows = [
+        TaskTimerTotal(**row)
+        for row in (
+            timers.filter(finish_time__isnull=False)
+            .values('content_type_id', 'object_id')
+            .annotate(total_ms=Sum(F('finish_time') - F('start_time')), timer_count=Count('id'))
+            .order_by()
+        )
+    ]
+    TaskTimerTotal.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['content_type', 'object_id'],
+        update_fields=['total_ms', 'timer_count', 'updated_at'],
+        batch_size=1000,
+    )
+    return rows
+
+
+def refresh_task_timer_totals(keys) -> int:
+    """
+    Re-sum the finished timers of tasks ``keys`` ((content_type_id,
+    object_id) pairs); tasks left without any lose their row. Returns the
+    number of rows written.
+    """
+    keys = _clean_keys(keys)
+    if not keys:
+        return 0
+    query = _keys_filter(keys)
+    with transaction.atomic():
+        rows = _write_totals(Timer.objects.filter(query))
+        gone = keys - {(row.content_type_id, row.object_id) for row in rows}
+        if gone:
+            TaskTimerTotal.objects.filter(_keys_filter(gone)).delete()
+    return len(rows)
+
+
+def rebuild_task_timer_totals() -> int:
+    """Recompute the totals of every task; returns rows written."""
+    with transaction.atomic():
+        TaskTimerTotal.objects.all().delete()
+        return len(_write_totals(Timer.objects.filter(content_type__isnull=False, object_id__isnull=False)))
+
+
+def mark_task_totals_stale(keys) -> None:
+    """
+    Refresh tasks ``keys`` once the current transaction commits (right away
+    in autocommit). Marks made in the same transaction share one refresh.
+    """
+    keys = _clean_keys(keys)
+    if not keys:
+        return
+    pending = getattr(_pending, 'keys', None)
+    if pending is None:
+        pending = _pending.keys = set()
+    pending.update(keys)
+    transaction.on_commit(flush_stale_task_totals, robust=True)
+
+
+def flush_stale_task_totals() -> int:
+    """Refresh everything marked so far in this thread."""
+    pending = getattr(_pending, 'keys', None)
+    _pending.keys = None
+    if not pending:
+        return 0
+    return refresh_task_timer_totals(pending)
+
+
+def task_total_hours(keys) -> dict:
+    """{(content_type_id, object_id): hours} for the tasks ``keys`` that have finished timers."""
+    keys = _clean_keys(keys)
+    if not keys:
+        return {}
+    return {
+        (row.content_type_id, row.object_id): row.total_hours
+        for row in TaskTimerTotal.objects.filter(_keys_filter(keys)).only('content_type_id', 'object_id', 'total_ms')
+    }
@@ -1,8 +1,12 @@
-from django.db.models.signals import post_delete, post_save
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
-from tasks.models import TaskFile, Timer, Operation, Part, PartCostRecalcQueue
+from core.cost_queue import enqueue_cost_recalc
+from core.models import CostRecalcJob
+from tasks.models import TaskFile, Timer, Operation, Part, TimerCostContribution
+from tasks.services.costing import apply_timer_cost_change
+from tasks.services.timer_totals import mark_task_totals_stale
 
 
 @receiver(post_delete, sender=TaskFile)
@@ -17,6 +21,25 @@ def delete_file_on_taskfile_delete(sender, instance, **kwargs):
         safe_delete_storage_file(instance.file, exclude_taskfile_id=instance.pk)
 
 
+@receiver(pre_save, sender=Timer)
+def remember_timer_task(sender, instance: Timer, **kwargs):
+    """Keep the task a saved timer belonged to, in case the save moves it."""
+    instance._previous_task = None
+    if instance.pk and not kwargs.get('raw'):
+        instance._previous_task = (
+            Timer.objects.filter(pk=instance.pk).values_list('content_type_id', 'object_id').first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Timer)
+def refresh_task_timer_total_on_timer_change(sender, instance: Timer, **kwargs):
+    """Re-sum the finished timers of the timer's task (old and new task on a move)."""
+    keys = [(instance.content_type_id, instance.object_id)]
+    if getattr(instance, '_previous_task', None):
+        keys.append(instance._previous_task)
+    mark_task_totals_stale(keys)
+
+
 @receiver([post_save, post_delete], sender=Timer)
 def enqueue_part_cost_recalc_on_timer_change(sender, instance: Timer, **kwargs):
     """
@@ -30,37 +53,43 @@ def enqueue_part_cost_recalc_on_timer_change(sender, instance: Timer, **kwargs):
         try:
             operation = Operation.objects.select_related('part').get(key=instance.object_id)
 
-            # Existing: enqueue cost recalc
-            PartCostRecalcQueue.objects.update_or_create(
-                part=operation.part,
-                defaults={'enqueued_at': timezone.now()}
-            )
+            if settings.PART_COST_INCREMENTAL:
+                # Cost only this timer's change, in the same transaction
+                apply_timer_cost_change(instance.pk)
+            else:
+                enqueue_cost_recalc(CostRecalcJob.KIND_PART, operation.part_id)
 
             # NEW: Update job order progress
             _update_job_order_for_operation(operation)
 
         except Operation.DoesNotExist:
-            pass
+            if settings.PART_COST_INCREMENTAL:
+                # Operation is gone: drop any contribution the timer left behind
+                apply_timer_cost_change(instance.pk)
+    elif (settings.PART_COST_INCREMENTAL
+          and TimerCostContribution.objects.filter(timer_id=instance.pk).exists()):
+        # Timer moved off its operation: take its cost back out
+        apply_timer_cost_change(instance.pk)
 
 
 def _update_job_order_for_operation(operation):
     """Update job orders that have a 'Talaşlı İmalat' task for this operation's part job_no."""
-    from projects.models import JobOrder
-
     if not operation.part or not operation.part.job_no:
         return
+    _refresh_job_order_progress(operation.part.job_no)
+
 
-    try:
-        job_order = JobOrder.objects.get(job_no=operation.part.job_no)
-        job_order.update_completion_percentage()
+def _refresh_job_order_progress(job_no):
+    from projects.models import JobOrderDepartmentTask
+    from projects.services.completion import recompute_job_completion
 
-        # Check if Talaşlı İmalat subtask should auto-complete
-        machining_subtask = job_order.department_tasks.filter(task_type='machining').first()
-        if machining_subtask:
-            machining_subtask.check_machining_auto_complete()
+    recompute_job_completion([job_no])
 
-    except JobOrder.DoesNotExist:
-        pass
+    # Check if Talaşlı İmalat subtask should auto-complete
+    machining_subtask = JobOrderDepartmentTask.objects.filter(
+        job_order_id=job_no, task_type='machining').select_related('job_order').first()
+    if machining_subtask:
+        machining_subtask.check_machining_auto_complete()
 
 
 @receiver(post_save, sender=Operation)
@@ -95,18 +124,6 @@ def update_job_order_on_part_change(sender, instance, **kwargs):
 
 def _update_related_job_orders(part):
     """Update job orders that have a 'Talaşlı İmalat' task for this part's job_no."""
-    from projects.models import JobOrder
-
     if not part.job_no:
         return
-
-    try:
-        job_order = JobOrder.objects.get(job_no=part.job_no)
-        job_order.update_completion_percentage()
-
-        # Check if Talaşlı İmalat subtask should auto-complete
-        machining_subtask = job_order.department_tasks.filter(task_type='machining').first()
-        if machining_subtask:
-            machining_subtask.check_machining_auto_complete()
-    except JobOrder.DoesNotExist:
-        pass
\ No newline at end of file
+    _refresh_job_order_progress(part.job_no)
@@ -0,0 +1,125 @@
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from core.models import CurrencyRateSnapshot
+from tasks.models import (
+    Operation, Part, PartCostAgg, PartCostAggUser, Timer, TimerCostContribution,
+)
+from tasks.services.costing import part_cost_drift, recompute_part_cost_snapshot
+from users.models import WageRate
+
+User = get_user_model()
+IST = ZoneInfo("Europe/Istanbul")
+
+
+def _ms(*args):
+    return int(datetime(*args, tzinfo=IST).timestamp() * 1000)
+
+
+@override_settings(PART_COST_INCREMENTAL=True)
+class IncrementalPartCostTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create(username='pc-alice')
+        cls.bob = User.objects.create(username='pc-bob')
+        for user, monthly in ((cls.alice, '45000'), (cls.bob, '33750')):
+            WageRate.objects.create(user=user, effective_from=date(2026, 1, 1),
+                                    base_monthly=Decimal(monthly))
+        CurrencyRateSnapshot.objects.create(date=date(2026, 1, 1), rates={'EUR': 0.025})
+        CurrencyRateSnapshot.objects.create(date=date(2026, 3, 4), rates={'EUR': 0.024})
+
+        cls.part = Part.objects.create(key='PART-PC-1', name='p1')
+        cls.op1 = Operation.objects.create(key='OP-PC-1', name='o1', part=cls.part, order=1)
+        cls.op2 = Operation.objects.create(key='OP-PC-2', name='o2', part=cls.part, order=2)
+        cls.op_ct = ContentType.objects.get_for_model(Operation)
+
+    def timer(self, user, op, start, finish):
+        return Timer.objects.create(user=user, start_time=start, finish_time=finish,
+                                    content_type=self.op_ct, object_id=op.key)
+
+    def snapshot(self):
+        fields = ('hours_ww', 'hours_ah', 'hours_su', 'cost_ww', 'cost_ah', 'cost_su', 'total_cost')
+        agg = PartCostAgg.objects.filter(part=self.part).values(*fields).first()
+        users = {r.pop('user'): r for r in
+                 PartCostAggUser.objects.filter(part=self.part).values('user', *fields)}
+        return agg, users
+
+    def make_timers(self):
+        # Monday 06:00-18:30 (ww + after hours), Sunday 10:00-12:00, and a
+        # Tuesday-Wednesday overnight timer across the FX change.
+        a = self.timer(self.alice, self.op1, _ms(2026, 3, 2, 6), _ms(2026, 3, 2, 18, 30))
+        b = self.timer(self.bob, self.op2, _ms(2026, 3, 8, 10), _ms(2026, 3, 8, 12))
+        c = self.timer(self.alice, self.op2, _ms(2026, 3, 3, 16), _ms(2026, 3, 4, 9))
+        return a, b, c
+
+    def test_incremental_matches_full_rebuild(self):
+        self.make_timers()
+        self.assertEqual(TimerCostContribution.objects.filter(part=self.part).count(), 3)
+        incremental = self.snapshot()
+        self.assertEqual(part_cost_drift(self.part.key), [])
+
+        recompute_part_cost_snapshot(self.part.key)
+        self.assertEqual(self.snapshot(), incremental)
+        agg, users = incremental
+        self.assertEqual(agg['hours_su'], Decimal('2.00'))
+        self.assertGreater(agg['total_cost'], 0)
+        self.assertEqual(set(users), {self.alice.id, self.bob.id})
+
+    def test_edit_and_delete_apply_deltas(self):
+        a, b, _ = self.make_timers()
+        a.finish_time = _ms(2026, 3, 2, 12)
+        a.save()
+        b.delete()
+        incremental = self.snapshot()
+        self.assertEqual(set(incremental[1]), {self.alice.id})
+
+        recompute_part_cost_snapshot(self.part.key)
+        self.assertEqual(self.snapshot(), incremental)
+
+        for timer in Timer.objects.all():
+            timer.delete()
+        self.assertEqual(self.snapshot(), (None, {}))
+        self.assertFalse(TimerCostContribution.objects.exists())
+
+    def test_running_timer_is_not_costed(self):
+        Timer.objects.create(user=self.alice, start_time=_ms(2026, 3, 2, 8),
+                             content_type=self.op_ct, object_id=self.op1.key)
+        self.assertFalse(TimerCostContribution.objects.exists())
+        self.assertEqual(self.snapshot(), (None, {}))
+
+    def test_part_without_contributions_is_seeded_by_full_rebuild(self):
+        self.make_timers()
+        TimerCostContribution.objects.all().delete()   # costed before incremental mode
+        self.timer(self.bob, self.op1, _ms(2026, 3, 5, 8), _ms(2026, 3, 5, 10))
+        self.assertEqual(TimerCostContribution.objects.filter(part=self.part).count(), 4)
+        self.assertEqual(part_cost_drift(self.part.key), [])
+
+    def test_moving_a_timer_off_a_part_without_contributions_rebuilds_it(self):
+        a, b, c = self.make_timers()
+        TimerCostContribution.objects.filter(timer__in=[b, c]).delete()   # costed before incremental mode
+        other = Part.objects.create(key='PART-PC-2', name='p2')
+        Operation.objects.create(key='OP-PC-3', name='o3', part=other, order=1)
+        a.object_id = 'OP-PC-3'
+        a.save()
+        self.assertEqual(part_cost_drift(self.part.key), [])
+        self.assertEqual(part_cost_drift(other.key), [])
+        self.assertEqual(set(self.snapshot()[1]), {self.alice.id, self.bob.id})
+
+    def test_verify_command_reports_and_repairs_drift(self):
+        a, _, _ = self.make_timers()
+        Timer.objects.filter(pk=a.pk).update(finish_time=_ms(2026, 3, 2, 9))  # bypasses signals
+
+        out = StringIO()
+        call_command('verify_part_costs', stdout=out)
+        self.assertIn(f'timer {a.pk}: contribution differs', out.getvalue())
+        self.assertIn('Drifted: 1', out.getvalue())
+
+        call_command('verify_part_costs', '--repair', stdout=StringIO())
+        self.assertEqual(part_cost_drift(self.part.key), [])
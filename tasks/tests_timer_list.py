@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from tasks.models import Operation, Part, TaskTimerTotal, Timer
+from tasks.services.timer_totals import rebuild_task_timer_totals, task_total_hours
+
+User = get_user_model()
+
+TIMERS_URL = '/machining/timers/'
+HOUR = 3_600_000
+
+
+class TaskTimerTotalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='tt-user')
+        part = Part.objects.create(key='PART-TT-1', name='p')
+        cls.op1 = Operation.objects.create(key='OP-TT-1', name='o1', part=part, order=1)
+        cls.op2 = Operation.objects.create(key='OP-TT-2', name='o2', part=part, order=2)
+        cls.ct = ContentType.objects.get_for_model(Operation)
+
+    def timer(self, op, start, finish=None):
+        return Timer.objects.create(user=self.user, start_time=start, finish_time=finish,
+                                    content_type=self.ct, object_id=op.key)
+
+    def totals(self):
+        return task_total_hours([(self.ct.id, self.op1.key), (self.ct.id, self.op2.key)])
+
+    def test_totals_follow_timer_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            a = self.timer(self.op1, 0, 2 * HOUR)
+            self.timer(self.op1, 5 * HOUR)      # running: not counted
+        self.assertEqual(self.totals(), {(self.ct.id, 'OP-TT-1'): 2.0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            b = self.timer(self.op1, 3 * HOUR, 4 * HOUR)
+            a.object_id = self.op2.key
+            a.save()
+        self.assertEqual(self.totals(), {(self.ct.id, 'OP-TT-1'): 1.0, (self.ct.id, 'OP-TT-2'): 2.0})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            b.delete()
+        self.assertEqual(self.totals(), {(self.ct.id, 'OP-TT-2'): 2.0})
+
+        incremental = list(TaskTimerTotal.objects.values_list('object_id', 'total_ms', 'timer_count'))
+        self.assertEqual(rebuild_task_timer_totals(), 1)
+        self.assertEqual(list(TaskTimerTotal.objects.values_list('object_id', 'total_ms', 'timer_count')), incremental)
+
+
+class GenericTimerListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.office = User.objects.create(username='tl-office', is_superuser=True)
+        cls.operator = User.objects.create(username='tl-operator')
+        ct = ContentType.objects.get_for_model(Operation)
+        for codename in ('access_machining_tasks', 'access_cnc_cutting_tasks'):
+            perm = (Permission.objects.filter(codename=codename).first()
+                    or Permission.objects.create(codename=codename, name=codename, content_type=ct))
+            cls.operator.user_permissions.add(perm)
+
+        op = Operation.objects.create(key='OP-TL-1', name='o', part=Part.objects.create(key='PART-TL-1', name='p'), order=1)
+        finishes = [None, None, 5 * HOUR, 5 * HOUR, 5 * HOUR, 7 * HOUR, 2 * HOUR]
+        cls.timers = [
+            Timer.objects.create(user=cls.operator, start_time=HOUR, finish_time=finish,
+                                 content_type=ct, object_id=op.key)
+            for finish in finishes
+        ]
+        # Machine-level timer: listed once although the user holds two permissions
+        cls.timers.append(Timer.objects.create(user=cls.operator, start_time=HOUR, finish_time=3 * HOUR))
+        rebuild_task_timer_totals()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.office)
+
+    def walk(self, params):
+        pages, url = [], TIMERS_URL
+        while url:
+            resp = self.client.get(url, params if url == TIMERS_URL else None)
+            self.assertEqual(resp.status_code, 200)
+            pages.append([row['id'] for row in resp.data['results']])
+            url = resp.data['next']
+        return pages, resp
+
+    def test_keyset_pages_cover_every_timer_once_in_order(self):
+        pages, last = self.walk({'page_size': 3})
+        expected = sorted(self.timers, key=lambda t: (t.finish_time is not None, -(t.finish_time or 0), -t.id))
+        self.assertEqual([i for page in pages for i in page], [t.id for t in expected])
+        self.assertEqual([len(p) for p in pages], [3, 3, 2])
+        self.assertIsNone(last.data['count'])
+
+        previous = self.client.get(last.data['previous']).data
+        self.assertEqual([row['id'] for row in previous['results']], pages[1])
+
+        pages, _ = self.walk({'page_size': 3, 'ordering': 'finish_time'})
+        self.assertEqual([i for page in pages for i in page], [t.id for t in reversed(expected)])
+
+    def test_rows_carry_duration_and_task_total(self):
+        resp = self.client.get(TIMERS_URL, {'ordering': '-finish_time', 'count': 'exact', 'page_size': 100})
+        self.assertEqual(resp.data['count'], len(self.timers))
+        row = next(r for r in resp.data['results'] if r['id'] == self.timers[5].id)
+        self.assertEqual((row['duration'], row['task_total_hours']), (6.0, 19.0))
+        machine_row = next(r for r in resp.data['results'] if r['id'] == self.timers[-1].id)
+        self.assertIsNone(machine_row['task_total_hours'])
+
+        self.assertIsInstance(self.client.get(TIMERS_URL, {'count': 'estimate'}).data['count'], int)
+
+    def test_numbered_pages_and_ordering_whitelist(self):
+        resp = self.client.get(TIMERS_URL, {'page': 2, 'page_size': 5})
+        self.assertEqual((resp.data['count'], len(resp.data['results'])), (len(self.timers), 3))
+        self.assertEqual(self.client.get(TIMERS_URL, {'ordering': 'user__password'}).status_code, 400)
+        self.assertEqual(self.client.get(TIMERS_URL, {'cursor': 'not-a-cursor'}).status_code, 404)
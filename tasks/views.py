@@ -9,8 +9,9 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, F, ExpressionWrapper, FloatField, Sum, Avg, Count, OuterRef, Subquery, Value
+from django.db.models import Q, F, ExpressionWrapper, FloatField, Sum, Avg, Count, Value
 from django.db.models.functions import Coalesce
+from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 from collections import defaultdict
 from django.db import transaction
@@ -23,9 +24,10 @@ from .serializers import (
     OperationSerializer, OperationDetailSerializer, OperationOperatorSerializer,
     OperationPlanUpdateItemSerializer, TaskFileSerializer,
 )
+from .services.timer_totals import task_total_hours
 from .view_mixins import TaskFileMixin
 from .filters import OperationFilter, PartFilter
-from config.pagination import CustomPageNumberPagination
+from config.pagination import CustomPageNumberPagination, KeysetPagination
 from users.permissions import user_has_role_perm
 
 
@@ -247,11 +249,19 @@ class GenericTimerManualEntryView(GenericTimerStartView):
 class GenericTimerListView(APIView):
     """
     A generic view to list timers, filterable by a specific task_type.
+
+    Pages are keyset-paginated on (ordering field, id) (``?cursor=``, see
+    config.pagination.KeysetPagination; ``?count=exact|estimate`` for a
+    total). Clients still sending ``?page=`` get numbered pages.
     """
     permission_classes = [IsAuthenticated]
 
+    ordering_fields = ('finish_time', 'start_time')
+
     def get(self, request, task_type):
         ordering = request.GET.get("ordering", "-finish_time")
+        if ordering.lstrip('-') not in self.ordering_fields:
+            return Response({"error": f"Invalid ordering '{ordering}'"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Map task_type to (app_label, model)
         task_type_map = {
@@ -275,19 +285,20 @@ class GenericTimerListView(APIView):
         # Include both task-linked timers AND machine-level timers (downtime/break with no operation)
         # For null content_type timers, filter by permission to avoid showing them in wrong task_type views
         # machine_fault/linear_cutting -> only GFK-linked timers, no null content_type timers
+        # (a user__in subquery rather than a join, so timers are not repeated per permission)
         if task_type in ('machine_fault', 'linear_cutting'):
             query = Q(content_type=ct)
         elif task_type == 'cnc_cutting':
             null_content_type_filter = Q(
                 content_type__isnull=True,
-                user__user_permissions__codename='access_cnc_cutting_tasks',
+                user__in=User.objects.filter(user_permissions__codename='access_cnc_cutting_tasks'),
             )
             query = Q(content_type=ct) | null_content_type_filter
         else:
             # For 'operation' and 'machining', filter by access_machining_tasks permission
             null_content_type_filter = Q(
                 content_type__isnull=True,
-                user__user_permissions__codename='access_machining_tasks',
+                user__in=User.objects.filter(user_permissions__codename='access_machining_tasks'),
             )
             query = Q(content_type=ct) | null_content_type_filter
 
@@ -327,28 +338,28 @@ class GenericTimerListView(APIView):
                 task_keys = TaskModel.objects.filter(job_no__icontains=request.GET['job_no']).values_list('key', flat=True)
                 query &= Q(object_id__in=list(task_keys))
 
-        # Subquery to calculate total hours for each task
-        task_total_hours_subquery = Timer.objects.filter(
-            content_type=OuterRef('content_type'),
-            object_id=OuterRef('object_id'),
-            finish_time__isnull=False
-        ).values('content_type', 'object_id').annotate(
-            total=Sum(ExpressionWrapper(
-                (F('finish_time') - F('start_time')) / 3600000.0,
-                output_field=FloatField()
-            ))
-        ).values('total')
-
-        timers = Timer.objects.prefetch_related('issue_key').annotate(
+        timers = Timer.objects.select_related(
+            'user', 'stopped_by', 'machine_fk', 'downtime_reason', 'related_fault',
+        ).prefetch_related('issue_key').annotate(
             duration=ExpressionWrapper(
                 (F('finish_time') - F('start_time')) / 3600000.0,
                 output_field=FloatField()
             ),
-            task_total_hours=Subquery(task_total_hours_subquery)
-        ).filter(query).distinct().order_by(ordering)
+        ).filter(query)
+
+        if request.GET.get("page"):
+            paginator = CustomPageNumberPagination()
+            tiebreak = '-id' if ordering.startswith('-') else 'id'
+            page = paginator.paginate_queryset(timers.order_by(ordering, tiebreak), request)
+        else:
+            paginator = KeysetPagination(ordering.lstrip('-'), descending=ordering.startswith('-'))
+            page = paginator.paginate_queryset(timers, request)
+
+        # Per-task totals come from TaskTimerTotal (tasks.services.timer_totals)
+        totals = task_total_hours((t.content_type_id, t.object_id) for t in page)
+        for timer in page:
+            timer.task_total_hours = totals.get((timer.content_type_id, str(timer.object_id)))
 
-        paginator = CustomPageNumberPagination()
-        page = paginator.paginate_queryset(timers, request)
         SerializerClass = get_timer_serializer_class(task_type)
         serializer = SerializerClass(page, many=True)
         return paginator.get_paginated_response(serializer.data)
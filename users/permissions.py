@@ -1,9 +1,115 @@
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from rest_framework.permissions import BasePermission
 
 
 # ---------------------------------------------------------------------------
 # Central permission resolver
 # ---------------------------------------------------------------------------
+#
+# A user's effective role permissions are loaded once into a frozenset of
+# codenames (overrides applied), kept on the user object for the rest of the
+# request and in the Django cache across requests. The cache key carries a
+# per-user version, replaced when the user's overrides, groups or direct
+# permissions change (users/signals.py, sync_user_permissions), and a global
+# version replaced when a group's permissions change. Version keys only reach
+# other instances through a shared cache, so ROLE_PERMISSION_CACHE_TTL_S is 0
+# (one load per request) unless CACHE_REDIS_URL configures one.
+
+GLOBAL_VERSION_KEY = 'role-perms:version'
+_MEMO_ATTR = '_role_perm_set'
+
+# 'loaded' = permission sets read from the database, 'cached' = read from the
+# Django cache, 'memoized' = served from the user object.
+role_perm_stats = Counter()
+
+
+def _user_version_key(user_id) -> str:
+    return f'role-perms:version:{user_id}'
+
+
+def _versions(user_id):
+    keys = [GLOBAL_VERSION_KEY, _user_version_key(user_id)]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return found[keys[0]], found[keys[1]]
+
+
+def _load_role_perm_set(user) -> frozenset:
+    """Effective codenames of *user*: group and direct ``users`` permissions
+    (active users only, like ModelBackend), minus denies, plus grants."""
+    from django.contrib.auth.models import Permission
+    from users.models import UserPermissionOverride
+
+    granted = set()
+    if user.is_active:
+        granted.update(
+            Permission.objects
+            .filter(content_type__app_label='users')
+            .filter(Q(user=user) | Q(group__user=user))
+            .values_list('codename', flat=True)
+        )
+    for codename, is_granted in UserPermissionOverride.objects.filter(user=user).values_list(
+            'codename', 'granted'):
+        if is_granted:
+            granted.add(codename)
+        else:
+            granted.discard(codename)
+    return frozenset(granted)
+
+
+def role_perm_set(user) -> frozenset:
+    """Effective role permission codenames of an authenticated, non-superuser
+    *user*; see user_has_role_perm for the resolution order."""
+    memo = user.__dict__.get(_MEMO_ATTR)
+    if memo is not None:
+        role_perm_stats['memoized'] += 1
+        return memo
+
+    ttl = settings.ROLE_PERMISSION_CACHE_TTL_S
+    key = None
+    if ttl > 0:
+        global_version, user_version = _versions(user.pk)
+        key = f'role-perms:{user.pk}:{global_version}:{user_version}'
+        perms = cache.get(key)
+        if perms is not None:
+            role_perm_stats['cached'] += 1
+            user.__dict__[_MEMO_ATTR] = perms
+            return perms
+
+    perms = _load_role_perm_set(user)
+    role_perm_stats['loaded'] += 1
+    if key is not None:
+        cache.set(key, perms, ttl)
+    user.__dict__[_MEMO_ATTR] = perms
+    return perms
+
+
+def invalidate_role_perms(user=None, user_ids=()) -> None:
+    """
+    Retire the cached permission sets of *user* / *user_ids*, or of everyone
+    when neither is given. Bumped now and again after commit, so a request
+    that re-cached the old set mid-transaction does not keep it.
+    """
+    if user is not None:
+        user.__dict__.pop(_MEMO_ATTR, None)
+        user_ids = [*user_ids, user.pk]
+    keys = [_user_version_key(uid) for uid in user_ids] or [GLOBAL_VERSION_KEY]
+
+    def bump():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
 
 def user_has_role_perm(user, codename: str) -> bool:
     """
@@ -14,20 +120,14 @@ def user_has_role_perm(user, codename: str) -> bool:
       2. Explicit deny UserPermissionOverride → False
       3. Explicit grant UserPermissionOverride → True
       4. Django group/permission system (user.has_perm) → result
+
+    Steps 2-4 are read from role_perm_set, so repeated checks cost no queries.
     """
     if not user or not getattr(user, 'is_authenticated', False):
         return False
     if getattr(user, 'is_superuser', False):
         return True
-
-    try:
-        override = user.permission_overrides.filter(codename=codename).only('granted').first()
-        if override is not None:
-            return override.granted
-    except Exception:
-        pass
-
-    return user.has_perm(f'users.{codename}')
+    return codename in role_perm_set(user)
 
 
 # ---------------------------------------------------------------------------
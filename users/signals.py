@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
-from django.contrib.auth.models import User
-from .models import UserProfile
+from django.contrib.auth.models import Group, User
+from .models import UserPermissionOverride, UserProfile
+from .permissions import invalidate_role_perms
 
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -9,3 +10,49 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
         UserProfile.objects.create(user=instance)
     else:
         instance.profile.save()
+
+
+# ---------------------------------------------------------------------------
+# Role permission cache invalidation (users.permissions.role_perm_set)
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=User)
+def role_perms_stale_on_user_save(sender, instance, created, **kwargs):
+    # is_active decides whether group permissions count; last_login saves
+    # on every login leave it alone
+    update_fields = kwargs.get('update_fields')
+    if created or (update_fields is not None and 'is_active' not in update_fields):
+        return
+    invalidate_role_perms(instance)
+
+
+@receiver(post_save, sender=UserPermissionOverride)
+@receiver(post_delete, sender=UserPermissionOverride)
+def role_perms_stale_on_override(sender, instance, **kwargs):
+    invalidate_role_perms(user_ids=[instance.user_id])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def role_perms_stale_on_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_role_perms(instance)
+    elif pk_set:
+        # group.user_set / permission.user_set: pk_set holds user ids
+        invalidate_role_perms(user_ids=pk_set)
+    else:
+        # a reverse clear() does not say whose
+        invalidate_role_perms()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def role_perms_stale_on_group_permissions(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_role_perms()
+
+
+@receiver(post_delete, sender=Group)
+def role_perms_stale_on_group_delete(sender, **kwargs):
+    invalidate_role_perms()
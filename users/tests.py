@@ -1,3 +1,74 @@
-from django.test import TestCase
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from organization.models import Position
+from users.models import PermissionMeta, UserPermissionOverride
+from users.permissions import can_see_job_costs, role_perm_stats, user_has_role_perm
+
+
+def fresh(user):
+    """The user as the next request would load it."""
+    return User.objects.get(pk=user.pk)
+
+
+@override_settings(ROLE_PERMISSION_CACHE_TTL_S=300)
+class RolePermissionCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.office = Permission.objects.get(codename='office_access', content_type__app_label='users')
+        cls.costs = Permission.objects.get(codename='view_job_costs', content_type__app_label='users')
+        cls.group = Group.objects.create(name='rbac-cache-office')
+        cls.group.permissions.add(cls.office)
+        cls.user = User.objects.create(username='rbac-cache-user')
+        cls.user.groups.add(cls.group)
+
+    def setUp(self):
+        cache.clear()
+        role_perm_stats.clear()
+
+    def test_one_load_serves_every_check(self):
+        user = fresh(self.user)
+        with self.assertNumQueries(2):   # permissions + overrides
+            for _ in range(50):
+                self.assertTrue(user_has_role_perm(user, 'office_access'))
+                self.assertFalse(can_see_job_costs(user))
+        self.assertEqual(role_perm_stats['loaded'], 1)
+
+        user = fresh(self.user)
+        with self.assertNumQueries(0):
+            self.assertTrue(user_has_role_perm(user, 'office_access'))
+        self.assertEqual(role_perm_stats['cached'], 1)
+
+    def test_overrides_win_and_invalidate(self):
+        self.assertTrue(user_has_role_perm(fresh(self.user), 'office_access'))
+        UserPermissionOverride.objects.create(user=self.user, codename='office_access', granted=False)
+        UserPermissionOverride.objects.create(user=self.user, codename='view_job_costs', granted=True)
+        user = fresh(self.user)
+        self.assertFalse(user_has_role_perm(user, 'office_access'))
+        self.assertTrue(can_see_job_costs(user))
+
+        UserPermissionOverride.objects.filter(user=self.user).delete()
+        user = fresh(self.user)
+        self.assertTrue(user_has_role_perm(user, 'office_access'))
+        self.assertFalse(can_see_job_costs(user))
+
+    def test_group_and_position_changes_invalidate(self):
+        self.assertFalse(can_see_job_costs(fresh(self.user)))
+        self.group.permissions.add(self.costs)
+        self.assertTrue(can_see_job_costs(fresh(self.user)))
+
+        self.group.user_set.remove(self.user)
+        self.assertFalse(user_has_role_perm(fresh(self.user), 'office_access'))
+
+        position = Position.objects.create(title='RBAC cache position', level=5)
+        position.permissions.add(PermissionMeta.objects.get_or_create(
+            codename='office_access', defaults={'name': 'Office access'})[0])
+        self.user.profile.position = position
+        self.user.profile.save()
+        self.assertTrue(user_has_role_perm(fresh(self.user), 'office_access'))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(user_has_role_perm(fresh(self.user), 'office_access'))
@@ -50,28 +50,17 @@ def _working_days_in_range(start: date, end: date) -> tuple[Decimal, set[date]]:
     Half-day holidays (Arife) count 0.5 and DO get a leave record so employees
     aren't flagged absent for the morning portion.
     """
-    from attendance.models import PublicHoliday
-
-    holiday_rows = PublicHoliday.objects.filter(date__gte=start, date__lte=end).values("date", "is_half_day")
-    half_day_holidays: set[date] = set()
-    full_holidays: set[date] = set()
-    for row in holiday_rows:
-        if row["is_half_day"]:
-            half_day_holidays.add(row["date"])
-        else:
-            full_holidays.add(row["date"])
+    from projects.services.schedule import WorkingCalendar, day_value
 
+    calendar = WorkingCalendar.load(start, end)
+    count = calendar.sum_inclusive(start, end) if start <= end else Decimal("0")
+    # Half-day holidays are not excluded — their leave record IS created so
+    # the employee isn't flagged absent.
     excluded: set[date] = set()
-    count = Decimal("0")
     current = start
     while current <= end:
-        if current.weekday() >= 5 or current in full_holidays:
+        if day_value(current, calendar) == 0:
             excluded.add(current)
-        elif current in half_day_holidays:
-            count += Decimal("0.5")
-            # not excluded — leave record IS created so employee isn't flagged absent
-        else:
-            count += Decimal("1")
         current += timedelta(days=1)
     return count, excluded
 
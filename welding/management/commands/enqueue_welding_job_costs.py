@@ -2,7 +2,9 @@
 from django.core.management.base import BaseCommand
 from django.db.models import Count
 
-from welding.models import WeldingTimeEntry, WeldingJobCostRecalcQueue
+from core.cost_queue import enqueue_cost_recalc
+from core.models import CostRecalcJob
+from welding.models import WeldingTimeEntry
 
 
 class Command(BaseCommand):
@@ -21,10 +23,7 @@ class Command(BaseCommand):
         for row in job_nos:
             job_no = row['job_no']
             if job_no:
-                WeldingJobCostRecalcQueue.objects.update_or_create(
-                    job_no=job_no,
-                    defaults={}
-                )
+                enqueue_cost_recalc(CostRecalcJob.KIND_WELDING, job_no)
                 enqueued += 1
 
         self.stdout.write(
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-16 21:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('welding', '0007_weldingplanallocation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeldingEntryCostContribution',
+            fields=[
+                ('entry_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('job_no', models.CharField(db_index=True, max_length=100)),
+                ('hours_regular', models.DecimalField(decimal_places=10, default=0, max_digits=22)),
+                ('hours_after_hours', models.DecimalField(decimal_places=10, default=0, max_digits=22)),
+                ('hours_holiday', models.DecimalField(decimal_places=10, default=0, max_digits=22)),
+                ('cost_regular', models.DecimalField(decimal_places=10, default=0, max_digits=26)),
+                ('cost_after_hours', models.DecimalField(decimal_places=10, default=0, max_digits=26)),
+                ('cost_holiday', models.DecimalField(decimal_places=10, default=0, max_digits=26)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'welding_entry_cost_contribution',
+                'indexes': [models.Index(fields=['job_no', 'user'], name='welding_ent_job_no_7224b7_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-16 22:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_costrecalcjob'),
+        ('welding', '0008_weldingentrycostcontribution'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='WeldingJobCostRecalcQueue',
+        ),
+    ]
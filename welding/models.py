@@ -165,6 +165,39 @@ class WeldingJobCostAggUser(models.Model):
         return f"{self.job_no} - {self.user.username} - {self.total_cost} {self.currency}"
 
 
+class WeldingEntryCostContribution(models.Model):
+    """
+    One WeldingTimeEntry's share of its job's cost aggregates.
+
+    Stored unrounded (10 decimal places) so WeldingJobCostAgg /
+    WeldingJobCostAggUser are exactly the rounded sums of these rows; an entry
+    change then only costs that one entry instead of every entry on the job.
+    """
+    # Plain id, not a FK: the row must survive the entry's delete so the
+    # delete can be subtracted from the aggregates.
+    entry_id = models.BigIntegerField(primary_key=True)
+    job_no = models.CharField(max_length=100, db_index=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    hours_regular = models.DecimalField(max_digits=22, decimal_places=10, default=0)
+    hours_after_hours = models.DecimalField(max_digits=22, decimal_places=10, default=0)
+    hours_holiday = models.DecimalField(max_digits=22, decimal_places=10, default=0)
+    cost_regular = models.DecimalField(max_digits=26, decimal_places=10, default=0)
+    cost_after_hours = models.DecimalField(max_digits=26, decimal_places=10, default=0)
+    cost_holiday = models.DecimalField(max_digits=26, decimal_places=10, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'welding_entry_cost_contribution'
+        indexes = [
+            models.Index(fields=['job_no', 'user']),
+        ]
+
+    def __str__(self):
+        return f"entry {self.entry_id} -> {self.job_no}"
+
+
 class InternalTeamAssignment(models.Model):
     """
     Assigns an internal team to a welding subtask.
@@ -212,23 +245,6 @@ class InternalTeamAssignment(models.Model):
         return self.department_task.get_completion_percentage(skip_expensive_calculations=True)
 
 
-class WeldingJobCostRecalcQueue(models.Model):
-    """
-    Queue for welding jobs that need cost recalculation.
-    Entries are processed by a background job and then deleted.
-    """
-    job_no = models.CharField(max_length=100, primary_key=True)
-    enqueued_at = models.DateTimeField(auto_now=True)
-
-    class Meta:
-        db_table = 'welding_job_cost_recalc_queue'
-        verbose_name = 'Welding Job Cost Recalc Queue'
-        verbose_name_plural = 'Welding Job Cost Recalc Queue'
-
-    def __str__(self):
-        return f"Recalc queue: {self.job_no}"
-
-
 class WeldingPlanAllocation(models.Model):
     """
     Planning-only split of a MAIN welding task's weight (kg) across a subcontractor
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import WeldingTimeEntry, InternalTeamAssignment, WeldingPlanAllocation
 from django.contrib.auth import get_user_model
 
@@ -279,7 +280,9 @@ class WeldingTimeEntryBulkCreateSerializer(serializers.Serializer):
 
     def create(self, validated_data):
         """Create multiple entries in a single transaction with batching for large datasets."""
-        from welding.models import WeldingJobCostRecalcQueue
+        from core.cost_queue import enqueue_cost_recalcs
+        from core.models import CostRecalcJob
+        from welding.services.costing import apply_welding_entry_changes
 
         entries_data = validated_data['entries']
         request = self.context.get('request')
@@ -302,13 +305,12 @@ class WeldingTimeEntryBulkCreateSerializer(serializers.Serializer):
             all_entries.extend(created_batch)
 
         # IMPORTANT: bulk_create() does NOT trigger Django signals!
-        # Manually enqueue all affected jobs for cost recalculation
-        unique_jobs = {entry.job_no for entry in all_entries if entry.job_no}
-        for job_no in unique_jobs:
-            WeldingJobCostRecalcQueue.objects.update_or_create(
-                job_no=job_no,
-                defaults={}
-            )
+        # Apply the whole import as one set-based cost delta per job,
+        # or enqueue all affected jobs for recalculation in legacy mode
+        if settings.WELDING_COST_INCREMENTAL:
+            apply_welding_entry_changes([entry.pk for entry in all_entries])
+        else:
+            enqueue_cost_recalcs(CostRecalcJob.KIND_WELDING, (entry.job_no for entry in all_entries))
 
         return {'entries': all_entries}
 
@@ -1,6 +1,6 @@
 # welding/services/costing.py
 from __future__ import annotations
-from django.db.models import Avg
+from django.db.models import Avg, Count, Sum
 from collections import defaultdict
 from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
@@ -9,7 +9,9 @@ from bisect import bisect_right
 from django.db import transaction
 from django.contrib.auth.models import User
 from users.models import WageRate
-from welding.models import WeldingJobCostAgg, WeldingJobCostAggUser, WeldingTimeEntry
+from welding.models import (
+    WeldingEntryCostContribution, WeldingJobCostAgg, WeldingJobCostAggUser, WeldingTimeEntry,
+)
 from machining.fx_utils import build_fx_lookup
 
 WAGE_MONTH_HOURS = 225
@@ -86,6 +88,112 @@ def _build_wage_picker(user_ids):
     return pick
 
 
+BUCKET_FIELDS = (
+    "hours_regular", "hours_after_hours", "hours_holiday",
+    "cost_regular", "cost_after_hours", "cost_holiday",
+)
+_CONTRIBUTION_PLACES = Decimal("0.0000000001")
+
+# Quantize at write time
+q2 = lambda x: x.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def _zero_buckets():
+    return dict.fromkeys(BUCKET_FIELDS, Decimal("0"))
+
+
+def _entry_contribution(entry, pick_wage, fx):
+    """
+    Hours and EUR cost of one time entry, in its overtime-type bucket.
+    Stored unrounded (10 places) as a WeldingEntryCostContribution.
+    """
+    v = _zero_buckets()
+    d = entry.date
+    hrs = Decimal(str(entry.hours))
+
+    wage = pick_wage(entry.employee_id, d)
+    if not wage:
+        return v
+
+    # Calculate hourly rate
+    base_monthly = Decimal(wage["base_monthly"])
+    base_hourly = base_monthly / WAGE_MONTH_HOURS
+
+    ah_mul = Decimal(wage["after_hours_multiplier"])
+    su_mul = Decimal(wage["sunday_multiplier"])
+
+    # Get FX rate for the date (TRY to EUR)
+    try_to_eur = fx(d)
+    if try_to_eur == 0:
+        # No FX rate → entry contributes nothing
+        return v
+
+    # Calculate cost based on overtime type
+    if entry.overtime_type == "regular":
+        c_try = hrs * base_hourly
+        v["hours_regular"] += hrs
+        v["cost_regular"] += (c_try * try_to_eur)
+    elif entry.overtime_type == "after_hours":
+        c_try = hrs * base_hourly * ah_mul
+        v["hours_after_hours"] += hrs
+        v["cost_after_hours"] += (c_try * try_to_eur)
+    else:  # holiday
+        c_try = hrs * base_hourly * su_mul
+        v["hours_holiday"] += hrs
+        v["cost_holiday"] += (c_try * try_to_eur)
+
+    return {k: x.quantize(_CONTRIBUTION_PLACES, rounding=ROUND_HALF_UP) for k, x in v.items()}
+
+
+def _cost_entries(entries):
+    """[WeldingEntryCostContribution] for ``entries``, with one wage picker
+    and one FX lookup shared by all of them."""
+    if not entries:
+        return []
+    pick_wage = _build_wage_picker({e.employee_id for e in entries})
+    fx = build_fx_lookup("EUR")
+    return [
+        WeldingEntryCostContribution(
+            entry_id=e.pk, job_no=e.job_no, user_id=e.employee_id,
+            **_entry_contribution(e, pick_wage, fx),
+        )
+        for e in entries
+    ]
+
+
+def _finalize(v):
+    out = {k: q2(v[k] or Decimal("0")) for k in BUCKET_FIELDS}
+    out["total_cost"] = q2(sum(
+        (v[k] or Decimal("0") for k in ("cost_regular", "cost_after_hours", "cost_holiday")),
+        Decimal("0"),
+    ))
+    return out
+
+
+def _save_job_aggregates(job_no, totals, per_user, user_ids=None):
+    """
+    Upsert WeldingJobCostAgg (deleted when ``totals`` is None) and replace the
+    WeldingJobCostAggUser rows of ``user_ids`` (all users when None) by ``per_user``.
+    """
+    user_rows = WeldingJobCostAggUser.objects.filter(job_no=job_no)
+    if user_ids is not None:
+        user_rows = user_rows.filter(user_id__in=user_ids)
+    user_rows.delete()
+
+    if totals is None:
+        WeldingJobCostAgg.objects.filter(job_no=job_no).delete()
+        return
+
+    WeldingJobCostAgg.objects.update_or_create(
+        job_no=job_no,
+        defaults=dict(currency="EUR", **totals),
+    )
+    WeldingJobCostAggUser.objects.bulk_create([
+        WeldingJobCostAggUser(job_no=job_no, user_id=uid, currency="EUR", **v)
+        for uid, v in per_user.items()
+    ])
+
+
 @transaction.atomic
 def recompute_welding_job_cost(job_no: str):
     """
@@ -93,6 +201,7 @@ def recompute_welding_job_cost(job_no: str):
 
     This reads all WeldingTimeEntry records for the given job_no,
     calculates costs based on employee wage rates and overtime multipliers,
+    stores them per entry as WeldingEntryCostContribution rows,
     and updates WeldingJobCostAgg and WeldingJobCostAggUser tables.
 
     Cost calculation:
@@ -101,110 +210,151 @@ def recompute_welding_job_cost(job_no: str):
     - holiday: base_hourly * hours * 2.0
 
     All costs are converted to EUR using historical exchange rates.
+
+    This is the full rebuild; entry changes normally go through the
+    incremental ``apply_welding_entry_changes``.
     """
-    entries = (
+    # Locked like apply_welding_entry_changes, so the two never interleave
+    _lock_jobs({job_no})
+    entries = list(
         WeldingTimeEntry.objects
         .filter(job_no=job_no)
-        .select_related('employee')
-        .order_by('date')
+        .only("id", "employee_id", "job_no", "date", "hours", "overtime_type")
     )
-    entries = list(entries)
 
     # Wipe existing aggregations for this job
+    WeldingEntryCostContribution.objects.filter(job_no=job_no).delete()
     WeldingJobCostAgg.objects.filter(job_no=job_no).delete()
     WeldingJobCostAggUser.objects.filter(job_no=job_no).delete()
 
     if not entries:
         return
 
-    user_ids = {e.employee_id for e in entries}
-    pick_wage = _build_wage_picker(user_ids)
-    fx = build_fx_lookup("EUR")
+    WeldingEntryCostContribution.objects.bulk_create(_cost_entries(entries))
+    _refresh_job_aggregates({job_no: None})
+
+    from projects.services.costing import recompute_job_cost_summary
+    recompute_job_cost_summary(job_no)
 
-    # Per-user accumulator
-    # Keys: h_reg, h_ah, h_hol, c_reg, c_ah, c_hol
-    per_user = defaultdict(lambda: {
-        "h_reg": Decimal("0"), "h_ah": Decimal("0"), "h_hol": Decimal("0"),
-        "c_reg": Decimal("0"), "c_ah": Decimal("0"), "c_hol": Decimal("0"),
-    })
-
-    for entry in entries:
-        d = entry.date
-        hrs = Decimal(str(entry.hours))
-        overtime_type = entry.overtime_type
-        uid = entry.employee_id
-
-        wage = pick_wage(uid, d)
-        if not wage:
-            continue
-
-        # Calculate hourly rate
-        base_monthly = Decimal(wage["base_monthly"])
-        base_hourly = base_monthly / WAGE_MONTH_HOURS
-
-        ah_mul = Decimal(wage["after_hours_multiplier"])
-        su_mul = Decimal(wage["sunday_multiplier"])
-
-        # Get FX rate for the date (TRY to EUR)
-        try_to_eur = fx(d)
-        if try_to_eur == 0:
-            # No FX rate → skip this entry (or log)
-            continue
-
-        # Calculate cost based on overtime type
-        if overtime_type == "regular":
-            c_try = hrs * base_hourly
-            per_user[uid]["h_reg"] += hrs
-            per_user[uid]["c_reg"] += (c_try * try_to_eur)
-        elif overtime_type == "after_hours":
-            c_try = hrs * base_hourly * ah_mul
-            per_user[uid]["h_ah"] += hrs
-            per_user[uid]["c_ah"] += (c_try * try_to_eur)
-        else:  # holiday
-            c_try = hrs * base_hourly * su_mul
-            per_user[uid]["h_hol"] += hrs
-            per_user[uid]["c_hol"] += (c_try * try_to_eur)
-
-    # Quantize helper
-    q2 = lambda x: x.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-    # Calculate totals across all users
-    tot_h_reg = sum((v["h_reg"] for v in per_user.values()), Decimal("0"))
-    tot_h_ah = sum((v["h_ah"] for v in per_user.values()), Decimal("0"))
-    tot_h_hol = sum((v["h_hol"] for v in per_user.values()), Decimal("0"))
-    tot_c_reg = sum((v["c_reg"] for v in per_user.values()), Decimal("0"))
-    tot_c_ah = sum((v["c_ah"] for v in per_user.values()), Decimal("0"))
-    tot_c_hol = sum((v["c_hol"] for v in per_user.values()), Decimal("0"))
-    total_cost = q2(tot_c_reg + tot_c_ah + tot_c_hol)
-
-    # Create job-level aggregation
-    WeldingJobCostAgg.objects.create(
-        job_no=job_no,
-        currency="EUR",
-        hours_regular=q2(tot_h_reg),
-        hours_after_hours=q2(tot_h_ah),
-        hours_holiday=q2(tot_h_hol),
-        cost_regular=q2(tot_c_reg),
-        cost_after_hours=q2(tot_c_ah),
-        cost_holiday=q2(tot_c_hol),
-        total_cost=total_cost,
-    )
 
-    # Create per-user aggregations
-    for uid, v in per_user.items():
-        u_tot = q2(v["c_reg"] + v["c_ah"] + v["c_hol"])
-        WeldingJobCostAggUser.objects.create(
-            job_no=job_no,
-            user_id=uid,
-            currency="EUR",
-            hours_regular=q2(v["h_reg"]),
-            hours_after_hours=q2(v["h_ah"]),
-            hours_holiday=q2(v["h_hol"]),
-            cost_regular=q2(v["c_reg"]),
-            cost_after_hours=q2(v["c_ah"]),
-            cost_holiday=q2(v["c_hol"]),
-            total_cost=u_tot,
+def _incomplete_jobs(job_nos, entry_ids):
+    """
+    Jobs among ``job_nos`` where some entry outside ``entry_ids`` has no
+    stored contribution (costed before incremental mode), i.e. whose
+    aggregates are not the sum of their contributions.
+    """
+    def counts(qs, id_field):
+        return dict(
+            qs.filter(job_no__in=job_nos)
+            .order_by()
+            .exclude(**{f"{id_field}__in": entry_ids})
+            .values("job_no").annotate(n=Count(id_field))
+            .values_list("job_no", "n")
         )
 
-    from projects.services.costing import recompute_job_cost_summary
-    recompute_job_cost_summary(job_no)
+    entries = counts(WeldingTimeEntry.objects, "id")
+    stored = counts(WeldingEntryCostContribution.objects, "entry_id")
+    return {j for j in job_nos if entries.get(j, 0) != stored.get(j, 0)}
+
+
+def _refresh_job_aggregates(touched):
+    """
+    Re-sum WeldingJobCostAgg and WeldingJobCostAggUser from the stored
+    contributions in one grouped query each. ``touched`` maps job_no to the
+    user_ids whose per-user rows to refresh (None = all users of the job).
+    """
+    sums = {k: Sum(k) for k in BUCKET_FIELDS}
+    rows = WeldingEntryCostContribution.objects.filter(job_no__in=touched)
+    totals = {r.pop("job_no"): r for r in rows.values("job_no").annotate(**sums)}
+    per_user = defaultdict(dict)
+    for r in rows.values("job_no", "user_id").annotate(**sums):
+        per_user[r.pop("job_no")][r.pop("user_id")] = r
+
+    for job_no, user_ids in touched.items():
+        users = per_user.get(job_no, {})
+        if user_ids is not None:
+            users = {uid: v for uid, v in users.items() if uid in user_ids}
+        _save_job_aggregates(
+            job_no,
+            _finalize(totals[job_no]) if job_no in totals else None,
+            {uid: _finalize(v) for uid, v in users.items()},
+            user_ids,
+        )
+
+
+def _lock_jobs(job_nos) -> set:
+    """
+    SELECT ... FOR UPDATE the WeldingJobCostAgg rows of ``job_nos`` in
+    job_no order, inserting the missing ones first so new jobs are locked
+    too (a re-sum that finds no contributions deletes them again). Returns
+    the job_nos locked.
+    """
+    job_nos = sorted(j for j in job_nos if j)
+    WeldingJobCostAgg.objects.bulk_create(
+        [WeldingJobCostAgg(job_no=j) for j in job_nos], ignore_conflicts=True)
+    return set(
+        WeldingJobCostAgg.objects.select_for_update()
+        .filter(job_no__in=job_nos)
+        .order_by("job_no")
+        .values_list("job_no", flat=True)
+    )
+
+
+@transaction.atomic
+def apply_welding_entry_changes(entry_ids):
+    """
+    Incremental counterpart of ``recompute_welding_job_cost`` for entries that
+    were created, edited or deleted (one entry from the signals, a whole bulk
+    import at once from the bulk-create serializer).
+
+    Only these entries are costed; their WeldingEntryCostContribution rows are
+    replaced and the aggregates of the affected jobs and users are re-summed
+    from the stored contributions as one set-based update. A job whose other
+    entries have no stored contribution yet is seeded with a full rebuild,
+    including a job a moved entry left. The affected jobs stay locked until
+    commit, so concurrent changes to one job are applied one after the other.
+
+    Returns the set of job_nos whose costs changed.
+    """
+    entry_ids = list(entry_ids)
+    if not entry_ids:
+        return set()
+
+    contributions = WeldingEntryCostContribution.objects.filter(entry_id__in=entry_ids)
+    old_jobs = set(contributions.values_list("job_no", flat=True))
+    entries = list(
+        WeldingTimeEntry.objects
+        .filter(pk__in=entry_ids)
+        .exclude(job_no="")
+        .only("id", "employee_id", "job_no", "date", "hours", "overtime_type")
+    )
+    if not old_jobs and not entries:
+        return set()
+
+    # The aggregates are re-summed from every contribution of the job, so
+    # concurrent changes to the same job must not interleave
+    locked = _lock_jobs(old_jobs | {e.job_no for e in entries})
+    old = list(contributions.select_for_update().values_list("job_no", "user_id"))
+    _lock_jobs({job_no for job_no, _ in old} - locked)
+
+    touched = defaultdict(set)   # job_no -> user_ids to re-sum
+    for job_no, uid in old:
+        touched[job_no].add(uid)
+    contributions.delete()
+
+    # Jobs the entries moved away from are only re-summed when complete too
+    rebuild = _incomplete_jobs({e.job_no for e in entries} | set(touched), entry_ids)
+    fresh = [e for e in entries if e.job_no not in rebuild]
+    WeldingEntryCostContribution.objects.bulk_create(_cost_entries(fresh))
+    for e in fresh:
+        touched[e.job_no].add(e.employee_id)
+
+    for job_no in rebuild:
+        recompute_welding_job_cost(job_no)
+        touched.pop(job_no, None)
+    _refresh_job_aggregates(touched)
+
+    if touched:
+        from projects.services.costing import recompute_job_cost_summaries
+        recompute_job_cost_summaries(touched)
+    return set(touched) | rebuild
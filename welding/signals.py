@@ -1,28 +1,33 @@
 # welding/signals.py
+from django.conf import settings
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from welding.models import WeldingTimeEntry, WeldingJobCostRecalcQueue
+from core.cost_queue import enqueue_cost_recalc
+from core.models import CostRecalcJob
+from welding.models import WeldingTimeEntry
+from welding.services.costing import apply_welding_entry_changes
 
 
 @receiver(post_save, sender=WeldingTimeEntry)
 def enqueue_welding_job_cost_on_save(sender, instance, **kwargs):
     """
-    When a WeldingTimeEntry is created or updated, enqueue its job_no for cost recalculation.
+    When a WeldingTimeEntry is created or updated, apply its cost change to the
+    job aggregates (or enqueue its job_no for recalculation in legacy mode).
     """
-    if instance.job_no:
-        WeldingJobCostRecalcQueue.objects.update_or_create(
-            job_no=instance.job_no,
-            defaults={}
-        )
+    if settings.WELDING_COST_INCREMENTAL:
+        # Also takes the entry out of its previous job when job_no changed
+        apply_welding_entry_changes([instance.pk])
+    elif instance.job_no:
+        enqueue_cost_recalc(CostRecalcJob.KIND_WELDING, instance.job_no)
 
 
 @receiver(post_delete, sender=WeldingTimeEntry)
 def enqueue_welding_job_cost_on_delete(sender, instance, **kwargs):
     """
-    When a WeldingTimeEntry is deleted, enqueue its job_no for cost recalculation.
+    When a WeldingTimeEntry is deleted, subtract its cost from the job
+    aggregates (or enqueue its job_no for recalculation in legacy mode).
     """
-    if instance.job_no:
-        WeldingJobCostRecalcQueue.objects.update_or_create(
-            job_no=instance.job_no,
-            defaults={}
-        )
+    if settings.WELDING_COST_INCREMENTAL:
+        apply_welding_entry_changes([instance.pk])
+    elif instance.job_no:
+        enqueue_cost_recalc(CostRecalcJob.KIND_WELDING, instance.job_no)
@@ -0,0 +1,91 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.models import CurrencyRateSnapshot
+from users.models import WageRate
+from welding.models import (
+    WeldingEntryCostContribution, WeldingJobCostAgg, WeldingJobCostAggUser, WeldingTimeEntry,
+)
+from welding.serializers import WeldingTimeEntryBulkCreateSerializer
+from welding.services.costing import recompute_welding_job_cost
+
+User = get_user_model()
+
+
+@override_settings(WELDING_COST_INCREMENTAL=True)
+class IncrementalWeldingCostTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create(username='wc-alice')
+        cls.bob = User.objects.create(username='wc-bob')
+        for user, monthly in ((cls.alice, '45000'), (cls.bob, '33750')):
+            WageRate.objects.create(user=user, effective_from=date(2026, 1, 1),
+                                    base_monthly=Decimal(monthly))
+        CurrencyRateSnapshot.objects.create(date=date(2026, 1, 1), rates={'EUR': 0.025})
+        CurrencyRateSnapshot.objects.create(date=date(2026, 3, 4), rates={'EUR': 0.024})
+
+    def entry(self, user, job_no, day, hours, overtime_type='regular'):
+        return WeldingTimeEntry.objects.create(employee=user, job_no=job_no, date=day,
+                                               hours=Decimal(hours), overtime_type=overtime_type)
+
+    def snapshot(self, job_no):
+        fields = ('hours_regular', 'hours_after_hours', 'hours_holiday',
+                  'cost_regular', 'cost_after_hours', 'cost_holiday', 'total_cost')
+        agg = WeldingJobCostAgg.objects.filter(job_no=job_no).values(*fields).first()
+        users = {r.pop('user'): r for r in
+                 WeldingJobCostAggUser.objects.filter(job_no=job_no).values('user', *fields)}
+        return agg, users
+
+    def test_edit_move_and_delete_match_full_rebuild(self):
+        a = self.entry(self.alice, 'W-1', date(2026, 3, 2), '8')
+        b = self.entry(self.bob, 'W-1', date(2026, 3, 7), '4.5', 'after_hours')
+        self.entry(self.alice, 'W-1', date(2026, 3, 8), '2', 'holiday')
+        a.hours = Decimal('6')
+        a.save()
+        b.job_no = 'W-2'
+        b.save()
+
+        incremental = self.snapshot('W-1'), self.snapshot('W-2')
+        self.assertEqual(set(incremental[0][1]), {self.alice.id})
+        self.assertEqual(incremental[1][0]['hours_after_hours'], Decimal('4.50'))
+
+        recompute_welding_job_cost('W-1')
+        recompute_welding_job_cost('W-2')
+        self.assertEqual((self.snapshot('W-1'), self.snapshot('W-2')), incremental)
+
+        b.delete()
+        self.assertEqual(self.snapshot('W-2'), (None, {}))
+
+    def test_bulk_create_applies_one_delta_per_job(self):
+        self.entry(self.alice, 'W-3', date(2026, 3, 2), '8')
+        WeldingEntryCostContribution.objects.all().delete()   # costed before incremental mode
+
+        payload = {'entries': [
+            {'employee': user.id, 'job_no': job_no, 'date': '2026-03-05', 'hours': '3.25'}
+            for user in (self.alice, self.bob) for job_no in ('W-3', 'W-4')
+        ]}
+        serializer = WeldingTimeEntryBulkCreateSerializer(data=payload)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.assertEqual(WeldingEntryCostContribution.objects.count(), 5)
+        incremental = self.snapshot('W-3'), self.snapshot('W-4')
+        recompute_welding_job_cost('W-3')
+        recompute_welding_job_cost('W-4')
+        self.assertEqual((self.snapshot('W-3'), self.snapshot('W-4')), incremental)
+
+    def test_moving_an_entry_off_a_job_without_contributions_rebuilds_it(self):
+        a = self.entry(self.alice, 'W-5', date(2026, 3, 2), '8')
+        b = self.entry(self.bob, 'W-5', date(2026, 3, 3), '5')
+        WeldingEntryCostContribution.objects.filter(entry_id=b.id).delete()   # costed before incremental mode
+        a.job_no = 'W-6'
+        a.save()
+
+        incremental = self.snapshot('W-5'), self.snapshot('W-6')
+        self.assertEqual(set(incremental[0][1]), {self.bob.id})
+        recompute_welding_job_cost('W-5')
+        recompute_welding_job_cost('W-6')
+        self.assertEqual((self.snapshot('W-5'), self.snapshot('W-6')), incremental)